@@ -8,8 +8,19 @@
 # Trigger: Stop hook (sole checkpoint writer in the Stop chain since
 # 2026-04-28; the redundant stop-git-commit.sh sibling was retired).
 # Idempotent: if tree==parent, the shared library short-circuits to no-op.
+#
+# First runs stop-doc-sync-flush.py with the hook's stdin, so the INDEX.md /
+# README.md files doc-sync deferred to Stop are regenerated before the
+# snapshot. It cannot be a sibling in the Stop group: hooks in one group run
+# in parallel, and the checkpoint would race the regeneration.
 # ============================================================================
 
+. "${BASH_SOURCE[0]%/*}/lib/hook-telemetry.sh"
+
+HOOK_INPUT=""
+[ -t 0 ] || HOOK_INPUT=$(cat)
+printf '%s' "$HOOK_INPUT" | python3 "${BASH_SOURCE[0]%/*}/stop-doc-sync-flush.py" >/dev/null 2>&1 || true
+
 set -e
 
 GREEN='\033[0;32m'
@@ -143,4 +143,6 @@ def main() -> int:
 
 
 if __name__ == "__main__":
+    from lib.hook_telemetry import timed_hook
+    main = timed_hook("check-todo-md-sync.py")(main)
     sys.exit(main())
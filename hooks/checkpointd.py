@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""checkpointd — coalescing checkpoint writer control (start | stop | status | serve).
+
+posttool-git-checkpoint.sh only appends the edit to a spool and returns; this
+writer drains the spool and writes at most one refs/checkpoints/<branch>
+snapshot per worktree per debounce window (see lib/checkpoint_queue.py).
+The hook starts it on demand, so nothing has to be wired up by hand.
+
+Usage:
+    checkpointd.py start     # detach into the background (no-op if already running)
+    checkpointd.py stop      # SIGTERM the writer; it flushes pending worktrees first
+    checkpointd.py status    # exit 0 if running, 1 otherwise
+    checkpointd.py serve     # run in the foreground (debugging)
+
+Only one writer runs per state dir: serve holds an flock on writer.lock for
+its lifetime and a second serve gives up after waiting briefly for it. An
+idle writer exits on its own.
+
+Env:
+    CLAUDE_CHECKPOINTD_DIR              override the state dir holding spool, pid,
+                                        lock and log (default
+                                        $TMPDIR/claude-checkpointd-<uid>)
+    CLAUDE_CHECKPOINTD_DEBOUNCE_SECS    quiet period before a worktree is
+                                        written (default 2)
+    CLAUDE_CHECKPOINTD_MAX_DELAY_SECS   longest a queued edit waits under a
+                                        steady stream of edits (default 10)
+    CLAUDE_CHECKPOINTD_IDLE_SECS        exit after this long with nothing queued
+                                        (default 600; 0 = never)
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import signal
+import subprocess
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from lib.checkpoint_queue import (  # noqa: E402
+    Writer, acquire_writer_lock, default_state_dir, ensure_state_dir, log_path,
+    pid_alive, read_pid,
+)
+
+DEBOUNCE_SECS = float(os.environ.get('CLAUDE_CHECKPOINTD_DEBOUNCE_SECS', '2'))
+MAX_DELAY_SECS = float(os.environ.get('CLAUDE_CHECKPOINTD_MAX_DELAY_SECS', '10'))
+IDLE_SECS = float(os.environ.get('CLAUDE_CHECKPOINTD_IDLE_SECS', '600'))
+
+
+def cmd_serve(state_dir: str, verbose: bool) -> int:
+    try:
+        lock_fd = acquire_writer_lock(state_dir)
+    except OSError as exc:
+        sys.stderr.write(f'checkpointd: cannot serve in {state_dir}: {exc}\n')
+        return 1
+    if lock_fd is None:
+        if verbose:
+            sys.stderr.write(f'checkpointd: already serving in {state_dir}\n')
+        return 0
+    stop = []
+    signal.signal(signal.SIGTERM, lambda _signum, _frame: stop.append(True))
+    writer = Writer(state_dir, debounce=DEBOUNCE_SECS, max_delay=MAX_DELAY_SECS,
+                    verbose=verbose)
+    try:
+        writer.serve(idle=IDLE_SECS, stopping=lambda: bool(stop))
+    except KeyboardInterrupt:
+        writer.flush(force=True)
+    finally:
+        os.close(lock_fd)  # releases the flock
+    writer.log(f'wrote {writer.written} checkpoints, skipped {writer.skipped} below threshold')
+    return 0
+
+
+def cmd_start(state_dir: str) -> int:
+    if pid_alive(read_pid(state_dir)):
+        return 0
+    ensure_state_dir(state_dir)
+    with open(os.devnull, 'rb') as devnull, open(log_path(state_dir), 'ab') as log:
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), '--state-dir', state_dir,
+             'serve', '--verbose'],
+            stdin=devnull, stdout=log, stderr=log,
+            start_new_session=True, close_fds=True,
+        )
+    return 0
+
+
+def cmd_stop(state_dir: str) -> int:
+    pid = read_pid(state_dir)
+    if not pid:
+        return 0
+    try:
+        os.kill(pid, signal.SIGTERM)
+    except ProcessLookupError:
+        pass
+    return 0
+
+
+def cmd_status(state_dir: str) -> int:
+    pid = read_pid(state_dir)
+    if pid_alive(pid):
+        print(f'checkpointd: running (pid {pid}) in {state_dir}')
+        return 0
+    print(f'checkpointd: not running ({state_dir})')
+    return 1
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description='Coalescing checkpoint writer control')
+    ap.add_argument('--state-dir', default=default_state_dir())
+    sub = ap.add_subparsers(dest='action', required=True)
+    serve = sub.add_parser('serve')
+    serve.add_argument('--verbose', action='store_true')
+    sub.add_parser('start')
+    sub.add_parser('stop')
+    sub.add_parser('status')
+    args = ap.parse_args()
+    if args.action == 'serve':
+        return cmd_serve(args.state_dir, args.verbose)
+    if args.action == 'start':
+        return cmd_start(args.state_dir)
+    if args.action == 'stop':
+        return cmd_stop(args.state_dir)
+    return cmd_status(args.state_dir)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Single-process hook dispatcher — read the payload once, run every matching hook.
+
+Usage:
+    dispatch.py <Event> [--matcher M] [--table PATH] [--parallel]
+
+Reads stdin once, selects the hooks that the table (default: settings.json
+next to this directory) wires for <Event> and the payload's tool, and runs
+them in table order inside this interpreter (see lib/hook_dispatch.py).
+Exit status / stdout / stderr follow Claude Code's own combination rules, so
+wiring one dispatcher entry is equivalent to wiring each hook separately.
+
+Wiring: move the per-hook entries of an event into a settings-format table
+file (e.g. hooks/dispatch-table.json) and point a single settings.json entry
+at it, e.g.
+
+    python3 "$HOME/.claude/hooks/dispatch.py" PreToolUse \\
+        --table "$HOME/.claude/hooks/dispatch-table.json"
+
+Entries that invoke dispatch.py are ignored, so pointing --table at
+settings.json itself never recurses.
+
+--parallel (or CLAUDE_HOOK_DISPATCH_PARALLEL=1) runs the read-only guards in
+lib.hook_dispatch.READ_ONLY_HOOKS on a thread pool. A pooled hook that
+overruns its timeout is reported as timed out and abandoned: the dispatcher
+then exits without waiting for its thread.
+
+CLAUDE_HOOK_DISPATCH_TRACE=1 writes one per-hook timing line to stderr.
+
+Fail-safe: a dispatcher bug exits 0 with a stderr note (same contract as the
+individual hooks' __main__ wrappers).
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from lib import hook_dispatch  # noqa: E402
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description='In-process hook dispatcher')
+    ap.add_argument('event')
+    ap.add_argument('--matcher', default=None,
+                    help='only run the table block with exactly this matcher')
+    ap.add_argument('--table', default=None,
+                    help='settings-format JSON holding the hooks table')
+    ap.add_argument('--parallel', action='store_true')
+    args = ap.parse_args()
+
+    raw = sys.stdin.read()
+    parallel = args.parallel or os.environ.get('CLAUDE_HOOK_DISPATCH_PARALLEL') == '1'
+    table = hook_dispatch.load_table(args.table)
+    status, out, err, results = hook_dispatch.dispatch(
+        args.event, raw, table, matcher=args.matcher, parallel=parallel,
+    )
+    if os.environ.get('CLAUDE_HOOK_DISPATCH_TRACE') == '1':
+        for r in results:
+            err += f'[dispatch] {r.entry.name} exit={r.status} {r.seconds * 1000:.1f}ms\n'
+    sys.stdout.write(out)
+    sys.stderr.write(err)
+    if any(r.timed_out for r in results):
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(status)
+    return status
+
+
+if __name__ == '__main__':
+    try:
+        sys.exit(main())
+    except Exception as e:  # pragma: no cover
+        sys.stderr.write(f'dispatch: unexpected ({e})\n')
+        sys.exit(0)
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Per-session journal of directories awaiting INDEX/README regeneration.
+
+In deferred mode (the default; CLAUDE_DOC_SYNC_DEFER=0 regenerates on every
+edit) posttool-doc-sync.py only appends the edited file's directory here.
+stop-doc-sync-flush.py (SubagentStop, and Stop via auto-commit.sh before its
+checkpoint) regenerates the union once per turn via main.flush_pending, and userprompt-doc-sync-check.py flushes
+a journal left by a turn that ended without Stop (e.g. an interrupt).
+
+Journal: ~/.claude/state/doc-sync/pending-<session_id>.jsonl (override the
+directory with CLAUDE_DOC_SYNC_JOURNAL_DIR), one O_APPEND line per edit:
+    {"dir": <parent dir>, "project_dir": <project dir>}
+A flush renames it to .claimed under an exclusive lock, so edits landing
+during the flush go to a fresh journal for the next one; a .claimed file
+left by a crashed flush is handled before the journal is claimed again.
+"""
+
+import contextlib
+import fcntl
+import json
+import os
+import re
+from pathlib import Path
+
+
+def defer_enabled() -> bool:
+    return os.environ.get('CLAUDE_DOC_SYNC_DEFER', '1') != '0'
+
+
+def journal_dir() -> Path:
+    override = os.environ.get('CLAUDE_DOC_SYNC_JOURNAL_DIR')
+    if override:
+        return Path(override)
+    return Path.home() / '.claude' / 'state' / 'doc-sync'
+
+
+def journal_path(session_id: str) -> Path:
+    safe = re.sub(r'[^A-Za-z0-9._-]', '_', session_id or '') or 'default'
+    return journal_dir() / f'pending-{safe}.jsonl'
+
+
+def record(session_id: str, parent_dir: Path, project_dir: Path) -> None:
+    """Queue parent_dir for the next flush; raises OSError if the journal is unwritable."""
+    path = journal_path(session_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    line = json.dumps({'dir': str(parent_dir), 'project_dir': str(project_dir)}) + '\n'
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+    try:
+        os.write(fd, line.encode('utf-8'))
+    finally:
+        os.close(fd)
+
+
+def pending(session_id: str) -> bool:
+    path = journal_path(session_id)
+    for p in (path, path.with_name(path.name + '.claimed')):
+        with contextlib.suppress(OSError):
+            if p.stat().st_size:
+                return True
+    return False
+
+
+@contextlib.contextmanager
+def claimed(session_id: str):
+    """Yield the queued (dir, project_dir) pairs, deduplicated in queue order.
+
+    Yields None when another flush holds the lock. The claim is deleted only
+    when the body completes, so a crashed flush is retried by the next one.
+    """
+    path = journal_path(session_id)
+    claim = path.with_name(path.name + '.claimed')
+    try:
+        lock_fd = os.open(path.with_name(path.name + '.lock'), os.O_WRONLY | os.O_CREAT, 0o600)
+    except OSError:
+        yield None
+        return
+    try:
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            yield None
+            return
+        data = b''
+        with contextlib.suppress(FileNotFoundError):
+            if not claim.exists():  # else: a crashed flush's claim goes first
+                os.rename(path, claim)
+            data = claim.read_bytes()
+        entries: dict[tuple[str, str], None] = {}
+        for raw in data.splitlines():
+            try:
+                item = json.loads(raw)
+                entries[(str(item['dir']), str(item['project_dir']))] = None
+            except (ValueError, KeyError, TypeError):
+                continue
+        yield [(Path(d), Path(p)) for d, p in entries]
+        with contextlib.suppress(FileNotFoundError):
+            claim.unlink()
+    finally:
+        os.close(lock_fd)
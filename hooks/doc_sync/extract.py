@@ -1,21 +1,136 @@
 #!/usr/bin/env python3
-"""Extract description from various file types."""
+"""Extract description from various file types.
 
+Descriptions are cached per path, keyed by (mtime_ns, size), in
+~/.claude/.doc-sync-descriptions.json (override: CLAUDE_DOC_SYNC_DESC_CACHE)
+so a regen after one edit re-reads only the edited file; everything else
+costs a stat. Files modified within the last second are never cached (the
+same edit could land again in the same mtime tick). Misses read only the
+first HEAD_BYTES and fall back to the whole file when the header cannot
+settle the description.
+"""
+
+import json
+import os
+import threading
+import time
 from pathlib import Path
 
+HEAD_BYTES = 8192
+MAX_ENTRIES = 20000
+_RACY_NS = 1_000_000_000
+_FALLBACKS = {'No description', 'Python script', 'Shell script'}
+
+_cache: dict | None = None
+_fresh: dict = {}
+_dirty = False
+_load_lock = threading.Lock()  # main.flush_pending regenerates on a thread pool
+
+
+def _cache_path() -> Path:
+    override = os.environ.get('CLAUDE_DOC_SYNC_DESC_CACHE')
+    if override:
+        return Path(override)
+    return Path.home() / '.claude' / '.doc-sync-descriptions.json'
+
+
+def _entries() -> dict:
+    global _cache
+    with _load_lock:
+        if _cache is None:
+            try:
+                data = json.loads(_cache_path().read_text())
+                _cache = data if isinstance(data, dict) else {}
+            except (OSError, ValueError):
+                _cache = {}
+    return _cache
+
+
+def invalidate(file_path: Path) -> None:
+    """Forget a path the caller knows has just changed."""
+    global _dirty
+    _fresh.pop(str(file_path), None)
+    if _entries().pop(str(file_path), None) is not None:
+        _dirty = True
+
+
+def save_cache() -> None:
+    """Persist the cache (most recently used MAX_ENTRIES) if this run changed it."""
+    global _dirty
+    if not _dirty or _cache is None:
+        return
+    keys = list(_cache)[-MAX_ENTRIES:]
+    path = _cache_path()
+    tmp = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp.write_text(json.dumps({k: _cache[k] for k in keys}, separators=(',', ':')))
+        os.replace(tmp, path)
+        _dirty = False
+    except OSError:
+        tmp.unlink(missing_ok=True)
+
 
 def extract_description(file_path: Path) -> str:
+    global _dirty
     try:
-        text = file_path.read_text(errors='replace')
-    except Exception:
+        st = file_path.stat()
+    except OSError:
         return 'Unreadable'
+    key = str(file_path)
+    entries = _entries()
+    hit = entries.pop(key, None)
+    if hit and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+        entries[key] = hit  # re-insert: most recently used last
+        return hit[2]
+    if hit:
+        _dirty = True
+    fresh = _fresh.get(key)
+    if fresh and fresh[0] == st.st_mtime_ns and fresh[1] == st.st_size:
+        return fresh[2]
+    desc = _describe(file_path)
+    entry = [st.st_mtime_ns, st.st_size, desc]
+    if desc == 'Unreadable' or time.time_ns() - st.st_mtime_ns < _RACY_NS:
+        _fresh[key] = entry  # this run only: INDEX and README share the read
+    else:
+        entries[key] = entry
+        _dirty = True
+    return desc
+
+
+def _read_text(file_path: Path, limit: int | None = None) -> tuple[str, bool]:
+    """(text, truncated): at most `limit` bytes, cut back to the last full line."""
+    with file_path.open('rb') as f:
+        data = f.read() if limit is None else f.read(limit + 1)
+    if limit is None or len(data) <= limit:
+        return data.decode('utf-8', errors='replace'), False
+    data = data[:limit]
+    return data[:data.rfind(b'\n') + 1].decode('utf-8', errors='replace'), True
+
+
+def _settled(text: str, suffix: str, desc: str) -> bool:
+    """True when a truncated header gives the same description as the whole file."""
+    if desc in _FALLBACKS:
+        return False
+    if suffix == '.md' and text.startswith('---') and text.find('---', 3) == -1:
+        return False
+    return suffix != '.py' or text.count('\n') >= 10  # docstring look-ahead
+
+
+def _describe(file_path: Path) -> str:
     suffix = file_path.suffix
-    if suffix == '.md':
-        return _extract_md_desc(text)
-    if suffix == '.py':
-        return _extract_py_desc(text)
-    if suffix in ('.sh', '.bash'):
-        return _extract_sh_desc(text)
+    extractor = _EXTRACTORS.get(suffix)
+    try:
+        if extractor is None:
+            file_path.open('rb').close()  # readability is all that matters
+        else:
+            text, truncated = _read_text(file_path, HEAD_BYTES)
+            desc = extractor(text)
+            if truncated and not _settled(text, suffix, desc):
+                desc = extractor(_read_text(file_path)[0])
+            return desc
+    except Exception:
+        return 'Unreadable'
     if suffix in ('.json', '.yaml', '.yml'):
         return f'{suffix.lstrip(".")} config'
     return f'{suffix.lstrip(".") or "unknown"} file'
@@ -98,3 +213,11 @@ def _extract_sh_desc(text: str) -> str:
         if s:
             break
     return 'Shell script'
+
+
+_EXTRACTORS = {
+    '.md': _extract_md_desc,
+    '.py': _extract_py_desc,
+    '.sh': _extract_sh_desc,
+    '.bash': _extract_sh_desc,
+}
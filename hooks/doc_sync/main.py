@@ -4,7 +4,9 @@
 import json
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from . import deferred, extract
 from .regen_index import regen_index
 from .regen_readme import regen_readme
 from .patch import patch_claude_md
@@ -72,26 +74,63 @@ def _match_watch_dir(rel: str):
     return None
 
 
-def _regen_if_dir(d: Path):
-    if d.is_dir():
-        regen_index(d)
-        regen_readme(d)
-
-
-def _maybe_regen_global(parent_dir: Path, rel: str):
+def regen_targets(parent_dir: Path, project_dir: Path) -> list[Path]:
+    """The directories an edit under parent_dir regenerates: itself, plus the
+    matching global ~/.claude/<watched dir> when that is a different directory."""
+    targets = [parent_dir] if parent_dir.is_dir() else []
+    try:
+        rel = str(parent_dir.relative_to(project_dir))
+    except ValueError:
+        return targets
     wd = _match_watch_dir(rel)
     if wd is None:
-        return
+        return targets
     global_dir = Path.home() / wd
     if global_dir.is_dir() and global_dir.resolve() != parent_dir.resolve():
-        regen_index(global_dir)
-        regen_readme(global_dir)
+        targets.append(global_dir)
+    return targets
+
+
+def _regen_dir(d: Path) -> bool:
+    try:
+        regen_index(d)
+        regen_readme(d)
+    except Exception:
+        return False
+    return True
 
 
 def process_parent_dirs(parent_dir: Path, project_dir: Path):
-    _regen_if_dir(parent_dir)
-    rel = str(parent_dir.relative_to(project_dir))
-    _maybe_regen_global(parent_dir, rel)
+    for d in regen_targets(parent_dir, project_dir):
+        regen_index(d)
+        regen_readme(d)
+
+
+def flush_pending(session_id: str) -> list[Path]:
+    """Regenerate every directory queued for session_id once; returns those done.
+
+    Directories are independent (each owns its INDEX.md/README.md), so they
+    run on a small thread pool; CLAUDE.md is patched once per project after.
+    """
+    with deferred.claimed(session_id) as entries:
+        if not entries:
+            return []
+        targets: dict[str, Path] = {}
+        for parent_dir, project_dir in entries:
+            for d in regen_targets(parent_dir, project_dir):
+                targets.setdefault(str(d.resolve()), d)
+        dirs = list(targets.values())
+        done = []
+        if dirs:
+            with ThreadPoolExecutor(max_workers=min(8, len(dirs))) as pool:
+                done = [d for d, ok in zip(dirs, pool.map(_regen_dir, dirs)) if ok]
+        for project_dir in dict.fromkeys(project_dir for _, project_dir in entries):
+            try:
+                patch_claude_md(project_dir)
+            except Exception:
+                pass
+        extract.save_cache()
+        return done
 
 
 def main():
@@ -109,8 +148,18 @@ def main():
             sys.exit(0)
         if not should_sync(fp, rel):
             sys.exit(0)
+        if deferred.defer_enabled():
+            try:
+                deferred.record(data.get('session_id') or '', fp.parent, project_dir)
+                sys.exit(0)
+            except OSError:
+                pass  # journal unwritable: regenerate now
+        # The edited file is the dirty entry; every other description is
+        # served from the (path, mtime, size) cache.
+        extract.invalidate(fp)
         process_parent_dirs(fp.parent, project_dir)
         patch_claude_md(project_dir)
+        extract.save_cache()
     except Exception:
         pass
     sys.exit(0)
@@ -94,6 +94,10 @@ def _extract_preserved(old: str, dir_name: str) -> str:
     return '\n'.join(preserved)
 
 
+def _without_timestamp(text: str) -> list[str]:
+    return [ln for ln in text.splitlines() if not ln.startswith('*Last updated:')]
+
+
 def _build_index_content(dir_path: Path, convention: str, preserved: str = '') -> str:
     tree = build_tree(dir_path, max_depth=3)
     ts = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
@@ -125,8 +129,9 @@ def regen_index(dir_path: Path):
     if not _index_needs_update(index_path):
         return
     convention = _detect_convention(dir_path)
-    preserved = ''
-    if index_path.exists():
-        preserved = _extract_preserved(index_path.read_text(), dir_path.name)
+    old = index_path.read_text() if index_path.exists() else None
+    preserved = _extract_preserved(old, dir_path.name) if old is not None else ''
     content = _build_index_content(dir_path, convention, preserved)
+    if old is not None and _without_timestamp(old) == _without_timestamp(content):
+        return  # only the timestamp would change: keep the file (and its mtime)
     index_path.write_text(content)
@@ -32,6 +32,8 @@ SKIP_NAMES = {
     # Lifecycle JSONL score log and its lock file (arch-7 phase 2, task 20260525-050824).
     # lifecycle.jsonl is tracked in git but must not appear in generated README listings.
     'lifecycle.jsonl', 'lifecycle.jsonl.lock',
+    # Score ledger index sidecars (scripts/score_ledger.py).
+    'lifecycle.jsonl.idx', 'lifecycle.jsonl.undo.idx',
 }
 SKIP_DIRS = {'__pycache__', '.git', 'node_modules'}
 # Prefix-aware suppression (spec-20260518-225715 Cycle 3 Debt 7 / AC-07):
@@ -123,4 +125,6 @@ def regen_readme(dir_path: Path):
         if '<!-- AUTO:readme-stats -->' in old:
             body = content.split('<!-- AUTO:readme-stats -->')[1].split('-->')[0]
             content = _replace_section(old, 'readme-stats', body)
+        if content == old:
+            return
     readme_path.write_text(content)
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 """Build directory trees for INDEX.md."""
 
+import os
 from pathlib import Path
 
 # Dual-mode import: relative when loaded as `hooks.doc_sync.tree`
@@ -27,6 +28,8 @@ SKIP_FILES = {
     # Lifecycle JSONL score log and its lock file (arch-7 phase 2, task 20260525-050824).
     # lifecycle.jsonl is tracked in git but must not appear in rendered INDEX trees.
     'lifecycle.jsonl', 'lifecycle.jsonl.lock',
+    # Score ledger index sidecars (scripts/score_ledger.py).
+    'lifecycle.jsonl.idx', 'lifecycle.jsonl.undo.idx',
 }
 IGNORE_DIRS = {
     'node_modules', '.git', '__pycache__', '.venv', 'venv',
@@ -65,17 +68,18 @@ def _matches_skip_prefix(name: str) -> bool:
 # name is `.claude`; a blanket `i.name == 'specs'` check would also suppress
 # `ordinary/specs/` and is explicitly forbidden by the AC-09 negative control.
 def _is_dot_claude_specs(item: Path) -> bool:
-    return item.is_dir() and item.name == 'specs' and item.parent.name == '.claude'
+    return item.name == 'specs' and item.parent.name == '.claude' and item.is_dir()
 
 
 def build_tree(dir_path: Path, prefix: str = '', depth: int = 0,
                max_depth: int = 3) -> list[str]:
     if depth >= max_depth or not dir_path.is_dir():
         return []
-    items = sorted(
-        dir_path.iterdir(),
-        key=lambda x: (x.is_file(), x.name.lower()),
-    )
+    # One scandir pass: DirEntry caches the file type, so sorting and
+    # filtering below cost no extra stat per entry.
+    with os.scandir(dir_path) as it:
+        kinds = {Path(e.path): (e.is_file(), e.is_dir()) for e in it}
+    items = sorted(kinds, key=lambda x: (kinds[x][0], x.name.lower()))
     items = [
         i for i in items
         if i.name not in SKIP_FILES
@@ -88,7 +92,7 @@ def build_tree(dir_path: Path, prefix: str = '', depth: int = 0,
     for idx, item in enumerate(items):
         is_last = (idx == len(items) - 1)
         conn = '\u2514\u2500\u2500 ' if is_last else '\u251c\u2500\u2500 '
-        if item.is_dir():
+        if kinds[item][1]:
             ext = '    ' if is_last else '\u2502   '
             lines.append(f'{prefix}{conn}{item.name}/')
             lines.extend(build_tree(item, prefix + ext, depth + 1, max_depth))
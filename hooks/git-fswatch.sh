@@ -3,6 +3,12 @@
 # Comprehensive Git file monitor using fswatch
 # Location: ~/.claude/hooks/git-fswatch.sh
 # Usage: bash ~/.claude/hooks/git-fswatch.sh [path]
+#        bash ~/.claude/hooks/git-fswatch.sh --sync-once <path>
+#
+# --sync-once runs a single checkpoint / pull / push pass and exits, without
+# taking the watcher lock or starting fswatch. git-watchd.py (the inotify
+# service that watches every registered repo from one process) dispatches
+# its syncs this way; FSWATCH_LAST_PULL carries its pull clock.
 
 #━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 # CONFIGURATION
@@ -18,6 +24,11 @@ readonly MAGENTA='\033[0;35m'
 readonly NC='\033[0m' # No Color
 
 # Configuration
+SYNC_ONCE=0
+if [ "${1:-}" = "--sync-once" ]; then
+    SYNC_ONCE=1
+    shift
+fi
 WATCH_PATH="${1:-.}"
 WATCH_PATH=$(cd "$WATCH_PATH" 2>/dev/null && pwd) || WATCH_PATH="."
 REPO_NAME=$(basename "$WATCH_PATH")
@@ -30,7 +41,7 @@ STATE_FILE="/tmp/git-fswatch-state-${USER}-${REPO_NAME}.txt"
 
 # Runtime state
 COMMIT_TIMER_PID=""
-LAST_PULL_TIME=$(date +%s)
+LAST_PULL_TIME=${FSWATCH_LAST_PULL:-$(date +%s)}
 CONSECUTIVE_FAILURES=0
 
 #━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
@@ -92,7 +103,9 @@ cleanup() {
     exit 0
 }
 
-trap cleanup SIGINT SIGTERM EXIT
+if [ "$SYNC_ONCE" != "1" ]; then
+    trap cleanup SIGINT SIGTERM EXIT
+fi
 
 # Check if another instance is running
 check_lock() {
@@ -562,5 +575,11 @@ main() {
     done
 }
 
-# Run main
+# Run main (or a single pass for git-watchd.py)
+if [ "$SYNC_ONCE" = "1" ]; then
+    mkdir -p "$(dirname "$LOG_FILE")"
+    check_git_repo
+    sync_changes
+    exit $?
+fi
 main "$@"
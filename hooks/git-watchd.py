@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""git-watchd — one inotify watcher for every auto-synced repo.
+
+Replaces the one-bash-loop-plus-one-fswatch-per-repo setup of git-fswatch.sh
+on Linux: a single process watches every registered repo, honours each
+repo's ignore rules in-process, debounces per repo and hands syncs to a
+bounded worker pool (see lib/inotify_watch.py). Each sync is one
+`git-fswatch.sh --sync-once <repo>` pass, so checkpoint, pull and push
+behave exactly as under the per-repo watcher.
+
+Usage:
+    git-watchd.py add <repo>...     # register repos (the service picks them up)
+    git-watchd.py remove <repo>...  # unregister
+    git-watchd.py list              # registered repos
+    git-watchd.py start             # detach into the background (no-op if running)
+    git-watchd.py stop              # SIGTERM the service
+    git-watchd.py status [--repo P] # exit 0 if running (and P is registered)
+    git-watchd.py serve             # run in the foreground (debugging)
+    git-watchd.py supported         # exit 0 if inotify is available here
+
+Env:
+    GIT_WATCHD_REGISTRY     registered repos, one path per line
+                            (default ~/.claude/state/git-watchd-repos)
+    GIT_WATCHD_PID          pid file (default $TMPDIR/claude-git-watchd-<uid>.pid;
+                            .lock and .log live next to it)
+    FSWATCH_DEBOUNCE        quiet period before a repo syncs (default 12s)
+    FSWATCH_MAX_WAIT        longest a change waits under constant activity
+                            (default 5 x FSWATCH_DEBOUNCE)
+    FSWATCH_PULL_INTERVAL   seconds between pulls per repo (default 300)
+    FSWATCH_WORKERS         concurrent syncs (default 4)
+"""
+
+from __future__ import annotations
+
+import argparse
+import fcntl
+import os
+import signal
+import subprocess
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from lib import inotify_watch  # noqa: E402
+
+DEBOUNCE = float(os.environ.get('FSWATCH_DEBOUNCE', '12'))
+MAX_WAIT = float(os.environ.get('FSWATCH_MAX_WAIT', str(DEBOUNCE * 5)))
+PULL_INTERVAL = float(os.environ.get('FSWATCH_PULL_INTERVAL', '300'))
+WORKERS = int(os.environ.get('FSWATCH_WORKERS', '4'))
+
+
+def default_registry() -> str:
+    return os.environ.get('GIT_WATCHD_REGISTRY') or os.path.expanduser(
+        '~/.claude/state/git-watchd-repos')
+
+
+def default_pid_path() -> str:
+    override = os.environ.get('GIT_WATCHD_PID')
+    if override:
+        return override
+    base = os.environ.get('CLAUDE_TMPDIR') or os.environ.get('TMPDIR') or '/tmp'
+    return os.path.join(base, f'claude-git-watchd-{os.getuid()}.pid')
+
+
+def _read_pid(pid_path: str) -> int:
+    try:
+        pid = int(Path(pid_path).read_text().strip())
+        os.kill(pid, 0)
+        return pid
+    except (OSError, ValueError):
+        return 0
+
+
+def _repo_root(path: str) -> str | None:
+    proc = subprocess.run(['git', '-C', path, 'rev-parse', '--show-toplevel'],
+                          capture_output=True, text=True)
+    return proc.stdout.strip() if proc.returncode == 0 else None
+
+
+def cmd_add(registry: str, paths: list[str]) -> int:
+    repos = inotify_watch.read_registry(registry)
+    status = 0
+    for path in paths:
+        root = _repo_root(path)
+        if root is None:
+            sys.stderr.write(f'git-watchd: not a git repository: {path}\n')
+            status = 1
+        elif root not in repos:
+            repos.append(root)
+            print(f'git-watchd: registered {root}')
+    inotify_watch.write_registry(registry, repos)
+    return status
+
+
+def cmd_remove(registry: str, paths: list[str]) -> int:
+    drop = {os.path.realpath(p) for p in paths}
+    repos = [r for r in inotify_watch.read_registry(registry) if os.path.realpath(r) not in drop]
+    inotify_watch.write_registry(registry, repos)
+    return 0
+
+
+def cmd_serve(registry: str, pid_path: str, verbose: bool) -> int:
+    lock_fd = os.open(pid_path + '.lock', os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        sys.stderr.write('git-watchd: already running\n')
+        return 0
+    try:
+        watcher = inotify_watch.Watcher(
+            registry, base=DEBOUNCE, max_wait=MAX_WAIT, workers=WORKERS,
+            pull_interval=PULL_INTERVAL, excludes_file=inotify_watch.global_excludes_file(),
+            verbose=verbose)
+    except OSError as exc:
+        sys.stderr.write(f'git-watchd: inotify unavailable: {exc}\n')
+        return 1
+    Path(pid_path).write_text(f'{os.getpid()}\n')
+    stop = []
+    signal.signal(signal.SIGTERM, lambda _signum, _frame: stop.append(True))
+    try:
+        watcher.serve(stopping=lambda: bool(stop))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        try:
+            if Path(pid_path).read_text().strip() == str(os.getpid()):
+                os.unlink(pid_path)
+        except OSError:
+            pass
+        os.close(lock_fd)
+    watcher.log(f'exiting after {watcher.syncs} syncs')
+    return 0
+
+
+def cmd_start(registry: str, pid_path: str) -> int:
+    if _read_pid(pid_path):
+        return 0
+    with open(os.devnull, 'rb') as devnull, open(pid_path + '.log', 'ab') as log:
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), '--registry', registry,
+             '--pid-file', pid_path, 'serve', '--verbose'],
+            stdin=devnull, stdout=log, stderr=log,
+            start_new_session=True, close_fds=True,
+        )
+    return 0
+
+
+def cmd_stop(pid_path: str) -> int:
+    pid = _read_pid(pid_path)
+    if pid:
+        os.kill(pid, signal.SIGTERM)
+    return 0
+
+
+def cmd_status(registry: str, pid_path: str, repo: str | None) -> int:
+    pid = _read_pid(pid_path)
+    repos = inotify_watch.read_registry(registry)
+    if repo is not None:
+        root = _repo_root(repo)
+        return 0 if pid and root in repos else 1
+    if not pid:
+        print(f'git-watchd: not running ({len(repos)} repos registered)')
+        return 1
+    print(f'git-watchd: running (pid {pid}), watching {len(repos)} repos')
+    return 0
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description='Single inotify watcher for auto-synced repos')
+    ap.add_argument('--registry', default=default_registry())
+    ap.add_argument('--pid-file', default=default_pid_path())
+    sub = ap.add_subparsers(dest='action', required=True)
+    sub.add_parser('add').add_argument('repos', nargs='+')
+    sub.add_parser('remove').add_argument('repos', nargs='+')
+    sub.add_parser('list')
+    serve = sub.add_parser('serve')
+    serve.add_argument('--verbose', action='store_true')
+    sub.add_parser('start')
+    sub.add_parser('stop')
+    sub.add_parser('status').add_argument('--repo')
+    sub.add_parser('supported')
+    args = ap.parse_args()
+    if args.action == 'add':
+        return cmd_add(args.registry, args.repos)
+    if args.action == 'remove':
+        return cmd_remove(args.registry, args.repos)
+    if args.action == 'list':
+        for repo in inotify_watch.read_registry(args.registry):
+            print(repo)
+        return 0
+    if args.action == 'serve':
+        return cmd_serve(args.registry, args.pid_file, args.verbose)
+    if args.action == 'start':
+        return cmd_start(args.registry, args.pid_file)
+    if args.action == 'stop':
+        return cmd_stop(args.pid_file)
+    if args.action == 'status':
+        return cmd_status(args.registry, args.pid_file, args.repo)
+    return 0 if inotify_watch.supported() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""hookd client shim — forward one hook invocation to the warm hook daemon.
+
+Usage (settings.json):
+    python3 -S "$HOME/.claude/hooks/hookd-client.py" <hook-file> [args...]
+
+Hands this process's stdin/stdout/stderr fds to hookd over its Unix socket
+(SCM_RIGHTS), so the hook reads the real payload and writes straight to
+Claude Code; the hook's exit status is relayed back as our own.
+
+Imports are kept to the bare minimum (run with -S) because this shim IS the
+per-call cost. If the daemon is unreachable for any reason the hook is exec'd
+directly — identical semantics, cold-start cost — and, unless
+CLAUDE_HOOKD_AUTOSTART=0, a daemon is started in the background for the next
+call. Shell hooks (*.sh) are always exec'd directly via bash.
+
+Nothing is sent until the socket is known to belong to our own uid (socket
+owner, then SO_PEERCRED of the listening peer): the payload fds and the full
+environment would otherwise go to whoever created the predictable socket path
+first. A foreign socket is treated like an unreachable daemon.
+
+Set CLAUDE_HOOKD=0 to bypass the daemon entirely.
+"""
+
+import _socket
+import os
+import struct
+import sys
+
+HOOKS_DIR = os.path.dirname(os.path.abspath(__file__))
+MAGIC = b'HOOKD1'
+
+
+def _socket_path():
+    override = os.environ.get('CLAUDE_HOOKD_SOCKET')
+    if override:
+        return override
+    base = os.environ.get('CLAUDE_TMPDIR') or os.environ.get('TMPDIR') or '/tmp'
+    return os.path.join(base, 'claude-hookd-%d.sock' % os.getuid())
+
+
+def _exec_direct(hook_path, args):
+    if hook_path.endswith('.sh'):
+        os.execvp('bash', ['bash', hook_path] + args)
+    os.execv(sys.executable, [sys.executable, hook_path] + args)
+
+
+def _autostart(sock_path):
+    if os.environ.get('CLAUDE_HOOKD_AUTOSTART', '1') == '0':
+        return
+    try:
+        pid = os.fork()
+    except OSError:
+        return
+    if pid:
+        return
+    try:  # grandchild detaches; never touch the hook's stdio
+        os.setsid()
+        devnull = os.open(os.devnull, os.O_RDWR)
+        for fd in (0, 1, 2):
+            os.dup2(devnull, fd)
+        os.execv(sys.executable, [
+            sys.executable, os.path.join(HOOKS_DIR, 'hookd.py'),
+            '--socket', sock_path, 'start',
+        ])
+    finally:
+        os._exit(0)
+
+
+def _encode(hook_path, args):
+    # Same framing as lib/hook_server.encode_request; inlined so the shim
+    # never imports json/socket (their re/enum imports triple startup time).
+    fields = [MAGIC, os.fsencode(hook_path), os.fsencode(os.getcwd()),
+              str(len(args)).encode()]
+    fields.extend(os.fsencode(a) for a in args)
+    fields.extend(k + b'=' + v for k, v in os.environb.items())
+    body = b'\0'.join(fields)
+    return struct.pack('>I', len(body)) + body
+
+
+def _peer_is_us(conn, sock_path):
+    uid = os.getuid()
+    if os.lstat(sock_path).st_uid != uid:
+        return False
+    peercred = getattr(_socket, 'SO_PEERCRED', None)
+    if peercred is None:
+        return True  # no SO_PEERCRED here; the socket owner check stands alone
+    creds = conn.getsockopt(_socket.SOL_SOCKET, peercred, struct.calcsize('3i'))
+    return struct.unpack('3i', creds)[1] == uid
+
+
+def _forward(sock_path, hook_path, args):
+    conn = _socket.socket(_socket.AF_UNIX, _socket.SOCK_STREAM)
+    try:
+        conn.connect(sock_path)
+        if not _peer_is_us(conn, sock_path):
+            conn.close()
+            return None
+    except OSError:
+        conn.close()
+        return None
+    msg = _encode(hook_path, args)
+    try:
+        fds = struct.pack('3i', 0, 1, 2)
+        sent = conn.sendmsg(
+            [msg[:65536]], [(_socket.SOL_SOCKET, _socket.SCM_RIGHTS, fds)])
+        conn.sendall(msg[sent:])
+        buf = b''
+        while len(buf) < 4:
+            chunk = conn.recv(4 - len(buf))
+            if not chunk:
+                # Daemon died mid-request; the hook may have partially run, so
+                # do not re-run it. Fail open like a crashed hook would.
+                sys.stderr.write('hookd-client: daemon closed connection\n')
+                return 1
+            buf += chunk
+    finally:
+        conn.close()
+    return struct.unpack('>i', buf)[0]
+
+
+def main():
+    if len(sys.argv) < 2:
+        sys.stderr.write('usage: hookd-client.py <hook-file> [args...]\n')
+        return 1
+    hook = sys.argv[1]
+    args = sys.argv[2:]
+    hook_path = hook if os.path.isabs(hook) else os.path.join(HOOKS_DIR, hook)
+    if hook_path.endswith('.sh') or os.environ.get('CLAUDE_HOOKD') == '0':
+        _exec_direct(hook_path, args)
+    sock_path = _socket_path()
+    try:
+        status = _forward(sock_path, hook_path, args)
+    except OSError:
+        status = None
+    if status is None:
+        _autostart(sock_path)
+        _exec_direct(hook_path, args)
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""hookd — warm hook daemon control (start | stop | status | serve).
+
+Serves every Python hook from one pre-warmed process (see lib/hook_server.py)
+so a tool call no longer pays ~15 cold interpreter starts. Hooks are invoked
+through the tiny client shim:
+
+    python3 -S "$HOME/.claude/hooks/hookd-client.py" pretool-tool-policy.py
+
+The shim falls back to running the hook directly whenever the daemon is not
+reachable, so wiring it in settings.json never changes hook semantics.
+
+Usage:
+    hookd.py start     # detach into the background (no-op if already running)
+    hookd.py stop      # SIGTERM the running daemon
+    hookd.py status    # exit 0 if running, 1 otherwise
+    hookd.py serve     # run in the foreground (debugging)
+
+The shim is opt-in: settings.json still runs every hook directly, so the
+daemon serves nothing until hook commands are switched to hookd-client.py.
+
+Concurrent starts are serialized by an flock on <socket>.lock held across the
+liveness check, stale-socket unlink, bind and listen, so exactly one daemon
+owns the socket. An idle daemon exits on its own.
+
+Env:
+    CLAUDE_HOOKD_SOCKET     override the socket path
+                            (default $TMPDIR/claude-hookd-<uid>.sock)
+    CLAUDE_HOOKD_IDLE_SECS  exit after this long without a request
+                            (default 1800; 0 = never)
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import fcntl
+import os
+import signal
+import socket
+import subprocess
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from lib.hook_server import HookServer, IdleExit, default_socket_path, pid_path  # noqa: E402
+
+IDLE_SECS = float(os.environ.get('CLAUDE_HOOKD_IDLE_SECS', '1800'))
+
+
+def _read_pid(sock_path: str) -> int:
+    try:
+        return int(Path(pid_path(sock_path)).read_text().strip())
+    except (OSError, ValueError):
+        return 0
+
+
+def _alive(sock_path: str) -> bool:
+    s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    s.settimeout(0.5)
+    try:
+        s.connect(sock_path)
+        return True
+    except OSError:
+        return False
+    finally:
+        s.close()
+
+
+@contextlib.contextmanager
+def _socket_lock(sock_path: str):
+    """Exclusive flock on <socket>.lock; serializes bind and unlink of the socket."""
+    old_umask = os.umask(0o077)
+    try:
+        lock_fd = os.open(sock_path + '.lock', os.O_RDWR | os.O_CREAT, 0o600)
+    finally:
+        os.umask(old_umask)
+    try:
+        fcntl.flock(lock_fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(lock_fd)  # releases the flock
+
+
+def _bind(sock_path: str, verbose: bool):
+    """Create the listening server, or None when another daemon owns the socket.
+
+    The check / unlink / bind / listen sequence runs under _socket_lock so two
+    concurrent starts cannot both see a dead socket and orphan each other.
+    """
+    with _socket_lock(sock_path):
+        if _alive(sock_path):
+            return None
+        try:
+            os.unlink(sock_path)  # stale socket from a crashed daemon
+        except FileNotFoundError:
+            pass
+        server = HookServer(sock_path, verbose=verbose, idle_timeout=IDLE_SECS)
+        Path(pid_path(sock_path)).write_text(f'{os.getpid()}\n')
+        return server
+
+
+def cmd_serve(sock_path: str, verbose: bool) -> int:
+    try:
+        server = _bind(sock_path, verbose)
+    except OSError as exc:
+        sys.stderr.write(f'hookd: cannot serve on {sock_path}: {exc}\n')
+        return 1
+    if server is None:
+        sys.stderr.write(f'hookd: already serving on {sock_path}\n')
+        return 0
+
+    def _term(_signum, _frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, _term)
+    try:
+        server.serve_forever(poll_interval=1.0)
+    except IdleExit as exc:
+        server.log(f'exiting: {exc}')
+    except KeyboardInterrupt:
+        pass
+    finally:
+        with _socket_lock(sock_path):  # never unlink a successor's socket
+            server.server_close()
+        try:
+            if _read_pid(sock_path) == os.getpid():
+                os.unlink(pid_path(sock_path))
+        except OSError:
+            pass
+    return 0
+
+
+def cmd_start(sock_path: str) -> int:
+    if _alive(sock_path):
+        return 0
+    log_path = sock_path + '.log'
+    with open(os.devnull, 'rb') as devnull, open(log_path, 'ab') as log:
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), '--socket', sock_path,
+             'serve', '--verbose'],
+            stdin=devnull, stdout=log, stderr=log,
+            start_new_session=True, close_fds=True,
+        )
+    return 0
+
+
+def cmd_stop(sock_path: str) -> int:
+    pid = _read_pid(sock_path)
+    if not pid:
+        return 0
+    try:
+        os.kill(pid, signal.SIGTERM)
+    except ProcessLookupError:
+        pass
+    return 0
+
+
+def cmd_status(sock_path: str) -> int:
+    if _alive(sock_path):
+        print(f'hookd: running (pid {_read_pid(sock_path) or "?"}) on {sock_path}')
+        return 0
+    print(f'hookd: not running ({sock_path})')
+    return 1
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description='Warm hook daemon control')
+    ap.add_argument('--socket', default=default_socket_path())
+    sub = ap.add_subparsers(dest='action', required=True)
+    serve = sub.add_parser('serve')
+    serve.add_argument('--verbose', action='store_true')
+    sub.add_parser('start')
+    sub.add_parser('stop')
+    sub.add_parser('status')
+    args = ap.parse_args()
+    if args.action == 'serve':
+        return cmd_serve(args.socket, args.verbose)
+    if args.action == 'start':
+        return cmd_start(args.socket)
+    if args.action == 'stop':
+        return cmd_stop(args.socket)
+    return cmd_status(args.socket)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
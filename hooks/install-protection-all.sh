@@ -105,7 +105,8 @@ find ~ -maxdepth 3 -type d -name ".git" 2>/dev/null | sort | while read git_dir;
     fi
 
     # Check Layer 3 (FSWatch)
-    if ps aux | grep -q "[g]it-fswatch.sh $repo_dir"; then
+    if ps aux | grep -q "[g]it-fswatch.sh $repo_dir" \
+        || python3 ~/.claude/hooks/git-watchd.py status --repo "$repo_dir" 2>/dev/null; then
         echo "   ✅ Layer 3: FSWatch monitoring"
     else
         echo "   ❌ Layer 3: Not monitored"
@@ -0,0 +1,32 @@
+"""Shared hook helpers.
+
+Submodules load lazily: ``from lib import contract_runtime`` binds a module
+object at once but runs the module only on its first attribute access. Hooks
+that exit early (tool mismatch, no overnight session, not a subagent) thus
+never pay for modules, or their dependencies, that they would not have used.
+
+``from lib.x import name`` is an ordinary eager import. Use the module form in
+hooks whose fast path should stay cheap. The warm hook server and the
+in-process dispatcher preload every submodule (lib/hook_server.preload_lib)
+before forking or starting threads, because a lazy module is not safe to
+first-touch from two threads at once.
+"""
+
+import sys
+
+
+def __getattr__(name):
+    fullname = f"{__name__}.{name}"
+    if name.startswith("_") or fullname in sys.modules:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib.util  # not needed by hooks that only use `from lib.x import`
+
+    spec = importlib.util.find_spec(fullname)
+    if spec is None or spec.loader is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    spec.loader = importlib.util.LazyLoader(spec.loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[fullname] = module
+    spec.loader.exec_module(module)
+    globals()[name] = module
+    return module
@@ -23,11 +23,18 @@ None, degrade to warn + allow. See pretool-subagent-code-block.py.
 
 from __future__ import annotations
 
-import glob
 import json
 import os
 from typing import Optional
 
+try:
+    from . import state_snapshot
+except ImportError:
+    try:
+        from lib import state_snapshot  # type: ignore
+    except ImportError:
+        import state_snapshot  # type: ignore  # lib/ itself on sys.path
+
 
 def _read_json(path: str) -> Optional[dict]:
     try:
@@ -45,14 +52,13 @@ def _match_cp_state(path: str, agent_id: str) -> Optional[str]:
     return t if isinstance(t, str) else None
 
 
-def _read_match(path: str, agent_id: str) -> Optional[dict]:
-    """Return cp-state dict if agent_id matches, else None.
+def _match_data(data, agent_id: str) -> Optional[dict]:
+    """Return parsed cp-state dict if agent_id matches, else None.
 
     Unlike _match_cp_state (which returns just agent_type), this returns
     the full payload so disambiguation in _scan_cp_state_files can inspect
     is_running and checked_in_at without re-reading the file.
     """
-    data = _read_json(path)
     if not data or data.get("agent_id") != agent_id:
         return None
     t = data.get("agent_type")
@@ -74,9 +80,13 @@ def _pick_active(matches: list) -> Optional[str]:
     return next(iter(types))  # F14 M9: deterministic same-role active
 
 
+def _read_agent_index(project_dir: str):
+    """Parsed dev-registry agent-index.json via the shared state snapshot."""
+    return state_snapshot.snapshot(project_dir).agent_index()
+
+
 def _lookup_dev_registry_index(agent_id: str, project_dir: str) -> Optional[str]:
-    index_path = f"{project_dir}/.claude/dev-registry/agent-index.json"
-    data = _read_json(index_path)
+    data = _read_agent_index(project_dir)
     if not data:
         return None
     value = data.get(agent_id)
@@ -100,8 +110,7 @@ def resolve_dev_registry_entry(agent_id: str, project_dir: str) -> Optional[dict
     Used by posttool-codex-skill-ledger.py and subagentstop-codex-enforce.py
     to access both agent_type AND dev_session_id from a single index read.
     """
-    index_path = f"{project_dir}/.claude/dev-registry/agent-index.json"
-    data = _read_json(index_path)
+    data = _read_agent_index(project_dir)
     if not data:
         return None
     value = data.get(agent_id)
@@ -118,12 +127,9 @@ def resolve_dev_registry_entry(agent_id: str, project_dir: str) -> Optional[dict
 _FAIL_CLOSED = object()  # sentinel: cross-role active collision -> deny
 
 
-def _glob_cp_state(project_dir: str) -> list:
-    pattern = f"{project_dir}/.claude/specs/*/cp-state-*.json"
-    try:
-        return glob.glob(pattern)
-    except OSError:
-        return []
+def _cp_states(project_dir: str) -> list:
+    """Every specs/*/cp-state-*.json as a StateFile, re-parsed only on change."""
+    return state_snapshot.snapshot(project_dir).cp_states()
 
 
 def _scan_cp_state_files(agent_id: str, project_dir: str):
@@ -136,8 +142,7 @@ def _scan_cp_state_files(agent_id: str, project_dir: str):
       - None: no match or inactive-only (AC-3 non-authoritative); caller
         MAY fall through to agent-index.
     """
-    paths = _glob_cp_state(project_dir)
-    matches = [d for d in (_read_match(p, agent_id) for p in paths) if d]
+    matches = [d for d in (_match_data(sf.data, agent_id) for sf in _cp_states(project_dir)) if d]
     if not matches:
         return None
     active = [m for m in matches if m.get("is_running")]
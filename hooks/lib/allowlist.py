@@ -33,37 +33,145 @@ Sentinel-file grant lifecycle (task 20260519-211515 R2 / AC2):
   - reap_expired_sentinel_grants() is called by stop-cleanup hook to remove
     unconsumed grants at session end.
 
+Grant store (every Bash call runs several grant checks, often in one
+hook_server process):
+  - Grant files are parsed once and reused while their (dev, inode,
+    mtime_ns, size) signature is unchanged; a miss reads under LOCK_SH, so
+    readers never serialize on each other — only the PostToolUse consumer
+    takes LOCK_EX.
+  - SENTINEL_GRANT_DIR is indexed by task_id (every "<task_id>" prefix of a
+    "<task_id>[-<nonce>].json" name) and rescanned only when the directory's
+    mtime changes; the index never decides a match on its own — the file is
+    still stat'ed and read.
+  - Regexes are compiled once per pattern and search results memoized per
+    (pattern, text), so the SIGALRM guard runs once per distinct command.
+  - Expiry is a heap persisted in SENTINEL_GRANT_DIR/.expiry-index/heap.json;
+    reaping pops elapsed entries and parses only grants issued since the last
+    reap.
+
 Stdlib-only; Python 3.12+ required.
 """
 
 import fcntl
+import heapq
 import json
 import os
 import re
 import signal
+import stat
 import sys
 import time
+from functools import lru_cache
 from pathlib import Path
 from typing import NamedTuple
 
 
 # Sentinel-grant filesystem layout (task 20260519-211515 R2 / AC2)
 SENTINEL_GRANT_DIR = "/tmp/claude-grants"
+EXPIRY_INDEX_NAME = ".expiry-index"
+EXPIRY_HEAP_NAME = "heap.json"
+
+_ENV_ASSIGN_RE = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*=')
+_MEMO_MAX = 1024
+# File and directory mtimes come from the kernel's coarse clock: two changes
+# inside one tick can leave the same mtime. Nothing modified this recently
+# is trusted from cache (git's "racy" entries).
+_RACY_NS = 1_000_000_000
 
+# (pattern, text) -> bool for regex grant matches
+_search_memo: dict[tuple[str, str], bool] = {}
+# grant path -> (stat signature, decoded JSON)
+_grant_cache: dict[str, tuple[tuple, object]] = {}
 
-def _regex_safe(pattern: str, text: str, timeout: int = 1) -> bool:
-    """re.search with SIGALRM timeout. Returns False on re.error or timeout."""
-    def _handler(signum, frame):
-        raise TimeoutError("regex timeout")
-    old = signal.signal(signal.SIGALRM, _handler)
-    signal.alarm(timeout)
+
+@lru_cache(maxsize=256)
+def _compiled(pattern: str) -> re.Pattern | None:
+    """Compiled grant regex, or None when the pattern does not compile."""
     try:
-        return bool(re.search(pattern, text))
-    except (re.error, TimeoutError):
+        return re.compile(pattern)
+    except (re.error, RecursionError, OverflowError):
+        return None
+
+
+def _regex_safe(pattern: str, text: str, timeout: int | None = 1) -> bool:
+    """re.search with SIGALRM timeout. Returns False on re.error or timeout.
+
+    timeout=None searches without the alarm (callers that already run under
+    one, and the pure-match unit tests)."""
+    key = (pattern, text)
+    hit = _search_memo.get(key)
+    if hit is not None:
+        return hit
+    compiled = _compiled(pattern)
+    if compiled is None:
         return False
-    finally:
-        signal.alarm(0)
-        signal.signal(signal.SIGALRM, old)
+    if timeout is None:
+        result = compiled.search(text) is not None
+    else:
+        def _handler(signum, frame):
+            raise TimeoutError("regex timeout")
+        old = signal.signal(signal.SIGALRM, _handler)
+        signal.alarm(timeout)
+        try:
+            result = compiled.search(text) is not None
+        except TimeoutError:
+            result = False
+        finally:
+            signal.alarm(0)
+            signal.signal(signal.SIGALRM, old)
+    if len(_search_memo) >= _MEMO_MAX:
+        _search_memo.clear()
+    _search_memo[key] = result
+    return result
+
+
+def _signature(st: os.stat_result) -> tuple:
+    return (st.st_dev, st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def _racy(mtime_ns: int) -> bool:
+    return time.time_ns() - mtime_ns < _RACY_NS
+
+
+def _read_grant_file(path, nonblocking: bool = False):
+    """Decoded JSON of a grant file, or None when it is missing or unreadable.
+
+    Reuses the last decode while the file's stat signature is unchanged;
+    otherwise reads it under LOCK_SH (non-blocking with 3x100ms retry when
+    nonblocking=True). Parse failures are never cached. The returned object
+    is shared with later callers — treat it as read-only.
+    """
+    key = os.fspath(path)
+    try:
+        sig = _signature(os.stat(key))
+    except OSError:
+        _grant_cache.pop(key, None)
+        return None
+    hit = _grant_cache.get(key)
+    if hit is not None and hit[0] == sig:
+        return hit[1]
+    try:
+        with open(key) as fh:
+            attempts = 0
+            while True:
+                try:
+                    fcntl.flock(fh, fcntl.LOCK_SH | (fcntl.LOCK_NB if nonblocking else 0))
+                    break
+                except BlockingIOError:
+                    attempts += 1
+                    if attempts >= 3:
+                        return None
+                    time.sleep(0.1)
+            grant = json.load(fh)
+            sig = _signature(os.fstat(fh.fileno()))
+    except Exception:
+        return None
+    if _racy(sig[2]):
+        return grant
+    if len(_grant_cache) >= _MEMO_MAX:
+        _grant_cache.clear()
+    _grant_cache[key] = (sig, grant)
+    return grant
 
 
 class MatchResult(NamedTuple):
@@ -125,8 +233,8 @@ def _load_and_match(
     literal_policy: str,
     regex_timeout: int = 1,
 ) -> MatchResult | None:
-    """Blocking-lock wrapper: acquire LOCK_EX on grant file, json.load,
-    then delegate to _match_loaded_grant.
+    """Blocking-lock wrapper: read the grant file (LOCK_SH on a cache miss,
+    see _read_grant_file), then delegate to _match_loaded_grant.
 
     Args:
         sid: session id (used to locate /tmp/claude-bash-allowlist-<sid>.json)
@@ -138,16 +246,11 @@ def _load_and_match(
         MatchResult on match, None otherwise. Never unlinks the grant file.
     """
     flag_path = Path(f"/tmp/claude-bash-allowlist-{sid}.json")
-    try:
-        with open(flag_path, "r+") as fh:
-            fcntl.flock(fh, fcntl.LOCK_EX)
-            try:
-                grant = json.load(fh)
-            except Exception:
-                return None
-            return _match_loaded_grant(grant, candidates, literal_policy, regex_timeout)
-    except (FileNotFoundError, OSError):
+    grant = _read_grant_file(flag_path)
+    if not isinstance(grant, dict):
         return None
+    try:
+        return _match_loaded_grant(grant, candidates, literal_policy, regex_timeout)
     except Exception:
         return None
 
@@ -196,9 +299,9 @@ def match_grant_for_bash_command(
 ) -> MatchResult | None:
     """Match /allow grant for a compound bash command. Read-only — does NOT delete.
 
-    Acquires LOCK_EX | LOCK_NB on sidecar .lock file with 3x100ms retry
-    (matches existing bash heredoc NB-flock behavior — distinct from the
-    blocking LOCK_EX used by _load_and_match).
+    Reads the grant under LOCK_SH | LOCK_NB with 3x100ms retry (a consumer
+    holding LOCK_EX never hangs the hook; distinct from the blocking read
+    used by _load_and_match).
 
     Splits command on &&, ||, ;, | (order: || before | so || becomes single
     newline, not |\\n).
@@ -206,33 +309,10 @@ def match_grant_for_bash_command(
     Returns MatchResult on first subcommand match, None if no match / no grant.
     Subagent firewall check stays in the bash wrapper caller.
     """
-    flag_file = f"/tmp/claude-bash-allowlist-{sid}.json"
-    lock_file = f"{flag_file}.lock"
-
-    # NB flock with 3x100ms retry (preserves existing bash heredoc behavior)
-    lock_fd = None
+    grant = _read_grant_file(f"/tmp/claude-bash-allowlist-{sid}.json", nonblocking=True)
+    if not isinstance(grant, dict):
+        return None
     try:
-        lock_fd = os.open(lock_file, os.O_CREAT | os.O_RDWR, 0o600)
-        attempts = 0
-        while True:
-            try:
-                fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
-                break
-            except BlockingIOError:
-                attempts += 1
-                if attempts >= 3:
-                    return None
-                time.sleep(0.1)
-
-        # Lock held — read grant file
-        if not os.path.exists(flag_file):
-            return None
-        try:
-            with open(flag_file) as f:
-                grant = json.load(f)
-        except Exception:
-            return None
-
         # Build subcommand candidates (split on && || ; |)
         # Order matters: || before | so '||' becomes a single newline
         s = command.replace("||", "\n").replace("&&", "\n").replace(";", "\n").replace("|", "\n")
@@ -241,19 +321,8 @@ def match_grant_for_bash_command(
             subcmds = [command]
 
         return _match_loaded_grant(grant, subcmds, "substr_only", regex_timeout)
-
     except Exception:
         return None
-    finally:
-        if lock_fd is not None:
-            try:
-                fcntl.flock(lock_fd, fcntl.LOCK_UN)
-            except Exception:
-                pass
-            try:
-                os.close(lock_fd)
-            except Exception:
-                pass
 
 
 def consume_grant_for_posttool(sid: str, tool_name: str, command: str) -> bool:
@@ -326,6 +395,7 @@ def consume_grant_for_posttool(sid: str, tool_name: str, command: str) -> bool:
                     os.unlink(grant_path)
                 except FileNotFoundError:
                     pass
+                _grant_cache.pop(os.fspath(grant_path), None)
                 sys.stderr.write(f"[ALLOW] grant CONSUMED for {tool_name}\n")
                 return True
             return False
@@ -354,24 +424,91 @@ def consume_grant_for_posttool(sid: str, tool_name: str, command: str) -> bool:
 # ─────────────────────────────────────────────────────────────────────
 
 
+class _SentinelIndex:
+    """task_id -> sentinel grant file names for one grant directory.
+
+    Rebuilt from a single scandir when the directory's mtime changes (every
+    create, rename and unlink bumps it) or is too recent to trust. Each "<task_id>[-<nonce>].json"
+    name is filed under its full stem and every prefix ending before a '-',
+    which is exactly the set of task_ids _enumerate_sentinel_grant_files
+    used to accept by globbing.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self.dir_sig: tuple | None = None
+        self.names: list[str] = []
+        self.by_task: dict[str, list[str]] = {}
+
+    def refresh(self) -> bool:
+        """Sync with the directory; False when it does not exist."""
+        try:
+            st = os.stat(self.directory)
+        except OSError:
+            self.dir_sig, self.names, self.by_task = None, [], {}
+            return False
+        sig = (st.st_dev, st.st_ino, st.st_mtime_ns)
+        if sig == self.dir_sig:
+            return True
+        names = [e.name for e in os.scandir(self.directory) if e.name.endswith(".json")]
+        by_task: dict[str, list[str]] = {}
+        for name in names:
+            stem = name[:-5]
+            by_task.setdefault(stem, []).append(name)
+            for i, ch in enumerate(stem):
+                if ch == "-" and i:
+                    by_task.setdefault(stem[:i], []).append(name)
+        self.dir_sig = None if _racy(st.st_mtime_ns) else sig
+        self.names, self.by_task = names, by_task
+        return True
+
+    def files(self, task_id: str | None) -> list[str]:
+        if not self.refresh():
+            return []
+        if task_id:
+            return list(self.by_task.get(task_id, ()))
+        return list(self.names)
+
+
+_sentinel_indexes: dict[str, _SentinelIndex] = {}
+
+
+def _sentinel_index() -> _SentinelIndex:
+    # Keyed by directory so tests that repoint SENTINEL_GRANT_DIR get their own.
+    index = _sentinel_indexes.get(SENTINEL_GRANT_DIR)
+    if index is None:
+        index = _sentinel_indexes[SENTINEL_GRANT_DIR] = _SentinelIndex(SENTINEL_GRANT_DIR)
+    return index
+
+
 def _enumerate_sentinel_grant_files(task_id: str | None = None) -> list[Path]:
     """List existing sentinel grant files under SENTINEL_GRANT_DIR.
 
     If task_id is provided, restrict to files whose basename starts with
-    "<task_id>-" or equals "<task_id>.json".
+    "<task_id>-" or equals "<task_id>.json". Served from _SentinelIndex.
     """
     try:
-        d = Path(SENTINEL_GRANT_DIR)
-        if not d.is_dir():
-            return []
-        if task_id:
-            return [p for p in d.glob("*.json")
-                    if p.name == f"{task_id}.json" or p.name.startswith(f"{task_id}-")]
-        return list(d.glob("*.json"))
+        index = _sentinel_index()
+        return [Path(index.directory) / name for name in index.files(task_id)]
     except Exception:
         return []
 
 
+def _expiry_epoch(exp) -> float | None:
+    """expires_at as epoch seconds; None for a non-numeric, non-string value.
+
+    Raises ValueError for a string that is not ISO-8601."""
+    if isinstance(exp, bool):
+        return None
+    if isinstance(exp, (int, float)):
+        return float(exp)
+    if isinstance(exp, str):
+        # Accept ISO-8601 with Z or +00:00 suffix.
+        from datetime import datetime
+        return datetime.fromisoformat(exp.replace("Z", "+00:00")).timestamp()
+    return None
+
+
 def load_sentinel_grant_for_task(task_id: str) -> dict | None:
     """Read and validate a sentinel grant JSON for a given task_id.
 
@@ -379,6 +516,7 @@ def load_sentinel_grant_for_task(task_id: str) -> dict | None:
     Required schema keys: task_id, session_id, allowed_operations (list),
     created_at, expires_at. expires_at is an ISO-8601 string OR unix-epoch
     integer/float; if it has elapsed, the grant is treated as missing.
+    The dict is shared with the grant cache; callers must not mutate it.
 
     NOTE: this function does NOT unlink the grant. Consumption goes through
     consume_sentinel_grant_on_terminal_result().
@@ -387,16 +525,12 @@ def load_sentinel_grant_for_task(task_id: str) -> dict | None:
     if not matches:
         return None
     # Most-recent-mtime wins on the unlikely event of duplicates.
-    try:
-        matches.sort(key=lambda p: p.stat().st_mtime, reverse=True)
-    except Exception:
-        pass
-    grant_path = matches[0]
-    try:
-        with open(grant_path) as f:
-            grant = json.load(f)
-    except Exception:
-        return None
+    if len(matches) > 1:
+        try:
+            matches.sort(key=lambda p: p.stat().st_mtime, reverse=True)
+        except Exception:
+            pass
+    grant = _read_grant_file(matches[0])
     if not isinstance(grant, dict):
         return None
     required = ("task_id", "session_id", "allowed_operations", "created_at", "expires_at")
@@ -405,23 +539,12 @@ def load_sentinel_grant_for_task(task_id: str) -> dict | None:
     if not isinstance(grant.get("allowed_operations"), list):
         return None
     # Expiry check (deny-by-default on parse failure).
-    exp = grant.get("expires_at")
     try:
-        now = time.time()
-        if isinstance(exp, (int, float)):
-            if exp < now:
-                return None
-        elif isinstance(exp, str):
-            # Accept ISO-8601 with Z or +00:00 suffix.
-            from datetime import datetime, timezone
-            s = exp.replace("Z", "+00:00")
-            t = datetime.fromisoformat(s).timestamp()
-            if t < now:
-                return None
-        else:
-            return None
+        expires = _expiry_epoch(grant.get("expires_at"))
     except Exception:
         return None
+    if expires is None or expires < time.time():
+        return None
     return grant
 
 
@@ -485,7 +608,7 @@ def match_sentinel_grant_for_bash_command(task_id: str, command: str) -> dict |
     if not tokens:
         return None
     env_skip = 0
-    while env_skip < len(tokens) and re.match(r'^[A-Za-z_][A-Za-z0-9_]*=', tokens[env_skip]):
+    while env_skip < len(tokens) and _ENV_ASSIGN_RE.match(tokens[env_skip]):
         env_skip += 1
     if env_skip >= len(tokens):
         return None
@@ -611,39 +734,159 @@ def consume_sentinel_grant_on_terminal_result(task_id: str, terminal_result: str
     return unlinked
 
 
+def _read_expiry_index(directory: str) -> tuple[tuple | None, dict[str, tuple]]:
+    """(directory signature, {name: (expires_at, file signature)}) from the
+    persisted expiry index; empty when missing, foreign-owned or corrupt."""
+    path = os.path.join(directory, EXPIRY_INDEX_NAME, EXPIRY_HEAP_NAME)
+    try:
+        with open(path) as f:
+            if os.fstat(f.fileno()).st_uid != os.getuid():
+                return None, {}
+            data = json.load(f)
+        entries = {
+            name: (float(exp), tuple(sig))
+            for name, (exp, sig) in data["entries"].items()
+            if name.endswith(".json") and "/" not in name and not name.startswith(".")
+        }
+        dir_sig = data["dir_sig"]
+        return (tuple(dir_sig) if dir_sig else None), entries
+    except Exception:
+        return None, {}
+
+
+def _expiry_index_dir(directory: str) -> str | None:
+    """SENTINEL_GRANT_DIR/.expiry-index, created 0700 on first use; None when
+    it cannot be made or is not our own directory. A legacy flat index file
+    of ours at that name is replaced by the directory."""
+    path = os.path.join(directory, EXPIRY_INDEX_NAME)
+    try:
+        st = os.lstat(path)
+        if not stat.S_ISDIR(st.st_mode) and st.st_uid == os.getuid():
+            os.unlink(path)
+            raise FileNotFoundError(path)
+    except FileNotFoundError:
+        try:
+            os.mkdir(path, 0o700)
+            st = os.lstat(path)
+        except OSError:
+            return None
+    except OSError:
+        return None
+    if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid():
+        return None
+    return path
+
+
+def _write_expiry_index(directory: str, entries: dict[str, tuple]) -> None:
+    """Persist the expiry heap: write a temp file and os.replace it, so a
+    reader never sees a partial heap. Both live in the .expiry-index
+    subdirectory, so saving only bumps that directory's mtime, not the
+    grant directory signature recorded in the heap."""
+    index_dir = _expiry_index_dir(directory)
+    if index_dir is None:
+        return
+    path = os.path.join(index_dir, EXPIRY_HEAP_NAME)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        st = os.stat(directory)
+        data = json.dumps({
+            "dir_sig": None if _racy(st.st_mtime_ns) else [st.st_dev, st.st_ino, st.st_mtime_ns],
+            "entries": {n: [exp, list(sig)] for n, (exp, sig) in entries.items()},
+        }).encode()
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_NOFOLLOW, 0o600)
+        try:
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+
+
+def _grant_expiry(path: str) -> tuple[float, tuple] | None:
+    """(expires_at, signature) for reaping: malformed grants expire at once,
+    grants without a usable expires_at never do. None when the file is gone."""
+    try:
+        with open(path) as f:
+            sig = _signature(os.fstat(f.fileno()))
+            try:
+                grant = json.load(f)
+                exp = _expiry_epoch(grant.get("expires_at"))
+            except Exception:
+                return 0.0, sig
+    except OSError:
+        return None
+    return (float("inf") if exp is None else exp), sig
+
+
 def reap_expired_sentinel_grants() -> int:
     """Stop-cleanup helper: unlink every sentinel grant whose expires_at has
-    elapsed. Returns the count of reaped files. Best-effort; never raises."""
+    elapsed. Returns the count of reaped files. Best-effort; never raises.
+
+    Works off the expiry heap in SENTINEL_GRANT_DIR/.expiry-index: the
+    directory is listed only when it changed since the last reap, only
+    grants added or replaced since then are parsed, and elapsed entries are
+    popped off the heap and re-verified (stat signature) before unlinking.
+    A grant rewritten in place without touching the directory keeps its
+    indexed expiry until the next change; load_sentinel_grant_for_task
+    checks expires_at itself, so this only delays the cleanup.
+    """
+    directory = SENTINEL_GRANT_DIR
     count = 0
-    for p in _enumerate_sentinel_grant_files(None):
-        try:
-            with open(p) as f:
-                grant = json.load(f)
-        except Exception:
-            # Malformed grant — also reap.
+    try:
+        if not os.path.isdir(directory):
+            return 0
+        dir_sig, entries = _read_expiry_index(directory)
+        st = os.stat(directory)
+        if dir_sig != (st.st_dev, st.st_ino, st.st_mtime_ns):
+            names = set(_sentinel_index().files(None))
+            entries = {n: e for n, e in entries.items() if n in names}
+            for name in names:
+                path = os.path.join(directory, name)
+                if name in entries:
+                    try:
+                        if _signature(os.stat(path)) == entries[name][1]:
+                            continue
+                    except OSError:
+                        del entries[name]
+                        continue
+                found = _grant_expiry(path)
+                if found is not None:
+                    entries[name] = found
+                else:
+                    entries.pop(name, None)
+        heap = [(exp, name) for name, (exp, _sig) in entries.items()]
+        heapq.heapify(heap)
+        now = time.time()
+        while heap and heap[0][0] < now:
+            _exp, name = heapq.heappop(heap)
+            path = os.path.join(directory, name)
             try:
-                os.unlink(p)
-                count += 1
-            except Exception:
-                pass
-            continue
-        exp = grant.get("expires_at")
-        elapsed = False
-        try:
-            now = time.time()
-            if isinstance(exp, (int, float)) and exp < now:
-                elapsed = True
-            elif isinstance(exp, str):
-                from datetime import datetime
-                s = exp.replace("Z", "+00:00")
-                if datetime.fromisoformat(s).timestamp() < now:
-                    elapsed = True
-        except Exception:
-            elapsed = True
-        if elapsed:
+                current = _signature(os.stat(path))
+            except OSError:
+                entries.pop(name, None)
+                continue
+            if current != entries[name][1]:
+                # Rewritten since it was indexed: re-read before deciding.
+                found = _grant_expiry(path)
+                if found is None:
+                    entries.pop(name, None)
+                    continue
+                entries[name] = found
+                if found[0] >= now:
+                    heapq.heappush(heap, (found[0], name))
+                    continue
             try:
-                os.unlink(p)
+                os.unlink(path)
                 count += 1
             except Exception:
                 pass
+            entries.pop(name, None)
+            _grant_cache.pop(path, None)
+        _write_expiry_index(directory, entries)
+    except Exception:
+        pass
     return count
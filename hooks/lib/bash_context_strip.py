@@ -17,6 +17,11 @@ import os
 import re
 from pathlib import Path
 
+try:
+    from . import shell_lex
+except ImportError:  # run as lib/bash_context_strip.py
+    import shell_lex  # type: ignore
+
 MAX_COMMAND_CHARS = int(os.environ.get("CLAUDE_HOOK_CONTEXT_MAX_CHARS", "262144"))
 _SHELL_INTERPS = {"bash", "sh", "zsh", "dash"}
 _WRAPPER_PREFIXES = {"env", "time", "sudo", "nice", "ionice", "nohup", "timeout", "doas", "run0"}
@@ -24,7 +29,6 @@ _WRAPPER_PREFIXES = {"env", "time", "sudo", "nice", "ionice", "nohup", "timeout"
 _SUDO_OPTS_WITH_ARG = frozenset({"-u", "--user", "-g", "--group", "-C", "--close-from", "-D", "--chdir"})
 # Commands whose arguments are the dangerous payload — do NOT strip their args.
 DANGER_COMMANDS = frozenset({"killall", "pkill", "kill", "rm", "mv"})
-_HEREDOC_RE = re.compile(r"<<-?\s*(['\"]?)([A-Za-z_][A-Za-z0-9_]*)\1")
 _SCRIPT_INTERPS: frozenset[str] = frozenset({
     "python", "python3", "python2",
     "node", "nodejs",
@@ -61,161 +65,6 @@ def _basename(word: str) -> str:
     return Path(word).name
 
 
-def _consume_quoted(s: str, i: int) -> tuple[str, int]:
-    quote = s[i]
-    j = i + 1
-    n = len(s)
-    while j < n:
-        ch = s[j]
-        if ch == "\\" and quote != "'":
-            j = min(j + 2, n)
-            continue
-        if ch == quote:
-            return s[i:j + 1], j + 1
-        j += 1
-    return s[i:n], n
-
-
-def _consume_backtick(s: str, i: int) -> tuple[str, int]:
-    return _consume_quoted(s, i)
-
-
-def _consume_paren(s: str, i: int) -> tuple[str, int]:
-    # i points at '('
-    depth = 0
-    j = i
-    n = len(s)
-    while j < n:
-        ch = s[j]
-        if ch in "'\"`":
-            _, j = _consume_quoted(s, j)
-            continue
-        if ch == "(":
-            depth += 1
-            j += 1
-            continue
-        if ch == ")":
-            depth -= 1
-            j += 1
-            if depth <= 0:
-                return s[i:j], j
-            continue
-        j += 1
-    return s[i:n], n
-
-
-def _consume_dollar(s: str, i: int) -> tuple[str, int]:
-    n = len(s)
-    if i + 1 >= n:
-        return "$", i + 1
-    nxt = s[i + 1]
-    if nxt == "(":
-        span, end = _consume_paren(s, i + 1)
-        return "$" + span, end
-    if nxt == "{":
-        j = i + 2
-        depth = 1
-        while j < n:
-            ch = s[j]
-            if ch in "'\"`":
-                _, j = _consume_quoted(s, j)
-                continue
-            if ch == "{":
-                depth += 1
-            elif ch == "}":
-                depth -= 1
-                if depth == 0:
-                    return s[i:j + 1], j + 1
-            j += 1
-        return s[i:n], n
-    if nxt.isalpha() or nxt == "_":
-        j = i + 2
-        while j < n and (s[j].isalnum() or s[j] == "_"):
-            j += 1
-        return s[i:j], j
-    # Positional/special shell params: $$, $?, $#, $1, etc.
-    return s[i:i + 2], i + 2
-
-
-def _split_top_level(cmd: str) -> list[tuple[str, str]]:
-    parts: list[tuple[str, str]] = []
-    current: list[str] = []
-    sep = ""
-    i = 0
-    n = len(cmd)
-    while i < n:
-        start = i
-        ch = cmd[i]
-        if ch in "'\"":
-            span, i = _consume_quoted(cmd, i)
-            current.append(span)
-        elif ch == "`":
-            span, i = _consume_backtick(cmd, i)
-            current.append(span)
-        elif ch == "$":
-            span, i = _consume_dollar(cmd, i)
-            current.append(span)
-        elif cmd.startswith("&&", i) or cmd.startswith("||", i):
-            parts.append((sep, "".join(current)))
-            sep = cmd[i:i + 2]
-            current = []
-            i += 2
-        elif ch in ";|\n":
-            parts.append((sep, "".join(current)))
-            sep = ch
-            current = []
-            i += 1
-        else:
-            current.append(ch)
-            i += 1
-        if i <= start:
-            # Defensive invariant: scanners must always advance.
-            current.append(cmd[start:start + 1])
-            i = start + 1
-    parts.append((sep, "".join(current)))
-    return parts
-
-
-def _tokenize_segment(segment: str) -> list[tuple[str, str]]:
-    tokens: list[tuple[str, str]] = []
-    i = 0
-    n = len(segment)
-    while i < n:
-        start = i
-        ch = segment[i]
-        if ch in " \t":
-            j = i + 1
-            while j < n and segment[j] in " \t":
-                j += 1
-            tokens.append((segment[i:j], "space"))
-            i = j
-        elif ch == "#":
-            tokens.append((segment[i:], "comment"))
-            i = n
-        elif ch == "'":
-            span, i = _consume_quoted(segment, i)
-            tokens.append((span, "single"))
-        elif ch == '"':
-            span, i = _consume_quoted(segment, i)
-            tokens.append((span, "double"))
-        elif ch == "`":
-            span, i = _consume_backtick(segment, i)
-            tokens.append((span, "subst"))
-        elif ch == "$":
-            span, i = _consume_dollar(segment, i)
-            tokens.append((span, "subst" if span.startswith("$(") else "word"))
-        else:
-            j = i + 1
-            while j < n and segment[j] not in " \t'\"`#$;|&\n":
-                j += 1
-            tokens.append((segment[i:j], "word"))
-            i = j
-        if i <= start:
-            tokens.append((segment[start:start + 1], "word"))
-            i = start + 1
-    return tokens
-
-
 def _find_command_word(tokens: list[tuple[str, str]]) -> int | None:
     idx = 0
     while idx < len(tokens):
@@ -270,11 +119,11 @@ def _strip_double_content(text: str) -> str:
     while i < n:
         start = i
         if inner[i] == "$":
-            span, i = _consume_dollar(inner, i)
+            span, i = shell_lex.consume_dollar(inner, i)
             if span.startswith("$("):
                 out.append(span)
         elif inner[i] == "`":
-            span, i = _consume_backtick(inner, i)
+            span, i = shell_lex.consume_quoted(inner, i)
             out.append(span)
         else:
             i += 1
@@ -285,7 +134,7 @@ def _strip_double_content(text: str) -> str:
 
 
 def _process_segment(segment: str) -> str:
-    tokens = _tokenize_segment(segment.strip())
+    tokens = shell_lex.word_tokens(segment.strip())
     if not tokens:
         return segment.strip()
     cmd_idx = _find_command_word(tokens)
@@ -392,11 +241,11 @@ def _process_script_interp(tokens: list[tuple[str, str]], cmd_idx: int) -> str:
 
 
 def _process_compound(cmd: str) -> str:
-    return "".join(sep + _process_segment(seg) for sep, seg in _split_top_level(cmd))
+    return "".join(sep + _process_segment(seg) for sep, seg in shell_lex.parse(cmd).parts)
 
 
 def _first_word(text: str) -> str:
-    toks = _tokenize_segment(text.strip())
+    toks = shell_lex.word_tokens(text.strip())
     idx = _find_command_word(toks)
     if idx is None:
         return ""
@@ -404,36 +253,22 @@ def _first_word(text: str) -> str:
 
 
 def _process_heredocs(cmd: str) -> str:
-    if "<<" not in cmd:
+    heredocs = shell_lex.parse(cmd).heredocs
+    if not heredocs:
         return cmd
     lines = cmd.split("\n")
-    out: list[str] = []
-    i = 0
-    while i < len(lines):
-        line = lines[i]
-        m = _HEREDOC_RE.search(line)
-        if not m:
-            out.append(line)
-            i += 1
-            continue
-        delim = m.group(2)
-        before = line[:m.start()]
-        after = line[m.end():]
+    for h in heredocs:
+        line = lines[h.line]
+        before = line[:h.start]
+        after = line[h.end:]
         consumer = _first_word(before)
         shell_ctx = consumer in _SHELL_INTERPS or any(
             _first_word(seg) in _SHELL_INTERPS for seg in after.split("|")[1:]
         )
-        out.append(line)
-        i += 1
-        body: list[str] = []
-        while i < len(lines) and lines[i].strip() != delim:
-            body.append(lines[i])
-            i += 1
-        out.extend(body if shell_ctx else ["" for _ in body])
-        if i < len(lines):
-            out.append(lines[i])
-            i += 1
-    return "\n".join(out)
+        if not shell_ctx:
+            for i in range(h.body_start, h.body_end):
+                lines[i] = ""
+    return "\n".join(lines)
 
 
 if __name__ == "__main__":
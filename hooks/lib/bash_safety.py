@@ -0,0 +1,795 @@
+#!/usr/bin/env python3
+"""Native bash-safety rule engine (in-process port of pretool-bash-safety.sh).
+
+pretool-bash-safety.sh forks a python3 for every payload field and a grep per
+rule, so a plain `git status` costs several hundred milliseconds. run() parses
+the payload once and evaluates the same rule set, in the same order, with the
+same stderr/stdout text and exit codes:
+
+  runtime guard (guard_cache) -> /do bypass -> sentinel grant -> /allow grant
+  -> Layers 1.A-1.F -> ABSOLUTE BAN -> Rules -> dangerous git operations
+
+grep semantics are kept deliberately: every pattern is matched line by line
+(grep is line-oriented), and payload fields are read the way `$(python -c
+print(...))` yields them (trailing newlines stripped). The context-strip view
+comes from bash_context_strip in-process instead of a timeout-wrapped child.
+
+The shell script stays authoritative as the fallback: pretool-bash-safety.py
+runs it whenever this module cannot be imported, or when run() raises before
+changing any state. Once run() has consumed a grant or appended to a log, a
+shell re-run would repeat that, so run() raises EngineError instead and the
+hook blocks.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import io
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime, timezone
+
+try:
+    from . import allowlist, bash_context_strip, guard_cache, shell_lex
+except ImportError:  # run as lib/bash_safety.py
+    import allowlist  # type: ignore
+    import bash_context_strip  # type: ignore
+    import guard_cache  # type: ignore
+    import shell_lex  # type: ignore
+
+HOOKS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUNTIME_GUARD_LIB = os.path.join(HOOKS_DIR, "lib", "runtime_guard.py")
+
+DEV_CONTAINERS = ("happy-web-dev",)
+DEV_SYSTEMD: tuple[str, ...] = ()
+
+BLOCK = 2
+
+# Bumped by every state change run() makes (log append, grant unlink).
+_state_changes = 0
+
+
+class EngineError(Exception):
+    """run() failed after it had already changed state."""
+
+
+def _env(name: str, default: str) -> str:
+    """`${NAME:-default}`: empty counts as unset."""
+    return os.environ.get(name) or default
+
+
+def _rx(pattern: str, flags: int = 0) -> re.Pattern:
+    return re.compile(pattern, flags)
+
+
+def _grep(rx: re.Pattern, text: str) -> bool:
+    """`echo "$text" | grep -qE`: a match on any single line."""
+    return any(rx.search(line) for line in text.split("\n"))
+
+
+def _grep_o_first(rx: re.Pattern, text: str):
+    """`grep -oE ... | head -1`: first match in line order, or None."""
+    for line in text.split("\n"):
+        m = rx.search(line)
+        if m:
+            return m
+    return None
+
+
+def _field(payload, getter) -> str:
+    """A payload field as `$(python -c "...print(...)")` yields it."""
+    try:
+        return str(getter(payload)).rstrip("\n")
+    except Exception:
+        return ""
+
+
+def _session_id(payload) -> str:
+    sid = _field(payload, lambda d: d.get("session_id", "")
+                 or os.environ.get("CLAUDE_SESSION_ID", "default"))
+    return sid or "default"
+
+
+def _timestamp() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
+def _append(path: str, line: str) -> None:
+    global _state_changes
+    _state_changes += 1
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a", encoding="utf-8", errors="surrogateescape") as fh:
+            fh.write(line + "\n")
+    except OSError:
+        pass
+
+
+def _approve(out, reason: str) -> None:
+    out.write(json.dumps({"hookSpecificOutput": {
+        "hookEventName": "PreToolUse",
+        "permissionDecision": "allow",
+        "permissionDecisionReason": reason,
+    }}) + "\n")
+
+
+# ── Protected-runtime guard ─────────────────────────────────────────────────
+
+_FAIL_CLOSED_RES = tuple(_rx(p, re.I) for p in (
+    r"(^|[;&|]|\s)(systemctl|service)\s+(start|stop|restart|try-restart|reload|reload-or-restart|kill|disable|mask|enable)(\s|$)",
+    r"(^|[;&|]|\s)(kill|pkill|killall)(\s|$)",
+    r"(^|[;&|]|\s)(yarn|npm|pnpm|bun)(\s|$)",
+    r"(^|[;&|]|\s)(npx|bunx|tsc|pkgroll|tsup)(\s|$)",
+    r"(^|[;&|]|\s)(node|nodejs|tsx|deno)(\s|$)",
+))
+
+
+def _runtime_guard_verdict(payload) -> tuple[str, str]:
+    """(verdict, stderr) exactly as guard_cache.py's CLI would report them."""
+    if not os.path.isfile(RUNTIME_GUARD_LIB):
+        return "MISSING", ""
+    try:
+        tool_input = payload.get("tool_input") or {}
+        command = tool_input.get("command", "")
+        cwd_base = tool_input.get("cwd") or os.environ.get("CLAUDE_GUARD_CWD")
+        if not cwd_base:
+            try:
+                cwd_base = os.getcwd()
+            except OSError:
+                cwd_base = None
+        decision, primitive, reason = guard_cache.cached_evaluate(command, cwd_base)
+    except Exception:
+        return "", ""
+    if decision == "BLOCK":
+        return "BLOCK", f"[protected-runtime-guard] BLOCK {primitive}: {reason}\n"
+    return "ALLOW", ""
+
+
+# ── C3: daemon-restart grant channel ────────────────────────────────────────
+
+_DAEMON_TARGETS = {
+    "happy-daemon-dev": "dev",
+    "happy-daemon-jade": "jade",
+    "happy-daemon-qijie": "qijie",
+    "happy-daemon": "default",
+}
+
+
+def _try_consume_daemon_grant(flag_file: str, lock_file: str, target: str, sid: str) -> tuple:
+    """flock + read + validate + unlink; returns (outcome, *details)."""
+    import fcntl
+    import signal
+
+    def _alarm(signum, frame):
+        raise TimeoutError("parse timeout")
+
+    lock_fd = None
+    try:
+        lock_fd = os.open(lock_file, os.O_CREAT | os.O_RDWR, 0o600)
+        attempts = 0
+        while True:
+            try:
+                fcntl.flock(lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                break
+            except BlockingIOError:
+                attempts += 1
+                if attempts >= 3:
+                    return ("BLOCKED_LOCK",)
+                time.sleep(0.1)
+
+        if not os.path.exists(flag_file):
+            return ("NO_FLAG",)
+
+        old = signal.signal(signal.SIGALRM, _alarm)
+        signal.alarm(1)
+        try:
+            with open(flag_file) as fh:
+                data = json.load(fh)
+        except Exception:
+            return ("NO_FLAG",)
+        finally:
+            signal.alarm(0)
+            signal.signal(signal.SIGALRM, old)
+
+        grant_target = data.get("target", "")
+        expires_at = data.get("expires_at", "")
+        grant_sid = data.get("session_id", "")
+
+        if grant_target != target and grant_target != "all":
+            return ("TARGET_MISMATCH", grant_target, target)
+        try:
+            exp = datetime.fromisoformat(expires_at.replace("Z", "+00:00"))
+            if exp.tzinfo is None:
+                exp = exp.replace(tzinfo=timezone.utc)
+            if exp <= datetime.now(timezone.utc):
+                return ("EXPIRED", expires_at)
+        except Exception:
+            return ("EXPIRED", expires_at)
+        if grant_sid and grant_sid != "no-active-session" and grant_sid != sid:
+            return ("SESSION_MISMATCH", grant_sid, sid)
+
+        global _state_changes
+        _state_changes += 1
+        try:
+            os.unlink(flag_file)
+        except FileNotFoundError:
+            pass
+        return ("CONSUMED", grant_target, expires_at, grant_sid)
+    except Exception as e:
+        return ("ERROR", str(e))
+    finally:
+        if lock_fd is not None:
+            try:
+                fcntl.flock(lock_fd, fcntl.LOCK_UN)
+            except Exception:
+                pass
+            try:
+                os.close(lock_fd)
+            except Exception:
+                pass
+
+
+def consume_daemon_restart_grant(payload, unit: str, verb: str, err) -> bool:
+    """check_and_consume_daemon_restart_grant: True when a grant was consumed."""
+    target = _DAEMON_TARGETS.get(unit, "")
+    if not target:
+        return False
+    sid = _session_id(payload)
+    audit_log = _env("CLAUDE_DAEMON_RESTART_AUDIT_LOG",
+                     os.path.join(os.environ.get("HOME", ""), ".claude", "logs",
+                                  "claude-daemon-restart-grants.log"))
+    with contextlib.suppress(OSError):
+        os.makedirs(os.path.dirname(audit_log), exist_ok=True)
+
+    grant_dir = _daemon_grant_dir()
+    flag_file = f"{grant_dir}/claude-allow-daemon-restart-{target}.flag"
+    flag_all = f"{grant_dir}/claude-allow-daemon-restart-all.flag"
+    if not os.path.isfile(flag_file) and os.path.isfile(flag_all):
+        flag_file = flag_all
+    if not os.path.isfile(flag_file):
+        return False
+
+    result = _try_consume_daemon_grant(flag_file, f"{flag_file}.lock", target, sid)
+    record = {
+        "ts": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "sid": sid, "target": target, "unit": unit, "verb": verb,
+    }
+    if result[0] == "CONSUMED":
+        _, grant_target, expires, grant_sid = result
+        record.update(outcome="consumed", grant_target=str(grant_target),
+                      grant_session_id=str(grant_sid), grant_expires_at=str(expires))
+    else:
+        record["outcome"] = result[0].lower()
+    record["source"] = "pretool-bash-safety"
+    _append(audit_log, json.dumps(record, separators=(",", ":")))
+    if result[0] != "CONSUMED":
+        return False
+    err.write(f"[daemon-restart-grant] consumed grant for target={target} unit={unit} verb={verb}\n")
+    return True
+
+
+def _daemon_grant_dir() -> str:
+    tmpdir = _env("CLAUDE_TMPDIR", _env("TMPDIR", "/tmp"))
+    grant_dir = _env("CLAUDE_DAEMON_RESTART_GRANT_DIR", tmpdir)
+    return grant_dir[:-1] if grant_dir.endswith("/") else grant_dir
+
+
+# ── /allow grants ───────────────────────────────────────────────────────────
+
+def _consent_log() -> str:
+    return os.path.join(os.environ.get("HOME", ""), ".claude", "logs", "bash-consent.log")
+
+
+def _sentinel_query(task_id: str, command: str) -> str:
+    try:
+        with contextlib.redirect_stderr(io.StringIO()):
+            if allowlist.load_sentinel_grant_for_task(task_id) is None:
+                return "SENTINEL_NONE"
+            if allowlist.match_sentinel_grant_for_bash_command(task_id, command) is not None:
+                return "SENTINEL_OK"
+            return "SENTINEL_EXISTS_NO_MATCH"
+    except Exception:
+        return ""
+
+
+def check_and_consume_allowlist(payload, command: str, is_subagent: str, out, err) -> bool:
+    """Legacy one-shot /allow match; True when the call is approved."""
+    if is_subagent == "1":
+        return False
+    sid = _session_id(payload)
+    if not os.path.isfile(f"/tmp/claude-bash-allowlist-{sid}.json"):
+        return False
+    try:
+        result = allowlist.match_grant_for_bash_command(command, sid)
+    except Exception:
+        return False
+    if result is None:
+        return False
+    pattern, is_regex = result.pattern, "1" if result.is_regex else "0"
+    matched_sub = result.matched_sub.rstrip("\n")
+    _append(_consent_log(), f"{_timestamp()} sid={sid} CONSUMED pattern='{pattern}' "
+                            f"is_regex={is_regex} matched_subcmd='{matched_sub}' full_cmd='{command}'")
+    err.write(f"[allow] Grant matched for pattern='{pattern}' (matched subcommand: "
+              f"'{matched_sub}'). consume deferred to PostToolUse. Command will proceed.\n")
+    _approve(out, "/allow consumed for pattern=" + repr(pattern)
+             + " matched_subcmd=" + repr(matched_sub))
+    return True
+
+
+# ── Layer 1.F: bulk-commit sentinel ─────────────────────────────────────────
+
+_BULK_CANONICAL_RE = _rx(r"source\s+venv/bin/activate\s*&&\s*python3?\s+"
+                         r"/root/\.claude/scripts/write-bulk-commit-sentinel\.py")
+_BULK_MARKERS = ("/tmp/claude-bulk-commit-sentinel-", "write-bulk-commit-sentinel.py",
+                 "userprompt-bulk-commit-capability.py")
+_COMPOUND_TOKENS = {";", "&&", "||", "|", "&", "|&", ";;"}
+_RECURSIVE_SHELLS = {"bash", "sh", "zsh", "dash", "python", "python3", "node", "perl", "ruby"}
+_SHELL_KEYWORDS = {"if", "then", "else", "elif", "fi", "for", "while",
+                   "until", "do", "done", "case", "esac", "function", "select"}
+_REDIRECT_TOKENS = {">", ">>", "<", "<>", ">|", "&>", "&>>", ">&", "<&", "<<", "<<-", "<<<"}
+_WRITE_ACTION_FLAGS = {"-exec", "-execdir", "-delete", "-ok", "-okdir",
+                       "-fprint", "-fprint0", "-fprintf", "-fls"}
+_PURE_READ_VERBS = {"ls", "stat", "cat", "file", "wc", "head", "tail",
+                    "grep", "jq", "find", "test", "["}
+_PROTECTED_SCRIPTS = ("write-bulk-commit-sentinel.py", "userprompt-bulk-commit-capability.py")
+_SENTINEL_PATH = "/tmp/claude-bulk-commit-sentinel-"
+_C_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "a": "\a", "b": "\b",
+              "f": "\f", "v": "\v", "\\": "\\", "'": "'", '"': '"'}
+_C_ESCAPE_RE = _rx(r"\\(?:x[0-9a-fA-F]{2}|U[0-9a-fA-F]{8}|u[0-9a-fA-F]{4}|0[0-7]{1,3}|[0-7]{1,3}|[ntrabfv\\'\"])")
+
+
+def _normalize_ansic_token(s: str):
+    """Decode ANSI-C escapes shlex leaves unexpanded; None on decode error."""
+    def _repl(m):
+        g = m.group(0)
+        if g[1] in "xUu":
+            return chr(int(g[2:], 16))
+        if g[1] == "0":
+            return chr(int(g[2:], 8))
+        if g[1] in "1234567":
+            return chr(int(g[1:], 8))
+        return _C_ESCAPES.get(g[1], g)
+    try:
+        return _C_ESCAPE_RE.sub(_repl, s)
+    except Exception:
+        return None
+
+
+def bulk_decision(cmd: str) -> str:
+    """PURE_READ | DENY | TOKENIZER_ERROR for a command naming the bulk sentinel."""
+    tokens = shell_lex.punct_words(cmd)
+    if tokens is None:
+        return "TOKENIZER_ERROR"
+    if "\n" in cmd or shell_lex.parse(cmd).has_active_substitution:
+        return "DENY"
+    if any(t in _COMPOUND_TOKENS for t in tokens):
+        return "DENY"
+    for i, t in enumerate(tokens):
+        if t in _RECURSIVE_SHELLS and i + 1 < len(tokens):
+            nxt = tokens[i + 1]
+            if nxt in ("-c", "-e") or re.match(r"^-[a-zA-Z]*[ce][a-zA-Z]*$", nxt):
+                return "DENY"
+    for i, t in enumerate(tokens):
+        if t in ("eval", "source", ".") and (i == 0 or tokens[i - 1] in _COMPOUND_TOKENS):
+            return "DENY"
+    if tokens and re.match(r"^[A-Za-z_][A-Za-z0-9_]*=", tokens[0]):
+        return "DENY"
+    if any(t in _SHELL_KEYWORDS for t in tokens) or "xargs" in tokens:
+        return "DENY"
+    if any(t in _REDIRECT_TOKENS for t in tokens) or "tee" in tokens:
+        return "DENY"
+    for t in tokens:
+        stripped = t.replace("$", "")
+        if t in _WRITE_ACTION_FLAGS or stripped in _WRITE_ACTION_FLAGS:
+            return "DENY"
+        decoded = _normalize_ansic_token(stripped)
+        if decoded is None or decoded in _WRITE_ACTION_FLAGS:
+            return "DENY"
+
+    protected_standalone = protected_in_arg = False
+    for t in tokens:
+        for ps in _PROTECTED_SCRIPTS:
+            if t == ps or t.endswith("/" + ps):
+                protected_standalone = True
+            elif ps in t:
+                protected_in_arg = True
+        if t.startswith(_SENTINEL_PATH) and not any(c in t[len(_SENTINEL_PATH):] for c in " \t"):
+            protected_standalone = True
+        elif _SENTINEL_PATH in t:
+            protected_in_arg = True
+    if protected_in_arg and not protected_standalone:
+        return "PURE_READ"
+    if tokens and tokens[0] == "git":
+        return "PURE_READ"
+    if tokens and tokens[0] in _PURE_READ_VERBS:
+        return "PURE_READ"
+    return "DENY"
+
+
+_BULK_TOKENIZER_MSG = (
+    "BLOCKED: bulk-commit-sentinel-write — Bash command failed tokenization (likely unterminated quote) — FORBIDDEN (fail-closed)",
+    "Command: {cmd}",
+    "REASON: per task 20260526-053746 AC-08, the shlex tokenizer raised ValueError",
+    "        while parsing this command. Per codex iter-2 C11, the helper exhausts",
+    "        list(lex) inside try/except ValueError and fails CLOSED (deny, not allow).",
+)
+_BULK_DENY_MSG = (
+    "BLOCKED: bulk-commit-sentinel-write — Bash command references protected bulk sentinel path OR sentinel-writer script (write-bulk-commit-sentinel.py) in a compound or write context — FORBIDDEN",
+    "Command: {cmd}",
+    "REASON: per task 20260526-053746 (fix for prior cycle 20260525-095242 ANSI-C bypass +",
+    "        over-blocking regressions), the compound/write detector now uses Python",
+    "        shlex.shlex(posix=True, punctuation_chars=True) tokenization. Any",
+    "        shell control structure (; && || | & |& $() backtick <(...) >(...) <<HEREDOC",
+    "        newline shell-keyword), recursive shell (-c/-e/eval/source), variable assignment,",
+    "        or write-surface operator (xargs, find -exec/-delete/-execdir/-ok/-okdir/-fprint*/-fls",
+    "        — including ANSI-C-quoted forms like $'-fpr''int' which shlex reassembles,",
+    "        > >> tee) causes the command to be denied. Only a single bare 'ls|stat|cat|file|wc|",
+    "        head|tail|grep|jq|find|test|[' invocation of the protected path (with NO compound",
+    "        shape) is allowed for inspection. The official sentinel-writer scripts/write-bulk-",
+    "        commit-sentinel.py is allowed ONLY as a bare invocation (STARTS-WITH match —",
+    "        comment-spoof and compound-with-script forms are denied).",
+)
+
+
+# ── Rule table ──────────────────────────────────────────────────────────────
+
+_SYSTEMCTL_VERBS_RE = _rx(r"systemctl\s+(stop|restart|disable|enable|reload|kill|try-restart|reload-or-restart)(\s+|\b)")
+# Longest alternative first: grep -o is leftmost-longest, Python is leftmost-first.
+_SYSTEMCTL_VERB_O_RE = _rx(r"systemctl\s+(stop|restart|disable|enable|reload-or-restart|reload|kill|try-restart)")
+_HAPPY_DAEMON_RE = _rx(r"happy-daemon")
+_HAPPY_UNIT_O_RE = _rx(r"happy-daemon(-(dev|jade|qijie))?")
+_WRAPPER_VERB_RE = _rx(r"(restart|stop|disable|enable|reload|kill|try-restart|reload-or-restart|kick|cycle|bounce|hup|HUP)")
+_WRAPPER_RE = _rx(r"(systemd-run|^|\s)((at|batch)\s|crontab\s|nohup\s|disown\s|watch\s|timeout\s|dbus-send|busctl|nc\s|ncat\s|eval\s|bash\s+-c|sh\s+-c|zsh\s+-c|python3?\s+-c|node\s+-[ce]|perl\s+-e|ruby\s+-e)")
+_TMP_SCRIPT_RE = _rx(r"(^|[;&|]\s*)(bash|sh|zsh)\s+(/tmp/|/var/tmp/|/dev/shm/)[^\s;&|]+\.sh")
+_HTTP_CLIENT_RE = _rx(r"(curl|wget|nc\s|ncat|http\.client|aiohttp|requests)")
+_HTTP_STOP_RE = _rx(r"(localhost|127\.0\.0\.1):[0-9]+/stop")
+_SENTINEL_WRITE_VERB_RE = _rx(r"(>|>>|tee|cp|mv|ln|touch|cat\s)")
+
+_SESSION_DIRS_RE = _rx(r"session_dirs\.txt")
+_SESSION_RECOVERY_RE = _rx(r"happy-session-recovery")
+_HAPPY_RESTART_RE = _rx(r"happy-restart")
+
+_SENSITIVE_TO_RE = _rx(r"(>|>>)\s*\S*(\.env|credentials|secret|password)")
+_SENSITIVE_FROM_RE = _rx(r"(\.env|credentials|secret|password)\S*\s*(>|>>)")
+_DOCKER_DAEMON_RE = _rx(r"systemctl\s+(restart|stop|disable)\s+docker")
+_DOCKER_CONFIG_RE = _rx(r"(>|>>|tee|cp|mv|sed|awk)\s.*/etc/docker/daemon\.json")
+_DOCKER_HAPPY_RE = _rx(r"docker\s+(stop|restart|rm|kill)\s+.*happy")
+_DOCKER_ACTION_RE = _rx(r"docker\s+(stop|restart|rm|kill)\s")
+_DOCKER_ARGS_RE = _rx(r".*docker\s+(stop|restart|rm|kill)\s+")
+_SYSTEMCTL_ACTION_RE = _rx(r"systemctl\s+(stop|restart)\s")
+_SYSTEMCTL_ARGS_RE = _rx(r".*systemctl\s+(stop|restart)\s+")
+_COMPOSE_RE = _rx(r"docker.compose\s+(down|restart|stop)")
+_PRUNE_RE = _rx(r"docker\s+system\s+prune\s+-a")
+_DISK_RE = _rx(r"^\s*(dd|mkfs|fdisk|shred)\b")
+_KILLALL_RE = _rx(r"(killall|pkill)\s+.*(happy|claude|docker)")
+_KILL_SIGNAL_RE = _rx(r"(^|[ \t;|&])(kill)[ \t]+-")
+_RM_MV_RE = _rx(r"(rm|mv)\s")
+_WORKFLOW_PATH_RE = _rx(r"(workflow-[^/]*\.json|\.claude/todos/)")
+_RM_RE = _rx(r"(^|[ \t;|&(])rm\s")
+_DOCKER_RM_RE = _rx(r"docker\s+rm\s")
+_NPM_GLOBAL_RES = (_rx(r"npm\s+(install|i)\s+.*(-g|--global)"), _rx(r"npm\s+(install|i)\s+-g"))
+_KILL_PID_RE = _rx(r"(^|[;&|]\s*)kill\s+[0-9]")
+
+_STASH_PUSH_RES = (_rx(r"git\s+stash\s+(push|save|create|store|-u|--include-untracked|-a|--all)\b"),
+                   _rx(r"git\s+stash\s+-[ua]+\b"))
+_STASH_BARE_RE = _rx(r"git\s+stash\s*($|[;&|])")
+_CHECKOUT_WIDE_RE = _rx(r"git\s+checkout\s+\S+\s+--\s+(\.|\*|[^ ]+/)\s*($|[;&|])")
+_RESTORE_RE = _rx(r"git\s+restore\b")
+_RESTORE_SOURCE_RE = _rx(r"(--source\b|-s\b)")
+_RESTORE_WIDE_RE = _rx(r"--\s+(\.|\*|[^ /]+/)\s*($|[;&|])")
+_GIT_GLOBAL_OPT = (r"(\s+(-[Cc]\s+[^\s;|&]+|-[Cc][^\s;|&]+|--(git-dir|work-tree|namespace|exec-path|super-prefix|config-env)"
+                   r"(=[^\s;|&]+|\s+[^\s;|&]+)|--(bare|no-pager|paginate|no-replace-objects|literal-pathspecs|glob-pathspecs"
+                   r"|noglob-pathspecs|icase-pathspecs|no-optional-locks)|-[pP]))*")
+_GIT_CMD = r"(^|[\s;&|()`])git" + _GIT_GLOBAL_OPT + r"\s+"
+_RESET_HARD_RE = _rx(_GIT_CMD + r"reset\s+([^;|&]*\s+)?--hard\b")
+_PUSH_RE = _rx(_GIT_CMD + r"push\b")
+_PUSH_FORCE_RE = _rx(r"(^|\s)(--force|-f|--force-with-lease(=[^\s]+)?|--delete|-d|--mirror)(\s|$)|\s\+[^\s]|\s:[^\s]")
+_REF_MUTATION_RE = _rx(_GIT_CMD + r"(update-ref\b|branch\s+(-[fDdMm]+|--delete|--force|--move)\b"
+                       r"|symbolic-ref(\s+-m(\s+[^\s;|&]+|[^\s;|&]*))*\s+HEAD\s+refs/)")
+_SUBAGENT_HISTORY_RE = _rx(r"git\s+(revert|cherry-pick|rebase)(\s|$)")
+_REVERT_RE = _rx(r"git\s+revert\s+")
+_REVERT_REF_RES = (_rx(r"git\s+revert\s+(\S+\s+)*[0-9a-f]{7,40}\b"),
+                   _rx(r"git\s+revert\s+(\S+\s+)*\S+\^+"),
+                   _rx(r"git\s+revert\s+(\S+\s+)*\S+~[0-9]*"),
+                   _rx(r"git\s+revert\s+(\S+\s+)*\S+@\{[0-9]+\}"))
+
+
+def _subcommands(cmd: str) -> list[str]:
+    """`sed 's/&&/\\n/g; s/||/\\n/g; s/;/\\n/g'`, one entry per line."""
+    return cmd.replace("&&", "\n").replace("||", "\n").replace(";", "\n").split("\n")
+
+
+def _targets_all_dev(cmd: str, action_rx, args_rx, whitelist, suffix: str = "") -> bool:
+    """check_docker_targets_all_dev / check_systemctl_targets_all_dev."""
+    for sub in _subcommands(cmd):
+        if not action_rx.search(sub):
+            continue
+        args = args_rx.sub("", sub, count=1)
+        for arg in re.split(r"[ \t\n]+", args):
+            if not arg or arg.startswith("-"):
+                continue
+            if suffix and arg.endswith(suffix):
+                arg = arg[:-len(suffix)]
+            if arg not in whitelist:
+                return False
+    return True
+
+
+def _strip_comments(cmd: str) -> str:
+    """`echo "$cmd" | sed 's/#.*$//'` captured by `$(...)`."""
+    return "\n".join(line.split("#", 1)[0] for line in cmd.split("\n")).rstrip("\n")
+
+
+def _context_stripped(cmd: str) -> str:
+    try:
+        return bash_context_strip.strip_non_executable_contexts(cmd).rstrip("\n")
+    except Exception:
+        return cmd
+
+
+def _rules(cmd: str, stripped: str, is_subagent: str, payload) -> list[str] | None:
+    """ABSOLUTE BAN, Rules and dangerous-git checks; block lines or None."""
+    cmd_line = f"Command: {cmd}"
+    if _grep(_SESSION_DIRS_RE, cmd):
+        return ["BLOCKED: session_dirs.txt is PERMANENTLY FORBIDDEN — never read, write, or reference this file",
+                cmd_line,
+                "REASON: On 2026-04-09, editing session_dirs.txt triggered session-watcher full restore and killed ALL production sessions."]
+    if _grep(_SESSION_RECOVERY_RE, cmd):
+        return ["BLOCKED: happy-session-recovery.sh is PERMANENTLY FORBIDDEN", cmd_line,
+                "REASON: This script manages critical session state. Only the user may run it manually."]
+    if _grep(_HAPPY_RESTART_RE, cmd):
+        return ["BLOCKED: happy-restart.sh is PERMANENTLY FORBIDDEN", cmd_line,
+                "REASON: This script restarts daemons and can kill all sessions. Only the user may run it manually."]
+
+    if _grep(_SENSITIVE_TO_RE, cmd):
+        return ["BLOCKED: Attempting to write to sensitive file via Bash", cmd_line,
+                "Edit sensitive files manually — never via AI-driven Bash redirection."]
+    if _grep(_SENSITIVE_FROM_RE, cmd):
+        return ["BLOCKED: Attempting to redirect from/to sensitive file via Bash", cmd_line,
+                "Edit sensitive files manually — never via AI-driven Bash redirection."]
+    if _grep(_DOCKER_DAEMON_RE, cmd):
+        return ["BLOCKED: Docker daemon operations are forbidden", cmd_line]
+    if _grep(_DOCKER_CONFIG_RE, cmd):
+        return ["BLOCKED: Modifying Docker daemon config is forbidden", cmd_line]
+    if _grep(_DOCKER_HAPPY_RE, cmd) and not _targets_all_dev(
+            cmd, _DOCKER_ACTION_RE, _DOCKER_ARGS_RE, DEV_CONTAINERS):
+        return ["BLOCKED: Stopping/restarting production happy containers is forbidden", cmd_line,
+                f"Hint: only {' '.join(DEV_CONTAINERS)} is allowed."]
+    if _grep(_COMPOSE_RE, cmd):
+        return ["BLOCKED: docker-compose down/stop/restart is forbidden", cmd_line]
+    if _grep(_PRUNE_RE, cmd):
+        return ["BLOCKED: docker system prune -a is forbidden", cmd_line]
+    if _grep(_DISK_RE, stripped):
+        return ["BLOCKED: Destructive disk operation detected", cmd_line]
+    if _grep(_KILLALL_RE, stripped):
+        return ["BLOCKED: Killing happy/claude/docker processes is forbidden", cmd_line]
+    if _grep(_KILL_SIGNAL_RE, stripped):
+        return ["BLOCKED: kill with signals is forbidden — use graceful shutdown methods", cmd_line]
+    if (_grep(_SYSTEMCTL_VERBS_RE, cmd) and not _grep(_HAPPY_DAEMON_RE, cmd)
+            and not _targets_all_dev(cmd, _SYSTEMCTL_ACTION_RE, _SYSTEMCTL_ARGS_RE,
+                                     DEV_SYSTEMD, suffix=".service")):
+        return ["BLOCKED: systemctl stop/restart/disable/enable/reload/kill/try-restart/reload-or-restart is forbidden for production services",
+                cmd_line,
+                f"Hint: only {' '.join(DEV_SYSTEMD)} is allowed (and happy-daemon-* is gated by Layer 1.A)."]
+    if _grep(_RM_MV_RE, stripped) and _grep(_WORKFLOW_PATH_RE, cmd):
+        return ["BLOCKED: Deleting/moving workflow state files is forbidden", cmd_line,
+                "These files are required by the workflow enforcement system."]
+    if _grep(_RM_RE, stripped) and not _grep(_DOCKER_RM_RE, cmd):
+        return ["BLOCKED: rm is forbidden — delete files manually or ask the user", cmd_line]
+    no_comments = _strip_comments(cmd)
+    if any(_grep(rx, no_comments) for rx in _NPM_GLOBAL_RES):
+        return ["BLOCKED: npm install -g is FORBIDDEN from this environment", cmd_line,
+                "REASON: A global install can replace a shared binary and disrupt running processes.",
+                "Install locally, or ask the user to perform any global install manually."]
+    if _grep(_KILL_PID_RE, stripped):
+        return ["BLOCKED: kill with PIDs is FORBIDDEN — verify the target is safe before killing", cmd_line,
+                "REASON: Killing a PID can cascade to unrelated processes. Use a scoped restart instead."]
+
+    if any(_grep(rx, cmd) for rx in _STASH_PUSH_RES):
+        return ["BLOCKED: 'git stash push/save/create/store/-u/--all' requires explicit user approval", cmd_line,
+                "REASON: On 2026-04-19, a dev subagent used 'git stash' as a throwaway buffer",
+                "before running a destructive 'git checkout <hash> -- .', silently erasing 17 days",
+                "of UI work. Stash+checkout is a known-dangerous combo in subagent hands.",
+                "-u/--include-untracked/-a/--all forms include untracked/ignored files — more destructive.",
+                "Tell the user what you want to do and ask them to run it, or use commit/branch."]
+    if _grep(_STASH_BARE_RE, cmd):
+        return ["BLOCKED: bare 'git stash' (implicit push) requires explicit user approval", cmd_line,
+                "REASON: See 2026-04-19 incident — stash is often paired with destructive checkout.",
+                "Safe stash subcommands are exempt: list, show, pop, apply, drop, clear, branch."]
+    if _grep(_CHECKOUT_WIDE_RE, cmd):
+        return ["BLOCKED: 'git checkout <ref> -- .' / '-- *' / '-- dir/' requires explicit user approval", cmd_line,
+                "REASON: On 2026-04-19, a dev subagent ran 'git checkout 925f5960 -- .' inside",
+                "packages/happy-app/, overwriting 17 days of UI development with 3-27 baseline.",
+                "Wide-path checkout from a commit is a blunt-force destructive operation.",
+                "Allowed: 'git checkout <ref> -- path/to/specific-file.ts' (single file).",
+                "If you genuinely need a subtree restore, tell the user what you need and why."]
+    if _grep(_RESTORE_RE, cmd) and _grep(_RESTORE_SOURCE_RE, cmd) and _grep(_RESTORE_WIDE_RE, cmd):
+        return ["BLOCKED: 'git restore --source=<ref> -- .' / '-- *' / '-- dir/' requires explicit user approval", cmd_line,
+                "REASON: 'git restore --source=<ref> -- .' is the modern equivalent of",
+                "'git checkout <ref> -- .' (git 2.23+). It overwrites the working tree with historical",
+                "content — same blunt-force destructive operation that erased 17 days of UI work on 2026-04-19.",
+                "Allowed: 'git restore -- path/to/specific-file.ts' (no --source, or specific file).",
+                "If you genuinely need a subtree restore, tell the user what you need and why."]
+    if _grep(_RESET_HARD_RE, cmd):
+        return ["BLOCKED: 'git reset --hard' is forbidden in agent flow", cmd_line,
+                "REASON: shared-repo policy requires non-destructive recovery; hard reset can discard another session's work or index state.",
+                "Use semantic commits, backup recovery refs, or ask the user for a human-run recovery operation."]
+    if _grep(_PUSH_RE, cmd) and _grep(_PUSH_FORCE_RE, cmd):
+        return ["BLOCKED: force/delete/ref-rewrite push is forbidden in agent flow", cmd_line,
+                "REASON: policy allows normal /push branch publication and backup-only recovery refs; force/delete/ref-rewrite pushes can lose remote work."]
+    if _grep(_REF_MUTATION_RE, cmd):
+        return ["BLOCKED: direct git ref mutation is forbidden in agent flow", cmd_line,
+                "REASON: branch movement must go through the expected-parent CAS wrapper; branch delete/force/update-ref is not agent-accessible."]
+
+    if is_subagent == "1":
+        sid = _field(payload, lambda d: d.get("session_id", ""))
+        if sid and os.path.exists(f"/tmp/claude-orchestrator-consent-{sid}.flag"):
+            return []
+        if _grep(_SUBAGENT_HISTORY_RE, cmd):
+            return ["BLOCKED: Subagent-initiated git history mutation is FORBIDDEN (revert|cherry-pick|rebase)", cmd_line,
+                    "Subagents must NEVER mutate git history. Tell the user what you want done",
+                    "and ask them to run the command themselves.",
+                    "Allowed git verbs for subagents: status, log, show, diff, blame, ls-tree, ls-files, branch (read-only), worktree list.",
+                    "(commit|merge|push are blocked by pretool-git-privilege-guard.py)"]
+
+    if _grep(_REVERT_RE, cmd) and any(_grep(rx, cmd) for rx in _REVERT_REF_RES):
+        return ["BLOCKED: 'git revert' with any ref modifier (caret/tilde/reflog/hash) requires explicit user approval", cmd_line,
+                "REASON: On 2026-04-23, a dev subagent ran 'git revert 1204d62' which undid a user-approved",
+                "feature commit (the /spec simplification the user had explicitly endorsed), restoring an",
+                "unwanted 5-step interview state. The user had explicitly forbidden full revert in chat.",
+                "Reverting historical commits without user authorization is destructive — it overrides",
+                "deliberate work that may have been thoroughly reviewed and accepted.",
+                "Safe: 'git revert HEAD' only (bare — no caret, no tilde, no reflog, no branch-ref).",
+                "All other revert forms (HEAD^, HEAD~N, HEAD@{N}, master^, <hash>) are blocked.",
+                "If you genuinely need to revert a historical commit, tell the user the hash and the",
+                "rationale, and ask them to run it manually."]
+    return None
+
+
+# ── Driver ──────────────────────────────────────────────────────────────────
+
+def run(raw: str, out=None, err=None) -> int:
+    """Evaluate one PreToolUse payload; returns the hook exit code.
+
+    Raises EngineError if evaluation fails after a state change, and lets any
+    other exception through (nothing has been changed yet).
+    """
+    mark = _state_changes
+    try:
+        return _evaluate(raw, out, err)
+    except Exception as exc:
+        if _state_changes != mark:
+            raise EngineError(f"{type(exc).__name__}: {exc}") from exc
+        raise
+
+
+def _evaluate(raw: str, out=None, err=None) -> int:
+    out = out or sys.stdout
+    err = err or sys.stderr
+
+    def block(lines) -> int:
+        err.write("".join(line + "\n" for line in lines))
+        return BLOCK
+
+    try:
+        payload = json.loads(raw)
+    except ValueError:
+        payload = None
+    is_subagent = _field(payload, lambda d: "1" if d.get("agent_id") else "0")
+    if _field(payload, lambda d: d.get("tool_name", "")) != "Bash":
+        return 0
+    command = _field(payload, lambda d: d.get("tool_input", {}).get("command", ""))
+
+    # Protected-runtime guard: first, unbypassable, fail-closed.
+    verdict, guard_err = _runtime_guard_verdict(payload)
+    if verdict == "BLOCK":
+        err.write(guard_err)
+        return block([
+            "BLOCKED: protected-runtime-guard — this command could restart, hand off, or kill a protected local service, or rebuild/launch its protected package. This block is generic and unbypassable (it runs before /do and /allow).",
+            "If the human operator intends to run it, they must do so from a real terminal — Claude/subagents are never permitted this command."])
+    if verdict != "ALLOW" and any(_grep(rx, command) for rx in _FAIL_CLOSED_RES):
+        return block([
+            f"BLOCKED: protected-runtime-guard FAIL-CLOSED — the guard engine is unavailable or returned no decision (verdict='{verdict}'), and this command is in a protected verb family (service/kill/package-manager/build/runtime). Denied conservatively. A human operator must run it from a real terminal, and the guard deployment ({RUNTIME_GUARD_LIB}) should be repaired."])
+
+    # Main-agent /do bypass.
+    if is_subagent != "1":
+        flag = f"/tmp/claude-orchestrator-consent-{_session_id(payload)}.flag"
+        try:
+            with open(flag, "rb") as fh:
+                if fh.read().rstrip(b"\n") == b"true":
+                    return 0
+        except OSError:
+            pass
+
+    # Structured sentinel grant, then the legacy /allow short-circuit.
+    sentinel_exists = False
+    task_id = os.environ.get("CLAUDE_TASK_ID") or _field(
+        payload, lambda d: d.get("session_id", "") or os.environ.get("CLAUDE_SESSION_ID", "default"))
+    query = _sentinel_query(task_id, command) if task_id else ""
+    if query == "SENTINEL_OK":
+        _append(_consent_log(), f"{_timestamp()} task={task_id} SENTINEL_GRANT_MATCHED command='{command}'")
+        err.write(f"[allow-sentinel] structured grant matched for task={task_id}. "
+                  "consume-on-any-terminal-result deferred to PostToolUse.\n")
+        _approve(out, "/allow sentinel grant consumed (structured allowed_operations[] match)")
+        return 0
+    if query == "SENTINEL_EXISTS_NO_MATCH":
+        sentinel_exists = True
+        err.write(f"[allow-sentinel] sentinel exists for task={task_id} but command did not match "
+                  "allowed_operations[] — legacy /allow path suppressed for this Bash call (AC2 invariant).\n")
+    if not sentinel_exists and check_and_consume_allowlist(payload, command, is_subagent, out, err):
+        return 0
+
+    cmd_line = f"Command: {command}"
+    # Layer 1.A — daemon-restart prohibition.
+    if _grep(_SYSTEMCTL_VERBS_RE, command) and _grep(_HAPPY_DAEMON_RE, command):
+        m = _grep_o_first(_HAPPY_UNIT_O_RE, command)
+        unit = m.group(0) if m else ""
+        m = _grep_o_first(_SYSTEMCTL_VERB_O_RE, command)
+        verb = m.group(1) if m else ""
+        if not (unit and consume_daemon_restart_grant(payload, unit, verb, err)):
+            return block([
+                f"BLOCKED: daemon-restart-prohibition — systemctl {verb or '<verb>'} on {unit or 'happy-daemon-*'} is FORBIDDEN",
+                cmd_line,
+                "REASON: per c3-20260504-223115, Claude must NEVER restart any happy-daemon-* by any path.",
+                "Hint: user must run /root/bin/claude-allow-restart <target> from a real TTY first."])
+
+    # Layer 1.B — wrapper-class block.
+    if (_grep(_HAPPY_DAEMON_RE, command) and _grep(_WRAPPER_VERB_RE, command)
+            and _grep(_WRAPPER_RE, command)):
+        return block([
+            "BLOCKED: daemon-restart-wrapper — wrapper invocation co-occurring with daemon-restart vocabulary is FORBIDDEN",
+            cmd_line,
+            "REASON: per c3-20260504-223115, indirect daemon-restart paths (systemd-run/at/crontab/nohup/",
+            "        timeout/dbus-send/nc/eval/bash -c/python -c) are all forbidden. Use the user-only",
+            "        /root/bin/claude-allow-restart grant channel instead."])
+
+    # Layer 1.C — disposable wrapper script on disk.
+    if _grep(_TMP_SCRIPT_RE, command):
+        return block([
+            "BLOCKED: daemon-restart-wrapper — bash invocation of disposable wrapper script is FORBIDDEN",
+            cmd_line,
+            "REASON: per c3-20260504-223115, wrapper scripts under /tmp/, /var/tmp/, /dev/shm/ can be a",
+            "        durable bypass surface for daemon-restart. Run commands inline or via tracked scripts."])
+
+    # Layer 1.D — daemon HTTP /stop.
+    if _grep(_HTTP_CLIENT_RE, command) and _grep(_HTTP_STOP_RE, command):
+        return block([
+            "BLOCKED: daemon-restart-http-stop — HTTP /stop on a localhost port is FORBIDDEN",
+            cmd_line,
+            "REASON: per c3-20260504-223115, the daemon HTTP /stop endpoint is the only documented",
+            "        use of /stop on a localhost port; Claude must never trigger it. False-positive risk",
+            "        on other localhost services is accepted by design."])
+
+    # Layer 1.E — grant sentinel write.
+    sentinel_rx = _rx(re.escape(f"{_daemon_grant_dir()}/claude-allow-daemon-restart-") + r"[A-Za-z0-9_-]+\.flag")
+    if _grep(sentinel_rx, command) and _grep(_SENTINEL_WRITE_VERB_RE, command):
+        return block([
+            "BLOCKED: daemon-restart-sentinel-write — writing to grant sentinel is FORBIDDEN",
+            cmd_line,
+            "REASON: per c3-20260504-223115, only /root/bin/claude-allow-restart (run by user from TTY)",
+            "        may create the grant sentinel."])
+
+    stripped = _context_stripped(command)
+
+    # Layer 1.F — bulk-commit sentinel write.
+    if any(marker in command for marker in _BULK_MARKERS):
+        if _BULK_CANONICAL_RE.fullmatch(command):
+            return 0
+        try:
+            decision = bulk_decision(command)
+        except Exception:
+            decision = "DENY"
+        if decision == "TOKENIZER_ERROR":
+            return block([line.format(cmd=command) for line in _BULK_TOKENIZER_MSG])
+        if decision not in ("PURE_READ", "BARE_WRITER"):
+            return block([line.format(cmd=command) for line in _BULK_DENY_MSG])
+
+    lines = _rules(command, stripped, is_subagent, payload)
+    return block(lines) if lines else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(run(sys.stdin.read()))
@@ -81,44 +81,12 @@ from __future__ import annotations
 
 import os
 import re
-from typing import List, Tuple
-
-# Heredoc opener pattern. Captures three groups:
-#   1: dash flag (- means tab-stripped form)
-#   2: optional quote (' or ")
-#   3: delimiter token
-# Examples matched: '<< EOF', '<<EOF', '<<-EOF', "<<'QUOTED'", '<<"QUOTED"'
-_HEREDOC_OPENER_RE = re.compile(r"<<(-?)\s*([\"'])?([A-Za-z_][A-Za-z0-9_]*)\2?")
-
-
-def _detect_heredoc_opener(line: str) -> Tuple[bool, str, bool]:
-    """Return (found, delimiter, dash_form) for the right-most heredoc opener."""
-    matches = list(_HEREDOC_OPENER_RE.finditer(line))
-    if not matches:
-        return (False, "", False)
-    m = matches[-1]
-    return (True, m.group(3), m.group(1) == "-")
-
-
-def _is_heredoc_closer(payload_line: str, delim: str, dash: bool) -> bool:
-    """True if payload_line is the matching delimiter line."""
-    stripped = payload_line.lstrip("\t") if dash else payload_line
-    return stripped.strip() == delim
-
-
-def _skip_heredoc_payload(lines: List[str], start: int, delim: str, dash: bool) -> int:
-    """Advance past heredoc payload lines and the closing delimiter.
-
-    Returns the index of the line AFTER the closing delimiter, or
-    len(lines) if the heredoc is unclosed.
-    """
-    i = start
-    while i < len(lines):
-        if _is_heredoc_closer(lines[i], delim, dash):
-            return i + 1
-        i += 1
-    return i
+from typing import List
 
+try:
+    from . import shell_lex
+except ImportError:  # run as lib/bash_write_targets.py (doctest entrypoint)
+    import shell_lex  # type: ignore
 
 def command_without_heredoc_bodies(command: str) -> str:
     """Return command with heredoc payload lines stripped.
@@ -127,26 +95,13 @@ def command_without_heredoc_bodies(command: str) -> str:
     write-target extraction still sees the redirect; payload lines and
     the closing delimiter line are removed.
 
-    Multiple heredocs in a single command are handled sequentially.
-    Unclosed heredocs (no matching delimiter found) drop all
-    subsequent lines.
+    Multiple heredocs in a single command (or on one opener line) are
+    handled in bash order. Unclosed heredocs (no matching delimiter
+    found) drop all subsequent lines. A '<<<' here-string has no body.
     """
     if not isinstance(command, str):
         return ""
-    if "<<" not in command:
-        return command
-    lines = command.split("\n")
-    out_lines: List[str] = []
-    i = 0
-    while i < len(lines):
-        line = lines[i]
-        out_lines.append(line)
-        found, delim, dash = _detect_heredoc_opener(line)
-        if not found:
-            i += 1
-            continue
-        i = _skip_heredoc_payload(lines, i + 1, delim, dash)
-    return "\n".join(out_lines)
+    return shell_lex.parse(command).without_heredoc_bodies
 
 
 def _resolve_path(token: str) -> str:
@@ -17,9 +17,12 @@
 #     - empty repo:                 ref created as a root commit (no parent)
 #
 # Algorithm (git plumbing only — no `git commit`):
-#   1. read-tree parent tree (or --empty for bootstrap)
-#   2. git add -A  (staged into a TEMP index via GIT_INDEX_FILE)
-#   3. git write-tree  -> TREE_SHA
+#   1. copy the branch's shadow index into a TEMP index (GIT_INDEX_FILE);
+#      without one, read-tree HEAD's tree (or --empty for bootstrap)
+#   2. git add -A  (untracked cache on; only changed files are rehashed)
+#   2b. with a shadow index: reconcile against HEAD so the result equals
+#       read-tree HEAD + add -A (see _checkpoint_reconcile_head)
+#   3. git write-tree  -> TREE_SHA; the TEMP index becomes the shadow index
 #   4. if TREE_SHA == PARENT_TREE_SHA -> return 0 (idempotent)
 #   5. git commit-tree TREE_SHA [-p PARENT_SHA] -m "<msg>"  -> NEW_SHA
 #   6. git update-ref REF NEW_SHA OLD_SHA           (CAS; retries 5x on race)
@@ -55,6 +58,20 @@
 #   - trap EXIT INT TERM HUP removes temp index on any exit path
 #   - If flock is unavailable, falls back to the old CAS-retry loop (and
 #     logs a warning about potential orphan commits under concurrency).
+#
+# Shadow index (incremental snapshots):
+#   <git-dir>/checkpoint-shadow/<sanitized-branch>.index keeps the stat data
+#   and untracked cache of the last snapshot of this worktree + branch, so
+#   `git add -A` only rehashes files whose stat changed (and asks
+#   core.fsmonitor instead of lstat-ing when the repo has it configured).
+#   It is copied into the temp index, never written in
+#   place, so concurrent writers cannot corrupt it; the last writer's index
+#   wins, and any fully refreshed index is a valid cache. HEAD and the real
+#   .git/index are never touched. Shadows unused for 14 days are swept.
+#   The snapshot is the same tree the HEAD seed gives: ignored-but-tracked
+#   files stay, files that became ignored leave (_checkpoint_reconcile_head).
+#   CHECKPOINT_SHADOW_INDEX=0 restores the full read-tree + add -A on
+#   every call.
 # ============================================================================
 
 CHECKPOINT_LOG_DIR="${CHECKPOINT_LOG_DIR:-$HOME/.claude/logs}"
@@ -62,6 +79,7 @@ CHECKPOINT_LOG_FILE="${CHECKPOINT_LOG_DIR}/checkpoint.log"
 CHECKPOINT_PUSH_LOG_FILE="${CHECKPOINT_LOG_DIR}/checkpoint-push.log"
 CHECKPOINT_PUSH_MIN_INTERVAL="${CHECKPOINT_PUSH_MIN_INTERVAL:-30}"  # seconds
 CHECKPOINT_CAS_MAX_RETRIES="${CHECKPOINT_CAS_MAX_RETRIES:-5}"
+CHECKPOINT_SHADOW_INDEX="${CHECKPOINT_SHADOW_INDEX:-1}"  # 0 = rebuild the index every call
 
 # Consecutive-failure alerting (2026-04-16 SaaS-grade ops gap fix).
 # Counter file tracks back-to-back write_checkpoint failures; on the 3rd
@@ -132,7 +150,33 @@ _checkpoint_sweep_stale_indexes() {
     local git_dir="$1"
     if [ -n "$git_dir" ] && [ -d "$git_dir" ]; then
         find "$git_dir" -maxdepth 1 -name 'checkpoint-index.*' -mmin +60 -delete 2>/dev/null || true
+        if [ -d "$git_dir/checkpoint-shadow" ]; then
+            find "$git_dir/checkpoint-shadow" -maxdepth 1 -type f -mtime +14 -delete 2>/dev/null || true
+        fi
+    fi
+}
+
+# Internal: make a reused shadow <index> hold what `read-tree <head_tree>`
+# followed by `add -A` would: put back HEAD entries it lacks that exist in
+# the worktree (ignored files `add -A` will not re-add), and drop ignored
+# entries that are not in HEAD (files that became ignored since they were
+# added).
+_checkpoint_reconcile_head() {
+    local git_cmd="$1"
+    local index="$2"
+    local head_tree="$3"
+    if [ -n "$head_tree" ]; then
+        GIT_INDEX_FILE="$index" $git_cmd diff-index --cached -z --name-only --diff-filter=D "$head_tree" \
+            | GIT_INDEX_FILE="$index" $git_cmd update-index -z --add --remove --stdin || return 1
     fi
+    GIT_INDEX_FILE="$index" $git_cmd ls-files -z -c -i --exclude-standard \
+        | if [ -n "$head_tree" ]; then
+              GIT_INDEX_FILE="$index" xargs -0 -r $git_cmd --literal-pathspecs \
+                  diff-index --cached -z --name-only --diff-filter=A "$head_tree" --
+          else
+              cat
+          fi \
+        | GIT_INDEX_FILE="$index" $git_cmd update-index -z --force-remove --stdin
 }
 
 # Internal: rate-limited background push of the checkpoint ref.
@@ -283,6 +327,11 @@ write_checkpoint() {
     # working tree + ignore rules, not yesterday's polluted checkpoint tree.
     #
     # In an empty repo HEAD has no tree, so seed from --empty instead.
+    #
+    # When this worktree + branch has a shadow index from an earlier call it
+    # is used instead of the HEAD seed: its stat data lets `add -A` skip
+    # every unchanged file. It is then reconciled against HEAD so the tree
+    # is exactly what the HEAD seed would have produced.
     # -------------------------------------------------------------------------
     local seed_parent_sha=""
     local seed_parent_tree=""
@@ -291,8 +340,15 @@ write_checkpoint() {
         seed_parent_tree=$($git_cmd rev-parse "${seed_parent_sha}^{tree}" 2>/dev/null || true)
     fi
 
+    local shadow_index="" shadow_reused=0
+    if [ "$CHECKPOINT_SHADOW_INDEX" != "0" ] && mkdir -p "${abs_git_dir}/checkpoint-shadow" 2>/dev/null; then
+        shadow_index="${abs_git_dir}/checkpoint-shadow/${sanitized}.index"
+    fi
+
     rm -f "$TMP_INDEX"
-    if [ -n "$seed_parent_tree" ]; then
+    if [ -n "$shadow_index" ] && cp -p "$shadow_index" "$TMP_INDEX" 2>/dev/null; then
+        shadow_reused=1
+    elif [ -n "$seed_parent_tree" ]; then
         if ! GIT_INDEX_FILE="$TMP_INDEX" $git_cmd read-tree "$seed_parent_tree" 2>>"$CHECKPOINT_LOG_FILE"; then
             _checkpoint_log ERROR "read-tree failed (parent_tree=${seed_parent_tree}, ref=${ref})"
             rm -f "$TMP_INDEX"
@@ -308,9 +364,17 @@ write_checkpoint() {
         fi
     fi
 
-    if ! GIT_INDEX_FILE="$TMP_INDEX" $git_cmd add -A 2>>"$CHECKPOINT_LOG_FILE"; then
+    if ! GIT_INDEX_FILE="$TMP_INDEX" $git_cmd -c core.untrackedCache=true add -A 2>>"$CHECKPOINT_LOG_FILE"; then
         _checkpoint_log ERROR "add -A failed (ref=${ref})"
-        rm -f "$TMP_INDEX"
+        rm -f "$TMP_INDEX" "$shadow_index"
+        _checkpoint_record_failure
+        return 1
+    fi
+
+    if [ "$shadow_reused" = "1" ] && \
+            ! _checkpoint_reconcile_head "$git_cmd" "$TMP_INDEX" "$seed_parent_tree" 2>>"$CHECKPOINT_LOG_FILE"; then
+        _checkpoint_log ERROR "shadow index reconcile failed (ref=${ref})"
+        rm -f "$TMP_INDEX" "$shadow_index"
         _checkpoint_record_failure
         return 1
     fi
@@ -319,11 +383,16 @@ write_checkpoint() {
     tree_sha=$(GIT_INDEX_FILE="$TMP_INDEX" $git_cmd write-tree 2>>"$CHECKPOINT_LOG_FILE")
     if [ -z "$tree_sha" ]; then
         _checkpoint_log ERROR "write-tree produced empty sha (ref=${ref})"
-        rm -f "$TMP_INDEX"
+        rm -f "$TMP_INDEX" "$shadow_index"
         _checkpoint_record_failure
         return 1
     fi
 
+    # Keep the refreshed index as the next call's shadow (atomic rename).
+    if [ -n "$shadow_index" ]; then
+        mv -f "$TMP_INDEX" "$shadow_index" 2>/dev/null || true
+    fi
+
     # -------------------------------------------------------------------------
     # PHASE 2: Enter flock-protected critical section for the commit-tree +
     # update-ref pair. Only one writer per repo runs this section at a time,
@@ -0,0 +1,301 @@
+"""Coalescing checkpoint writer: spool format and drain loop.
+
+posttool-git-checkpoint.sh used to count pending files and run
+write_checkpoint (lib/checkpoint-core.sh) inline after every Write, Edit and
+MultiEdit. With several sessions or subagents editing at once, every call paid
+the three counting git commands plus, past the threshold, a full snapshot, and
+the snapshots queued up on the per-repo checkpoint flock. The hook now appends
+one line to a spool file and returns. A single background writer
+(hooks/checkpointd.py serve) drains the spool, merges the events per worktree
+and writes at most one checkpoint per worktree per debounce window.
+
+Spool line, appended by the hook with one O_APPEND write so concurrent hooks
+never interleave:
+
+    <work_dir> TAB <threshold> NL
+
+  work_dir   the worktree the hook targeted (or its cwd), absolute
+  threshold  GIT_CHECKPOINT_THRESHOLD of the session that queued the edit
+
+Coalescing: events are keyed by `git rev-parse --show-toplevel` of work_dir.
+A worktree is flushed once it has been quiet for `debounce` seconds, or
+`max_delay` seconds after its first pending event, whichever comes first. The
+old threshold gate runs at flush time against the smallest threshold queued
+in the window: staged + modified + untracked must reach it, and nothing is
+written for a clean tree.
+
+Drain: the writer renames the spool to <spool>.claimed and reads it after a
+short grace sleep, so a hook that opened the spool just before the rename
+still lands its line in the claimed file. Hooks keep appending to a fresh
+spool meanwhile. A .claimed file left by a crashed writer is read first.
+
+Lifecycle: the writer holds an exclusive flock on <dir>/writer.lock while it
+runs and records its pid in <dir>/writer.pid; the hook starts a writer when
+that pid is not alive. After `idle` seconds with nothing queued or pending
+the writer removes its pid file, drains once more and only then exits, so an
+edit queued during shutdown is served either by it or by the writer the hook
+starts on finding no pid. SIGTERM flushes everything pending before exit.
+
+Stdlib-only.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import fcntl
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+HOOKS_DIR = Path(__file__).resolve().parent.parent
+CORE = HOOKS_DIR / 'lib' / 'checkpoint-core.sh'
+
+GRACE_SECS = 0.05
+
+
+def default_state_dir() -> str:
+    """Per-uid spool directory; overridable via $CLAUDE_CHECKPOINTD_DIR."""
+    override = os.environ.get('CLAUDE_CHECKPOINTD_DIR')
+    if override:
+        return override
+    base = os.environ.get('CLAUDE_TMPDIR') or os.environ.get('TMPDIR') or '/tmp'
+    return os.path.join(base, f'claude-checkpointd-{os.getuid()}')
+
+
+def spool_path(state_dir: str) -> str:
+    return os.path.join(state_dir, 'spool')
+
+
+def pid_path(state_dir: str) -> str:
+    return os.path.join(state_dir, 'writer.pid')
+
+
+def lock_path(state_dir: str) -> str:
+    return os.path.join(state_dir, 'writer.lock')
+
+
+def log_path(state_dir: str) -> str:
+    return os.path.join(state_dir, 'writer.log')
+
+
+def ensure_state_dir(state_dir: str) -> None:
+    os.makedirs(state_dir, mode=0o700, exist_ok=True)
+
+
+def read_pid(state_dir: str) -> int:
+    try:
+        return int(Path(pid_path(state_dir)).read_text().strip())
+    except (OSError, ValueError):
+        return 0
+
+
+def pid_alive(pid: int) -> bool:
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def enqueue(state_dir: str, work_dir: str, threshold: int) -> None:
+    """Append one edit event (the Python twin of the hook's printf)."""
+    ensure_state_dir(state_dir)
+    fd = os.open(spool_path(state_dir), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+    try:
+        os.write(fd, f'{work_dir}\t{threshold}\n'.encode())
+    finally:
+        os.close(fd)
+
+
+def acquire_writer_lock(state_dir: str, wait: float = 2.0) -> Optional[int]:
+    """Exclusive flock on writer.lock, or None if another writer keeps it for `wait`s.
+
+    The flock is held for the writer's lifetime: it is what makes the writer
+    single, the pid file is only the hook's cheap liveness probe.
+    """
+    ensure_state_dir(state_dir)
+    fd = os.open(lock_path(state_dir), os.O_RDWR | os.O_CREAT, 0o600)
+    deadline = time.monotonic() + wait
+    while True:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return fd
+        except BlockingIOError:
+            if time.monotonic() >= deadline:
+                os.close(fd)
+                return None
+            time.sleep(0.05)
+
+
+def _git_lines(top: str, *args: str) -> int:
+    proc = subprocess.run(['git', '-C', top, *args], capture_output=True)
+    if proc.returncode != 0:
+        return 0
+    return len(proc.stdout.splitlines())
+
+
+def pending_files(top: str) -> int:
+    """staged + modified + untracked, counted exactly as the old hook did."""
+    return (_git_lines(top, 'diff', '--cached', '--name-only')
+            + _git_lines(top, 'diff', '--name-only')
+            + _git_lines(top, 'ls-files', '--others', '--exclude-standard'))
+
+
+def run_checkpoint(top: str, trigger: str) -> bool:
+    """write_checkpoint from lib/checkpoint-core.sh; True on success."""
+    proc = subprocess.run(
+        ['bash', '-c', '. "$1" && write_checkpoint "$2" "$3"', 'checkpointd',
+         str(CORE), top, trigger],
+        stdin=subprocess.DEVNULL, capture_output=True,
+    )
+    return proc.returncode == 0
+
+
+def _toplevel(work_dir: str) -> Optional[str]:
+    proc = subprocess.run(['git', '-C', work_dir, 'rev-parse', '--show-toplevel'],
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        return None
+    return proc.stdout.strip() or None
+
+
+class Pending:
+    """Edits queued for one worktree since its last flush."""
+
+    __slots__ = ('first', 'last', 'events', 'threshold')
+
+    def __init__(self, now: float, threshold: int) -> None:
+        self.first = self.last = now
+        self.events = 0
+        self.threshold = threshold
+
+    def add(self, now: float, threshold: int) -> None:
+        self.last = now
+        self.events += 1
+        self.threshold = min(self.threshold, threshold)
+
+
+class Writer:
+    """Drains the spool and writes one checkpoint per worktree per window."""
+
+    def __init__(self, state_dir: str, debounce: float = 2.0, max_delay: float = 10.0,
+                 checkpoint: Callable[[str, str], bool] = run_checkpoint,
+                 count: Callable[[str], int] = pending_files,
+                 clock: Callable[[], float] = time.monotonic,
+                 verbose: bool = False) -> None:
+        self.state_dir = state_dir
+        self.spool = spool_path(state_dir)
+        self.claimed = self.spool + '.claimed'
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.checkpoint = checkpoint
+        self.count = count
+        self.clock = clock
+        self.verbose = verbose
+        self.pending: dict[str, Pending] = {}
+        self._toplevels: dict[str, Optional[str]] = {}
+        self.written = 0
+        self.skipped = 0
+
+    def log(self, msg: str) -> None:
+        if self.verbose:
+            sys.stderr.write(f'checkpointd[{os.getpid()}]: {msg}\n')
+            sys.stderr.flush()
+
+    def _claim(self) -> bytes:
+        if not os.path.exists(self.claimed):
+            try:
+                if os.stat(self.spool).st_size == 0:
+                    return b''
+                os.rename(self.spool, self.claimed)
+            except FileNotFoundError:
+                return b''
+            time.sleep(GRACE_SECS)
+        try:
+            with open(self.claimed, 'rb') as f:
+                data = f.read()
+            os.unlink(self.claimed)
+        except FileNotFoundError:
+            return b''
+        return data
+
+    def drain(self) -> int:
+        """Fold queued events into self.pending; returns how many were read."""
+        now = self.clock()
+        read = 0
+        for raw in self._claim().splitlines():
+            work_dir, _, threshold = raw.decode('utf-8', 'replace').partition('\t')
+            if not work_dir:
+                continue
+            try:
+                limit = int(threshold)
+            except ValueError:
+                limit = 10
+            read += 1
+            if work_dir not in self._toplevels:
+                self._toplevels[work_dir] = _toplevel(work_dir)
+            top = self._toplevels[work_dir]
+            if top is None:
+                continue  # not a git work tree: the old hook found 0 files too
+            entry = self.pending.get(top)
+            if entry is None:
+                entry = self.pending[top] = Pending(now, limit)
+            entry.add(now, limit)
+        return read
+
+    def due(self, now: float) -> list[str]:
+        return [top for top, p in self.pending.items()
+                if now - p.last >= self.debounce or now - p.first >= self.max_delay]
+
+    def flush(self, force: bool = False) -> None:
+        """Write every worktree whose window closed (all of them when `force`)."""
+        tops = list(self.pending) if force else self.due(self.clock())
+        for top in tops:
+            entry = self.pending.pop(top)
+            total = self.count(top)
+            if total == 0 or total < entry.threshold:
+                self.skipped += 1
+                continue
+            trigger = (f'posttool threshold ({total} files, threshold={entry.threshold},'
+                       f' {entry.events} edits coalesced)')
+            if self.checkpoint(top, trigger):
+                self.written += 1
+                self.log(f'checkpoint {top}: {total} files, {entry.events} edits')
+            else:
+                self.log(f'checkpoint failed for {top}; see ~/.claude/logs/checkpoint.log')
+
+    def serve(self, poll: float = 0.2, idle: float = 600.0,
+              stopping: Callable[[], bool] = lambda: False) -> None:
+        """Run until idle for `idle` seconds (0 = never) or `stopping()` is true."""
+        Path(pid_path(self.state_dir)).write_text(f'{os.getpid()}\n')
+        last_active = self.clock()
+        try:
+            while not stopping():
+                if self.drain():
+                    last_active = self.clock()
+                self.flush()
+                if idle and not self.pending and self.clock() - last_active >= idle:
+                    with contextlib.suppress(FileNotFoundError):
+                        os.unlink(pid_path(self.state_dir))
+                    if not self.drain():
+                        self.log(f'exiting: idle for {idle:.0f}s')
+                        return
+                    Path(pid_path(self.state_dir)).write_text(f'{os.getpid()}\n')
+                    last_active = self.clock()
+                    continue
+                time.sleep(poll)
+            self.drain()
+            self.flush(force=True)
+        finally:
+            try:
+                if read_pid(self.state_dir) == os.getpid():
+                    os.unlink(pid_path(self.state_dir))
+            except OSError:
+                pass
@@ -11,6 +11,10 @@ CLI:
 HARD CUTOVER: when no cycle-contract.json exists, ``run_cycle_closeout``
 returns an empty diagnostic dict and writes no harness report. Callers
 (stop-overnight-timelock.py) treat this as a no-op.
+
+Trace metrics come from the running aggregates in trace.index.json and
+report metrics from reduced reports cached there (lib/trace_index.py), so a
+closeout only reads trace records and reports that changed since the last one.
 """
 
 from __future__ import annotations
@@ -34,6 +38,8 @@ try:  # pragma: no cover - convenience for direct CLI use
 except Exception:  # pragma: no cover
     load_contract = None  # type: ignore[assignment]
 
+from lib.trace_index import TraceIndex, read_records  # noqa: E402
+
 
 # ---------------------------------------------------------------------------
 # Path helpers
@@ -148,24 +154,41 @@ def _resolve_path(maybe_path: str) -> Path:
     return _project_dir() / p
 
 
-def _load_one_entry_reports(entry: dict) -> list[dict[str, Any]]:
+def _reduce_report(report: dict) -> dict[str, Any]:
+    """The parts of a report the metrics below read, for the sidecar cache.
+
+    Keeps report_type / verdict / qa_verdict / ui_pipeline as-is and the
+    nested ui_evidence block as required-field truthiness, so every
+    predicate gives the same answer on the reduced dict as on the report.
+    """
+    reduced = {k: report[k] for k in ("report_type", "verdict", "qa_verdict", "ui_pipeline")
+               if k in report}
+    ui = _ui_evidence_block(report)
+    if ui is not None:
+        reduced["evidence_summary"] = {
+            "ui_evidence": {k: bool(ui.get(k)) for k in _UI_EVIDENCE_REQUIRED_FIELDS}
+        }
+    return reduced
+
+
+def _load_one_entry_reports(index: TraceIndex, entry: dict) -> list[dict[str, Any]]:
     out: list[dict[str, Any]] = []
     for raw in _expected_paths(entry):
-        data = _read_json_safe(_resolve_path(raw))
+        data = index.reduced_report(_resolve_path(raw), _reduce_report)
         if data is not None:
             out.append({"path": raw, "entry": entry, "report": data})
     return out
 
 
-def _load_pipeline_reports(contract: dict) -> list[dict[str, Any]]:
-    """Return parsed JSON for every required_calls expected_output_path."""
+def _load_pipeline_reports(index: TraceIndex, contract: dict) -> list[dict[str, Any]]:
+    """Return the (reduced) report for every required_calls expected_output_path."""
     out: list[dict[str, Any]] = []
     rc = contract.get("required_calls") if isinstance(contract, dict) else None
     if not isinstance(rc, list):
         return out
     for entry in rc:
         if isinstance(entry, dict):
-            out.extend(_load_one_entry_reports(entry))
+            out.extend(_load_one_entry_reports(index, entry))
     return out
 
 
@@ -185,22 +208,22 @@ def _required_role_for_step(contract: dict, step: str) -> str | None:
     return None
 
 
-def _count_role_matches(trace: list[dict], contract: dict) -> tuple[int, int]:
+def _count_role_matches(trace: dict[str, Any], contract: dict) -> tuple[int, int]:
+    """Over the (step, role) histogram of records that carry both."""
     matched = 0
     total = 0
-    for rec in trace:
-        if not (rec.get("step") and rec.get("role")):
-            continue
-        expected = _required_role_for_step(contract, str(rec.get("step")))
+    for key, n in trace["step_roles"].items():
+        step, role = json.loads(key)
+        expected = _required_role_for_step(contract, step)
         if expected is None:
             continue
-        total += 1
-        if expected == rec.get("role"):
-            matched += 1
+        total += n
+        if expected == role:
+            matched += n
     return matched, total
 
 
-def _role_compliance_rate(trace: list[dict], contract: dict) -> float | None:
+def _role_compliance_rate(trace: dict[str, Any], contract: dict) -> float | None:
     """% trace records whose role matched the contract for that step."""
     matched, total = _count_role_matches(trace, contract)
     if total == 0:
@@ -319,8 +342,8 @@ def _ui_evidence_coverage(loaded: list[dict[str, Any]]) -> float | None:
 # ---------------------------------------------------------------------------
 
 
-def _sum_estimated_tokens(trace: list[dict]) -> int:
-    return sum(int(t.get("estimated_tokens") or 0) for t in trace)
+def _sum_estimated_tokens(trace: dict[str, Any]) -> int:
+    return trace["tokens"]
 
 
 def _count_passed_pipelines(loaded: list[dict[str, Any]]) -> int:
@@ -332,7 +355,7 @@ def _count_passed_pipelines(loaded: list[dict[str, Any]]) -> int:
     return n
 
 
-def _token_per_fixed_issue(trace: list[dict], loaded: list[dict[str, Any]]) -> float | None:
+def _token_per_fixed_issue(trace: dict[str, Any], loaded: list[dict[str, Any]]) -> float | None:
     fixed = _count_passed_pipelines(loaded)
     if fixed <= 0:
         return None
@@ -344,17 +367,8 @@ def _token_per_fixed_issue(trace: list[dict], loaded: list[dict[str, Any]]) -> f
 # ---------------------------------------------------------------------------
 
 
-def _retry_count_by_role(trace: list[dict]) -> dict[str, int]:
-    out: dict[str, int] = {}
-    for rec in trace:
-        role = rec.get("role")
-        retries = rec.get("retry_count") or 0
-        if not isinstance(role, str) or not role:
-            continue
-        if not isinstance(retries, int):
-            continue
-        out[role] = out.get(role, 0) + retries
-    return out
+def _retry_count_by_role(trace: dict[str, Any]) -> dict[str, int]:
+    return dict(trace["retries"])
 
 
 # ---------------------------------------------------------------------------
@@ -403,26 +417,26 @@ def _entry_paths_exist(entry: dict) -> bool:
     return all(_resolve_path(raw).exists() for raw in paths)
 
 
-def _entry_validates_via_runtime(entry: dict) -> bool:
+def _entry_validates_via_runtime(index: TraceIndex, entry: dict) -> bool:
     """T3.2: re-run contract_runtime.validate on every expected_output_path.
 
     Returns True iff every path parses as JSON AND validates against the
     declared schema (or the entry has no schema, in which case existence
-    alone suffices).
+    alone suffices). Verdicts are cached per report version and schema
+    digest in the cycle's trace.index.json.
     """
     schema_name = entry.get("schema_name") or entry.get("expected_schema") or ""
     for raw in _expected_paths(entry):
-        record = _read_json_safe(_resolve_path(raw))
-        if record is None:
-            return False
+        path = _resolve_path(raw)
         if not schema_name:
+            if not index.parses(path):
+                return False
             continue
         try:
-            from lib.contract_runtime import validate as _runtime_validate
+            result = index.verdict(path, schema_name)
         except Exception:
             return False
-        result = _runtime_validate(record, schema_name)
-        if not result.get("ok"):
+        if result is None or not result.get("ok"):
             return False
     return True
 
@@ -435,12 +449,12 @@ def _entry_schema_status_ok(entry: dict) -> bool:
     return schema_status == "validated"
 
 
-def _entry_has_validated_artifact(entry: dict) -> bool:
+def _entry_has_validated_artifact(index: TraceIndex, entry: dict) -> bool:
     if not _entry_paths_exist(entry):
         return False
     if not _entry_schema_status_ok(entry):
         return False
-    return _entry_validates_via_runtime(entry)
+    return _entry_validates_via_runtime(index, entry)
 
 
 def has_pending_required_calls(session_id: str, cycle_id: int) -> bool:
@@ -457,11 +471,12 @@ def has_pending_required_calls(session_id: str, cycle_id: int) -> bool:
     rc = contract.get("required_calls")
     if not isinstance(rc, list):
         return False
-    for entry in rc:
-        if not isinstance(entry, dict):
-            continue
-        if not _entry_has_validated_artifact(entry):
-            return True
+    with TraceIndex.open(_trace_path(session_id, cycle_id)) as index:
+        for entry in rc:
+            if not isinstance(entry, dict):
+                continue
+            if not _entry_has_validated_artifact(index, entry):
+                return True
     return False
 
 
@@ -475,7 +490,7 @@ def _now_iso() -> str:
 
 
 def _build_metrics(
-    trace: list[dict],
+    trace: dict[str, Any],
     contract: dict,
     loaded: list[dict[str, Any]],
     session_id: str,
@@ -516,16 +531,17 @@ def run_cycle_closeout(session_id: str, cycle_id: int) -> dict[str, Any]:
         return _empty_report_diagnostic(
             session_id, cycle_id, "cycle-contract.json absent (legacy session)"
         )
-    trace = _read_jsonl_safe(_trace_path(session_id, cycle_id))
-    loaded = _load_pipeline_reports(contract)
-    metrics = _build_metrics(trace, contract, loaded, session_id)
+    with TraceIndex.open(_trace_path(session_id, cycle_id)) as index:
+        trace = index.refresh()
+        loaded = _load_pipeline_reports(index, contract)
+        metrics = _build_metrics(trace, contract, loaded, session_id)
     payload = {
         "schema_version": 1,
         "session_id": session_id,
         "cycle_id": cycle_id,
         "computed_at": _now_iso(),
         "status": "computed",
-        "trace_record_count": len(trace),
+        "trace_record_count": len(trace["records"]),
         "pipeline_report_count": len(loaded),
         "metrics": metrics,
     }
@@ -548,7 +564,7 @@ def _format_replay_line(rec: dict) -> str:
 
 
 def _replay(session_id: str, cycle_id: int) -> int:
-    trace = _read_jsonl_safe(_trace_path(session_id, cycle_id))
+    trace = read_records(_trace_path(session_id, cycle_id))
     print(f"# Replay: session={session_id} cycle={cycle_id}")
     print(f"# Trace records: {len(trace)}")
     for rec in trace:
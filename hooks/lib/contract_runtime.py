@@ -49,10 +49,12 @@ import fcntl
 from pathlib import Path
 from typing import Optional
 
-try:  # jsonschema 4.25.1 is installed system-wide; degrade gracefully if not.
-    from jsonschema import Draft7Validator
-except ImportError:  # pragma: no cover - architect confirmed availability
-    Draft7Validator = None  # type: ignore[assignment]
+# jsonschema 4.25.1 is installed system-wide; degrade gracefully if not. It is
+# imported, and each schema compiled, on the first validate() that needs it:
+# most hook invocations load a contract (or find none) and never validate.
+_UNLOADED = object()
+Draft7Validator = _UNLOADED
+_VALIDATORS: dict[str, object] = {}  # schema name -> compiled Draft7Validator
 
 # Importable from sibling lib module (already on the same hooks/lib/ path).
 try:
@@ -184,11 +186,31 @@ def _check_evidence_taxonomy(record: dict) -> list[str]:
     return errors
 
 
-def _run_jsonschema(record: dict, schema: dict) -> list[str]:
-    """Run Draft7Validator and collect formatted errors."""
+def _draft7_validator_class():
+    """jsonschema's Draft7Validator, imported on first call (None if absent)."""
+    global Draft7Validator
+    if Draft7Validator is _UNLOADED:
+        try:
+            from jsonschema import Draft7Validator as cls
+        except ImportError:  # pragma: no cover - architect confirmed availability
+            cls = None
+        Draft7Validator = cls
+    return Draft7Validator
+
+
+def _run_jsonschema(record: dict, schema: dict, schema_name: str = '') -> list[str]:
+    """Run Draft7Validator and collect formatted errors.
+
+    The compiled validator is reused for later records of the same registered
+    schema (the registry caches schema objects for the process lifetime).
+    """
     errors: list[str] = []
     try:
-        validator = Draft7Validator(schema)
+        validator = _VALIDATORS.get(schema_name) if schema_name else None
+        if validator is None or getattr(validator, 'schema', None) is not schema:
+            validator = _draft7_validator_class()(schema)
+            if schema_name:
+                _VALIDATORS[schema_name] = validator
         for err in validator.iter_errors(record):
             path = '.'.join(str(p) for p in err.absolute_path) or '<root>'
             errors.append(f'{path}: {err.message}')
@@ -210,12 +232,12 @@ def validate(record: dict, schema_name: str) -> dict:
     errors = _check_required_when_ui(record, _required_when_ui_keys(schema))
     errors.extend(_check_evidence_taxonomy(record))
 
-    if Draft7Validator is None:
+    if _draft7_validator_class() is None:
         if errors:
             return _result(False, errors, 'fail')
         return _result(True, ['jsonschema unavailable; only pre-pass ran'], 'warn')
 
-    errors.extend(_run_jsonschema(record, schema))
+    errors.extend(_run_jsonschema(record, schema, schema_name))
     if errors:
         return _result(False, errors, 'fail')
     return _result(True, [], 'pass')
@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""Persistent verdict cache in front of runtime_guard.evaluate().
+
+The orchestrator re-issues the same `git status` / `npm test` dozens of times
+per session, and every call re-tokenizes the command and re-runs every
+primitive. This module keeps a bounded LRU of verdicts in tmpfs and answers
+repeats without importing the (large) engine at all.
+
+Key:
+  sha256(command, cwd_base, data-file path, sha256(data-file bytes), HOME,
+         MAX_COMMAND_CHARS)
+
+Each entry also records the filesystem probes the engine made while deciding
+(see runtime_guard.set_dependency_observer): package.json manifests and
+`packages/` dirs by (mtime_ns, size, inode), candidate paths by realpath. A
+hit whose probes no longer match is discarded and re-evaluated, so editing the
+protected-config file or any manifest it consulted invalidates it.
+
+The cache file is covered by the engine's STEP0 self-protection (see
+runtime_guard.VERDICT_CACHE_PATH), and a file owned by another uid is ignored.
+
+Fail-closed contract is unchanged:
+  - an unreadable data file is never cached (the engine's STEP1 indeterminate
+    policy runs every time);
+  - a verdict is stored only if the data file is byte-identical before and
+    after evaluation;
+  - any cache I/O error degrades to a plain evaluate().
+
+Env:
+  CLAUDE_GUARD_CACHE=0          disable (always evaluate)
+  CLAUDE_GUARD_CACHE_FILE       cache path (default /dev/shm, else $TMPDIR)
+  CLAUDE_GUARD_CACHE_MAX        max entries (default 512)
+
+CLI (drop-in for `runtime_guard.py` in pretool-bash-safety.sh):
+  guard_cache.py            read a PreToolUse payload, print ALLOW/BLOCK/INDETERMINATE
+  guard_cache.py --stats    print hit/miss counters as JSON
+  guard_cache.py --clear    drop every entry and reset the counters
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sys
+
+try:
+    from . import hook_telemetry
+except ImportError:
+    try:
+        from lib import hook_telemetry  # type: ignore
+    except ImportError:
+        import hook_telemetry  # type: ignore  # run as lib/guard_cache.py
+
+# Mirrors runtime_guard.DATA_FILE_PATH / MAX_COMMAND_CHARS / VERDICT_CACHE_PATH.
+# Duplicated so a cache hit never has to import the engine.
+DATA_FILE_PATH = os.environ.get(
+    "CLAUDE_PROTECTED_RUNTIME_FILE",
+    "/root/.config/claude/protected-runtime.json",
+)
+MAX_COMMAND_CHARS = int(os.environ.get("CLAUDE_GUARD_MAX_CHARS", "262144"))
+
+MAX_ENTRIES = int(os.environ.get("CLAUDE_GUARD_CACHE_MAX", "512"))
+CACHE_VERSION = 1
+
+
+def enabled() -> bool:
+    return os.environ.get("CLAUDE_GUARD_CACHE", "1") != "0"
+
+
+def cache_path() -> str:
+    explicit = os.environ.get("CLAUDE_GUARD_CACHE_FILE")
+    if explicit:
+        return explicit
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else os.environ.get("TMPDIR", "/tmp")
+    return os.path.join(base, f"claude-guard-cache-{os.getuid()}.json")
+
+
+def config_digest(path: str = None) -> str | None:
+    """sha256 of the data file's bytes, or None when it cannot be read."""
+    try:
+        with open(path or DATA_FILE_PATH, "rb") as fh:
+            return hashlib.sha256(fh.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def cache_key(command: str, cwd_base: str | None, digest: str) -> str:
+    parts = (command, cwd_base or "", DATA_FILE_PATH, digest,
+             os.environ.get("HOME", ""), str(MAX_COMMAND_CHARS))
+    return hashlib.sha256("\0".join(parts).encode("utf-8", "surrogatepass")).hexdigest()
+
+
+def probe(kind: str, path: str):
+    """Current value of one recorded filesystem dependency (JSON-serializable)."""
+    if kind == "real":
+        try:
+            return os.path.realpath(path) if os.path.exists(path) else None
+        except OSError:
+            return None
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size, st.st_ino]
+
+
+def deps_current(deps: list) -> bool:
+    return all(probe(kind, path) == value for kind, path, value in deps)
+
+
+class VerdictCache:
+    """Bounded LRU of {key: {"v": verdict, "deps": [[kind, path, value], ...]}}.
+
+    Stored as one JSON document; dict insertion order is the LRU order (oldest
+    first). Writes go through a temp file + rename, so concurrent hooks see
+    either the old or the new document. Concurrent writers may drop each
+    other's updates — acceptable for a cache, and counters are approximate.
+    """
+
+    def __init__(self, path: str = None, max_entries: int = None):
+        self.path = path or cache_path()
+        self.max_entries = max_entries or MAX_ENTRIES
+        self.entries: dict = {}
+        self.counters = {"hits": 0, "misses": 0, "stale": 0}
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as fh:
+                # a file planted by another uid in shared tmpfs is never trusted
+                if os.fstat(fh.fileno()).st_uid != os.getuid():
+                    return
+                doc = json.load(fh)
+        except (OSError, ValueError):
+            return
+        if not isinstance(doc, dict) or doc.get("version") != CACHE_VERSION:
+            return
+        entries = doc.get("entries")
+        if isinstance(entries, dict):
+            self.entries = entries
+        for k in self.counters:
+            if isinstance(doc.get(k), int):
+                self.counters[k] = doc[k]
+
+    def get(self, key: str):
+        """Return the cached verdict tuple, or None (miss or stale)."""
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            self.counters["misses"] += 1
+            return None
+        if not deps_current(entry.get("deps", [])):
+            self.counters["stale"] += 1
+            self.counters["misses"] += 1
+            return None
+        self.entries[key] = entry  # move to most-recently-used
+        self.counters["hits"] += 1
+        return tuple(entry["v"])
+
+    def put(self, key: str, verdict, deps: list) -> None:
+        self.entries.pop(key, None)
+        self.entries[key] = {"v": list(verdict), "deps": deps}
+        while len(self.entries) > self.max_entries:
+            del self.entries[next(iter(self.entries))]
+
+    def clear(self) -> None:
+        self.entries = {}
+        self.counters = {k: 0 for k in self.counters}
+
+    def stats(self) -> dict:
+        lookups = self.counters["hits"] + self.counters["misses"]
+        return dict(self.counters, entries=len(self.entries),
+                    max_entries=self.max_entries, path=self.path,
+                    hit_rate=round(self.counters["hits"] / lookups, 4) if lookups else 0.0)
+
+    def save(self) -> None:
+        doc = dict(self.counters, version=CACHE_VERSION, entries=self.entries)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        old_umask = os.umask(0o077)
+        try:
+            with open(tmp, "w", encoding="utf-8") as fh:
+                json.dump(doc, fh, separators=(",", ":"))
+            os.replace(tmp, self.path)
+        finally:
+            os.umask(old_umask)
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+
+
+# evaluate() and the primitives it calls, timed when hook telemetry is on.
+ENGINE_PRIMITIVES = (
+    "evaluate", "_strip_compound_delims", "_split_pipeline", "_pipeline_groups",
+    "_step0_self_protection", "_unwrap_exec_frontends", "_load_config",
+    "_step1_indeterminate", "_runner_call_payloads", "_p0_anchor", "_p1_launch",
+    "_p2_service", "_p3_hotfile", "_p4_statefile", "_p5_endpoint", "_p6_prockill",
+    "_p7_globalbin", "_p9_pkgscript", "_p8_explicit_protected_path", "_p8_build",
+    "_p8_bare_build",
+)
+
+
+def _engine():
+    try:
+        from . import runtime_guard
+    except ImportError:
+        try:
+            from lib import runtime_guard  # type: ignore
+        except ImportError:
+            import runtime_guard  # type: ignore  # run as lib/guard_cache.py
+    if hook_telemetry.enabled():
+        hook_telemetry.instrument(runtime_guard, "runtime_guard", ENGINE_PRIMITIVES)
+    return runtime_guard
+
+
+def _evaluate_recording(command: str, cwd_base: str | None):
+    """evaluate() with every filesystem probe recorded as [kind, path, value]."""
+    engine = _engine()
+    deps, seen = [], set()
+
+    def observe(kind, path):
+        if (kind, path) not in seen:
+            seen.add((kind, path))
+            deps.append([kind, path, probe(kind, path)])
+
+    engine.set_dependency_observer(observe)
+    try:
+        verdict = engine.evaluate(command, cwd_base)
+    finally:
+        engine.set_dependency_observer(None)
+    return verdict, deps
+
+
+def cached_evaluate(command: str, cwd_base: str | None = None, cache: VerdictCache = None):
+    """Drop-in for runtime_guard.evaluate() backed by the persistent cache."""
+    if command is None or not enabled():
+        return _engine().evaluate(command, cwd_base)
+    digest = config_digest()
+    if digest is None:
+        return _engine().evaluate(command, cwd_base)
+    try:
+        cache = cache or VerdictCache()
+        key = cache_key(command, cwd_base, digest)
+        verdict = cache.get(key)
+    except Exception:
+        return _engine().evaluate(command, cwd_base)
+    if verdict is None:
+        verdict, deps = _evaluate_recording(command, cwd_base)
+        if config_digest() == digest:
+            cache.put(key, verdict, deps)
+    try:
+        cache.save()
+    except OSError:
+        pass
+    return verdict
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in ("--stats", "--clear"):
+        cache = VerdictCache()
+        if argv[0] == "--clear":
+            cache.clear()
+            cache.save()
+        print(json.dumps(cache.stats(), indent=2))
+        return 0
+    # Same payload contract as runtime_guard.main().
+    try:
+        payload = json.load(sys.stdin)
+    except (ValueError, OSError):
+        print("INDETERMINATE")
+        return 0
+    if payload.get("tool_name") != "Bash":
+        print("ALLOW")
+        return 0
+    tool_input = payload.get("tool_input") or {}
+    command = tool_input.get("command", "")
+    cwd_base = tool_input.get("cwd") or os.environ.get("CLAUDE_GUARD_CWD")
+    if not cwd_base:
+        try:
+            cwd_base = os.getcwd()
+        except OSError:
+            cwd_base = None
+    decision, primitive, reason = cached_evaluate(command, cwd_base)
+    if decision == "BLOCK":
+        sys.stderr.write(f"[protected-runtime-guard] BLOCK {primitive}: {reason}\n")
+        print("BLOCK")
+        return 0
+    print("ALLOW")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,16 @@
+# shellcheck shell=bash
+# Per-hook timing for bash hooks (see lib/hook_telemetry.py).
+#
+# Source it before the hook reads stdin:
+#   . "${BASH_SOURCE[0]%/*}/lib/hook-telemetry.sh"
+#
+# With CLAUDE_HOOK_TELEMETRY=1 the hook re-runs itself under
+# lib/hook_telemetry.py, which times it and writes the same record the Python
+# hooks write. CLAUDE_HOOK_TELEMETRY_TIMED marks the re-run (and a hook the
+# in-process dispatcher already times). Otherwise this is two tests, no fork.
+
+if [ -n "${CLAUDE_HOOK_TELEMETRY_TIMED:-}" ]; then
+  unset CLAUDE_HOOK_TELEMETRY_TIMED
+elif [ "${CLAUDE_HOOK_TELEMETRY:-}" = "1" ]; then
+  exec python3 "${BASH_SOURCE[0]%/*}/hook_telemetry.py" "${0##*/}" bash "$0" "$@"
+fi
@@ -0,0 +1,550 @@
+"""In-process hook dispatcher: one payload, every matching hook, one interpreter.
+
+Claude Code spawns one process per wired hook and each hook re-parses the
+same stdin JSON. This module reads the settings.json ``hooks`` table, picks
+the entries that apply to one event (and tool / matcher), and runs them with
+the payload read once:
+
+  - Python hooks under hooks/ are exec'd in-process from a compiled-code
+    cache (lib/hook_server.CodeCache) with per-hook stdin/stdout/stderr
+    buffers, so they share the already-imported hooks/lib modules.
+  - Anything else (bash hooks, scripts/, inline commands) runs as a
+    subprocess through ``bash -c`` exactly like Claude Code would.
+
+Result aggregation mirrors how Claude Code combines separate hooks:
+  - any exit 2  -> exit 2; stderr of the blocking hooks is what Claude sees;
+  - JSON stdout objects of the hooks that exited 0 are merged (deny > ask >
+    allow for permissionDecision, first updatedInput wins, reasons/context
+    joined). A merged deny or ``decision: block`` next to a failed hook is
+    reported as exit 2 with the reason on stderr, because Claude Code ignores
+    JSON on a non-zero exit and the deny would otherwise fail open. Any other
+    merged JSON is reported with exit 0 and the failed hooks' stderr moves
+    into systemMessage;
+  - otherwise any other non-zero exit -> exit 1 (non-blocking error);
+  - plain-text stdout is concatenated when no hook emitted JSON. Next to
+    JSON it is added to additionalContext for the events that inject stdout
+    as context (UserPromptSubmit, SessionStart) and dropped for the others,
+    where Claude Code only shows it in the transcript.
+
+Every hook gets its settings ``timeout``. A subprocess is killed; an
+in-process hook on the main thread is interrupted by a watchdog (SIGUSR1
+raising inside the hook), and a pooled one is abandoned. Either way the
+result is what the subprocess path reports: exit 1, no stdout, "timed out".
+
+Parallel mode runs the hooks in READ_ONLY_HOOKS on a thread pool while the
+stateful hooks run serially on the main thread. Only hooks that neither
+write files nor install signal handlers (allowlist regex grants use
+SIGALRM, which only works on the main thread) belong in that set;
+tests/test_hook_dispatch.py enforces both with an audit hook.
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import os
+import re
+import shlex
+import signal
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+try:
+    from . import hook_server, hook_telemetry
+except ImportError:  # pragma: no cover - direct import in focused tests
+    from lib import hook_server, hook_telemetry  # type: ignore
+
+HOOKS_DIR = hook_server.HOOKS_DIR
+DEFAULT_SETTINGS = HOOKS_DIR.parent / 'settings.json'
+DEFAULT_TIMEOUT = 60
+MAX_WORKERS = 8
+
+# Pure guards: read the payload (and maybe config / git), never open a file
+# for writing, never touch signal handlers. Safe to run concurrently on
+# worker threads.
+READ_ONLY_HOOKS = frozenset({
+    'pretool-bash-views-guard.py',
+    'pretool-bulk-commit-detector.py',
+    'pretool-claude-config-guard.py',
+    'pretool-cp-state-write-guard.py',
+    'pretool-gitignore-preflight.py',
+    'pretool-quality-gate.py',
+    'pretool-spec-block-foreground-agent.py',
+    'pretool-subagent-code-block.py',
+    'pretool-todo-validate.py',
+    'pretool-tool-policy.py',
+})
+
+# Payload field each event's matcher is compared against (None: match all).
+_MATCH_FIELD = {
+    'PreToolUse': 'tool_name',
+    'PostToolUse': 'tool_name',
+    'SessionStart': 'source',
+    'Notification': 'notification_type',
+    'PreCompact': 'trigger',
+}
+
+_DECISION_RANK = {'allow': 0, 'ask': 1, 'deny': 2}
+
+# Events whose plain-text stdout Claude Code adds to the model's context.
+_CONTEXT_EVENTS = frozenset({'UserPromptSubmit', 'SessionStart'})
+
+
+class HookEntry(NamedTuple):
+    command: str
+    matcher: str
+    timeout: int
+    script: Optional[str]  # abs path when runnable in-process, else None
+
+    @property
+    def name(self) -> str:
+        return os.path.basename(self.script) if self.script else self.command
+
+    @property
+    def label(self) -> str:
+        """Basename of the script the command runs, for bash hooks too."""
+        if self.script:
+            return os.path.basename(self.script)
+        try:
+            words = shlex.split(self.command)
+        except ValueError:
+            return self.command
+        scripts = [w for w in words if w.endswith(('.py', '.sh'))]
+        return os.path.basename(scripts[0]) if scripts else self.command
+
+
+class HookResult(NamedTuple):
+    entry: HookEntry
+    status: int
+    stdout: str
+    stderr: str
+    seconds: float
+    timed_out: bool = False
+
+
+def _timed_out(entry: HookEntry, seconds: float) -> HookResult:
+    return HookResult(entry, 1, '', f'{entry.name}: timed out after {entry.timeout}s\n',
+                      seconds, timed_out=True)
+
+
+# ---------------------------------------------------------------------------
+# Table loading / selection
+# ---------------------------------------------------------------------------
+
+
+def load_table(path: Optional[str] = None) -> dict:
+    """Return the ``hooks`` mapping from a settings-format JSON file."""
+    src = Path(path) if path else DEFAULT_SETTINGS
+    try:
+        data = json.loads(src.read_text(encoding='utf-8'))
+    except (OSError, json.JSONDecodeError):
+        return {}
+    hooks = data.get('hooks') if isinstance(data, dict) else None
+    return hooks if isinstance(hooks, dict) else {}
+
+
+def _inprocess_script(command: str) -> Optional[str]:
+    """Abs script path if ``command`` is ``python3 <hooks/x.py>``, else None."""
+    try:
+        argv = shlex.split(os.path.expanduser(os.path.expandvars(command)))
+    except ValueError:
+        return None
+    if len(argv) != 2 or os.path.basename(argv[0]) not in ('python3', 'python'):
+        return None
+    return hook_server.resolve_hook_path(os.path.expanduser(argv[1]))
+
+
+def matcher_applies(matcher: Optional[str], value: Optional[str]) -> bool:
+    if matcher in (None, '', '*') or value is None:
+        return True
+    try:
+        return re.fullmatch(matcher, value) is not None
+    except re.error:
+        return matcher == value
+
+
+def select_hooks(
+    table: dict,
+    event: str,
+    payload: dict,
+    matcher: Optional[str] = None,
+) -> list[HookEntry]:
+    """Entries for ``event`` in settings order.
+
+    With ``matcher`` only blocks whose matcher string equals it are used
+    (dispatching exactly one settings block); otherwise every block whose
+    matcher accepts the payload's tool / source applies. Entries that invoke
+    the dispatcher itself are skipped so a table can wire it without
+    recursing.
+    """
+    field = _MATCH_FIELD.get(event)
+    value = payload.get(field) if field and isinstance(payload, dict) else None
+    entries: list[HookEntry] = []
+    for block in table.get(event) or []:
+        if not isinstance(block, dict):
+            continue
+        block_matcher = block.get('matcher') or ''
+        if matcher is not None:
+            if block_matcher != matcher:
+                continue
+        elif not matcher_applies(block_matcher, value):
+            continue
+        for hook in block.get('hooks') or []:
+            if not isinstance(hook, dict) or hook.get('type', 'command') != 'command':
+                continue
+            command = str(hook.get('command') or '')
+            if not command or 'dispatch.py' in command:
+                continue
+            entries.append(HookEntry(
+                command=command,
+                matcher=block_matcher,
+                timeout=int(hook.get('timeout') or DEFAULT_TIMEOUT),
+                script=_inprocess_script(command),
+            ))
+    return entries
+
+
+# ---------------------------------------------------------------------------
+# Execution
+# ---------------------------------------------------------------------------
+
+
+class _StreamProxy:
+    """sys.std* stand-in that routes to the current thread's buffer."""
+
+    def __init__(self, local: threading.local, name: str, default) -> None:
+        self._local = local
+        self._name = name
+        self._default = default
+
+    def _target(self):
+        return getattr(self._local, self._name, None) or self._default
+
+    def __getattr__(self, attr):
+        return getattr(self._target(), attr)
+
+    def read(self, *args):
+        return self._target().read(*args)
+
+    def readline(self, *args):
+        return self._target().readline(*args)
+
+    def write(self, s):
+        return self._target().write(s)
+
+    def flush(self):
+        return self._target().flush()
+
+    def isatty(self):
+        return self._target().isatty()
+
+
+class _Streams:
+    """Install thread-routed std streams for the duration of a dispatch."""
+
+    def __init__(self) -> None:
+        self.local = threading.local()
+        self._saved = None
+
+    def __enter__(self):
+        self._saved = (sys.stdin, sys.stdout, sys.stderr)
+        sys.stdin = _StreamProxy(self.local, 'stdin', self._saved[0])
+        sys.stdout = _StreamProxy(self.local, 'stdout', self._saved[1])
+        sys.stderr = _StreamProxy(self.local, 'stderr', self._saved[2])
+        return self
+
+    def __exit__(self, *exc):
+        sys.stdin, sys.stdout, sys.stderr = self._saved
+        return False
+
+
+class _HookTimeout(BaseException):
+    """Raised inside a main-thread hook by the watchdog (not an Exception, so
+    a hook's own ``except Exception`` fallback does not swallow it)."""
+
+
+class _Watchdog:
+    """Interrupt the main thread after ``seconds`` with SIGUSR1.
+
+    A no-op off the main thread, where no signal handler can be installed;
+    run_hooks bounds pooled hooks with Future.result(timeout) instead.
+    """
+
+    def __init__(self, seconds: float) -> None:
+        self.seconds = seconds
+        self.fired = False
+        self._armed = False
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        self._saved = None
+
+    def _fire(self) -> None:
+        with self._lock:
+            if self._armed:
+                self.fired = True
+                signal.pthread_kill(threading.main_thread().ident, signal.SIGUSR1)
+
+    def _interrupt(self, signum, frame) -> None:
+        if self._armed:
+            raise _HookTimeout()
+
+    def __enter__(self):
+        if threading.current_thread() is threading.main_thread():
+            self._saved = signal.signal(signal.SIGUSR1, self._interrupt)
+            self._armed = True
+            self._timer = threading.Timer(self.seconds, self._fire)
+            self._timer.daemon = True
+            self._timer.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._timer is None:
+            return False
+        with self._lock:
+            self._armed = False
+        self._timer.cancel()
+        signal.signal(signal.SIGUSR1, self._saved)
+        return exc[0] is _HookTimeout
+
+
+def run_inprocess(
+    entry: HookEntry,
+    raw: str,
+    codes: hook_server.CodeCache,
+    streams: _Streams,
+    main_thread: bool = True,
+) -> HookResult:
+    out, err = io.StringIO(), io.StringIO()
+    local = streams.local
+    local.stdin, local.stdout, local.stderr = io.StringIO(raw), out, err
+    start = time.monotonic()
+    status = 1
+    with hook_telemetry.hook_span(entry.label, raw) as record:
+        with _Watchdog(entry.timeout) as watchdog:
+            try:
+                code = codes.get(entry.script)
+                status = hook_server.run_code_as_main(
+                    code, entry.script, [],
+                    install_main=main_thread, run_atexit=False,
+                )
+            except (OSError, SyntaxError) as exc:
+                err.write(f'{entry.name}: {exc}\n')
+                status = 1
+            finally:
+                local.stdin = local.stdout = local.stderr = None
+        if watchdog.fired:
+            result = _timed_out(entry, time.monotonic() - start)
+        else:
+            result = HookResult(entry, status, out.getvalue(), err.getvalue(),
+                                time.monotonic() - start)
+        record.status, record.stdout = result.status, result.stdout
+    return result
+
+
+def run_subprocess(entry: HookEntry, raw: str) -> HookResult:
+    start = time.monotonic()
+    with hook_telemetry.hook_span(entry.label, raw) as record:
+        try:
+            # the span already times this hook: keep lib/hook-telemetry.sh
+            # from re-running it under a second record
+            env = dict(os.environ, CLAUDE_HOOK_TELEMETRY_TIMED='1') \
+                if hook_telemetry.enabled() else None
+            proc = subprocess.run(
+                ['bash', '-c', entry.command], input=raw, text=True,
+                capture_output=True, timeout=entry.timeout, env=env,
+            )
+            result = HookResult(entry, proc.returncode, proc.stdout, proc.stderr,
+                                time.monotonic() - start)
+        except subprocess.TimeoutExpired:
+            result = _timed_out(entry, time.monotonic() - start)
+        except OSError as exc:
+            result = HookResult(entry, 1, '', f'{entry.name}: {exc}\n',
+                                time.monotonic() - start)
+        record.status, record.stdout = result.status, result.stdout
+    return result
+
+
+def run_hooks(
+    entries: list[HookEntry],
+    raw: str,
+    parallel: bool = False,
+    codes: Optional[hook_server.CodeCache] = None,
+) -> list[HookResult]:
+    """Run ``entries`` against ``raw``; results come back in entry order.
+
+    A pooled hook that overruns its timeout is abandoned on its worker
+    thread; the caller should exit without joining it (dispatch.py does
+    when any result is ``timed_out``).
+    """
+    codes = codes or hook_server.CodeCache()
+    results: list[Optional[HookResult]] = [None] * len(entries)
+    with _Streams() as streams:
+        pooled = [
+            i for i, e in enumerate(entries)
+            if parallel and e.script and e.name in READ_ONLY_HOOKS
+        ]
+        if pooled:
+            # Import every lib module up front so worker threads never race
+            # on a half-initialised lazy import; serial runs keep lib lazy.
+            hook_server.preload_lib()
+        pool = ThreadPoolExecutor(max_workers=MAX_WORKERS) if pooled else None
+        abandoned = False
+        try:
+            started = time.monotonic()
+            futures = {
+                i: pool.submit(run_inprocess, entries[i], raw, codes, streams, False)
+                for i in pooled
+            } if pool else {}
+            for i, entry in enumerate(entries):
+                if i in futures:
+                    continue
+                if entry.script:
+                    results[i] = run_inprocess(entry, raw, codes, streams)
+                else:
+                    results[i] = run_subprocess(entry, raw)
+            for i, fut in futures.items():
+                left = entries[i].timeout - (time.monotonic() - started)
+                try:
+                    results[i] = fut.result(timeout=max(left, 0))
+                except FutureTimeout:
+                    results[i] = _timed_out(entries[i], time.monotonic() - started)
+                    abandoned = True
+        finally:
+            if pool:
+                pool.shutdown(wait=not abandoned, cancel_futures=abandoned)
+    return [r for r in results if r is not None]
+
+
+# ---------------------------------------------------------------------------
+# Aggregation
+# ---------------------------------------------------------------------------
+
+
+def _as_json_object(text: str) -> Optional[dict]:
+    stripped = text.strip()
+    if not stripped.startswith('{'):
+        return None
+    try:
+        obj = json.loads(stripped)
+    except json.JSONDecodeError:
+        return None
+    return obj if isinstance(obj, dict) else None
+
+
+def merge_json_outputs(objs: list[dict]) -> dict:
+    """Fold several hook JSON outputs into the single most restrictive one."""
+    merged: dict = {}
+    reasons: list[str] = []
+    messages: list[str] = []
+    specific: dict = {}
+    contexts: list[str] = []
+    decision_reasons: dict[str, list[str]] = {}
+    for obj in objs:
+        if obj.get('continue') is False:
+            merged['continue'] = False
+            merged.setdefault('stopReason', obj.get('stopReason', ''))
+        if obj.get('suppressOutput'):
+            merged['suppressOutput'] = True
+        if obj.get('decision') == 'block':
+            merged['decision'] = 'block'
+        if obj.get('reason'):
+            reasons.append(str(obj['reason']))
+        if obj.get('systemMessage'):
+            messages.append(str(obj['systemMessage']))
+        hso = obj.get('hookSpecificOutput')
+        if not isinstance(hso, dict):
+            continue
+        if 'hookEventName' in hso:
+            specific.setdefault('hookEventName', hso['hookEventName'])
+        decision = hso.get('permissionDecision')
+        if decision in _DECISION_RANK:
+            current = specific.get('permissionDecision')
+            if current is None or _DECISION_RANK[decision] > _DECISION_RANK[current]:
+                specific['permissionDecision'] = decision
+            if hso.get('permissionDecisionReason'):
+                decision_reasons.setdefault(decision, []).append(
+                    str(hso['permissionDecisionReason']))
+        if 'updatedInput' in hso and 'updatedInput' not in specific:
+            specific['updatedInput'] = hso['updatedInput']
+        if hso.get('additionalContext'):
+            contexts.append(str(hso['additionalContext']))
+    if reasons:
+        merged['reason'] = '\n'.join(reasons)
+    if messages:
+        merged['systemMessage'] = '\n'.join(messages)
+    if contexts:
+        specific['additionalContext'] = '\n'.join(contexts)
+    winner = specific.get('permissionDecision')
+    if winner and decision_reasons.get(winner):
+        specific['permissionDecisionReason'] = '; '.join(decision_reasons[winner])
+    if specific:
+        merged['hookSpecificOutput'] = specific
+    return merged
+
+
+def _denies(merged: dict) -> Optional[str]:
+    """The reason when ``merged`` denies / blocks, else None."""
+    hso = merged.get('hookSpecificOutput') or {}
+    if hso.get('permissionDecision') == 'deny':
+        return hso.get('permissionDecisionReason') or 'denied by hook'
+    if merged.get('decision') == 'block':
+        return merged.get('reason') or 'blocked by hook'
+    return None
+
+
+def aggregate(
+    results: list[HookResult],
+    event: Optional[str] = None,
+) -> tuple[int, str, str]:
+    """Combine per-hook results into one (exit status, stdout, stderr)."""
+    blocking = [r for r in results if r.status == 2]
+    if blocking:
+        return 2, '', ''.join(r.stderr for r in blocking)
+    failed = [r for r in results if r.status != 0]
+    status = 1 if failed else 0
+    stderr = ''.join(r.stderr for r in results)
+    ok = [r for r in results if r.status == 0 and r.stdout.strip()]
+    parsed = [(r, _as_json_object(r.stdout)) for r in ok]
+    objs = [o for _, o in parsed if o is not None]
+    if not objs:
+        return status, ''.join(r.stdout for r in ok), stderr
+    merged = merge_json_outputs(objs)
+    if failed:
+        reason = _denies(merged)
+        if reason is not None:
+            return 2, '', reason.rstrip('\n') + '\n' + ''.join(r.stderr for r in failed)
+        errors = ''.join(r.stderr for r in failed).strip()
+        if errors:
+            merged['systemMessage'] = '\n'.join(
+                m for m in (merged.get('systemMessage'), errors) if m)
+    text = ''.join(r.stdout for r, o in parsed if o is None).strip()
+    if text and event in _CONTEXT_EVENTS:
+        specific = merged.setdefault('hookSpecificOutput', {})
+        specific.setdefault('hookEventName', event)
+        specific['additionalContext'] = '\n'.join(
+            c for c in (specific.get('additionalContext'), text) if c)
+    return 0, json.dumps(merged) + '\n', stderr
+
+
+def dispatch(
+    event: str,
+    raw: str,
+    table: dict,
+    matcher: Optional[str] = None,
+    parallel: bool = False,
+) -> tuple[int, str, str, list[HookResult]]:
+    try:
+        payload = json.loads(raw) if raw.strip() else {}
+    except json.JSONDecodeError:
+        payload = {}
+    if not isinstance(payload, dict):
+        payload = {}
+    entries = select_hooks(table, event, payload, matcher)
+    results = run_hooks(entries, raw, parallel=parallel)
+    status, out, err = aggregate(results, event)
+    return status, out, err, results
@@ -0,0 +1,463 @@
+"""Warm hook server: run existing hook scripts in-process from one daemon.
+
+Every Python hook wired in settings.json normally pays a fresh interpreter
+start plus the hooks/lib import cost on every tool call. This module keeps a
+single long-lived process that has already imported hooks/lib/* and compiled
+every hooks/*.py script, and serves hook invocations over a Unix socket.
+
+Protocol (one request per connection):
+  client -> server  4-byte big-endian header length + NUL-separated header
+                    MAGIC, hook path, cwd, argc, argv..., KEY=VALUE env...;
+                    the client's stdin/stdout/stderr fds ride along as
+                    SCM_RIGHTS ancillary data on the first send. NUL cannot
+                    occur in argv/env, and the shim avoids importing json.
+  server -> client  4-byte big-endian signed exit status.
+
+Each request is served in a forked child (socketserver.ForkingMixIn): the
+child dup2()s the received fds onto 0/1/2, adopts the client's env, cwd and
+argv, and execs the cached code object as ``__main__``. The parent therefore
+never runs hook code, so per-hook global state, os.chdir(), env mutation and
+sys.exit() cannot leak between calls, and the hook sees its real stdin/stdout
+exactly as it would when spawned by Claude Code.
+
+Reload: before every fork the parent stats hooks/*.py and hooks/lib/*.py; if
+any mtime/size changed (or a file appeared/disappeared) the lib modules are
+purged from sys.modules, re-imported, and the code cache is rebuilt.
+
+Environment: a few lib modules read env vars into constants at import time
+(IMPORT_TIME_ENV). When the client's values differ from the daemon's, the
+child purges lib before running the hook, so it imports lib under the
+client's env just like a cold run would.
+
+Only the uid that owns the daemon may connect (SO_PEERCRED check, 0600 socket).
+Stdlib-only.
+"""
+
+from __future__ import annotations
+
+import atexit
+import importlib
+import os
+import socket
+import socketserver
+import struct
+import sys
+import time
+import traceback
+import types
+from pathlib import Path
+from typing import Optional
+
+HOOKS_DIR = Path(__file__).resolve().parent.parent
+LIB_DIR = HOOKS_DIR / 'lib'
+
+MAGIC = b'HOOKD1'
+MAX_HEADER_BYTES = 4 * 1024 * 1024
+_LEN = struct.Struct('>I')
+_STATUS = struct.Struct('>i')
+
+
+def default_socket_path() -> str:
+    """Per-uid socket path; overridable via $CLAUDE_HOOKD_SOCKET."""
+    override = os.environ.get('CLAUDE_HOOKD_SOCKET')
+    if override:
+        return override
+    base = os.environ.get('CLAUDE_TMPDIR') or os.environ.get('TMPDIR') or '/tmp'
+    return os.path.join(base, f'claude-hookd-{os.getuid()}.sock')
+
+
+def pid_path(sock_path: str) -> str:
+    return sock_path + '.pid'
+
+
+# ---------------------------------------------------------------------------
+# Wire helpers (hookd-client.py inlines a minimal copy of encode_request)
+# ---------------------------------------------------------------------------
+
+
+def _recv_exact(conn: socket.socket, n: int, buf: bytes = b'') -> bytes:
+    while len(buf) < n:
+        chunk = conn.recv(n - len(buf))
+        if not chunk:
+            raise ConnectionError('short read from hookd peer')
+        buf += chunk
+    return buf
+
+
+def encode_request(hook: str, cwd: str, argv: list[str], env: dict) -> bytes:
+    """Frame a request header (the client shim inlines the same encoding)."""
+    fields = [MAGIC, os.fsencode(hook), os.fsencode(cwd), str(len(argv)).encode()]
+    fields.extend(os.fsencode(a) for a in argv)
+    fields.extend(os.fsencode(k) + b'=' + os.fsencode(v) for k, v in env.items())
+    body = b'\0'.join(fields)
+    return _LEN.pack(len(body)) + body
+
+
+def decode_request(body: bytes) -> dict:
+    fields = body.split(b'\0')
+    if len(fields) < 4 or fields[0] != MAGIC:
+        raise ValueError('unsupported hookd protocol version')
+    argc = int(fields[3])
+    argv = [os.fsdecode(a) for a in fields[4:4 + argc]]
+    env = {}
+    for item in fields[4 + argc:]:
+        key, sep, value = item.partition(b'=')
+        if sep:
+            env[os.fsdecode(key)] = os.fsdecode(value)
+    return {'hook': os.fsdecode(fields[1]), 'cwd': os.fsdecode(fields[2]),
+            'argv': argv, 'env': env}
+
+
+def recv_request(conn: socket.socket) -> tuple[dict, list[int]]:
+    """Read one request header plus the ancillary std fds."""
+    data, fds, _flags, _addr = socket.recv_fds(conn, 65536, 3)
+    try:
+        data = _recv_exact(conn, _LEN.size, data)
+        (length,) = _LEN.unpack(data[:_LEN.size])
+        if length > MAX_HEADER_BYTES:
+            raise ValueError(f'hookd header too large ({length} bytes)')
+        body = _recv_exact(conn, _LEN.size + length, data)[_LEN.size:]
+        header = decode_request(body)
+    except Exception:
+        for fd in fds:
+            os.close(fd)
+        raise
+    return header, list(fds)
+
+
+def send_status(conn: socket.socket, status: int) -> None:
+    conn.sendall(_STATUS.pack(int(status)))
+
+
+# ---------------------------------------------------------------------------
+# Hook inventory: signature, preload, compile cache
+# ---------------------------------------------------------------------------
+
+
+def _watched_files() -> list[Path]:
+    files = list(HOOKS_DIR.glob('*.py'))
+    files.extend(LIB_DIR.glob('*.py'))
+    return files
+
+
+def tree_signature() -> tuple:
+    """Cheap change detector: (name, mtime_ns, size) for every watched file."""
+    sig = []
+    for p in _watched_files():
+        try:
+            st = p.stat()
+        except OSError:
+            continue
+        sig.append((str(p), st.st_mtime_ns, st.st_size))
+    sig.sort()
+    return tuple(sig)
+
+
+def _lib_module_names() -> list[str]:
+    names = []
+    for p in sorted(LIB_DIR.glob('*.py')):
+        stem = p.stem
+        if stem == '__init__' or not stem.isidentifier():
+            continue
+        names.append(f'lib.{stem}')
+    return names
+
+
+# Environment variables hooks/lib reads at import time (module-level constants).
+# The daemon preloads lib under its own env; a client whose values differ gets
+# lib re-imported in its forked child (see _Handler.handle). Enforced by
+# tests/test_hook_server.py, which scans lib/ for module-level env reads.
+IMPORT_TIME_ENV = (
+    'HOME', 'TMPDIR',
+    'CLAUDE_GUARD_CACHE_FILE', 'CLAUDE_GUARD_CACHE_MAX', 'CLAUDE_GUARD_MAX_CHARS',
+    'CLAUDE_HOOK_CONTEXT_MAX_CHARS', 'CLAUDE_PROTECTED_RUNTIME_FILE',
+)
+
+
+def import_env_key(env) -> tuple:
+    return tuple(env.get(name) for name in IMPORT_TIME_ENV)
+
+
+def purge_lib_modules() -> None:
+    for name in list(sys.modules):
+        if name == 'lib' or name.startswith('lib.'):
+            del sys.modules[name]
+    importlib.invalidate_caches()
+
+
+def preload_lib() -> dict[str, str]:
+    """Import every hooks/lib module; return {module: error} for failures.
+
+    A module that fails to import (e.g. an optional dependency is missing) is
+    simply left for the hook to import, and fail, exactly as it would cold.
+    Modules already bound lazily (see lib/__init__.py) are forced here, so
+    worker threads and forked children never run a first-touch load.
+    """
+    if str(HOOKS_DIR) not in sys.path:
+        sys.path.insert(0, str(HOOKS_DIR))
+    errors: dict[str, str] = {}
+    for name in _lib_module_names():
+        try:
+            getattr(importlib.import_module(name), '__file__', None)
+        except Exception as exc:  # noqa: BLE001 - preload is best-effort
+            errors[name] = f'{type(exc).__name__}: {exc}'
+    return errors
+
+
+class CodeCache:
+    """Compiled hook code objects keyed by absolute path + (mtime, size)."""
+
+    def __init__(self) -> None:
+        self._entries: dict[str, tuple[int, int, types.CodeType]] = {}
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def get(self, path: str) -> types.CodeType:
+        st = os.stat(path)
+        hit = self._entries.get(path)
+        if hit and hit[0] == st.st_mtime_ns and hit[1] == st.st_size:
+            return hit[2]
+        with open(path, 'rb') as fh:
+            code = compile(fh.read(), path, 'exec', dont_inherit=True)
+        self._entries[path] = (st.st_mtime_ns, st.st_size, code)
+        return code
+
+    def warm(self, paths) -> None:
+        for p in paths:
+            try:
+                self.get(str(p))
+            except (OSError, SyntaxError, ValueError):
+                continue
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# ---------------------------------------------------------------------------
+# In-process execution (runs inside the forked child)
+# ---------------------------------------------------------------------------
+
+
+def _exit_status(exc: SystemExit) -> int:
+    code = exc.code
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code & 0xFF
+    try:
+        sys.stderr.write(f'{code}\n')
+    except Exception:
+        pass
+    return 1
+
+
+def run_code_as_main(
+    code: types.CodeType,
+    path: str,
+    argv: list[str],
+    install_main: bool = True,
+    run_atexit: bool = True,
+) -> int:
+    """Execute ``code`` the way ``python3 <path> <argv...>`` would.
+
+    Installs a fresh ``__main__`` module, runs atexit handlers registered by
+    the hook, and maps SystemExit / uncaught exceptions to the interpreter's
+    own exit-status rules (uncaught exception -> traceback + 1).
+
+    ``install_main``/``run_atexit`` touch process-global state; the in-process
+    dispatcher (lib/hook_dispatch.py) turns them off when it runs several
+    hooks in one interpreter, possibly on worker threads.
+    """
+    main_mod = types.ModuleType('__main__')
+    main_mod.__file__ = path
+    main_mod.__builtins__ = __builtins__
+    saved_main = sys.modules.get('__main__')
+    if install_main:
+        sys.modules['__main__'] = main_mod
+        sys.argv = [path] + list(argv)
+    hook_dir = os.path.dirname(path)
+    if hook_dir not in sys.path:
+        sys.path.insert(0, hook_dir)
+    try:
+        exec(code, main_mod.__dict__)
+        status = 0
+    except SystemExit as exc:
+        status = _exit_status(exc)
+    except BaseException:  # noqa: BLE001 - mirror interpreter behaviour
+        traceback.print_exc(file=sys.stderr)
+        status = 1
+    finally:
+        if install_main and saved_main is not None:
+            sys.modules['__main__'] = saved_main
+    if run_atexit:
+        try:
+            atexit._run_exitfuncs()
+        except BaseException:  # noqa: BLE001
+            pass
+    for stream in (sys.stdout, sys.stderr):
+        try:
+            stream.flush()
+        except Exception:
+            pass
+    return status
+
+
+def _adopt_client_context(header: dict, fds: list[int]) -> None:
+    """Make the forked child look like the client's process."""
+    for target, fd in enumerate(fds[:3]):
+        os.dup2(fd, target)
+    for fd in fds:
+        if fd > 2:
+            os.close(fd)
+    os.environ.clear()
+    os.environ.update(header['env'])
+    cwd = header['cwd']
+    if cwd:
+        try:
+            os.chdir(cwd)
+        except OSError:
+            pass
+
+
+# ---------------------------------------------------------------------------
+# Server
+# ---------------------------------------------------------------------------
+
+
+def _peer_uid(conn: socket.socket) -> Optional[int]:
+    if not hasattr(socket, 'SO_PEERCRED'):
+        return None
+    creds = conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i'))
+    _pid, uid, _gid = struct.unpack('3i', creds)
+    return uid
+
+
+def resolve_hook_path(hook: str) -> Optional[str]:
+    """Absolute path for a hook inside HOOKS_DIR, or None when out of tree.
+
+    The daemon only executes files that live in this hooks directory; an
+    arbitrary path from the socket would otherwise be a code-exec primitive.
+    """
+    candidate = Path(hook)
+    if not candidate.is_absolute():
+        candidate = HOOKS_DIR / candidate
+    try:
+        resolved = candidate.resolve()
+    except OSError:
+        return None
+    if resolved.suffix != '.py' or not resolved.is_file():
+        return None
+    if resolved.parent != HOOKS_DIR:
+        return None
+    return str(resolved)
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    server: 'HookServer'
+
+    def handle(self) -> None:
+        conn = self.request
+        try:
+            header, fds = recv_request(conn)
+        except ConnectionError:
+            return  # liveness probe (hookd.py status) or a vanished client
+        except Exception as exc:  # noqa: BLE001
+            self.server.log(f'bad request: {exc}')
+            return
+        path = resolve_hook_path(header['hook'])
+        if path is None:
+            os.write(fds[2] if len(fds) > 2 else 2,
+                     f'hookd: refusing hook {header["hook"]!r}\n'.encode())
+            for fd in fds:
+                os.close(fd)
+            send_status(conn, 1)
+            return
+        _adopt_client_context(header, fds)
+        if import_env_key(os.environ) != self.server._env_key:
+            # lib constants were frozen under the daemon's env; let the hook
+            # import lib afresh under the client's env, exactly as cold.
+            purge_lib_modules()
+        try:
+            code = self.server.codes.get(path)
+        except SyntaxError:
+            traceback.print_exc()
+            send_status(conn, 1)
+            return
+        status = run_code_as_main(code, path, header['argv'])
+        send_status(conn, status)
+
+
+class IdleExit(Exception):
+    """Raised out of serve_forever() once the server has been idle too long."""
+
+
+class HookServer(socketserver.ForkingMixIn, socketserver.UnixStreamServer):
+    """Forking Unix-socket hook server with mtime-driven hot reload."""
+
+    allow_reuse_address = False
+    max_children = 64
+    block_on_close = False
+
+    def __init__(self, sock_path: str, verbose: bool = False,
+                 idle_timeout: float = 0.0) -> None:
+        self.sock_path = sock_path
+        self.verbose = verbose
+        self.idle_timeout = idle_timeout
+        self.last_active = time.monotonic()
+        self.codes = CodeCache()
+        self._signature: tuple = ()
+        self._env_key: tuple = ()
+        self.reloads = 0
+        self.served = 0
+        old_umask = os.umask(0o177)
+        try:
+            super().__init__(sock_path, _Handler)
+        finally:
+            os.umask(old_umask)
+        self.reload(force=True)
+
+    def log(self, msg: str) -> None:
+        if self.verbose:
+            sys.stderr.write(f'hookd[{os.getpid()}]: {msg}\n')
+            sys.stderr.flush()
+
+    def reload(self, force: bool = False) -> bool:
+        sig = tree_signature()
+        if not force and sig == self._signature:
+            return False
+        purge_lib_modules()
+        errors = preload_lib()
+        self.codes.clear()
+        self.codes.warm(HOOKS_DIR.glob('*.py'))
+        self._signature = sig
+        self._env_key = import_env_key(os.environ)
+        self.reloads += 1
+        self.log(f'loaded {len(self.codes)} hooks; preload errors: {errors or "none"}')
+        return True
+
+    def verify_request(self, request, client_address) -> bool:
+        uid = _peer_uid(request)
+        if uid is not None and uid != os.getuid():
+            self.log(f'rejecting peer uid {uid}')
+            return False
+        try:
+            self.reload()
+        except Exception as exc:  # noqa: BLE001 - keep serving the old tree
+            self.log(f'reload failed: {exc}')
+        self.served += 1
+        self.last_active = time.monotonic()
+        return True
+
+    def service_actions(self) -> None:
+        super().service_actions()  # reaps finished children
+        if self.idle_timeout and not self.active_children \
+                and time.monotonic() - self.last_active > self.idle_timeout:
+            raise IdleExit(f'idle for {self.idle_timeout:.0f}s')
+
+    def server_close(self) -> None:
+        super().server_close()
+        try:
+            os.unlink(self.sock_path)
+        except OSError:
+            pass
@@ -0,0 +1,346 @@
+"""Opt-in per-hook timing telemetry written to a local rotating JSONL sink.
+
+Off unless CLAUDE_HOOK_TELEMETRY=1. Nothing leaves the machine: each hook
+invocation appends one line to the sink, and scripts/hook-profile.py
+aggregates the lines per session and per hook.
+
+Record (one JSON object per line):
+  ts             UTC timestamp, second precision
+  session        payload session_id
+  event          payload hook_event_name
+  matcher        the payload field the event's matcher is compared against
+                 (tool_name, source, notification_type or trigger)
+  hook           hook basename
+  ms             wall time of the invocation
+  status         exit status
+  verdict        block / deny / ask / allow / error
+  payload_bytes  size of the stdin payload
+  spans          {"a;b": [inclusive_ms, calls]} timed sections inside the
+                 hook, keyed by their ';'-joined call stack (folded-stack
+                 form, so flame graphs can be built straight from it)
+
+Instrumenting:
+  hook_span(hook, raw)     context manager around one invocation; used by the
+                           in-process dispatcher (lib/hook_dispatch.py)
+  timed_hook(name)         decorator for a standalone hook's main(); every
+                           Python hook wired in settings.json applies it
+  lib/hook-telemetry.sh    sourced by every wired bash hook: with telemetry
+                           on, the hook re-runs itself as
+                           `python3 lib/hook_telemetry.py <name> bash <hook>`
+                           (run_timed), which times the whole process
+  span(name)               time a section inside the current hook
+  instrument(mod, prefix, names)
+                           wrap module functions in span()s, e.g. the
+                           runtime_guard.evaluate primitives (see guard_cache)
+
+Every helper is a no-op when telemetry is off or no hook span is active, and
+a sink error never reaches the hook.
+
+Reporting:
+  percentile(samples, pct) nearest-rank percentile shared by
+                           scripts/hook-profile.py, scripts/bash-safety-bench.py
+                           and tests/bench/
+
+Env:
+  CLAUDE_HOOK_TELEMETRY=1              enable
+  CLAUDE_HOOK_TELEMETRY_FILE           sink path
+                                       (default ~/.claude/logs/hook-telemetry.jsonl)
+  CLAUDE_HOOK_TELEMETRY_MAX_BYTES      rotate past this size (default 5 MiB)
+  CLAUDE_HOOK_TELEMETRY_KEEP           rotated files kept (default 3)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import time
+
+MATCH_FIELDS = ("tool_name", "source", "notification_type", "trigger")
+DEFAULT_MAX_BYTES = 5 * 1024 * 1024
+DEFAULT_KEEP = 3
+
+_state = None  # threading.local, created on first use so a disabled hook skips the import
+
+
+def enabled() -> bool:
+    return os.environ.get("CLAUDE_HOOK_TELEMETRY") == "1"
+
+
+def sink_path() -> str:
+    return os.environ.get("CLAUDE_HOOK_TELEMETRY_FILE") or os.path.expanduser(
+        "~/.claude/logs/hook-telemetry.jsonl")
+
+
+def _local():
+    global _state
+    if _state is None:
+        import threading
+
+        _state = threading.local()
+    return _state
+
+
+def _current():
+    return getattr(_state, "record", None) if _state is not None else None
+
+
+def verdict_for(status: int, stdout: str = "") -> str:
+    """Map a hook's exit status / JSON stdout to a single verdict word."""
+    if status == 2:
+        return "block"
+    if status != 0:
+        return "error"
+    text = stdout.strip()
+    if text.startswith("{"):
+        try:
+            obj = json.loads(text)
+        except ValueError:
+            obj = None
+        if isinstance(obj, dict):
+            specific = obj.get("hookSpecificOutput")
+            if isinstance(specific, dict) and specific.get("permissionDecision"):
+                return str(specific["permissionDecision"])
+            if obj.get("decision") == "block":
+                return "block"
+    return "allow"
+
+
+def _payload_fields(raw: str) -> tuple:
+    try:
+        payload = json.loads(raw) if raw.strip() else {}
+    except ValueError:
+        payload = {}
+    if not isinstance(payload, dict):
+        payload = {}
+    matcher = next((payload[f] for f in MATCH_FIELDS if payload.get(f)), None)
+    return payload.get("session_id"), payload.get("hook_event_name"), matcher
+
+
+class _Span:
+    __slots__ = ("name", "_record", "_start")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._record = None
+
+    def __enter__(self):
+        record = _current()
+        if record is not None:
+            record.stack.append(self.name)
+            self._record = record
+            self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record = self._record
+        if record is not None:
+            ms = (time.perf_counter() - self._start) * 1000
+            key = ";".join(record.stack)
+            record.stack.pop()
+            slot = record.spans.setdefault(key, [0.0, 0])
+            slot[0] += ms
+            slot[1] += 1
+            self._record = None
+        return False
+
+
+def span(name: str) -> _Span:
+    """Time a section of the current hook (no-op outside a hook span)."""
+    return _Span(name)
+
+
+class HookSpan:
+    """One hook invocation. Set ``status`` (and ``stdout``) before leaving."""
+
+    def __init__(self, hook: str, raw: str = "") -> None:
+        self.hook = hook
+        self.raw = raw
+        self.status = 0
+        self.stdout = ""
+        self.verdict = None
+        self.stack: list[str] = []
+        self.spans: dict[str, list] = {}
+        self._nested = None
+        self._start = 0.0
+
+    def __enter__(self):
+        if not enabled():
+            return self
+        if _current() is not None:
+            # Already inside a hook (a decorated hook run by the dispatcher):
+            # time this one as a section of the outer record.
+            self._nested = span(self.hook).__enter__()
+            return self
+        _local().record = self
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._nested is not None:
+            self._nested.__exit__(exc_type, exc, tb)
+            return False
+        if _current() is not self:
+            return False
+        ms = (time.perf_counter() - self._start) * 1000
+        _state.record = None
+        if exc_type is not None and not issubclass(exc_type, SystemExit):
+            self.status = 1
+        session, event, matcher = _payload_fields(self.raw)
+        write({
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "session": session,
+            "event": event,
+            "matcher": matcher,
+            "hook": self.hook,
+            "ms": round(ms, 3),
+            "status": self.status,
+            "verdict": self.verdict or verdict_for(self.status, self.stdout),
+            "payload_bytes": len(self.raw.encode("utf-8", "surrogateescape")),
+            "spans": {k: [round(v[0], 3), v[1]] for k, v in self.spans.items()},
+        })
+        return False
+
+
+def hook_span(hook: str, raw: str = "") -> HookSpan:
+    return HookSpan(hook, raw)
+
+
+def _exit_code(code) -> int:
+    if code is None:
+        return 0
+    return code if isinstance(code, int) else 1
+
+
+def timed_hook(name: str):
+    """Decorate a hook's ``main()``: stdin is read once and replayed to it.
+
+    The wrapped function's return value (or SystemExit code) is the status.
+    When telemetry is off the function is called untouched.
+    """
+
+    def decorate(fn):
+        def wrapper(*args, **kwargs):
+            if not enabled():
+                return fn(*args, **kwargs)
+            if _current() is not None:
+                # run in-process by the dispatcher, which owns stdin
+                with _Span(name):
+                    return fn(*args, **kwargs)
+            import io
+
+            raw = sys.stdin.read()
+            sys.stdin = io.StringIO(raw)
+            with HookSpan(name, raw) as record:
+                try:
+                    status = fn(*args, **kwargs)
+                except SystemExit as exc:
+                    record.status = _exit_code(exc.code)
+                    raise
+                record.status = _exit_code(status)
+            return status
+
+        wrapper.__name__ = fn.__name__
+        wrapper.__doc__ = fn.__doc__
+        wrapper.__wrapped__ = fn
+        return wrapper
+
+    return decorate
+
+
+def run_timed(name: str, argv: list) -> int:
+    """Run ``argv`` as hook ``name`` on this process's stdin and record it.
+
+    Output is passed through unchanged and the child's exit status returned.
+    The child gets CLAUDE_HOOK_TELEMETRY_TIMED=1 so it does not re-wrap.
+    """
+    import subprocess
+
+    raw = sys.stdin.buffer.read()
+    env = dict(os.environ, CLAUDE_HOOK_TELEMETRY_TIMED="1")
+    with HookSpan(name, raw.decode("utf-8", "surrogateescape")) as record:
+        try:
+            proc = subprocess.run(argv, input=raw, stdout=subprocess.PIPE, env=env)
+        except OSError as exc:
+            sys.stderr.write(f"{name}: {exc}\n")
+            record.status = 127
+            return 127
+        record.status = proc.returncode
+        record.stdout = proc.stdout.decode("utf-8", "surrogateescape")
+    sys.stdout.buffer.write(proc.stdout)
+    sys.stdout.flush()
+    return proc.returncode
+
+
+def instrument(module, prefix: str, names) -> None:
+    """Replace ``module.<name>`` functions with span-timed wrappers (idempotent)."""
+    for name in names:
+        fn = getattr(module, name, None)
+        if fn is None or getattr(fn, "_hook_telemetry", False):
+            continue
+
+        def make(fn, label):
+            def wrapper(*args, **kwargs):
+                if _current() is None:
+                    return fn(*args, **kwargs)
+                with _Span(label):
+                    return fn(*args, **kwargs)
+
+            wrapper._hook_telemetry = True
+            wrapper.__name__ = fn.__name__
+            wrapper.__wrapped__ = fn
+            return wrapper
+
+        setattr(module, name, make(fn, f"{prefix}.{name.lstrip('_')}"))
+
+
+def _rotate(path: str) -> None:
+    try:
+        max_bytes = int(os.environ.get("CLAUDE_HOOK_TELEMETRY_MAX_BYTES", DEFAULT_MAX_BYTES))
+        keep = int(os.environ.get("CLAUDE_HOOK_TELEMETRY_KEEP", DEFAULT_KEEP))
+    except ValueError:
+        max_bytes, keep = DEFAULT_MAX_BYTES, DEFAULT_KEEP
+    if os.path.getsize(path) <= max_bytes:
+        return
+    import fcntl
+
+    with open(f"{path}.lock", "a") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return  # another hook is rotating
+        if os.path.getsize(path) <= max_bytes:
+            return
+        for i in range(keep - 1, 0, -1):
+            if os.path.exists(f"{path}.{i}"):
+                os.replace(f"{path}.{i}", f"{path}.{i + 1}")
+        if keep > 0:
+            os.replace(path, f"{path}.1")
+        else:
+            os.unlink(path)
+
+
+def percentile(samples, pct: float) -> float:
+    """Nearest-rank percentile of ``samples`` (which must be non-empty)."""
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def write(record: dict) -> None:
+    """Append one record to the sink; errors are swallowed."""
+    path = sink_path()
+    line = (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8", "surrogateescape")
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        try:
+            os.write(fd, line)  # one O_APPEND write: concurrent hooks don't interleave
+        finally:
+            os.close(fd)
+        _rotate(path)
+    except OSError:
+        pass
+
+
+if __name__ == "__main__":
+    sys.exit(run_timed(sys.argv[1], sys.argv[2:]))
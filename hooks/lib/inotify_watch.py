@@ -0,0 +1,530 @@
+"""Single-process inotify watcher for the git-fswatch auto-sync.
+
+git-fswatch.sh runs one bash loop plus one `fswatch` process per repo and
+sleeps a fixed FSWATCH_DEBOUNCE after the last event before syncing. This
+module watches every registered repo from one process (hooks/git-watchd.py
+serve) on one inotify fd, read through ctypes and select:
+
+  Watches    one inotify watch per non-ignored directory of each repo. A new
+             directory is walked and watched as soon as its IN_CREATE or
+             IN_MOVED_TO arrives. IN_Q_OVERFLOW marks every repo dirty.
+  Ignores    .git/, the old fswatch excludes (node_modules/, __pycache__/,
+             *.pyc, *.swp, *.tmp, *.log) and each repo's ignore rules:
+             core.excludesFile, .git/info/exclude and every .gitignore. They
+             are compiled to regexes once, recompiled when a .gitignore
+             changes, and matched in-process, so no git runs per event.
+  Debounce   per repo, adaptive. A repo syncs once it has been quiet for
+             `base` seconds (FSWATCH_DEBOUNCE). While events arrive faster
+             than BURST_RATE per second (builds, installs, checkouts) the
+             quiet window stretches with the rate, up to 4x base. A steady
+             stream still syncs `max_wait` seconds after its first event.
+  Sync       dispatched to a bounded thread pool that runs
+             `git-fswatch.sh --sync-once <repo>`, the same checkpoint / pull
+             / push steps as the per-repo watcher. A repo never syncs twice
+             at once; events during its sync schedule the next one.
+
+Linux only (inotify); git-watchd.py reports `supported` so callers can fall
+back to the per-repo fswatch loop elsewhere. Stdlib-only.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import ctypes
+import errno
+import os
+import queue
+import re
+import select
+import struct
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+HOOKS_DIR = Path(__file__).resolve().parent.parent
+FSWATCH_SH = HOOKS_DIR / 'git-fswatch.sh'
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_CLOSE_WRITE | IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO
+              | IN_DELETE_SELF | IN_ONLYDIR | IN_DONT_FOLLOW)
+_EVENT = struct.Struct('iIII')
+
+EXCLUDED_DIRS = frozenset({'.git', 'node_modules', '__pycache__'})
+EXCLUDED_SUFFIXES = ('.pyc', '.swp', '.tmp', '.log')
+BURST_RATE = 20.0       # events/s above which the quiet window stretches
+MAX_STRETCH = 4.0       # quiet window never exceeds base * MAX_STRETCH
+
+
+class Inotify:
+    """Thin ctypes wrapper over inotify_init1 / inotify_add_watch / read."""
+
+    def __init__(self) -> None:
+        self._libc = ctypes.CDLL(None, use_errno=True)
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+    def add(self, path: str, mask: int = WATCH_MASK) -> int:
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        return wd
+
+    def remove(self, wd: int) -> None:
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read(self) -> list[tuple[int, int, str]]:
+        """Pending events as (wd, mask, name); [] when none are queued."""
+        try:
+            buf = os.read(self.fd, 256 * 1024)
+        except BlockingIOError:
+            return []
+        events, pos = [], 0
+        while pos + _EVENT.size <= len(buf):
+            wd, mask, _cookie, length = _EVENT.unpack_from(buf, pos)
+            pos += _EVENT.size
+            name = buf[pos:pos + length].rstrip(b'\0')
+            pos += length
+            events.append((wd, mask, os.fsdecode(name)))
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+def supported() -> bool:
+    if not sys.platform.startswith('linux'):
+        return False
+    try:
+        Inotify().close()
+    except (OSError, AttributeError):
+        return False
+    return True
+
+
+# ---------------------------------------------------------------------------
+# .gitignore matching
+# ---------------------------------------------------------------------------
+
+
+def _translate(pat: str) -> str:
+    """gitignore glob (no leading '/', no trailing '/') -> regex body."""
+    out, i, n = [], 0, len(pat)
+    while i < n:
+        c = pat[i]
+        if pat.startswith('**/', i) and (i == 0 or pat[i - 1] == '/'):
+            out.append('(?:.*/)?')
+            i += 3
+        elif pat.startswith('**', i) and i + 2 == n and (i == 0 or pat[i - 1] == '/'):
+            out.append('.*')
+            i += 2
+        elif c == '*':
+            out.append('[^/]*')
+            i += 1
+        elif c == '?':
+            out.append('[^/]')
+            i += 1
+        elif c == '[':
+            j = pat.find(']', i + 2)
+            if j < 0:
+                out.append(re.escape(c))
+                i += 1
+                continue
+            body = pat[i + 1:j]
+            if body[0] in '!^':
+                body = '^' + body[1:]
+            out.append('[' + body.replace('\\', '\\\\') + ']')
+            i = j + 1
+        elif c == '\\' and i + 1 < n:
+            out.append(re.escape(pat[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(c))
+            i += 1
+    return ''.join(out)
+
+
+def compile_patterns(lines) -> list[tuple[re.Pattern, bool, bool]]:
+    """(regex, negated, dir_only) per rule; regexes match paths relative to
+    the directory holding the ignore file."""
+    rules = []
+    for line in lines:
+        line = line.rstrip('\n')
+        if not line.endswith('\\ '):
+            line = line.rstrip()
+        if not line or line.startswith('#'):
+            continue
+        negated = line.startswith('!')
+        if negated or line.startswith('\\!') or line.startswith('\\#'):
+            line = line[1:]
+        dir_only = line.endswith('/')
+        line = line.rstrip('/')
+        if not line:
+            continue
+        anchored = '/' in line
+        body = _translate(line.lstrip('/'))
+        regex = re.compile(body if anchored else '(?:.*/)?' + body, re.DOTALL)
+        rules.append((regex, negated, dir_only))
+    return rules
+
+
+def _read_lines(path: str) -> list[str]:
+    try:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            return f.readlines()
+    except OSError:
+        return []
+
+
+class IgnoreRules:
+    """A repo's ignore rules, matched without running git.
+
+    Sources in increasing precedence: core.excludesFile, .git/info/exclude,
+    then .gitignore files from the root down; the last matching rule wins and
+    nothing below an ignored directory can be re-included, as in git.
+    """
+
+    def __init__(self, root: str, excludes_file: Optional[str] = None) -> None:
+        self.root = root
+        self.base: list = []
+        for path in (excludes_file, os.path.join(root, '.git', 'info', 'exclude')):
+            if path:
+                self.base.extend(compile_patterns(_read_lines(path)))
+        self.by_dir: dict[str, list] = {}
+        self._dirs: dict[str, bool] = {}
+
+    def load(self, rel_dir: str) -> None:
+        """(Re)read rel_dir/.gitignore ('' is the repo root)."""
+        path = os.path.join(self.root, rel_dir, '.gitignore')
+        rules = compile_patterns(_read_lines(path))
+        if rules:
+            self.by_dir[rel_dir] = rules
+        else:
+            self.by_dir.pop(rel_dir, None)
+        self._dirs.clear()
+
+    def _match(self, rel: str, is_dir: bool) -> bool:
+        verdict = False
+        for regex, negated, dir_only in self.base:
+            if (is_dir or not dir_only) and regex.fullmatch(rel):
+                verdict = not negated
+        parts = rel.split('/')
+        for depth in range(len(parts)):
+            rules = self.by_dir.get('/'.join(parts[:depth]))
+            if not rules:
+                continue
+            sub = '/'.join(parts[depth:])
+            for regex, negated, dir_only in rules:
+                if (is_dir or not dir_only) and regex.fullmatch(sub):
+                    verdict = not negated
+        return verdict
+
+    def ignored(self, rel: str, is_dir: bool = False) -> bool:
+        parts = rel.split('/')
+        if EXCLUDED_DIRS.intersection(parts[:-1] if not is_dir else parts):
+            return True
+        if not is_dir and rel.endswith(EXCLUDED_SUFFIXES):
+            return True
+        for depth in range(1, len(parts)):
+            parent = '/'.join(parts[:depth])
+            hit = self._dirs.get(parent)
+            if hit is None:
+                hit = self._dirs[parent] = self._match(parent, True)
+            if hit:
+                return True
+        return self._match(rel, is_dir)
+
+
+def global_excludes_file() -> Optional[str]:
+    """core.excludesFile, or git's XDG default; read once per service start."""
+    proc = subprocess.run(['git', 'config', '--global', '--path', 'core.excludesFile'],
+                          capture_output=True, text=True)
+    if proc.returncode == 0 and proc.stdout.strip():
+        return proc.stdout.strip()
+    xdg = os.environ.get('XDG_CONFIG_HOME') or os.path.expanduser('~/.config')
+    return os.path.join(xdg, 'git', 'ignore')
+
+
+# ---------------------------------------------------------------------------
+# Debounce
+# ---------------------------------------------------------------------------
+
+
+class Debounce:
+    """Adaptive sync window for one repo (see the module docstring)."""
+
+    def __init__(self, base: float, max_wait: float) -> None:
+        self.base = base
+        self.max_wait = max_wait
+        self.first: Optional[float] = None
+        self.last = 0.0
+        self.events = 0
+
+    def touch(self, now: float, count: int = 1) -> None:
+        if self.first is None:
+            self.first = now
+            self.events = 0
+        self.last = now
+        self.events += count
+
+    def force(self, now: float) -> None:
+        """Sync at the next poll (start-up and newly registered repos)."""
+        self.touch(now)
+        self.first = now - self.max_wait
+
+    def rate(self) -> float:
+        if self.first is None:
+            return 0.0
+        return self.events / max(1.0, self.last - self.first)
+
+    def quiet(self) -> float:
+        rate = self.rate()
+        if rate <= BURST_RATE:
+            return self.base
+        return min(self.base * MAX_STRETCH, self.base * rate / BURST_RATE)
+
+    def due(self, now: float) -> bool:
+        if self.first is None:
+            return False
+        return now - self.last >= self.quiet() or now - self.first >= self.max_wait
+
+    def reset(self) -> None:
+        self.first = None
+        self.events = 0
+
+
+# ---------------------------------------------------------------------------
+# Service
+# ---------------------------------------------------------------------------
+
+
+def read_registry(path: str) -> list[str]:
+    """Registered repo roots, one absolute path per line ('#' comments allowed)."""
+    repos = []
+    for line in _read_lines(path):
+        line = line.strip()
+        if line and not line.startswith('#') and line not in repos:
+            repos.append(line)
+    return repos
+
+
+def write_registry(path: str, repos: list[str]) -> None:
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(''.join(f'{r}\n' for r in repos))
+    os.replace(tmp, path)
+
+
+def run_sync(repo: str, pull: bool) -> int:
+    """One sync pass for `repo` through git-fswatch.sh --sync-once."""
+    env = dict(os.environ, FSWATCH_LAST_PULL='0' if pull else str(int(time.time())))
+    return subprocess.run(['bash', str(FSWATCH_SH), '--sync-once', repo], env=env,
+                          stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                          stderr=subprocess.DEVNULL).returncode
+
+
+class RepoWatch:
+    """Watches and debounce state for one repo."""
+
+    def __init__(self, root: str, debounce: Debounce, excludes_file: Optional[str]) -> None:
+        self.root = root
+        self.rules = IgnoreRules(root, excludes_file)
+        self.debounce = debounce
+        self.wds: dict[int, str] = {}   # wd -> dir relative to root ('' = root)
+        self.syncing = False
+        self.last_pull = 0.0
+
+
+class Watcher:
+    """All registered repos on one inotify fd, syncs on a bounded pool."""
+
+    def __init__(self, registry: str, base: float = 12.0, max_wait: float = 60.0,
+                 workers: int = 4, pull_interval: float = 300.0,
+                 sync: Callable[[str, bool], int] = run_sync,
+                 clock: Callable[[], float] = time.monotonic,
+                 excludes_file: Optional[str] = None, verbose: bool = False) -> None:
+        self.registry = registry
+        self.base = base
+        self.max_wait = max_wait
+        self.pull_interval = pull_interval
+        self.sync = sync
+        self.clock = clock
+        self.excludes_file = excludes_file
+        self.verbose = verbose
+        self.inotify = Inotify()
+        self.repos: dict[str, RepoWatch] = {}
+        self.by_wd: dict[int, RepoWatch] = {}
+        self.pool = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+        self.done: queue.SimpleQueue = queue.SimpleQueue()
+        self._registry_sig: Optional[tuple] = None
+        self.limit_warned = False
+        self.syncs = 0
+
+    def log(self, msg: str) -> None:
+        if self.verbose:
+            sys.stderr.write(f'git-watchd[{os.getpid()}]: {msg}\n')
+            sys.stderr.flush()
+
+    # -- watches -----------------------------------------------------------
+
+    def _watch_tree(self, repo: RepoWatch, rel_dir: str) -> None:
+        """Watch rel_dir and every non-ignored directory below it."""
+        stack = [rel_dir]
+        while stack:
+            rel = stack.pop()
+            path = os.path.join(repo.root, rel) if rel else repo.root
+            try:
+                wd = self.inotify.add(path)
+            except OSError as exc:
+                if exc.errno == errno.ENOSPC and not self.limit_warned:
+                    self.limit_warned = True
+                    self.log('inotify watch limit reached (fs.inotify.max_user_watches); '
+                             f'{repo.root} is only partly watched')
+                continue
+            repo.wds[wd] = rel
+            self.by_wd[wd] = repo
+            repo.rules.load(rel)
+            try:
+                entries = list(os.scandir(path))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    child = f'{rel}/{entry.name}' if rel else entry.name
+                    if not repo.rules.ignored(child, is_dir=True):
+                        stack.append(child)
+
+    def _unwatch_tree(self, repo: RepoWatch, rel_dir: str) -> None:
+        """Forget rel_dir and everything below it (deleted or moved away)."""
+        prefix = rel_dir + '/'
+        for wd, rel in list(repo.wds.items()):
+            if rel == rel_dir or rel.startswith(prefix):
+                self.inotify.remove(wd)
+                del repo.wds[wd]
+                self.by_wd.pop(wd, None)
+
+    def add_repo(self, root: str) -> None:
+        repo = RepoWatch(root, Debounce(self.base, self.max_wait), self.excludes_file)
+        self.repos[root] = repo
+        self._watch_tree(repo, '')
+        repo.debounce.force(self.clock())  # initial sync, as the per-repo watcher did
+        self.log(f'watching {root} ({len(repo.wds)} dirs)')
+
+    def drop_repo(self, root: str) -> None:
+        repo = self.repos.pop(root)
+        for wd in repo.wds:
+            self.inotify.remove(wd)
+            self.by_wd.pop(wd, None)
+        self.log(f'stopped watching {root}')
+
+    def reload_registry(self) -> None:
+        try:
+            st = os.stat(self.registry)
+            sig = (st.st_ino, st.st_mtime_ns, st.st_size)
+        except OSError:
+            sig = None
+        if sig == self._registry_sig:
+            return
+        self._registry_sig = sig
+        wanted = [r for r in read_registry(self.registry) if os.path.isdir(os.path.join(r, '.git'))]
+        for root in list(self.repos):
+            if root not in wanted:
+                self.drop_repo(root)
+        for root in wanted:
+            if root not in self.repos:
+                self.add_repo(root)
+
+    # -- events ------------------------------------------------------------
+
+    def handle(self, events: list[tuple[int, int, str]]) -> None:
+        now = self.clock()
+        for wd, mask, name in events:
+            if mask & IN_Q_OVERFLOW:
+                for repo in self.repos.values():
+                    repo.debounce.touch(now)
+                continue
+            repo = self.by_wd.get(wd)
+            if repo is None:
+                continue
+            rel_dir = repo.wds.get(wd, '')
+            if mask & IN_IGNORED:
+                repo.wds.pop(wd, None)
+                self.by_wd.pop(wd, None)
+                continue
+            if not name:
+                continue  # IN_DELETE_SELF: the parent reports the removal
+            rel = f'{rel_dir}/{name}' if rel_dir else name
+            is_dir = bool(mask & IN_ISDIR)
+            if is_dir and mask & (IN_DELETE | IN_MOVED_FROM):
+                self._unwatch_tree(repo, rel)
+            if name == '.gitignore':
+                repo.rules.load(rel_dir)
+                self._watch_tree(repo, rel_dir)  # directories it no longer ignores
+            if repo.rules.ignored(rel, is_dir):
+                continue
+            if is_dir and mask & (IN_CREATE | IN_MOVED_TO):
+                self._watch_tree(repo, rel)
+            repo.debounce.touch(now)
+
+    # -- dispatch ----------------------------------------------------------
+
+    def _run(self, repo: RepoWatch, pull: bool) -> None:
+        try:
+            status = self.sync(repo.root, pull)
+        except Exception as exc:  # noqa: BLE001 - a failed sync must not kill the pool
+            status = f'{type(exc).__name__}: {exc}'
+        self.done.put((repo, status))
+
+    def dispatch(self) -> None:
+        while True:
+            try:
+                repo, status = self.done.get_nowait()
+            except queue.Empty:
+                break
+            repo.syncing = False
+            self.log(f'sync {repo.root}: {status}')
+        now = self.clock()
+        for repo in self.repos.values():
+            if repo.syncing or not repo.debounce.due(now):
+                continue
+            pull = now - repo.last_pull >= self.pull_interval
+            if pull:
+                repo.last_pull = now
+            repo.debounce.reset()
+            repo.syncing = True
+            self.syncs += 1
+            self.pool.submit(self._run, repo, pull)
+
+    def poll(self, timeout: float) -> None:
+        ready, _, _ = select.select([self.inotify.fd], [], [], timeout)
+        if ready:
+            self.handle(self.inotify.read())
+        self.reload_registry()
+        self.dispatch()
+
+    def serve(self, stopping: Callable[[], bool] = lambda: False, tick: float = 1.0) -> None:
+        self.reload_registry()
+        try:
+            while not stopping():
+                self.poll(tick)
+        finally:
+            self.pool.shutdown(wait=True)
+            self.inotify.close()
@@ -0,0 +1,223 @@
+"""Fire-and-forget spool for PostToolUse observability work.
+
+PostToolUse:Agent ran three hooks inline before the orchestrator could
+continue. Two of them gate the next step and stay synchronous:
+posttool-overnight-file-check.py can exit 2, and posttool-subagent-track.py
+writes the workflow bookmark that pretool-todo-validate reads. The third,
+posttool-overnight-trace.py, only observes. It loads the cycle contract,
+opens the agent's report, appends trace.jsonl, updates trace.index.json and
+classifies and records specialist yield. It now captures the fields that
+cannot wait (timestamps, the current step, usage counters) into one compact
+event, appends it here and returns. A single background consumer
+(hooks/obsd.py serve) drains the spool and hands the events to their
+handler in batches.
+
+Spool line, one O_APPEND write per event so concurrent hooks never
+interleave (an append to a local regular file is one atomic extent):
+
+    {"kind": <handler>, "env": {...}, ...event fields} NL
+
+  kind  selects the handler in obsd.py's HANDLERS table
+  env   the ENV_KEYS the hook ran with; the consumer applies them around
+        the handler call, since it serves every session and project
+
+Drain, lifecycle and single-consumer locking follow lib/checkpoint_queue.py
+(same state-dir layout: spool, writer.pid, writer.lock, writer.log): the
+spool is renamed to <spool>.claimed and read after a short grace sleep, a
+.claimed file left by a crashed consumer is read first, and an idle consumer
+removes its pid file and drains once more before exiting.
+
+The consumer holds writer.lock for its whole life, so each drain pass (claim
+plus handlers) also takes drain.lock. A synchronous drain (obsd.py drain,
+or stop-overnight-timelock.py before closeout) therefore waits for a batch
+the consumer is still handling and then handles the rest itself, so every
+event queued before it started is done when it returns.
+
+Events are observability only: a handler that raises is logged and its
+batch is dropped, never retried.
+
+Stdlib-only.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import fcntl
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Iterator
+
+from lib.checkpoint_queue import (
+    GRACE_SECS, ensure_state_dir, log_path, pid_alive, pid_path, read_pid, spool_path,
+)
+
+HOOKS_DIR = Path(__file__).resolve().parent.parent
+OBSD = HOOKS_DIR / 'obsd.py'
+
+ENV_KEYS = (
+    'CLAUDE_PROJECT_DIR', 'CLAUDE_SESSION_ID', 'CLAUDE_AGENT_ID',
+    'SPECIALIST_YIELD_LOG_PATH', 'SPECIALIST_YIELD_POLICY_PATH',
+)
+
+
+def default_state_dir() -> str:
+    """Per-uid spool directory; overridable via $CLAUDE_OBSD_DIR."""
+    override = os.environ.get('CLAUDE_OBSD_DIR')
+    if override:
+        return override
+    base = os.environ.get('CLAUDE_TMPDIR') or os.environ.get('TMPDIR') or '/tmp'
+    return os.path.join(base, f'claude-obsd-{os.getuid()}')
+
+
+def drain_lock_path(state_dir: str) -> str:
+    return os.path.join(state_dir, 'drain.lock')
+
+
+def enqueue(state_dir: str, kind: str, event: dict) -> None:
+    """Append one event; raises OSError when the spool cannot be written."""
+    ensure_state_dir(state_dir)
+    env = {k: os.environ[k] for k in ENV_KEYS if k in os.environ}
+    line = json.dumps({**event, 'kind': kind, 'env': env},
+                      ensure_ascii=False, separators=(',', ':')) + '\n'
+    fd = os.open(spool_path(state_dir), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+    try:
+        os.write(fd, line.encode('utf-8'))
+    finally:
+        os.close(fd)
+
+
+def ensure_consumer(state_dir: str) -> None:
+    """Start obsd.py serve detached unless its pid is alive."""
+    if pid_alive(read_pid(state_dir)):
+        return
+    with open(os.devnull, 'rb') as devnull, open(log_path(state_dir), 'ab') as log:
+        subprocess.Popen(
+            [sys.executable, str(OBSD), '--state-dir', state_dir, 'serve', '--verbose'],
+            stdin=devnull, stdout=log, stderr=log,
+            start_new_session=True, close_fds=True,
+        )
+
+
+@contextlib.contextmanager
+def applied_env(env: dict) -> Iterator[None]:
+    """Set ENV_KEYS to what the enqueuing hook saw, restoring them afterwards."""
+    saved = {k: os.environ.get(k) for k in ENV_KEYS}
+    try:
+        for key in ENV_KEYS:
+            if key in env:
+                os.environ[key] = str(env[key])
+            else:
+                os.environ.pop(key, None)
+        yield
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+class Consumer:
+    """Drains the spool and passes each kind's events to its handler in one batch."""
+
+    def __init__(self, state_dir: str, handlers: dict[str, Callable[[list[dict]], None]],
+                 clock: Callable[[], float] = time.monotonic, verbose: bool = False) -> None:
+        self.state_dir = state_dir
+        self.spool = spool_path(state_dir)
+        self.claimed = self.spool + '.claimed'
+        self.handlers = handlers
+        self.clock = clock
+        self.verbose = verbose
+        self.handled = 0
+        self.dropped = 0
+
+    def log(self, msg: str) -> None:
+        if self.verbose:
+            sys.stderr.write(f'obsd[{os.getpid()}]: {msg}\n')
+            sys.stderr.flush()
+
+    def _claim(self) -> bytes:
+        if not os.path.exists(self.claimed):
+            try:
+                if os.stat(self.spool).st_size == 0:
+                    return b''
+                os.rename(self.spool, self.claimed)
+            except FileNotFoundError:
+                return b''
+            time.sleep(GRACE_SECS)
+        try:
+            with open(self.claimed, 'rb') as f:
+                data = f.read()
+            os.unlink(self.claimed)
+        except FileNotFoundError:
+            return b''
+        return data
+
+    def drain(self) -> int:
+        """Handle every queued event under drain.lock; returns how many were read."""
+        try:
+            fd = os.open(drain_lock_path(self.state_dir), os.O_RDWR | os.O_CREAT, 0o600)
+        except FileNotFoundError:
+            return 0  # no state dir: nothing was ever queued
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            return self._drain_locked()
+        finally:
+            os.close(fd)
+
+    def _drain_locked(self) -> int:
+        batches: dict[str, list[dict]] = {}
+        read = 0
+        for raw in self._claim().splitlines():
+            try:
+                event = json.loads(raw)
+            except ValueError:
+                continue
+            if not isinstance(event, dict):
+                continue
+            read += 1
+            batches.setdefault(str(event.get('kind')), []).append(event)
+        for kind, events in batches.items():
+            handler = self.handlers.get(kind)
+            if handler is None:
+                self.dropped += len(events)
+                self.log(f'no handler for {kind!r}; dropped {len(events)} events')
+                continue
+            try:
+                handler(events)
+                self.handled += len(events)
+            except Exception as exc:
+                self.dropped += len(events)
+                self.log(f'{kind} handler failed on {len(events)} events: {exc!r}')
+        return read
+
+    def serve(self, poll: float = 0.2, idle: float = 600.0,
+              stopping: Callable[[], bool] = lambda: False) -> None:
+        """Run until idle for `idle` seconds (0 = never) or `stopping()` is true."""
+        Path(pid_path(self.state_dir)).write_text(f'{os.getpid()}\n')
+        last_active = self.clock()
+        try:
+            while not stopping():
+                if self.drain():
+                    last_active = self.clock()
+                elif idle and self.clock() - last_active >= idle:
+                    with contextlib.suppress(FileNotFoundError):
+                        os.unlink(pid_path(self.state_dir))
+                    if not self.drain():
+                        self.log(f'exiting: idle for {idle:.0f}s')
+                        return
+                    Path(pid_path(self.state_dir)).write_text(f'{os.getpid()}\n')
+                    last_active = self.clock()
+                    continue
+                time.sleep(poll)
+            self.drain()
+        finally:
+            try:
+                if read_pid(self.state_dir) == os.getpid():
+                    os.unlink(pid_path(self.state_dir))
+            except OSError:
+                pass
@@ -25,7 +25,11 @@ import json
 import os
 import subprocess
 from datetime import datetime, timezone
-from pathlib import Path
+
+try:
+    from . import state_snapshot
+except ImportError:
+    from lib import state_snapshot  # type: ignore
 
 
 def _end_time_passed(end_str):
@@ -43,6 +47,17 @@ def _end_time_passed(end_str):
     return datetime.now(timezone.utc) > end
 
 
+def _state_is_live(state):
+    """True iff parsed state-file contents describe an in-progress session."""
+    if not isinstance(state, dict):
+        return False
+    if state.get('current_phase', '') in ('complete', 'completed'):
+        return False
+    if _end_time_passed(state.get('end_time', '')):
+        return False
+    return True
+
+
 def _state_file_is_live(sf):
     """True iff state file `sf` describes an in-progress overnight session."""
     try:
@@ -51,13 +66,7 @@ def _state_file_is_live(sf):
         state = json.loads(sf.read_text())
     except (OSError, ValueError):
         return False
-    if not isinstance(state, dict):
-        return False
-    if state.get('current_phase', '') in ('complete', 'completed'):
-        return False
-    if _end_time_passed(state.get('end_time', '')):
-        return False
-    return True
+    return _state_is_live(state)
 
 
 def candidate_project_dirs(project_dir=None):
@@ -94,16 +103,19 @@ def candidate_project_dirs(project_dir=None):
 
 def is_overnight_active(project_dir=None):
     """True iff a live overnight-state-*.json exists under any candidate project
-    dir's .claude/. Fails closed (returns False) on any error."""
+    dir's .claude/. Fails closed (returns False) on any error.
+
+    State files are read through lib/state_snapshot, so repeated probes within
+    a tool call (and across hooks) re-parse only files that changed.
+    """
     try:
         for d in candidate_project_dirs(project_dir):
             try:
-                state_files = Path(d).glob('.claude/overnight-state-*.json')
+                states = state_snapshot.snapshot(d).overnight_states()
             except Exception:
                 continue
-            for sf in state_files:
-                if _state_file_is_live(sf):
-                    return True
+            if any(_state_is_live(sf.data) for sf in states):
+                return True
         return False
     except Exception:
         return False
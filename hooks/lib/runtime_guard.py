@@ -19,7 +19,8 @@ Ordering (mandatory):
   STEP 2  P1..P9 generic primitives, patterns sourced from the data file
 
 Self-contained: does NOT depend on any context-stripped command form computed
-later in the hook. It performs its own conservative tokenization.
+later in the hook. It performs its own conservative tokenization (shared with
+the other Bash guards via lib/shell_lex.py).
 """
 
 from __future__ import annotations
@@ -27,10 +28,14 @@ from __future__ import annotations
 import json
 import os
 import re
-import shlex
 import sys
 from typing import Optional, Tuple
 
+try:
+    from . import shell_lex
+except ImportError:  # run as lib/runtime_guard.py, or imported top-level
+    import shell_lex  # type: ignore
+
 # ── The single hardcoded constant: the generic data-file path ────────────────
 # Overridable for tests via env so the live machine file is never mutated by a
 # test run. The path is generic; it carries no project identity.
@@ -41,6 +46,15 @@ DATA_FILE_PATH = os.environ.get(
 
 MAX_COMMAND_CHARS = int(os.environ.get("CLAUDE_GUARD_MAX_CHARS", "262144"))
 
+# Persistent verdict cache maintained by lib/guard_cache.py (same derivation as
+# guard_cache.cache_path()). A forged entry would answer ALLOW without running
+# the engine, so STEP0 protects this file exactly like the data file. Generic
+# tmpfs path — no project identity.
+VERDICT_CACHE_PATH = os.environ.get("CLAUDE_GUARD_CACHE_FILE") or os.path.join(
+    "/dev/shm" if os.path.isdir("/dev/shm") else os.environ.get("TMPDIR", "/tmp"),
+    f"claude-guard-cache-{os.getuid()}.json",
+)
+
 Verdict = Tuple[str, Optional[str], Optional[str]]
 ALLOW: Verdict = ("ALLOW", None, None)
 
@@ -49,6 +63,28 @@ def _block(primitive: str, reason: str) -> Verdict:
     return ("BLOCK", primitive, reason)
 
 
+# ── Filesystem-dependency observer (verdict cache support) ───────────────────
+# A verdict is a pure function of (command, cwd, config) EXCEPT where the engine
+# consults the live filesystem: package.json manifests, `packages/` listings and
+# symlink resolution of candidate paths. lib/guard_cache.py installs an observer
+# that is told about each such probe BEFORE it happens, so a cached verdict can
+# be invalidated when anything it depended on changes. None (the default) keeps
+# the engine observer-free.
+_dep_observer = None
+
+
+def set_dependency_observer(fn) -> None:
+    """Install `fn(kind, path)` (or None). `kind` is "stat" for a file/dir whose
+    existence or content was read, "real" for a path whose realpath was taken."""
+    global _dep_observer
+    _dep_observer = fn
+
+
+def _note_dep(kind: str, path: str) -> None:
+    if _dep_observer is not None:
+        _dep_observer(kind, path)
+
+
 # ── Generic verb / keyword vocabularies (no project names) ───────────────────
 PKG_MANAGERS = frozenset({"yarn", "npm", "pnpm", "bun"})
 # Generic command wrappers that prefix the real command. After consuming a
@@ -346,94 +382,13 @@ def _split_pipeline(command: str) -> list:
     """Split a bash command into simple commands across ; && || | and newlines.
 
     Conservative: operates on the raw text but only at unquoted top level by a
-    cheap quote-aware scan. Returns a list of raw simple-command strings.
+    cheap quote-aware scan (shared, memoized: lib/shell_lex.py). Returns a list
+    of raw simple-command strings.
     """
-    parts = []
-    buf = []
-    i = 0
-    n = len(command)
-    quote = None
-    subst_depth = 0   # inside $(...) command substitution
-    backtick = False  # inside `...` command substitution
-    while i < n:
-        c = command[i]
-        if quote == "'":
-            # single quotes: no escaping inside; only a matching ' ends it.
-            buf.append(c)
-            if c == "'":
-                quote = None
-            i += 1
-            continue
-        if quote == '"':
-            # double quotes: backslash escapes ", \, $, `, newline — those do
-            # NOT terminate the quote. Any other char (incl. an escaped ;/&/|)
-            # stays inside the quote, so a quoted separator never splits.
-            if c == "\\" and i + 1 < n and command[i + 1] in ('"', "\\", "$", "`", "\n"):
-                buf.append(c); buf.append(command[i + 1]); i += 2; continue
-            buf.append(c)
-            if c == '"':
-                quote = None
-            i += 1
-            continue
-        # unquoted context
-        if c in ("'", '"'):
-            quote = c
-            buf.append(c)
-            i += 1
-            continue
-        if c == "\\" and i + 1 < n:
-            buf.append(c)
-            buf.append(command[i + 1])
-            i += 2
-            continue
-        # command-substitution tracking: separators inside $()/`` do NOT split
-        # the OUTER simple command (the whole substitution belongs to it).
-        if c == "`":
-            backtick = not backtick
-            buf.append(c); i += 1; continue
-        if command[i:i + 2] in ("$(", "<(", ">("):
-            subst_depth += 1
-            buf.append(command[i:i + 2]); i += 2; continue
-        if c == ")" and subst_depth > 0:
-            subst_depth -= 1
-            buf.append(c); i += 1; continue
-        if subst_depth > 0 or backtick:
-            buf.append(c); i += 1; continue
-        # fd-redirection `&` (2>&1, >&, &>, &>>, >&2) is NOT a separator.
-        if c == "&" and _is_redirect_amp(command, i):
-            buf.append(c); i += 1; continue
-        two = command[i:i + 2]
-        if two in ("&&", "||", "|&"):
-            parts.append("".join(buf)); buf = []; i += 2; continue
-        if c in (";", "|", "\n", "&"):
-            parts.append("".join(buf)); buf = []; i += 1; continue
-        buf.append(c)
-        i += 1
-    parts.append("".join(buf))
-    return [p.strip() for p in parts if p.strip()]
-
+    return list(shell_lex.parse(command).segments)
 
-def _is_redirect_amp(command: str, i: int) -> bool:
-    """True if the `&` at index i is part of an fd redirection, not a separator.
 
-    Forms: `>&`, `<&`, `&>`, `&>>`, `2>&1`, `>&2`. Heuristic: preceded by a
-    redirection operator (`>`/`<` possibly with a leading fd digit) OR followed
-    by `>`/a digit/`-` (the `&>file` / `&>>file` form). `&&` is handled earlier.
-    """
-    n = len(command)
-    nxt = command[i + 1] if i + 1 < n else ""
-    if nxt == "&":
-        return False  # `&&` control operator
-    # &>file / &>>file / &- forms
-    if nxt in (">", "-") or nxt.isdigit():
-        return True
-    # preceding char is a redirection operator (>& / <&), optionally fd-prefixed
-    j = i - 1
-    while j >= 0 and command[j] == " ":
-        j -= 1
-    if j >= 0 and command[j] in (">", "<"):
-        return True
-    return False
+_is_redirect_amp = shell_lex.is_redirect_amp
 
 
 def _strip_compound_delims(command: str) -> str:
@@ -554,11 +509,11 @@ def _strip_quotes(tok: str) -> str:
 
 
 def _safe_shlex(simple_cmd: str) -> list:
-    try:
-        return shlex.split(simple_cmd, comments=False)
-    except ValueError:
+    words = shell_lex.split_words(simple_cmd)
+    if words is None:
         # Unbalanced quotes etc. — fall back to whitespace split.
         return [t for t in re.split(r"\s+", simple_cmd) if t]
+    return words
 
 
 # ── Path normalization + segment-boundary suffix matching ────────────────────
@@ -617,6 +572,16 @@ def _glob_to_segment_regex(glob: str) -> re.Pattern:
     `*` matches within a single segment (no /). `**` matches across segments.
     A leading absolute glob (/usr/bin/x*) anchors at string start.
     """
+    rx = _SEGMENT_REGEX_CACHE.get(glob)
+    if rx is None:
+        rx = _SEGMENT_REGEX_CACHE[glob] = re.compile(_glob_regex_source(glob))
+    return rx
+
+
+_SEGMENT_REGEX_CACHE: dict = {}
+
+
+def _glob_regex_source(glob: str) -> str:
     g = glob
     anchored = g.startswith("/")
     # Tokenize the glob into literal/star chunks.
@@ -644,7 +609,83 @@ def _glob_to_segment_regex(glob: str) -> re.Pattern:
     else:
         # suffix match at a segment boundary: start of string OR after a '/'
         pattern = "(^|/)" + body + "$"
-    return re.compile(pattern)
+    return pattern
+
+
+class _PathMatcher:
+    """A glob list compiled once into a shared matcher.
+
+    `search(cand)` is True iff `_glob_to_segment_regex(g).search(cand)` is True
+    for some glob `g` in the list, but costs one trie walk plus at most a few
+    regex searches instead of one regex per glob:
+
+      * anchored globs (`/usr/bin/x*`) sit in a segment trie keyed on their
+        leading LITERAL segments; a candidate only tests the anchored regexes
+        stored on the nodes its own leading segments reach (one alternation
+        per node);
+      * unanchored suffix globs (`**/packages/<pkg>`) share ONE alternation
+        regex `(^|/)(?:g1|g2|…)$`.
+    """
+
+    __slots__ = ("_trie", "_suffix_rx")
+
+    def __init__(self, globs):
+        trie: dict = {}
+        node_globs: dict = {}
+        suffix = []
+        for g in dict.fromkeys(globs):
+            src = _glob_regex_source(g)
+            if not g.startswith("/"):
+                suffix.append(src[len("(^|/)"):-1])
+                continue
+            node = trie
+            for seg in self._literal_segments(g):
+                node = node.setdefault(seg, {})
+            node_globs.setdefault(id(node), (node, []))[1].append(src[1:-1])
+        for node, bodies in node_globs.values():
+            node[None] = re.compile("^(?:" + "|".join(bodies) + ")$")
+        self._trie = trie
+        self._suffix_rx = (re.compile("(^|/)(?:" + "|".join(suffix) + ")$")
+                           if suffix else None)
+
+    @staticmethod
+    def _literal_segments(glob: str) -> list:
+        """Leading segments of an anchored glob that contain no `*`. A fully
+        literal glob keeps every segment (exact-match node)."""
+        segs = glob.split("/")
+        for i, seg in enumerate(segs):
+            if "*" in seg:
+                return segs[:i]
+        return segs
+
+    def search(self, cand: str) -> bool:
+        if self._suffix_rx is not None and self._suffix_rx.search(cand):
+            return True
+        node = self._trie
+        if not node:
+            return False
+        for seg in cand.split("/"):
+            rx = node.get(None)
+            if rx is not None and rx.match(cand):
+                return True
+            node = node.get(seg)
+            if node is None:
+                return False
+        rx = node.get(None)
+        return rx is not None and rx.match(cand) is not None
+
+
+_PATH_MATCHER_CACHE: dict = {}
+
+
+def _path_matcher(globs) -> _PathMatcher:
+    """Shared compiled matcher for a glob list (memoized by content, so every
+    primitive checking the same config list reuses one instance)."""
+    key = tuple(globs)
+    m = _PATH_MATCHER_CACHE.get(key)
+    if m is None:
+        m = _PATH_MATCHER_CACHE[key] = _PathMatcher(key)
+    return m
 
 
 # Shell-glob metacharacters that make a COMMAND-SIDE token a wildcard the shell
@@ -787,17 +828,17 @@ def _path_matches_any(path: str, globs: list) -> bool:
     norm = _normalize_path(path)
     candidates = {norm, path, _strip_quotes(path)}
     real = None
+    _note_dep("real", norm)
     try:
         if os.path.exists(norm):
             real = os.path.realpath(norm)
             candidates.add(real)
     except OSError:
         pass
-    for glob in globs:
-        rx = _glob_to_segment_regex(glob)
-        for cand in candidates:
-            if rx.search(cand):
-                return True
+    matcher = _path_matcher(globs)
+    for cand in candidates:
+        if matcher.search(cand):
+            return True
     # COMMAND-SIDE shell-glob token (`<dir>/*`, `<protectedfile-or-dir>/*`): a literal
     # match above fails (the `*` is normalized literally), but the shell would expand
     # the token to select entries under its glob-parent. Intersect the glob-parent
@@ -1353,10 +1394,11 @@ def _load_config():
 # ── STEP 0: config self-protection (hardcoded, generic path) ─────────────────
 
 def _config_path_variants() -> set:
-    p = DATA_FILE_PATH
-    variants = {p, os.path.normpath(p)}
-    if p.startswith("/root/"):
-        variants.add(p.replace("/root/", "~/", 1))
+    variants = set()
+    for p in (DATA_FILE_PATH, VERDICT_CACHE_PATH):
+        variants.update({p, os.path.normpath(p)})
+        if p.startswith("/root/"):
+            variants.add(p.replace("/root/", "~/", 1))
     return variants
 
 
@@ -3719,6 +3761,7 @@ def _resolve_path_filter_manifest(path_val: str, cfg: dict, effective_cwd: Optio
             tried.append(os.path.normpath(os.path.join(base, path_val)))
     for d in tried:
         man = os.path.join(d, "package.json")
+        _note_dep("stat", man)
         is_protected = (
             _dir_is_protected_pkg(d, cfg)
             or os.path.normpath(d) in [os.path.normpath(p) for p in cfg.get("protected_root_manifest_paths", [])]
@@ -3755,6 +3798,7 @@ def _resolve_workspace_manifest(selector: str, cfg: dict, effective_cwd: Optiona
     for root in search_roots:
         try:
             pkgs_dir = os.path.join(root, "packages")
+            _note_dep("stat", pkgs_dir)
             if not os.path.isdir(pkgs_dir):
                 continue
             for entry in os.listdir(pkgs_dir):
@@ -3762,6 +3806,7 @@ def _resolve_workspace_manifest(selector: str, cfg: dict, effective_cwd: Optiona
                 if man in seen:
                     continue
                 seen.add(man)
+                _note_dep("stat", man)
                 try:
                     with open(man, "r", encoding="utf-8") as fh:
                         data = json.load(fh)
@@ -3792,6 +3837,7 @@ def _effective_manifest_for_cwd(cwd: Optional[str], cfg: dict):
     while True:
         man = os.path.join(d, "package.json")
         scripts = None
+        _note_dep("stat", man)
         exists = os.path.isfile(man)
         if exists:
             try:
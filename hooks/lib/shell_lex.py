@@ -0,0 +1,538 @@
+#!/usr/bin/env python3
+"""Shared shell lexer for the Bash guards.
+
+runtime_guard, bash_context_strip, bash_write_targets and the inline helpers
+in pretool-bash-safety.sh all need the same few views of one Bash command.
+They used to compute them independently, and runtime_guard re-tokenized each
+simple command once per primitive. This module computes every view once per
+command and memoizes it:
+
+    lex = shell_lex.parse(command)
+    lex.segments                 simple commands split at every control operator
+    lex.parts                    lossless (separator, text) top-level split
+    lex.heredocs                 Heredoc records (opener + body line range)
+    lex.without_heredoc_bodies   command with heredoc bodies/closers removed
+    lex.has_active_substitution  $( / ` / <( / >( outside single quotes
+
+    split_words(text)   memoized shlex.split (None on unbalanced quotes)
+    punct_words(text)   memoized shlex with punctuation_chars (None on error)
+    word_tokens(text)   (text, kind) spans: space/word/single/double/subst/comment
+
+Each view is computed on first access, so a consumer only pays for what it
+reads. The memos are keyed on a 16-byte blake2b digest of the text, not the
+text itself, and each is bounded by entry count and by the total length of
+the texts it holds (a command may be up to 256KiB). This is NOT a full shell parser: every scanner is bounded, always
+advances, and keeps the exact semantics its consumer's tests pin down.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import shlex
+from typing import NamedTuple
+
+_MEMO_MAX = 512              # entries per memo
+_MEMO_MAX_CHARS = 1 << 20    # summed text length per memo
+
+# Heredoc opener: `<<EOF`, `<<-EOF`, `<< 'EOF'`, `<<"EOF"`. A `<<<` here-string
+# is NOT a heredoc (it has no body).
+_HEREDOC_RE = re.compile(r"(?<!<)<<(?!<)(-?)\s*(['\"]?)([A-Za-z_][A-Za-z0-9_]*)\2")
+
+
+class Heredoc(NamedTuple):
+    line: int        # index of the opener line in command.split("\n")
+    start: int       # opener span within that line
+    end: int
+    delim: str
+    dash: bool       # <<- (tab-stripped) form
+    quoted: bool     # <<'EOF' / <<"EOF": body is not expanded
+    body_start: int  # body lines are [body_start, body_end)
+    body_end: int
+    closed: bool     # closer line exists at index body_end
+
+
+class _Memo:
+    """Text -> derived value, keyed on a digest; cleared when either bound
+    (_MEMO_MAX entries, _MEMO_MAX_CHARS of text) would be exceeded."""
+
+    __slots__ = ("entries", "chars")
+
+    def __init__(self):
+        self.entries: dict = {}
+        self.chars = 0
+
+    @staticmethod
+    def key(text: str) -> bytes:
+        return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+    def get(self, text: str):
+        return self.entries.get(self.key(text))
+
+    def put(self, text: str, value):
+        if len(text) > _MEMO_MAX_CHARS:
+            return value
+        if len(self.entries) >= _MEMO_MAX or self.chars + len(text) > _MEMO_MAX_CHARS:
+            self.entries.clear()
+            self.chars = 0
+        key = self.key(text)
+        if key not in self.entries:
+            self.chars += len(text)
+        self.entries[key] = value
+        return value
+
+
+# ── Simple-command split (guard semantics) ───────────────────────────────────
+
+def is_redirect_amp(command: str, i: int) -> bool:
+    """True if the `&` at index i is part of an fd redirection, not a separator.
+
+    Forms: `>&`, `<&`, `&>`, `&>>`, `2>&1`, `>&2`. Heuristic: preceded by a
+    redirection operator (`>`/`<` possibly with a leading fd digit) OR followed
+    by `>`/a digit/`-` (the `&>file` / `&>>file` form). `&&` is handled earlier.
+    """
+    n = len(command)
+    nxt = command[i + 1] if i + 1 < n else ""
+    if nxt == "&":
+        return False  # `&&` control operator
+    # &>file / &>>file / &- forms
+    if nxt in (">", "-") or nxt.isdigit():
+        return True
+    # preceding char is a redirection operator (>& / <&), optionally fd-prefixed
+    j = i - 1
+    while j >= 0 and command[j] == " ":
+        j -= 1
+    if j >= 0 and command[j] in (">", "<"):
+        return True
+    return False
+
+
+def _split_simple_commands(command: str) -> tuple:
+    """Split a bash command into simple commands across ; && || | and newlines.
+
+    Conservative: operates on the raw text but only at unquoted top level by a
+    cheap quote-aware scan. Returns the raw simple-command strings.
+    """
+    parts = []
+    buf = []
+    i = 0
+    n = len(command)
+    quote = None
+    subst_depth = 0   # inside $(...) command substitution
+    backtick = False  # inside `...` command substitution
+    while i < n:
+        c = command[i]
+        if quote == "'":
+            # single quotes: no escaping inside; only a matching ' ends it.
+            buf.append(c)
+            if c == "'":
+                quote = None
+            i += 1
+            continue
+        if quote == '"':
+            # double quotes: backslash escapes ", \, $, `, newline — those do
+            # NOT terminate the quote. Any other char (incl. an escaped ;/&/|)
+            # stays inside the quote, so a quoted separator never splits.
+            if c == "\\" and i + 1 < n and command[i + 1] in ('"', "\\", "$", "`", "\n"):
+                buf.append(c); buf.append(command[i + 1]); i += 2; continue
+            buf.append(c)
+            if c == '"':
+                quote = None
+            i += 1
+            continue
+        # unquoted context
+        if c in ("'", '"'):
+            quote = c
+            buf.append(c)
+            i += 1
+            continue
+        if c == "\\" and i + 1 < n:
+            buf.append(c)
+            buf.append(command[i + 1])
+            i += 2
+            continue
+        # command-substitution tracking: separators inside $()/`` do NOT split
+        # the OUTER simple command (the whole substitution belongs to it).
+        if c == "`":
+            backtick = not backtick
+            buf.append(c); i += 1; continue
+        if command[i:i + 2] in ("$(", "<(", ">("):
+            subst_depth += 1
+            buf.append(command[i:i + 2]); i += 2; continue
+        if c == ")" and subst_depth > 0:
+            subst_depth -= 1
+            buf.append(c); i += 1; continue
+        if subst_depth > 0 or backtick:
+            buf.append(c); i += 1; continue
+        # fd-redirection `&` (2>&1, >&, &>, &>>, >&2) is NOT a separator.
+        if c == "&" and is_redirect_amp(command, i):
+            buf.append(c); i += 1; continue
+        two = command[i:i + 2]
+        if two in ("&&", "||", "|&"):
+            parts.append("".join(buf)); buf = []; i += 2; continue
+        if c in (";", "|", "\n", "&"):
+            parts.append("".join(buf)); buf = []; i += 1; continue
+        buf.append(c)
+        i += 1
+    parts.append("".join(buf))
+    return tuple(p.strip() for p in parts if p.strip())
+
+
+# ── Span scanners (lossless views) ───────────────────────────────────────────
+
+def _consume_quoted(s: str, i: int) -> tuple[str, int]:
+    quote = s[i]
+    j = i + 1
+    n = len(s)
+    while j < n:
+        ch = s[j]
+        if ch == "\\" and quote != "'":
+            j = min(j + 2, n)
+            continue
+        if ch == quote:
+            return s[i:j + 1], j + 1
+        j += 1
+    return s[i:n], n
+
+
+def _consume_paren(s: str, i: int) -> tuple[str, int]:
+    # i points at '('
+    depth = 0
+    j = i
+    n = len(s)
+    while j < n:
+        ch = s[j]
+        if ch in "'\"`":
+            _, j = _consume_quoted(s, j)
+            continue
+        if ch == "(":
+            depth += 1
+            j += 1
+            continue
+        if ch == ")":
+            depth -= 1
+            j += 1
+            if depth <= 0:
+                return s[i:j], j
+            continue
+        j += 1
+    return s[i:n], n
+
+
+def consume_dollar(s: str, i: int) -> tuple[str, int]:
+    """Span of the `$...` expansion starting at i: `$(...)`, `${...}`, `$NAME`
+    or a special parameter (`$$`, `$?`, `$1`)."""
+    n = len(s)
+    if i + 1 >= n:
+        return "$", i + 1
+    nxt = s[i + 1]
+    if nxt == "(":
+        span, end = _consume_paren(s, i + 1)
+        return "$" + span, end
+    if nxt == "{":
+        j = i + 2
+        depth = 1
+        while j < n:
+            ch = s[j]
+            if ch in "'\"`":
+                _, j = _consume_quoted(s, j)
+                continue
+            if ch == "{":
+                depth += 1
+            elif ch == "}":
+                depth -= 1
+                if depth == 0:
+                    return s[i:j + 1], j + 1
+            j += 1
+        return s[i:n], n
+    if nxt.isalpha() or nxt == "_":
+        j = i + 2
+        while j < n and (s[j].isalnum() or s[j] == "_"):
+            j += 1
+        return s[i:j], j
+    # Positional/special shell params: $$, $?, $#, $1, etc.
+    return s[i:i + 2], i + 2
+
+
+def consume_quoted(s: str, i: int) -> tuple[str, int]:
+    """Span of the quoted string (or backtick substitution) opening at i."""
+    return _consume_quoted(s, i)
+
+
+def _split_parts(cmd: str) -> tuple:
+    parts: list[tuple[str, str]] = []
+    current: list[str] = []
+    sep = ""
+    i = 0
+    n = len(cmd)
+    while i < n:
+        start = i
+        ch = cmd[i]
+        if ch in "'\"`":
+            span, i = _consume_quoted(cmd, i)
+            current.append(span)
+        elif ch == "$":
+            span, i = consume_dollar(cmd, i)
+            current.append(span)
+        elif cmd.startswith("&&", i) or cmd.startswith("||", i):
+            parts.append((sep, "".join(current)))
+            sep = cmd[i:i + 2]
+            current = []
+            i += 2
+        elif ch in ";|\n":
+            parts.append((sep, "".join(current)))
+            sep = ch
+            current = []
+            i += 1
+        else:
+            current.append(ch)
+            i += 1
+        if i <= start:
+            # Defensive invariant: scanners must always advance.
+            current.append(cmd[start:start + 1])
+            i = start + 1
+    parts.append((sep, "".join(current)))
+    return tuple(parts)
+
+
+def _scan_word_tokens(segment: str) -> tuple:
+    tokens: list[tuple[str, str]] = []
+    i = 0
+    n = len(segment)
+    while i < n:
+        start = i
+        ch = segment[i]
+        if ch in " \t":
+            j = i + 1
+            while j < n and segment[j] in " \t":
+                j += 1
+            tokens.append((segment[i:j], "space"))
+            i = j
+        elif ch == "#":
+            tokens.append((segment[i:], "comment"))
+            i = n
+        elif ch == "'":
+            span, i = _consume_quoted(segment, i)
+            tokens.append((span, "single"))
+        elif ch == '"':
+            span, i = _consume_quoted(segment, i)
+            tokens.append((span, "double"))
+        elif ch == "`":
+            span, i = _consume_quoted(segment, i)
+            tokens.append((span, "subst"))
+        elif ch == "$":
+            span, i = consume_dollar(segment, i)
+            tokens.append((span, "subst" if span.startswith("$(") else "word"))
+        else:
+            j = i + 1
+            while j < n and segment[j] not in " \t'\"`#$;|&\n":
+                j += 1
+            tokens.append((segment[i:j], "word"))
+            i = j
+        if i <= start:
+            tokens.append((segment[start:start + 1], "word"))
+            i = start + 1
+    return tuple(tokens)
+
+
+_word_token_memo = _Memo()
+
+
+def word_tokens(segment: str) -> list[tuple[str, str]]:
+    """(text, kind) spans of one segment; kinds are space / word / single /
+    double / subst / comment. Concatenating the texts yields the input."""
+    toks = _word_token_memo.get(segment)
+    if toks is None:
+        toks = _word_token_memo.put(segment, _scan_word_tokens(segment))
+    return list(toks)
+
+
+# ── Active substitution (4-state quote machine) ──────────────────────────────
+
+def _scan_active_substitution(text: str) -> bool:
+    """True if `text` contains an unquoted or double-quoted `$(` / backtick, or
+    an unquoted `<(` / `>(`.
+
+    States: UNQUOTED (all four forms active), SINGLE (nothing active; only `'`
+    exits), DOUBLE (`$(` and backtick active, `<(`/`>(` literal, single quotes
+    literal, backslash skips the next char), ANSI_C `$'...'` (nothing active,
+    backslash escapes, only an unescaped `'` exits).
+    """
+    UNQUOTED, SINGLE, DOUBLE, ANSI_C = 0, 1, 2, 3
+    state = UNQUOTED
+    i = 0
+    n = len(text)
+    while i < n:
+        c = text[i]
+        if state == UNQUOTED:
+            if c == '$' and i + 1 < n and text[i + 1] == "'":
+                state = ANSI_C
+                i += 2
+                continue
+            if c in '$<>' and i + 1 < n and text[i + 1] == '(':
+                return True
+            if c == '`':
+                return True
+            if c == "'":
+                state = SINGLE
+            elif c == '"':
+                state = DOUBLE
+            elif c == '\\' and i + 1 < n:
+                i += 2
+                continue
+            i += 1
+            continue
+        if state == SINGLE:
+            if c == "'":
+                state = UNQUOTED
+            i += 1
+            continue
+        if state == DOUBLE:
+            if c == '\\' and i + 1 < n:
+                i += 2
+                continue
+            if c == '$' and i + 1 < n and text[i + 1] == '(':
+                return True
+            if c == '`':
+                return True
+            if c == '"':
+                state = UNQUOTED
+            i += 1
+            continue
+        # ANSI_C
+        if c == '\\' and i + 1 < n:
+            i += 2
+            continue
+        if c == "'":
+            state = UNQUOTED
+        i += 1
+    return False
+
+
+# ── Heredocs ─────────────────────────────────────────────────────────────────
+
+def _scan_heredocs(command: str) -> tuple:
+    """Every heredoc in bash order: several openers on one line read their
+    bodies one after another. A closer is a line equal to the delimiter once
+    surrounding whitespace is stripped. An unclosed heredoc's body runs to the
+    end of the command."""
+    if "<<" not in command:
+        return ()
+    lines = command.split("\n")
+    out = []
+    i = 0
+    while i < len(lines):
+        openers = list(_HEREDOC_RE.finditer(lines[i]))
+        line_no = i
+        i += 1
+        for m in openers:
+            body_start = i
+            while i < len(lines) and lines[i].strip() != m.group(3):
+                i += 1
+            closed = i < len(lines)
+            out.append(Heredoc(line_no, m.start(), m.end(), m.group(3),
+                               m.group(1) == "-", bool(m.group(2)),
+                               body_start, i, closed))
+            if closed:
+                i += 1
+    return tuple(out)
+
+
+class ShellLex:
+    """Lazily computed, memoized views of one command (see module docstring)."""
+
+    __slots__ = ("command", "_segments", "_parts", "_heredocs", "_no_bodies", "_active")
+
+    def __init__(self, command: str):
+        self.command = command
+        self._segments = self._parts = self._heredocs = None
+        self._no_bodies = self._active = None
+
+    @property
+    def segments(self) -> tuple:
+        if self._segments is None:
+            self._segments = _split_simple_commands(self.command)
+        return self._segments
+
+    @property
+    def parts(self) -> tuple:
+        if self._parts is None:
+            self._parts = _split_parts(self.command)
+        return self._parts
+
+    @property
+    def heredocs(self) -> tuple:
+        if self._heredocs is None:
+            self._heredocs = _scan_heredocs(self.command)
+        return self._heredocs
+
+    @property
+    def lines(self) -> list:
+        return self.command.split("\n")
+
+    @property
+    def without_heredoc_bodies(self) -> str:
+        """Opener lines kept; body lines and closer lines dropped."""
+        if self._no_bodies is None:
+            if not self.heredocs:
+                self._no_bodies = self.command
+            else:
+                drop = set()
+                for h in self.heredocs:
+                    drop.update(range(h.body_start, h.body_end + (1 if h.closed else 0)))
+                self._no_bodies = "\n".join(
+                    ln for idx, ln in enumerate(self.lines) if idx not in drop)
+        return self._no_bodies
+
+    @property
+    def has_active_substitution(self) -> bool:
+        if self._active is None:
+            self._active = _scan_active_substitution(self.command)
+        return self._active
+
+
+_parse_memo = _Memo()
+
+
+def parse(command: str) -> ShellLex:
+    """Memoized ShellLex for `command` (one instance per distinct command)."""
+    lex = _parse_memo.get(command)
+    if lex is None:
+        lex = _parse_memo.put(command, ShellLex(command))
+    return lex
+
+
+# ── Word splitting ───────────────────────────────────────────────────────────
+
+_words_memo = _Memo()
+_punct_memo = _Memo()
+
+
+def split_words(text: str):
+    """shlex.split(text, comments=False) as a new list, or None when shlex
+    raises (unbalanced quotes)."""
+    words = _words_memo.get(text)
+    if words is None:
+        try:
+            words = tuple(shlex.split(text, comments=False))
+        except ValueError:
+            words = False
+        _words_memo.put(text, words)
+    return list(words) if words is not False else None
+
+
+def punct_words(text: str):
+    """Tokens of shlex.shlex(posix=True, punctuation_chars=True) with no
+    comment chars and whitespace_split, as a new list; None when the lexer
+    raises (it is fully exhausted, so an unterminated quote always fails)."""
+    words = _punct_memo.get(text)
+    if words is None:
+        lex = shlex.shlex(text, posix=True, punctuation_chars=True)
+        lex.commenters = ''
+        lex.whitespace_split = True
+        try:
+            words = tuple(lex)
+        except ValueError:
+            words = False
+        _punct_memo.put(text, words)
+    return list(words) if words is not False else None
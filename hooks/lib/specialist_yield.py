@@ -9,6 +9,12 @@ Public API:
 
 Policy: $CLAUDE_PROJECT_DIR/.claude/policies/specialist-degradation.v1.json
 Log:    $CLAUDE_PROJECT_DIR/.claude/state/specialist-yield-log.jsonl
+Ring:   <log>.ring.json — the last _RING_SIZE records per specialist, as of a
+        byte offset into the log (inode + digest of the bytes before it).
+        record_yield() folds each append into it under the log lock; readers
+        load it, fold whatever was appended past its offset, and only scan
+        the whole log when it is missing, describes another file, or the
+        history window is larger than the ring.
 
 Env overrides for tests:
     SPECIALIST_YIELD_POLICY_PATH
@@ -50,6 +56,10 @@ _FALLBACK_POLICY: dict[str, Any] = {
     },
 }
 
+_RING_SIZE = 32
+_RING_VERSION = 1
+_SIG_BYTES = 64
+
 _DEGRADED_ACTION_LABELS = {
     "reduce_budget_50pct",
     "skip_next_cycle",
@@ -145,6 +155,109 @@ def _filter_history(
     return matched[-history_window:]
 
 
+def _ring_path(log_path: Path) -> Path:
+    return log_path.with_name(log_path.name + ".ring.json")
+
+
+def _tail_sig(fh, offset: int) -> str:
+    start = max(0, offset - _SIG_BYTES)
+    fh.seek(start)
+    return fh.read(offset - start).hex()
+
+
+def _load_ring(log_path: Path, fh, st: os.stat_result) -> dict[str, Any] | None:
+    """The ring sidecar if it still describes a prefix of the open log."""
+    text = _read_text_safe(_ring_path(log_path))
+    if text is None:
+        return None
+    try:
+        ring = json.loads(text)
+        if (
+            ring["version"] == _RING_VERSION
+            and ring["inode"] == st.st_ino
+            and ring["offset"] <= st.st_size
+            and ring["sig"] == _tail_sig(fh, ring["offset"])
+            and isinstance(ring["by_specialist"], dict)
+        ):
+            return ring
+    except (ValueError, KeyError, TypeError):
+        pass
+    return None
+
+
+def _fold_records(by_specialist: dict[str, list], data: bytes) -> None:
+    for raw in data.split(b"\n"):
+        rec = _parse_log_line(raw.decode("utf-8", "replace"))
+        if not isinstance(rec, dict) or not isinstance(rec.get("specialist_type"), str):
+            continue
+        ring = by_specialist.setdefault(rec["specialist_type"], [])
+        ring.append(rec)
+        del ring[:-_RING_SIZE]
+
+
+def _catch_up(
+    log_path: Path, fh, st: os.stat_result
+) -> tuple[dict[str, Any], bool, bytes]:
+    """(ring folded up to the last complete line, whether it moved, the rest)."""
+    ring = _load_ring(log_path, fh, st)
+    if ring is None:
+        ring = {"version": _RING_VERSION, "inode": st.st_ino, "offset": 0,
+                "sig": "", "by_specialist": {}}
+    fh.seek(ring["offset"])
+    data = fh.read(st.st_size - ring["offset"])
+    cut = data.rfind(b"\n") + 1
+    if cut == 0:
+        return ring, False, data
+    _fold_records(ring["by_specialist"], data[:cut])
+    ring["offset"] += cut
+    ring["sig"] = _tail_sig(fh, ring["offset"])
+    return ring, True, data[cut:]
+
+
+def _save_ring(log_path: Path, ring: dict[str, Any]) -> None:
+    """Atomically replace the sidecar. Callers hold the log lock."""
+    path = _ring_path(log_path)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}")
+    try:
+        tmp.write_text(json.dumps(ring, ensure_ascii=False, sort_keys=True), encoding="utf-8")
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+
+
+def _read_history(specialist_type: str, window: int) -> list[dict[str, Any]]:
+    """The last `window` records for a specialist, without a full log scan."""
+    if window <= 0 or window > _RING_SIZE:
+        return _filter_history(_read_log_lines(), specialist_type, window)
+    path = _log_path()
+    try:
+        fh = path.open("rb")
+    except OSError:
+        return []
+    with fh:
+        st = os.fstat(fh.fileno())
+        ring, moved, rest = _catch_up(path, fh, st)
+        if moved and _HAS_FCNTL:
+            # Persist the catch-up only if no writer is mid-append; the
+            # sidecar always describes a prefix, so a later save is harmless.
+            try:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                pass
+            else:
+                _save_ring(path, ring)
+                _safe_unlock(fh)
+    history = list(ring["by_specialist"].get(specialist_type, []))
+    # An unterminated last line still counts once it parses, as in a full scan.
+    tail: dict[str, list] = {}
+    _fold_records(tail, rest)
+    history.extend(tail.get(specialist_type, []))
+    return history[-window:]
+
+
 def _signature_of(item: Any) -> str | None:
     if isinstance(item, str):
         return item
@@ -230,7 +343,7 @@ def compute_yield(
     classification = classify_report(current_report_path)
     policy = _resolve_policy_for(specialist_type)
     window = int(policy.get("history_window", history_window))
-    history = _filter_history(_read_log_lines(), specialist_type, window)
+    history = _read_history(specialist_type, window)
     return {
         "classification": classification,
         "history": history,
@@ -273,12 +386,25 @@ def _write_one(fh, line: str) -> None:
         os.fsync(fh.fileno())
 
 
+def _update_ring(path: Path) -> None:
+    """Fold the line just appended into the ring sidecar (log lock held)."""
+    try:
+        with path.open("rb") as rfh:
+            ring, moved, _rest = _catch_up(path, rfh, os.fstat(rfh.fileno()))
+    except OSError:
+        return
+    if moved:
+        _save_ring(path, ring)
+
+
 def _locked_append(path: Path, line: str) -> None:
     fh = path.open("a", encoding="utf-8")
     try:
         if _HAS_FCNTL:
             fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
         _write_one(fh, line)
+        if _HAS_FCNTL:
+            _update_ring(path)
     finally:
         _safe_unlock(fh)
         fh.close()
@@ -404,9 +530,11 @@ def _resolve_policy_safe(specialist_type: str) -> dict[str, Any] | None:
         return None
 
 
-def _read_log_safe() -> list[dict[str, Any]] | None:
+def _read_history_safe(
+    specialist_type: str, window: int
+) -> list[dict[str, Any]] | None:
     try:
-        return _read_log_lines()
+        return _read_history(specialist_type, window)
     except Exception:
         return None
 
@@ -435,12 +563,10 @@ def get_degradation_state(
     policy = _resolve_policy_safe(specialist_type)
     if policy is None:
         return _failsafe_response("policy unreadable, fail-safe default")
-    all_records = _read_log_safe()
-    if all_records is None:
-        return _failsafe_response("yield-log unreadable, fail-safe")
-
     window = int(policy.get("history_window", 5))
-    history = _filter_history(all_records, specialist_type, window)
+    history = _read_history_safe(specialist_type, window)
+    if history is None:
+        return _failsafe_response("yield-log unreadable, fail-safe")
     if not history:
         return _empty_history_response()
 
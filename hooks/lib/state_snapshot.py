@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""Stat-validated snapshot of the per-project state files hooks keep re-reading.
+
+A single PreToolUse call used to glob `.claude/overnight-state-*.json` up to
+five times (overnight guard, git-privilege guard, trace hook, ...), glob
+`.claude/specs/*/cp-state-*.json` to resolve an agent_id, and JSON-parse every
+match each time. This module answers the same questions from one shared,
+pre-parsed view:
+
+  overnight_states()         every .claude/overnight-state-*.json, name order
+  overnight_state(sid)       .claude/overnight-state-<sid>.json
+  workflow(sid)              .claude/workflow-<sid>.json (the workflow bookmark)
+  cp_states()                every .claude/specs/*/cp-state-*.json
+  agent_index()              .claude/dev-registry/agent-index.json
+
+Validation, per call (there is no blind memo, so a file written a moment ago
+is always seen):
+  - a directory listing is reused while the directory's (inode, mtime_ns) is
+    unchanged; adding, removing or renaming an entry bumps the mtime;
+  - a parsed file is reused while its (inode, mtime_ns, size) is unchanged;
+  - an entry whose mtime lies within RACY_NS of the moment it was listed or
+    read is never reused, because a second write inside the same timestamp
+    tick would be invisible to the comparison (git's "racily clean" rule).
+
+So a call costs one stat per directory and per candidate file, and a listdir
+or a parse only for what actually changed. The snapshot lives in this process
+only. A hook that asks the same question several times (the overnight guard
+asks up to five times per call) and the hooks run by the in-process dispatcher
+share it. Nothing is written to disk, so hooks that use it stay read-only. A
+fresh process starts empty and pays one parse per file, the same as a single
+glob-and-parse pass.
+
+Returned data is shared with the cache: treat it as read-only. A missing,
+empty or unparseable file reads as None, which every caller already treats
+as "no state" (fail closed). Never raises on I/O errors.
+
+Env:
+  CLAUDE_STATE_SNAPSHOT=0       never reuse an entry (re-list and re-parse on
+                                every call, as before this module existed)
+"""
+
+from __future__ import annotations
+
+import _thread
+import json
+import os
+import stat
+import time
+from typing import Any, NamedTuple
+
+RACY_NS = 2_000_000_000
+MAX_PROJECTS = 8
+MAX_FILES = 512  # per project; oldest reads are dropped first
+
+_LOCK = _thread.allocate_lock()
+_SNAPSHOTS: dict = {}  # project dir -> StateSnapshot, least recently used first
+
+
+class StateFile(NamedTuple):
+    path: str
+    data: Any  # parsed JSON, or None when empty / unparseable
+    mtime: float
+
+
+def enabled() -> bool:
+    return os.environ.get("CLAUDE_STATE_SNAPSHOT", "1") != "0"
+
+
+def _parse(path: str) -> tuple[bool, Any]:
+    try:
+        with open(path, "rb") as fh:
+            raw = fh.read()
+        return True, json.loads(raw)
+    except (OSError, ValueError):
+        return False, None
+
+
+class StateSnapshot:
+    """Views over one project's `.claude/` state; see the module docstring."""
+
+    def __init__(self, project_dir: str):
+        self.project_dir = os.path.abspath(project_dir)
+        self.claude_dir = os.path.join(self.project_dir, ".claude")
+        self._dirs: dict = {}   # path -> (ino, mtime_ns, listed_ns, names)
+        self._files: dict = {}  # path -> (ino, mtime_ns, size, read_ns, ok, data)
+
+    def _listdir(self, path: str) -> list:
+        """Sorted entry names of directory `path` ([] if it is not one)."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            st = None
+        if st is None or not stat.S_ISDIR(st.st_mode):
+            self._dirs.pop(path, None)
+            return []
+        ent = self._dirs.get(path)
+        if ent and enabled() and ent[0] == st.st_ino and ent[1] == st.st_mtime_ns \
+                and ent[1] < ent[2] - RACY_NS:
+            return ent[3]
+        listed_ns = time.time_ns()
+        try:
+            names = sorted(n for n in os.listdir(path) if not n.startswith("."))
+        except OSError:
+            self._dirs.pop(path, None)
+            return []
+        keep = set(names)
+        for gone in [p for p in self._files if os.path.dirname(p) == path
+                     and os.path.basename(p) not in keep]:
+            del self._files[gone]
+        self._dirs[path] = (st.st_ino, st.st_mtime_ns, listed_ns, names)
+        return names
+
+    def _file(self, path: str) -> StateFile | None:
+        """Parsed contents of `path`, or None when it does not exist."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            self._files.pop(path, None)
+            return None
+        if not stat.S_ISREG(st.st_mode):
+            return StateFile(path, None, st.st_mtime)
+        ent = self._files.get(path)
+        if ent and enabled() and ent[0] == st.st_ino and ent[1] == st.st_mtime_ns \
+                and ent[2] == st.st_size and ent[1] < ent[3] - RACY_NS:
+            return StateFile(path, ent[5] if ent[4] else None, st.st_mtime)
+        read_ns = time.time_ns()
+        ok, data = _parse(path) if st.st_size else (False, None)
+        self._files.pop(path, None)
+        self._files[path] = (st.st_ino, st.st_mtime_ns, st.st_size, read_ns, ok, data)
+        while len(self._files) > MAX_FILES:
+            del self._files[next(iter(self._files))]
+        return StateFile(path, data if ok else None, st.st_mtime)
+
+    def _view(self, build):
+        with _LOCK:
+            return build()
+
+    # -- views ---------------------------------------------------------------
+
+    def overnight_states(self) -> list[StateFile]:
+        """Every `.claude/overnight-state-*.json`, in file-name order."""
+        def build():
+            out = []
+            for name in self._listdir(self.claude_dir):
+                if name.startswith("overnight-state-") and name.endswith(".json"):
+                    sf = self._file(os.path.join(self.claude_dir, name))
+                    if sf is not None:
+                        out.append(sf)
+            return out
+        return self._view(build)
+
+    def overnight_state(self, session_id: str) -> Any:
+        """Parsed `.claude/overnight-state-<session_id>.json`, or None."""
+        return self._single(f"overnight-state-{session_id}.json") if session_id else None
+
+    def workflow(self, session_id: str) -> Any:
+        """Parsed workflow bookmark `.claude/workflow-<session_id>.json`, or None."""
+        return self._single(f"workflow-{session_id}.json") if session_id else None
+
+    def agent_index(self) -> Any:
+        """Parsed `.claude/dev-registry/agent-index.json`, or None."""
+        return self._single(os.path.join("dev-registry", "agent-index.json"))
+
+    def cp_states(self) -> list[StateFile]:
+        """Every `.claude/specs/*/cp-state-*.json`, in path order."""
+        def build():
+            specs = os.path.join(self.claude_dir, "specs")
+            out = []
+            for spec in self._listdir(specs):
+                spec_dir = os.path.join(specs, spec)
+                for name in self._listdir(spec_dir):
+                    if name.startswith("cp-state-") and name.endswith(".json"):
+                        sf = self._file(os.path.join(spec_dir, name))
+                        if sf is not None:
+                            out.append(sf)
+            return out
+        return self._view(build)
+
+    def _single(self, relpath: str) -> Any:
+        path = os.path.join(self.claude_dir, relpath)
+        sf = self._view(lambda: self._file(path))
+        return sf.data if sf is not None else None
+
+
+def snapshot(project_dir: str | os.PathLike | None = None) -> StateSnapshot:
+    """The StateSnapshot for `project_dir` (default $CLAUDE_PROJECT_DIR, else cwd)."""
+    if project_dir is None:
+        project_dir = os.environ.get("CLAUDE_PROJECT_DIR") or os.getcwd()
+    key = os.fspath(project_dir)
+    with _LOCK:
+        snap = _SNAPSHOTS.pop(key, None) or StateSnapshot(key)
+        _SNAPSHOTS[key] = snap
+        while len(_SNAPSHOTS) > MAX_PROJECTS:
+            del _SNAPSHOTS[next(iter(_SNAPSHOTS))]
+    return snap
@@ -0,0 +1,314 @@
+"""Incremental index over a cycle's trace.jsonl (sidecar trace.index.json).
+
+posttool-overnight-trace.py appends one record per Agent call. Closeout used
+to re-read the whole trace, reload every pipeline report and re-validate
+every artifact at each Stop; check-overnight-reports.py re-validated them
+again. The sidecar next to trace.jsonl keeps:
+
+  trace    how many bytes of trace.jsonl are folded in (always a record
+           boundary), the byte offset of every record so readers can resume,
+           and running aggregates: estimated-token sum, retry_count per role
+           and a (step, role) histogram that role compliance is computed from
+           against whatever the contract says.
+  reports  per report path, keyed by (size, mtime_ns, inode): the reduced
+           report closeout's metrics read, and contract_runtime.validate()
+           results per (schema name, schema digest).
+
+refresh() folds only what was appended since the last call; a trace that
+shrank, changed inode, or whose last folded bytes no longer match is re-read
+from the start. Updates run under flock on trace.index.lock and are written
+with an atomic rename, so the appending hook, closeout and the report checker
+share one sidecar; a missing or corrupt sidecar is simply rebuilt. Files
+modified within the last second are never trusted from cache (mtimes are
+tick-granular).
+
+Public API:
+    TraceIndex.open(trace_path, blocking=True)  context manager; None if busy
+    refresh(trace_path, blocking=True)          fold new records, return trace aggregates
+    read_records(trace_path, start=0)           parsed records from record #start
+"""
+
+from __future__ import annotations
+
+import contextlib
+import fcntl
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+SIDECAR_NAME = "trace.index.json"
+LOCK_NAME = "trace.index.lock"
+VERSION = 1
+_TAIL_BYTES = 64
+_RACY_NS = 1_000_000_000
+_RACY_SIG = [-1]
+
+
+def sidecar_path(trace_path: Path) -> Path:
+    return Path(trace_path).with_name(SIDECAR_NAME)
+
+
+def _empty_trace() -> dict[str, Any]:
+    return {
+        "inode": None,
+        "offset": 0,
+        "tail": "",
+        "records": [],
+        "tokens": 0,
+        "retries": {},
+        "step_roles": {},
+    }
+
+
+def _parse_line(raw: bytes) -> dict | None:
+    s = raw.strip()
+    if not s:
+        return None
+    try:
+        rec = json.loads(s)
+    except (ValueError, UnicodeDecodeError):
+        return None
+    return rec if isinstance(rec, dict) else None
+
+
+def _fold(trace: dict[str, Any], rec: dict, offset: int) -> None:
+    """Add one record to the aggregates (same rules as closeout's metrics)."""
+    trace["records"].append(offset)
+    try:
+        trace["tokens"] += int(rec.get("estimated_tokens") or 0)
+    except (TypeError, ValueError):
+        pass
+    role = rec.get("role")
+    retries = rec.get("retry_count") or 0
+    if isinstance(role, str) and role and isinstance(retries, int):
+        trace["retries"][role] = trace["retries"].get(role, 0) + retries
+    if rec.get("step") and role:
+        key = json.dumps([str(rec.get("step")), role])
+        trace["step_roles"][key] = trace["step_roles"].get(key, 0) + 1
+
+
+def _tail(fh, offset: int) -> str:
+    start = max(0, offset - _TAIL_BYTES)
+    fh.seek(start)
+    return fh.read(offset - start).hex()
+
+
+def _fold_new(trace_path: Path, trace: dict[str, Any]) -> bool:
+    """Fold bytes appended since trace['offset']; True when trace changed."""
+    try:
+        fh = open(trace_path, "rb")
+    except OSError:
+        if trace["offset"] or trace["inode"] is not None:
+            trace.clear()
+            trace.update(_empty_trace())
+            return True
+        return False
+    with fh:
+        st = os.fstat(fh.fileno())
+        changed = False
+        if (trace["inode"] != st.st_ino or st.st_size < trace["offset"]
+                or _tail(fh, trace["offset"]) != trace["tail"]):
+            trace.clear()
+            trace.update(_empty_trace(), inode=st.st_ino)
+            changed = True
+        if st.st_size == trace["offset"]:
+            return changed
+        fh.seek(trace["offset"])
+        data = fh.read()
+        pos = trace["offset"]
+        lines = data.split(b"\n")
+        for line in lines[:-1]:
+            rec = _parse_line(line)
+            if rec is not None:
+                _fold(trace, rec, pos)
+            pos += len(line) + 1
+        # An unterminated last line counts once it parses (a file that simply
+        # lacks the final newline); otherwise it is a write still in progress.
+        last = _parse_line(lines[-1])
+        if last is not None:
+            _fold(trace, last, pos)
+            pos += len(lines[-1])
+        trace["offset"] = pos
+        trace["tail"] = _tail(fh, pos)
+        return True
+
+
+def _stat_sig(path: Path) -> list[int] | None:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    if time.time_ns() - st.st_mtime_ns < _RACY_NS:
+        return _RACY_SIG  # stored, but never served from cache
+    return [st.st_size, st.st_mtime_ns, st.st_ino]
+
+
+def _read_json(path: Path) -> dict | None:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def schema_key(schema_name: str) -> str:
+    """Cache key for validate() verdicts: schema name, digest of the schema
+    it resolves to, and whether jsonschema is available to run."""
+    from lib import contract_runtime, schema_registry
+    try:
+        schema = schema_registry.get_schema(schema_name)
+    except Exception:
+        schema = None
+    digest = hashlib.sha1(json.dumps(schema, sort_keys=True, default=str).encode()).hexdigest()
+    engine = int(contract_runtime._draft7_validator_class() is not None)
+    return f"{schema_name}:{digest[:16]}:{engine}"
+
+
+class TraceIndex:
+    """A locked, loaded sidecar; use TraceIndex.open()."""
+
+    def __init__(self, trace_path: Path, data: dict[str, Any]) -> None:
+        self.trace_path = Path(trace_path)
+        self.data = data
+        self.dirty = False
+
+    @classmethod
+    @contextlib.contextmanager
+    def open(cls, trace_path: Path, blocking: bool = True) -> Iterator[TraceIndex | None]:
+        """Lock and load the sidecar for trace_path, save it on exit if changed.
+
+        Yields None when blocking=False and another process holds the lock.
+        When trace_path does not exist (a read-only check on a session or
+        cycle with no trace) or its directory cannot be written, the index is
+        built in memory and nothing is created or saved.
+        """
+        trace_path = Path(trace_path)
+        try:
+            if not trace_path.is_file():
+                raise FileNotFoundError(trace_path)
+            lock_fd = os.open(trace_path.with_name(LOCK_NAME), os.O_RDWR | os.O_CREAT, 0o644)
+        except OSError:
+            yield cls(trace_path, {"version": VERSION, "trace": _empty_trace(), "reports": {}})
+            return
+        try:
+            try:
+                fcntl.flock(lock_fd, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+            except BlockingIOError:
+                yield None
+                return
+            data = _read_json(sidecar_path(trace_path))
+            if data is None or data.get("version") != VERSION:
+                data = {"version": VERSION, "trace": _empty_trace(), "reports": {}}
+            index = cls(trace_path, data)
+            yield index
+            if index.dirty:
+                index._save()
+        finally:
+            os.close(lock_fd)
+
+    def _save(self) -> None:
+        path = sidecar_path(self.trace_path)
+        tmp = path.with_name(f".{path.name}.{os.getpid()}")
+        try:
+            tmp.write_text(json.dumps(self.data, separators=(",", ":")), encoding="utf-8")
+            os.replace(tmp, path)
+        except OSError:
+            with contextlib.suppress(OSError):
+                tmp.unlink()
+
+    # -- trace -------------------------------------------------------------
+
+    def refresh(self) -> dict[str, Any]:
+        """Fold newly appended records; returns the trace aggregates."""
+        if _fold_new(self.trace_path, self.data["trace"]):
+            self.dirty = True
+        return self.data["trace"]
+
+    # -- reports -----------------------------------------------------------
+
+    def _report(self, path: Path) -> tuple[dict | None, dict | None]:
+        """(cache entry, freshly parsed JSON or None if served from cache)."""
+        key = str(path)
+        reports = self.data["reports"]
+        sig = _stat_sig(path)
+        if sig is None:
+            if reports.pop(key, None) is not None:
+                self.dirty = True
+            return None, None
+        entry = reports.get(key)
+        if entry is not None and entry["sig"] == sig and sig != _RACY_SIG:
+            return entry, None
+        record = _read_json(path)
+        entry = {"sig": sig, "parsed": record is not None, "reduced": None, "verdicts": {}}
+        reports[key] = entry
+        self.dirty = True
+        return entry, record
+
+    def reduced_report(self, path: Path, reduce: Callable[[dict], dict]) -> dict | None:
+        """reduce(report) for the JSON object at path, recomputed only when the
+        file changed; None when missing or not a JSON object. `reduce` must
+        return plain JSON data and should be stable across calls."""
+        entry, record = self._report(path)
+        if entry is None or not entry["parsed"]:
+            return None
+        if entry["reduced"] is None:
+            if record is None:
+                record = _read_json(path)
+                if record is None:
+                    return None
+            entry["reduced"] = reduce(record)
+            self.dirty = True
+        return entry["reduced"]
+
+    def parses(self, path: Path) -> bool:
+        entry, _ = self._report(path)
+        return bool(entry and entry["parsed"])
+
+    def verdict(self, path: Path, schema_name: str) -> dict | None:
+        """contract_runtime.validate(report, schema_name), cached per report
+        version and schema digest; None when the report is missing or not
+        a JSON object."""
+        entry, record = self._report(path)
+        if entry is None or not entry["parsed"]:
+            return None
+        key = schema_key(schema_name)
+        cached = entry["verdicts"].get(key)
+        if cached is not None:
+            return cached
+        if record is None:
+            record = _read_json(path)
+            if record is None:
+                return None
+        from lib import contract_runtime
+        result = contract_runtime.validate(record, schema_name)
+        entry["verdicts"][key] = result
+        self.dirty = True
+        return result
+
+
+def refresh(trace_path: Path, blocking: bool = True) -> dict[str, Any] | None:
+    """Fold new trace records into the sidecar; None when blocking=False and
+    the sidecar is busy (whoever holds it, or the next reader, folds them)."""
+    with TraceIndex.open(trace_path, blocking=blocking) as index:
+        return None if index is None else index.refresh()
+
+
+def read_records(trace_path: Path, start: int = 0) -> list[dict[str, Any]]:
+    """Trace records from record number `start` on, seeking straight to it."""
+    trace = refresh(trace_path)
+    if trace is None or start >= len(trace["records"]):
+        return []
+    out: list[dict[str, Any]] = []
+    try:
+        with open(trace_path, "rb") as fh:
+            fh.seek(trace["records"][max(0, start)])
+            for line in fh.read(trace["offset"] - trace["records"][max(0, start)]).split(b"\n"):
+                rec = _parse_line(line)
+                if rec is not None:
+                    out.append(rec)
+    except OSError:
+        return []
+    return out
@@ -134,4 +134,6 @@ def main() -> int:
 
 
 if __name__ == "__main__":
+    from lib.hook_telemetry import timed_hook
+    main = timed_hook("notification-idle-overnight.py")(main)
     sys.exit(main())
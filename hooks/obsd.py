@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""obsd — background consumer for spooled PostToolUse observability events.
+
+posttool-overnight-trace.py appends one compact event per Agent call to a
+spool and returns; this consumer drains the spool and runs the deferred work
+(contract lookup, report inspection, trace.jsonl append, trace index update,
+specialist yield classification) in batches. See lib/obs_queue.py. The hook
+starts it on demand, so nothing has to be wired up by hand.
+
+Usage:
+    obsd.py start     # detach into the background (no-op if already running)
+    obsd.py stop      # SIGTERM the consumer; it drains the spool first
+    obsd.py status    # exit 0 if running, 1 otherwise
+    obsd.py drain     # handle whatever is queued in this process, then exit
+                      # (safe while the consumer runs; waits for its batch)
+    obsd.py serve     # run in the foreground (debugging)
+
+Env:
+    CLAUDE_OBSD_DIR          override the state dir holding spool, pid, lock
+                             and log (default $TMPDIR/claude-obsd-<uid>)
+    CLAUDE_OBSD_IDLE_SECS    exit after this long with nothing queued
+                             (default 600; 0 = never)
+    CLAUDE_OBS_ASYNC=0       (read by the hooks) handle events inline instead
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import os
+import signal
+import subprocess
+import sys
+from pathlib import Path
+from typing import Callable
+
+sys.path.insert(0, str(Path(__file__).parent))
+from lib.checkpoint_queue import acquire_writer_lock  # noqa: E402
+from lib.obs_queue import (  # noqa: E402
+    Consumer, default_state_dir, ensure_state_dir, log_path, pid_alive, read_pid,
+)
+
+IDLE_SECS = float(os.environ.get('CLAUDE_OBSD_IDLE_SECS', '600'))
+
+# event kind -> (hook script that enqueues it, batch handler defined there)
+HANDLERS = {
+    'agent_trace': ('posttool-overnight-trace.py', 'finish_events'),
+}
+
+
+def load_handler(kind: str) -> Callable[[list[dict]], None]:
+    script, func = HANDLERS[kind]
+    path = Path(__file__).resolve().parent / script
+    spec = importlib.util.spec_from_file_location(f'obsd_{kind}', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return getattr(module, func)
+
+
+class _LazyHandlers(dict):
+    """Loads a hook's handler on the first event of its kind."""
+
+    def get(self, kind, default=None):
+        if kind not in self and kind in HANDLERS:
+            self[kind] = load_handler(kind)
+        return super().get(kind, default)
+
+
+def cmd_serve(state_dir: str, verbose: bool) -> int:
+    try:
+        lock_fd = acquire_writer_lock(state_dir)
+    except OSError as exc:
+        sys.stderr.write(f'obsd: cannot serve in {state_dir}: {exc}\n')
+        return 1
+    if lock_fd is None:
+        if verbose:
+            sys.stderr.write(f'obsd: already serving in {state_dir}\n')
+        return 0
+    stop = []
+    signal.signal(signal.SIGTERM, lambda _signum, _frame: stop.append(True))
+    consumer = Consumer(state_dir, _LazyHandlers(), verbose=verbose)
+    try:
+        consumer.serve(idle=IDLE_SECS, stopping=lambda: bool(stop))
+    except KeyboardInterrupt:
+        consumer.drain()
+    finally:
+        os.close(lock_fd)  # releases the flock
+    consumer.log(f'handled {consumer.handled} events, dropped {consumer.dropped}')
+    return 0
+
+
+def drain_queued(state_dir: str | None = None, verbose: bool = False) -> Consumer:
+    """Handle every queued event in this process, after any batch a running
+    consumer is still handling (drain.lock); returns the consumer for its counts."""
+    consumer = Consumer(state_dir or default_state_dir(), _LazyHandlers(), verbose=verbose)
+    consumer.drain()
+    return consumer
+
+
+def cmd_drain(state_dir: str) -> int:
+    return 0 if not drain_queued(state_dir, verbose=True).dropped else 1
+
+
+def cmd_start(state_dir: str) -> int:
+    if pid_alive(read_pid(state_dir)):
+        return 0
+    ensure_state_dir(state_dir)
+    with open(os.devnull, 'rb') as devnull, open(log_path(state_dir), 'ab') as log:
+        subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), '--state-dir', state_dir,
+             'serve', '--verbose'],
+            stdin=devnull, stdout=log, stderr=log,
+            start_new_session=True, close_fds=True,
+        )
+    return 0
+
+
+def cmd_stop(state_dir: str) -> int:
+    pid = read_pid(state_dir)
+    if not pid:
+        return 0
+    try:
+        os.kill(pid, signal.SIGTERM)
+    except ProcessLookupError:
+        pass
+    return 0
+
+
+def cmd_status(state_dir: str) -> int:
+    pid = read_pid(state_dir)
+    if pid_alive(pid):
+        print(f'obsd: running (pid {pid}) in {state_dir}')
+        return 0
+    print(f'obsd: not running ({state_dir})')
+    return 1
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description='Observability event consumer control')
+    ap.add_argument('--state-dir', default=default_state_dir())
+    sub = ap.add_subparsers(dest='action', required=True)
+    serve = sub.add_parser('serve')
+    serve.add_argument('--verbose', action='store_true')
+    sub.add_parser('start')
+    sub.add_parser('stop')
+    sub.add_parser('status')
+    sub.add_parser('drain')
+    args = ap.parse_args()
+    if args.action == 'serve':
+        return cmd_serve(args.state_dir, args.verbose)
+    if args.action == 'start':
+        return cmd_start(args.state_dir)
+    if args.action == 'stop':
+        return cmd_stop(args.state_dir)
+    if args.action == 'drain':
+        return cmd_drain(args.state_dir)
+    return cmd_status(args.state_dir)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -274,4 +274,6 @@ def main() -> None:
 
 
 if __name__ == "__main__":
+    from lib.hook_telemetry import timed_hook
+    main = timed_hook("posttool-allowlist-consume.py")(main)
     main()
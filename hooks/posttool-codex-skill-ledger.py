@@ -121,6 +121,8 @@ def main() -> None:
 
 
 if __name__ == "__main__":
+    from lib.hook_telemetry import timed_hook
+    main = timed_hook("posttool-codex-skill-ledger.py")(main)
     try:
         main()
     except Exception:
@@ -81,4 +81,6 @@ def main():
 
 
 if __name__ == '__main__':
+    from lib.hook_telemetry import timed_hook
+    main = timed_hook("posttool-command-frontmatter-validate.py")(main)
     main()
@@ -10,4 +10,6 @@ Exit codes: 0 always (never blocks)
 from doc_sync.main import main
 
 if __name__ == '__main__':
+    from lib.hook_telemetry import timed_hook
+    main = timed_hook("posttool-doc-sync.py")(main)
     main()
@@ -1,29 +1,35 @@
 #!/bin/bash
 # posttool-git-checkpoint.sh - PostToolUse checkpoint trigger
-# Writes snapshots to refs/checkpoints/<branch> via the shared lib,
-# so HEAD and branch refs are NEVER moved by auto-saves.
+# Queues the edit for the coalescing checkpoint writer (checkpointd.py),
+# which writes snapshots to refs/checkpoints/<branch> via the shared lib,
+# so HEAD and branch refs are NEVER moved by auto-saves. The hook only
+# appends one spool line and returns; the writer applies the threshold
+# once per worktree per debounce window (see lib/checkpoint_queue.py).
+# GIT_CHECKPOINT_ASYNC=0 restores the inline count + write_checkpoint.
 #
 # Worktree awareness: detects when the edited file is inside a
 # .claude/worktrees/ directory and targets that worktree instead of the
 # main repo.
 
 # Configuration
+. "${BASH_SOURCE[0]%/*}/lib/hook-telemetry.sh"
+
 CHECKPOINT_THRESHOLD=${GIT_CHECKPOINT_THRESHOLD:-10}  # Default: 10 files accumulated
 SILENT_MODE=${GIT_CHECKPOINT_SILENT:-0}
 
 # Worktree detection: parse TOOL_INPUT to find file_path, detect worktree context
+# (bash regex only: this runs on every edit, so no forks before the enqueue)
 GIT_DIR=""
-if [ -n "$TOOL_INPUT" ]; then
-  FILE_PATH=$(echo "$TOOL_INPUT" | grep -o '"file_path"[[:space:]]*:[[:space:]]*"[^"]*"' | head -1 | sed 's/.*"file_path"[[:space:]]*:[[:space:]]*"//;s/"$//')
-
-  if [ -n "$FILE_PATH" ]; then
-    if echo "$FILE_PATH" | grep -q '/.claude/worktrees/[^/]\+/'; then
-      WORKTREE_ROOT=$(echo "$FILE_PATH" | sed 's|\(.*/.claude/worktrees/[^/]*/\).*|\1|')
-      if [ -d "$WORKTREE_ROOT" ]; then
-        GIT_DIR="$WORKTREE_ROOT"
-        if [ "$SILENT_MODE" != "1" ]; then
-          echo "📂 Worktree detected: $GIT_DIR"
-        fi
+FILE_PATH_RE='"file_path"[[:space:]]*:[[:space:]]*"([^"]*)"'
+WORKTREE_RE='^(.*/\.claude/worktrees/[^/]+/)'
+if [[ $TOOL_INPUT =~ $FILE_PATH_RE ]]; then
+  FILE_PATH="${BASH_REMATCH[1]}"
+  if [[ $FILE_PATH =~ $WORKTREE_RE ]]; then
+    WORKTREE_ROOT="${BASH_REMATCH[1]}"
+    if [ -d "$WORKTREE_ROOT" ]; then
+      GIT_DIR="$WORKTREE_ROOT"
+      if [ "$SILENT_MODE" != "1" ]; then
+        echo "📂 Worktree detected: $GIT_DIR"
       fi
     fi
   fi
@@ -32,6 +38,24 @@ fi
 # Allow explicit override via environment variable
 GIT_DIR="${GIT_CHECKPOINT_DIR:-$GIT_DIR}"
 
+# Default path: enqueue for the writer and return.
+if [ "${GIT_CHECKPOINT_ASYNC:-1}" != "0" ]; then
+  QUEUE_DIR="${CLAUDE_CHECKPOINTD_DIR:-${CLAUDE_TMPDIR:-${TMPDIR:-/tmp}}/claude-checkpointd-${UID}}"
+  [ -d "$QUEUE_DIR" ] || mkdir -m 700 -p "$QUEUE_DIR" 2>/dev/null
+  QUEUE_WORK_DIR="${GIT_DIR:-$PWD}"
+  [[ $QUEUE_WORK_DIR == /* ]] || QUEUE_WORK_DIR="$PWD/$QUEUE_WORK_DIR"
+  if printf '%s\t%s\n' "$QUEUE_WORK_DIR" "$CHECKPOINT_THRESHOLD" >> "$QUEUE_DIR/spool" 2>/dev/null; then
+    WRITER_PID=""
+    { read -r WRITER_PID < "$QUEUE_DIR/writer.pid"; } 2>/dev/null
+    if [ -z "$WRITER_PID" ] || ! kill -0 "$WRITER_PID" 2>/dev/null; then
+      python3 "${BASH_SOURCE[0]%/*}/checkpointd.py" --state-dir "$QUEUE_DIR" start \
+        </dev/null >/dev/null 2>&1 &
+    fi
+    exit 0
+  fi
+  # Spool not writable: fall through to the inline checkpoint below.
+fi
+
 # Build git command for counting only (no commit is issued here; the lib handles commits)
 if [ -n "$GIT_DIR" ]; then
   GIT_CMD="git -C $GIT_DIR"
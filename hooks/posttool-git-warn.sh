@@ -4,6 +4,8 @@
 # Location: ~/.claude/hooks/post-commit-warn.sh
 
 # Only run if warnings enabled
+. "${BASH_SOURCE[0]%/*}/lib/hook-telemetry.sh"
+
 if [ "$GIT_WARN_UNTRACKED" != "1" ]; then
   exit 0
 fi
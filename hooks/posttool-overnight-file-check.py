@@ -378,4 +378,6 @@ def main() -> None:
 
 
 if __name__ == '__main__':
+    from lib.hook_telemetry import timed_hook
+    main = timed_hook("posttool-overnight-file-check.py")(main)
     main()
@@ -12,6 +12,13 @@ HARD CUTOVER: when no overnight-state-*.json or cycle-contract.json is
 present (legacy /spec, single-shot /dev sessions) the hook exits 0
 immediately so it never blocks.
 
+ASYNC: by default the hook only captures what cannot wait (timestamps,
+the current step, usage counters from tool_response), spools it via
+``lib.obs_queue`` and returns; hooks/obsd.py (started on demand) loads the
+contract, inspects the report, appends the record, updates the trace index
+and records yield in batches through ``finish_events``. CLAUDE_OBS_ASYNC=0,
+or a spool that cannot be written, does all of it inline.
+
 Fail-soft: ANY exception is swallowed and reported on stderr. Exit code
 is always 0 -- this hook is observability, never a gate.
 """
@@ -30,16 +37,33 @@ _HOOKS_DIR = Path(__file__).resolve().parent
 if str(_HOOKS_DIR) not in sys.path:
     sys.path.insert(0, str(_HOOKS_DIR))
 
+# Bound lazily (lib/__init__.py): only specialist / contract-bearing records
+# pay for loading them. A broken module surfaces on first use and is handled
+# fail-soft there.
 try:
-    from lib.specialist_yield import classify_report, record_yield  # noqa: E402
+    from lib import specialist_yield  # noqa: E402
 except Exception:  # pragma: no cover - fail-soft if lib missing
-    classify_report = None  # type: ignore[assignment]
-    record_yield = None  # type: ignore[assignment]
+    specialist_yield = None  # type: ignore[assignment]
+
+try:
+    from lib import contract_runtime  # noqa: E402
+except Exception:  # pragma: no cover
+    contract_runtime = None  # type: ignore[assignment]
 
 try:
-    from lib.contract_runtime import load_contract  # noqa: E402
+    from lib import state_snapshot  # noqa: E402
 except Exception:  # pragma: no cover
-    load_contract = None  # type: ignore[assignment]
+    state_snapshot = None  # type: ignore[assignment]
+
+try:
+    from lib import trace_index  # noqa: E402
+except Exception:  # pragma: no cover
+    trace_index = None  # type: ignore[assignment]
+
+try:
+    from lib import obs_queue  # noqa: E402
+except Exception:  # pragma: no cover
+    obs_queue = None  # type: ignore[assignment]
 
 
 _SPECIALIST_TYPES = {"architect", "ui-specialist", "product-owner", "user"}
@@ -79,9 +103,15 @@ def _try_load_json(path: Path) -> dict | None:
 # ---------------------------------------------------------------------------
 
 
+def _overnight_state_docs(claude_dir: Path) -> list:
+    """Parsed overnight-state-*.json contents (None if unreadable), name order."""
+    if state_snapshot is not None:
+        return [sf.data for sf in state_snapshot.snapshot(claude_dir.parent).overnight_states()]
+    return [_try_load_json(p) for p in sorted(claude_dir.glob("overnight-state-*.json"))]
+
+
 def _scan_state_dir(claude_dir: Path, session_id: str) -> dict | None:
-    for path in sorted(claude_dir.glob("overnight-state-*.json")):
-        data = _try_load_json(path)
+    for data in _overnight_state_docs(claude_dir):
         if data is None:
             continue
         if not session_id or data.get("session_id") == session_id:
@@ -95,7 +125,10 @@ def _read_overnight_state(project_dir: Path, session_id: str) -> dict | None:
     if not claude_dir.is_dir():
         return None
     if session_id:
-        exact_data = _try_load_json(claude_dir / f"overnight-state-{session_id}.json")
+        if state_snapshot is not None:
+            exact_data = state_snapshot.snapshot(project_dir).overnight_state(session_id)
+        else:
+            exact_data = _try_load_json(claude_dir / f"overnight-state-{session_id}.json")
         if exact_data is not None:
             return exact_data
     return _scan_state_dir(claude_dir, session_id)
@@ -176,15 +209,6 @@ def _pipeline_id_from_contract(contract: dict | None) -> str | None:
     return None
 
 
-def _pipeline_id_from(stdin_ctx: dict, contract: dict | None) -> str | None:
-    ti = stdin_ctx.get("tool_input") or {}
-    if isinstance(ti, dict):
-        from_input = _pipeline_id_from_input(ti)
-        if from_input is not None:
-            return from_input
-    return _pipeline_id_from_contract(contract)
-
-
 def _tool_response(stdin_ctx: dict) -> dict | None:
     tr = stdin_ctx.get("tool_response")
     return tr if isinstance(tr, dict) else None
@@ -417,19 +441,23 @@ def _exit_status(tool_response: dict | None) -> str:
 # ---------------------------------------------------------------------------
 
 
-def _build_record(
+def _capture_record(
     *,
     session_id: str,
     cycle_id: int,
     stdin_ctx: dict,
-    contract: dict | None,
     state: dict | None,
 ) -> dict[str, Any]:
+    """Everything that must be read while the hook runs.
+
+    pipeline_id (when the prompt does not carry one) and
+    evidence_completeness are left for ``_complete_record``.
+    """
     end_ts = _now_iso()
     start_ts = _start_ts_from_bookmark(_project_dir(), session_id)
     tool_response = _tool_response(stdin_ctx)
     agent_type = _agent_type(stdin_ctx)
-    artifact_paths = _artifact_paths_from_response(tool_response)
+    ti = stdin_ctx.get("tool_input") or {}
     return {
         "ts_iso": end_ts,
         "session_id": session_id,
@@ -439,18 +467,16 @@ def _build_record(
         "step": _current_step(state),
         "role": agent_type,
         "mode": _mode_from_input(stdin_ctx),
-        "pipeline_id": _pipeline_id_from(stdin_ctx, contract),
+        "pipeline_id": _pipeline_id_from_input(ti) if isinstance(ti, dict) else None,
         "start_ts": start_ts,
         "end_ts": end_ts,
         "duration_ms": _duration_ms(start_ts, end_ts),
         "tool_call_count": _tool_call_count(tool_response),
         "estimated_tokens": _estimated_tokens(tool_response),
         "estimated_cost_usd": None,
-        "artifact_paths": artifact_paths,
+        "artifact_paths": _artifact_paths_from_response(tool_response),
         "schema_status": "unchecked",
-        "evidence_completeness": _compute_evidence_completeness(
-            artifact_paths, agent_type
-        ),
+        "evidence_completeness": None,
         "retry_count": 0,
         "exit_status": _exit_status(tool_response),
         "blocked_reason": None,
@@ -458,6 +484,30 @@ def _build_record(
     }
 
 
+def _complete_record(record: dict[str, Any], contract: dict | None) -> dict[str, Any]:
+    """Fill in the contract- and report-derived fields of a captured record."""
+    if record.get("pipeline_id") is None:
+        record["pipeline_id"] = _pipeline_id_from_contract(contract)
+    record["evidence_completeness"] = _compute_evidence_completeness(
+        record.get("artifact_paths") or [], record.get("agent_type")
+    )
+    return record
+
+
+def _build_record(
+    *,
+    session_id: str,
+    cycle_id: int,
+    stdin_ctx: dict,
+    contract: dict | None,
+    state: dict | None,
+) -> dict[str, Any]:
+    record = _capture_record(
+        session_id=session_id, cycle_id=cycle_id, stdin_ctx=stdin_ctx, state=state,
+    )
+    return _complete_record(record, contract)
+
+
 def _trace_path(project_dir: Path, session_id: str, cycle_id: int) -> Path:
     return (
         project_dir / "docs" / "dev" / "overnight" / session_id /
@@ -465,11 +515,13 @@ def _trace_path(project_dir: Path, session_id: str, cycle_id: int) -> Path:
     )
 
 
-def _append_jsonl(path: Path, record: dict[str, Any]) -> None:
+def _append_jsonl(path: Path, *records: dict[str, Any]) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    line = json.dumps(record, ensure_ascii=False, sort_keys=True) + "\n"
+    lines = "".join(
+        json.dumps(record, ensure_ascii=False, sort_keys=True) + "\n" for record in records
+    )
     with path.open("a", encoding="utf-8") as fh:
-        fh.write(line)
+        fh.write(lines)
 
 
 def _pick_report_path(artifacts: list[str]) -> str | None:
@@ -488,15 +540,15 @@ def _maybe_record_yield(
     agent_type = record.get("agent_type")
     if agent_type not in _SPECIALIST_TYPES:
         return
-    if classify_report is None or record_yield is None:
+    if specialist_yield is None:
         return
     artifacts = record.get("artifact_paths") or []
     report_path = _pick_report_path(artifacts) if artifacts else None
     if not report_path:
         return
     try:
-        classification = classify_report(report_path)
-        record_yield(
+        classification = specialist_yield.classify_report(report_path)
+        specialist_yield.record_yield(
             report_path, agent_type, session_id, cycle_id, classification, "active"
         )
     except Exception as exc:  # pragma: no cover - fail-soft
@@ -511,14 +563,76 @@ def _maybe_record_yield(
 
 
 def _resolve_contract(sid: str, cid: int) -> dict | None:
-    if load_contract is None:
+    if contract_runtime is None:
         return None
     try:
-        return load_contract(sid, cid)
+        return contract_runtime.load_contract(sid, cid)
     except Exception:
         return None
 
 
+def _maybe_index_trace(path: Path) -> None:
+    """Fold the new record into trace.index.json so closeout stays O(new).
+
+    Non-blocking: if closeout or the report checker holds the index, they
+    (or the next append) fold this record instead.
+    """
+    if trace_index is None:
+        return
+    try:
+        trace_index.refresh(path, blocking=False)
+    except Exception as exc:  # pragma: no cover - fail-soft
+        sys.stderr.write(f"[posttool-overnight-trace] trace index skipped: {exc}\n")
+
+
+def _write_records(sid: str, cid: int, records: list[dict[str, Any]]) -> None:
+    """Complete captured records and append them with one write and one index fold."""
+    contract = _resolve_contract(sid, cid)
+    if contract is None:
+        return
+    for record in records:
+        _complete_record(record, contract)
+    path = _trace_path(_project_dir(), sid, cid)
+    _append_jsonl(path, *records)
+    _maybe_index_trace(path)
+    for record in records:
+        _maybe_record_yield(record, sid, cid)
+
+
+def finish_events(events: list[dict]) -> None:
+    """obsd handler: finish spooled agent_trace events, batched per trace file."""
+    groups: dict[tuple, list[dict]] = {}
+    for event in events:
+        record = event.get("record")
+        if not isinstance(record, dict):
+            continue
+        sid, cid = record.get("session_id"), record.get("cycle_id")
+        if not isinstance(sid, str) or not isinstance(cid, int):
+            continue
+        env = event.get("env") if isinstance(event.get("env"), dict) else {}
+        key = (json.dumps(env, sort_keys=True), sid, cid)
+        groups.setdefault(key, []).append(record)
+    for (env_key, sid, cid), records in groups.items():
+        with obs_queue.applied_env(json.loads(env_key)):
+            _write_records(sid, cid, records)
+
+
+def _spool(record: dict[str, Any]) -> bool:
+    """Hand the record to obsd; False means the caller must finish it inline."""
+    if obs_queue is None or os.environ.get("CLAUDE_OBS_ASYNC", "1") == "0":
+        return False
+    try:
+        state_dir = obs_queue.default_state_dir()
+        obs_queue.enqueue(state_dir, "agent_trace", {"record": record})
+    except Exception:
+        return False
+    try:
+        obs_queue.ensure_consumer(state_dir)
+    except Exception as exc:  # queued: the next hook retries the start
+        sys.stderr.write(f"[posttool-overnight-trace] obsd start failed: {exc}\n")
+    return True
+
+
 def _process(stdin_ctx: dict) -> None:
     tool_name = stdin_ctx.get("tool_name") or ""
     if tool_name and tool_name != "Agent":
@@ -526,15 +640,12 @@ def _process(stdin_ctx: dict) -> None:
     sid, cid, state = _resolve_session_cycle(stdin_ctx)
     if state is None or sid is None or cid is None:
         return
-    contract = _resolve_contract(sid, cid)
-    if contract is None:
-        return
-    record = _build_record(
-        session_id=sid, cycle_id=cid, stdin_ctx=stdin_ctx,
-        contract=contract, state=state,
+    record = _capture_record(
+        session_id=sid, cycle_id=cid, stdin_ctx=stdin_ctx, state=state,
     )
-    _append_jsonl(_trace_path(_project_dir(), sid, cid), record)
-    _maybe_record_yield(record, sid, cid)
+    if _spool(record):
+        return
+    _write_records(sid, cid, [record])
 
 
 def main() -> int:
@@ -550,4 +661,6 @@ def main() -> int:
 
 
 if __name__ == "__main__":  # pragma: no cover
+    from lib.hook_telemetry import timed_hook
+    main = timed_hook("posttool-overnight-trace.py")(main)
     sys.exit(main())
@@ -70,4 +70,6 @@ def main():
 
 
 if __name__ == "__main__":
+    from lib.hook_telemetry import timed_hook
+    main = timed_hook("posttool-runcode-watchdog.py")(main)
     main()
@@ -525,4 +525,6 @@ def _main() -> None:
 
 
 if __name__ == '__main__':
+    from lib.hook_telemetry import timed_hook
+    _main = timed_hook("posttool-subagent-track.py")(_main)
     _main()
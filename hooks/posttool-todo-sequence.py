@@ -261,4 +261,6 @@ def main():
 
 
 if __name__ == '__main__':
+    from lib.hook_telemetry import timed_hook
+    main = timed_hook("posttool-todo-sequence.py")(main)
     main()
@@ -129,4 +129,6 @@ def main():
 
 
 if __name__ == '__main__':
+    from lib.hook_telemetry import timed_hook
+    main = timed_hook("posttool-todo-tracker.py")(main)
     main()
@@ -63,7 +63,7 @@ from collections import defaultdict
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent))
-from lib.allowlist import read_grant  # noqa: E402
+from lib import allowlist  # noqa: E402
 
 
 # Per-worker filename — role-first naming: dev-report-<role>-<task-id>.json
@@ -392,7 +392,7 @@ def main():
         if not data.get('agent_id'):
             _sid = (data.get('session_id') or
                     os.environ.get('CLAUDE_SESSION_ID', '') or 'default')
-            if read_grant('Agent', _sid):
+            if allowlist.read_grant('Agent', _sid):
                 sys.exit(0)
     except Exception:
         pass
@@ -412,6 +412,8 @@ def main():
 
 
 if __name__ == "__main__":
+    from lib.hook_telemetry import timed_hook
+    main = timed_hook("pretool-aggregate-check.py")(main)
     try:
         main()
     except Exception:
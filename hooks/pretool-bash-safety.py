@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""PreToolUse Hook (Bash): bash-safety rules evaluated in one process.
+
+Runs lib/bash_safety.py, the native port of pretool-bash-safety.sh: the
+payload is parsed once and every rule (runtime guard, /do and /allow grants,
+Layers 1.A-1.F, ABSOLUTE BAN, Rules, dangerous git) is checked in-process with
+the same messages and exit codes.
+
+pretool-bash-safety.sh remains the fallback. It runs instead when:
+  - CLAUDE_BASH_SAFETY_ENGINE=shell is set;
+  - lib/bash_safety.py cannot be imported or instrumented;
+  - the native engine raises before changing any state. Its buffered output
+    is then discarded, so the shell's verdict is the only one Claude Code sees.
+If the engine raises after it consumed a grant or appended to a log
+(bash_safety.EngineError), the shell would repeat those effects, so the call
+is blocked instead.
+
+With CLAUDE_HOOK_TELEMETRY=1 each call and its rule phases (runtime guard
+and its primitives, grants, rules) are recorded by lib/hook_telemetry.py.
+
+Exit 0 = allow, exit 2 = block (stderr is fed back to Claude).
+"""
+
+import io
+import os
+import sys
+
+HOOKS_DIR = os.path.dirname(os.path.abspath(__file__))
+SHELL_HOOK = os.path.join(HOOKS_DIR, "pretool-bash-safety.sh")
+sys.path.insert(0, HOOKS_DIR)
+
+try:
+    from lib import hook_telemetry
+except Exception:
+    hook_telemetry = None
+
+# Engine phases timed as telemetry spans.
+ENGINE_SPANS = ("_runtime_guard_verdict", "check_and_consume_allowlist",
+                "bulk_decision", "_context_stripped", "_rules")
+
+
+def _run_shell(raw):
+    import subprocess
+
+    proc = subprocess.run(["bash", SHELL_HOOK], input=raw, capture_output=True,
+                          text=True, errors="surrogateescape")
+    sys.stdout.write(proc.stdout)
+    sys.stderr.write(proc.stderr)
+    return proc.returncode
+
+
+def main():
+    raw = sys.stdin.read()
+    if os.environ.get("CLAUDE_BASH_SAFETY_ENGINE") == "shell":
+        return _run_shell(raw)
+    try:
+        from lib import bash_safety
+        if hook_telemetry and hook_telemetry.enabled():
+            hook_telemetry.instrument(bash_safety, "bash_safety", ENGINE_SPANS)
+            hook_telemetry.instrument(bash_safety.guard_cache, "guard_cache", ("cached_evaluate",))
+    except Exception:
+        return _run_shell(raw)
+    out, err = io.StringIO(), io.StringIO()
+    try:
+        code = bash_safety.run(raw, out, err)
+    except bash_safety.EngineError as e:
+        sys.stderr.write(
+            f"BLOCKED: bash-safety engine failed after changing state ({e}); the shell "
+            "fallback is not re-run because it would repeat that change. Retry the "
+            "command, or set CLAUDE_BASH_SAFETY_ENGINE=shell.\n")
+        return 2
+    except Exception:
+        return _run_shell(raw)
+    sys.stdout.write(out.getvalue())
+    sys.stderr.write(err.getvalue())
+    return code
+
+
+if __name__ == "__main__":
+    if hook_telemetry:
+        main = hook_telemetry.timed_hook("pretool-bash-safety.py")(main)
+    sys.exit(main())
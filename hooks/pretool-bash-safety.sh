@@ -81,9 +81,14 @@ _runtime_guard_fail_closed() {
   return 1
 }
 _RUNTIME_GUARD_LIB="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)/lib/runtime_guard.py"
+# guard_cache.py is a drop-in front-end that answers repeated commands from a
+# persistent verdict cache (CLAUDE_GUARD_CACHE=0 disables it); the engine itself
+# must still be present.
+_RUNTIME_GUARD_ENTRY="$(dirname "$_RUNTIME_GUARD_LIB")/guard_cache.py"
+[ -f "$_RUNTIME_GUARD_ENTRY" ] || _RUNTIME_GUARD_ENTRY="$_RUNTIME_GUARD_LIB"
 _RUNTIME_GUARD_ERR="$(mktemp "${CLAUDE_TMPDIR%/}/runtime-guard-XXXXXX" 2>/dev/null || echo /dev/null)"
 if [ -f "$_RUNTIME_GUARD_LIB" ]; then
-  _RUNTIME_GUARD_VERDICT=$(printf '%s' "$INPUT" | "$PYTHON_BIN" "$_RUNTIME_GUARD_LIB" 2>"$_RUNTIME_GUARD_ERR")
+  _RUNTIME_GUARD_VERDICT=$(printf '%s' "$INPUT" | "$PYTHON_BIN" "$_RUNTIME_GUARD_ENTRY" 2>"$_RUNTIME_GUARD_ERR")
 else
   _RUNTIME_GUARD_VERDICT="MISSING"
 fi
@@ -787,108 +792,34 @@ if echo "$COMMAND" | grep -qF '/tmp/claude-bulk-commit-sentinel-' \
   #       raw text shows the metachar inside '...' — these are ALLOWED for pure-read.
   #   (f) returns the decision via stdout: BARE_WRITER | PURE_READ | DENY | TOKENIZER_ERROR.
   HOOKS_DIR_BULK="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
-  _bulk_decision=$(CMD_INPUT="$COMMAND" "$PYTHON_BIN" - <<'PYEOF' 2>/dev/null
-import os, sys, shlex, re
+  _bulk_decision=$(CMD_INPUT="$COMMAND" HOOKS_DIR="$HOOKS_DIR_BULK" "$PYTHON_BIN" - <<'PYEOF' 2>/dev/null
+import os, sys, re
+
+# Shared lexer (lib/shell_lex.py). An import failure prints nothing, which the
+# case below treats as DENY (fail-closed).
+sys.path.insert(0, os.path.join(os.environ['HOOKS_DIR'], 'lib'))
+import shell_lex
 
 cmd = os.environ.get('CMD_INPUT', '')
 
 # Whitespace-trim for STARTS-WITH predicates on the raw text.
 trimmed = cmd.lstrip()
 
-# Canonical tokenizer recipe per ticket Reference Source / context constraints.
-# MUST exhaust the lexer via list(lex) — construction alone does not raise
-# (iter-2 C11). On ValueError (e.g. unterminated quote), fail-closed (AC-08).
+# Canonical tokenizer recipe per ticket Reference Source / context constraints:
+# shlex.shlex(posix=True, punctuation_chars=True) with commenters='' and
+# whitespace_split=True, exhausted via list(lex) (construction alone does not
+# raise — iter-2 C11). On ValueError (e.g. unterminated quote) punct_words
+# returns None: fail-closed DENY (AC-08).
 def tokenize_or_deny(text):
-    lex = shlex.shlex(text, posix=True, punctuation_chars=True)
-    lex.commenters = ''        # attribute assignment, NOT constructor kwarg (C1)
-    lex.whitespace_split = True
-    try:
-        return list(lex)       # MUST exhaust; construction alone will not raise
-    except ValueError:
-        return None            # signal fail-closed DENY (AC-08)
+    return shell_lex.punct_words(text)
 
 # Raw-text quote-state walk: detect unquoted OR double-quoted $( <( >( ` substrings.
-# Single-quoted bodies are NOT active subshells (single quotes inhibit expansion).
-# Double-quoted bodies ARE active subshells (double quotes do NOT inhibit $() or
-# backticks — codex iter-2 C6 + iter-3 F4). Single quotes inside double quotes
-# are LITERAL — they do NOT toggle single-quote state (iter-3 F4 closure).
-# State machine: 4 states tracked explicitly:
-#   - UNQUOTED (default): $( / <( / >( / ` are ACTIVE
-#   - SINGLE: nothing is active; only ' exits to UNQUOTED
-#   - DOUBLE: $( and ` are ACTIVE; <( / >( are inert (treated as literal inside "...")
-#             only " exits to UNQUOTED. \ escapes the next char (mostly for \" and \\).
-#   - ANSI_C: $'...' bash extension. Backslash escapes the next char. Only ' exits.
-#             Body is literal; no expansion. Treat like SINGLE for active-form purposes.
+# Single-quoted and ANSI-C $'...' bodies are NOT active subshells; double-quoted
+# bodies ARE for $( and backticks (codex iter-2 C6 + iter-3 F4), and single
+# quotes inside double quotes are LITERAL (iter-3 F4 closure). The 4-state
+# machine lives in shell_lex._scan_active_substitution.
 def has_active_cmdsub_or_procsub(text):
-    UNQUOTED, SINGLE, DOUBLE, ANSI_C = 0, 1, 2, 3
-    state = UNQUOTED
-    i = 0
-    n = len(text)
-    while i < n:
-        c = text[i]
-        if state == UNQUOTED:
-            # ANSI-C quoting start: $'...'
-            if c == '$' and i + 1 < n and text[i+1] == "'":
-                state = ANSI_C
-                i += 2
-                continue
-            # Active forms in UNQUOTED state:
-            if c == '$' and i + 1 < n and text[i+1] == '(':
-                return True
-            if c == '<' and i + 1 < n and text[i+1] == '(':
-                return True
-            if c == '>' and i + 1 < n and text[i+1] == '(':
-                return True
-            if c == '`':
-                return True
-            # State transitions.
-            if c == "'":
-                state = SINGLE
-                i += 1
-                continue
-            if c == '"':
-                state = DOUBLE
-                i += 1
-                continue
-            # Backslash in UNQUOTED state escapes the next char.
-            if c == '\\' and i + 1 < n:
-                i += 2
-                continue
-            i += 1
-            continue
-        if state == SINGLE:
-            # Inside single quotes nothing is active and nothing escapes.
-            if c == "'":
-                state = UNQUOTED
-            i += 1
-            continue
-        if state == DOUBLE:
-            # Inside double quotes: $( and backticks ARE active; <( and >( are
-            # NOT active (literal). Single quotes are LITERAL (do not toggle).
-            # Backslash escapes \, $, `, " and newline (per bash); for our scan
-            # treating \X as a 2-char skip is safe.
-            if c == '\\' and i + 1 < n:
-                i += 2
-                continue
-            if c == '$' and i + 1 < n and text[i+1] == '(':
-                return True
-            if c == '`':
-                return True
-            if c == '"':
-                state = UNQUOTED
-            i += 1
-            continue
-        if state == ANSI_C:
-            # Inside $'...': backslash escapes the next char (\', \\, \n, etc.).
-            # Only an unescaped ' exits.
-            if c == '\\' and i + 1 < n:
-                i += 2
-                continue
-            if c == "'":
-                state = UNQUOTED
-            i += 1
-            continue
-    return False
+    return shell_lex.parse(text).has_active_substitution
 
 # Tokenize FIRST so all subsequent checks (including bare-writer + pure-read)
 # operate on the parsed token list. Bare-writer regression iter-3 F3: the prior
@@ -91,6 +91,8 @@ def main():
 
 
 if __name__ == "__main__":
+    from lib.hook_telemetry import timed_hook
+    main = timed_hook("pretool-bash-views-guard.py")(main)
     try:
         main()
     except Exception:
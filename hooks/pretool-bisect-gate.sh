@@ -5,6 +5,8 @@
 #          (either suspect_commit or bisect_blocked reason).
 # Non-blocking: always exit 0. Degrades gracefully.
 
+. "${BASH_SOURCE[0]%/*}/lib/hook-telemetry.sh"
+
 set -euo pipefail
 
 cd "${CLAUDE_PROJECT_DIR:-.}" 2>/dev/null || exit 0
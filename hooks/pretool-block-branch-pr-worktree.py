@@ -92,11 +92,7 @@ try:
     from lib.bash_context_strip import strip_non_executable_contexts
 except Exception:  # pragma: no cover - lib always present in repo
     strip_non_executable_contexts = None
-from lib.allowlist import (  # noqa: E402
-    match_grant_for_bash_command,
-    match_sentinel_grant_for_bash_command,
-)
-from lib.overnight import is_overnight_active  # noqa: E402
+from lib import allowlist, overnight  # noqa: E402
 
 
 # ---------------------------------------------------------------------------
@@ -704,7 +700,7 @@ def _allow_grant_matches(command, data):
     sid = _get_session_id(data)
     task_id = os.environ.get('CLAUDE_TASK_ID') or sid
     try:
-        if task_id and match_sentinel_grant_for_bash_command(task_id, command) is not None:
+        if task_id and allowlist.match_sentinel_grant_for_bash_command(task_id, command) is not None:
             return True
     except Exception:
         pass
@@ -713,7 +709,7 @@ def _allow_grant_matches(command, data):
     if not sid:
         return False
     try:
-        return match_grant_for_bash_command(command, sid) is not None
+        return allowlist.match_grant_for_bash_command(command, sid) is not None
     except Exception:
         return False
 
@@ -761,7 +757,7 @@ def main():
         if not kind:
             sys.exit(0)
         # Bypasses — any one allows the operation.
-        if is_overnight_active(data.get('cwd')):
+        if overnight.is_overnight_active(data.get('cwd')):
             sys.exit(0)
         if _has_do_consent(data):
             sys.exit(0)
@@ -776,4 +772,6 @@ def main():
 
 
 if __name__ == '__main__':
+    from lib.hook_telemetry import timed_hook
+    main = timed_hook("pretool-block-branch-pr-worktree.py")(main)
     main()
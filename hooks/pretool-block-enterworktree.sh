@@ -11,6 +11,8 @@
 # (EnterPlanMode/ExitPlanMode only).
 
 # Read full JSON from stdin
+. "${BASH_SOURCE[0]%/*}/lib/hook-telemetry.sh"
+
 INPUT=$(cat)
 
 # Extract tool name (fail-open on parse failure)
@@ -185,4 +185,6 @@ def main() -> None:
 
 
 if __name__ == '__main__':
+    from lib.hook_telemetry import timed_hook
+    main = timed_hook("pretool-bulk-commit-detector.py")(main)
     main()
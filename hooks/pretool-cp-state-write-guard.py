@@ -141,6 +141,8 @@ def main() -> None:
 
 
 if __name__ == "__main__":
+    from lib.hook_telemetry import timed_hook
+    main = timed_hook("pretool-cp-state-write-guard.py")(main)
     try:
         main()
     except Exception as e:  # pragma: no cover
@@ -89,7 +89,7 @@ from datetime import datetime, timezone
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent))
-from lib.allowlist import read_grant_for_git_command, match_sentinel_grant_for_bash_command  # noqa: E402
+from lib import allowlist  # noqa: E402
 
 
 BLESSED_BRIDGE_RE = re.compile(r'auto-bulk:\s*end-of-cycle commit for\b')
@@ -154,12 +154,12 @@ def _check_git_allowlist(command: str, data: dict) -> bool:
     # Sentinel grant check (task 20260524-133650): NOT gated by subagent firewall.
     # User-granted sentinels must be honored in subagent context per M2 (20260521-090200).
     task_id = os.environ.get('CLAUDE_TASK_ID') or sid
-    if match_sentinel_grant_for_bash_command(task_id, command) is not None:
+    if allowlist.match_sentinel_grant_for_bash_command(task_id, command) is not None:
         return True
     # Legacy grant check: subagent firewall preserved (original behavior).
     if data.get('agent_id'):
         return False
-    return read_grant_for_git_command(command, sid)
+    return allowlist.read_grant_for_git_command(command, sid)
 
 
 def _inline_env_present(command, var_name):
@@ -817,4 +817,6 @@ def main():
 
 
 if __name__ == '__main__':
+    from lib.hook_telemetry import timed_hook
+    main = timed_hook("pretool-git-privilege-guard.py")(main)
     main()
@@ -111,4 +111,6 @@ def main():
 
 
 if __name__ == '__main__':
+    from lib.hook_telemetry import timed_hook
+    main = timed_hook("pretool-gitignore-preflight.py")(main)
     main()
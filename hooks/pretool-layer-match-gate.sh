@@ -5,6 +5,8 @@
 #          against latest context-*.json's diagnosis_layer. Warn on mismatch.
 # Non-blocking: always exit 0. Degrades gracefully when fields/files are missing.
 
+. "${BASH_SOURCE[0]%/*}/lib/hook-telemetry.sh"
+
 set -euo pipefail
 
 # Resolve project dir; exit silently if not available
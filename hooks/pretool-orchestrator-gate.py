@@ -28,7 +28,7 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent))
 from lib.subagent import is_subagent_context  # noqa: E402
-from lib.allowlist import read_grant          # noqa: E402
+from lib import allowlist                     # noqa: E402
 
 ALWAYS_ALLOWED = {
     "Agent",
@@ -180,7 +180,7 @@ def main():
     # Note: /allow CAN rescue even perm-blocked tools (e.g., EnterPlanMode) if
     # the user explicitly /allow-ed that tool name. This is by design.
     try:
-        if read_grant(tool_name, sid):
+        if allowlist.read_grant(tool_name, sid):
             sys.exit(0)
     except Exception:
         pass
@@ -221,4 +221,6 @@ def main():
 
 
 if __name__ == "__main__":
+    from lib.hook_telemetry import timed_hook
+    main = timed_hook("pretool-orchestrator-gate.py")(main)
     main()
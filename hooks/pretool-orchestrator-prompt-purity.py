@@ -354,4 +354,6 @@ def main() -> int:
 
 
 if __name__ == "__main__":
+    from lib.hook_telemetry import timed_hook
+    main = timed_hook("pretool-orchestrator-prompt-purity.py")(main)
     sys.exit(main())
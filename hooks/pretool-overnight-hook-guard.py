@@ -28,6 +28,7 @@ from pathlib import Path
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+from lib import state_snapshot  # noqa: E402
 from lib.bash_write_targets import (  # noqa: E402
     command_without_heredoc_bodies,
     extract_bash_write_paths,
@@ -400,19 +401,18 @@ def _is_orphaned_state(sf: Path, state: dict) -> bool:
     return _file_age_seconds(sf) > 7200
 
 
-def _load_state(sf: Path) -> dict | None:
-    """Read and JSON-parse a state file; return None on any failure."""
-    try:
-        if sf.stat().st_size == 0:
-            return None
-        return json.loads(sf.read_text())
-    except (json.JSONDecodeError, OSError):
-        return None
+def _overnight_states() -> list[tuple[Path, dict | None]]:
+    """(path, parsed state or None) for every .claude/overnight-state-*.json.
 
+    Served by lib/state_snapshot: main() asks for these up to five times per
+    call, and only files whose inode/mtime/size changed are re-parsed.
+    """
+    project_dir = os.environ.get("CLAUDE_PROJECT_DIR", os.getcwd())
+    return [(Path(sf.path), sf.data)
+            for sf in state_snapshot.snapshot(project_dir).overnight_states()]
 
-def _extract_live_worktree_path(sf: Path) -> str:
-    """Return worktree_path from a live, non-orphaned state file; else empty."""
-    state = _load_state(sf)
+
+def _live_worktree_path(state: dict | None) -> str:
     if state is None:
         return ""
     if not _is_session_live(state):
@@ -422,11 +422,9 @@ def _extract_live_worktree_path(sf: Path) -> str:
 
 def _get_active_worktree_paths() -> list[str]:
     """Return worktree_paths from all live overnight sessions."""
-    project_dir = Path(os.environ.get("CLAUDE_PROJECT_DIR", os.getcwd()))
-    state_files = list((project_dir / ".claude").glob("overnight-state-*.json"))
     paths = []
-    for sf in state_files:
-        wt = _extract_live_worktree_path(sf)
+    for _sf, state in _overnight_states():
+        wt = _live_worktree_path(state)
         if wt:
             paths.append(wt)
     return paths
@@ -498,13 +496,13 @@ def apply_global_worktree_enforcement(tool_name: str, tool_input: dict, worktree
     _enforce_bash_all_sessions(tool_name, tool_input, worktree_paths)
 
 
-def _any_live_state(sf: Path) -> bool:
-    """Return True if sf describes a live, non-orphaned overnight session.
+def _any_live_state(sf: Path, state: dict | None) -> bool:
+    """Return True if sf (parsed as `state`) describes a live, non-orphaned
+    overnight session.
 
     Calls `_cleanup_expired_state` for expired/orphaned entries (now a
     no-op per 2026-04-21) to keep the legacy call graph intact.
     """
-    state = _load_state(sf)
     if state is None:
         return False
     if not _is_session_live(state):
@@ -518,24 +516,14 @@ def _any_live_state(sf: Path) -> bool:
 
 def is_overnight_active() -> bool:
     """Check if any overnight session is still live."""
-    project_dir = Path(os.environ.get("CLAUDE_PROJECT_DIR", os.getcwd()))
-    state_files = list((project_dir / ".claude").glob("overnight-state-*.json"))
-    if not state_files:
-        return False
-    return any(_any_live_state(sf) for sf in state_files)
+    return any(_any_live_state(sf, state) for sf, state in _overnight_states())
 
 
 def get_overnight_state_for_session(project_dir: Path, session_id: str) -> dict | None:
     """Load overnight state file for the specific session."""
     if not session_id:
         return None
-    state_path = project_dir / '.claude' / f'overnight-state-{session_id}.json'
-    if not state_path.exists():
-        return None
-    try:
-        return json.loads(state_path.read_text())
-    except (json.JSONDecodeError, OSError):
-        return None
+    return state_snapshot.snapshot(project_dir).overnight_state(session_id)
 
 
 def is_hooks_path(file_path: str) -> bool:
@@ -882,9 +870,7 @@ def _governing_state_for_cwd(cwd: str) -> dict | None:
         cwd_real = os.path.realpath(cwd)
     except Exception:
         cwd_real = cwd
-    project_dir = Path(os.environ.get('CLAUDE_PROJECT_DIR', os.getcwd()))
-    for sf in (project_dir / '.claude').glob('overnight-state-*.json'):
-        state = _load_state(sf)
+    for _sf, state in _overnight_states():
         if state is None or not _is_session_live(state):
             continue
         wt = state.get('worktree_path', '') or ''
@@ -1977,6 +1963,8 @@ def _self_test() -> int:
 
 
 if __name__ == '__main__':
+    from lib.hook_telemetry import timed_hook
+    main = timed_hook("pretool-overnight-hook-guard.py")(main)
     if '--self-test' in sys.argv:
         sys.exit(_self_test())
     main()
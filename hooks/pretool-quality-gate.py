@@ -382,4 +382,6 @@ def main():
 
 
 if __name__ == "__main__":
+    from lib.hook_telemetry import timed_hook
+    main = timed_hook("pretool-quality-gate.py")(main)
     main()
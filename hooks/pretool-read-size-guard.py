@@ -13,7 +13,7 @@ import sys
 from pathlib import Path
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-from lib.allowlist import read_grant  # noqa: E402
+from lib import allowlist  # noqa: E402
 
 BINARY_EXTENSIONS = {
     ".png", ".jpg", ".jpeg", ".gif", ".svg", ".webp", ".ico", ".bmp", ".pdf",
@@ -69,7 +69,7 @@ def main():
     if data.get("tool_name") == "Read" and not data.get("agent_id"):
         sid = data.get("session_id") or os.environ.get("CLAUDE_SESSION_ID", "default")
         try:
-            if has_consent(sid) or read_grant("Read", sid):
+            if has_consent(sid) or allowlist.read_grant("Read", sid):
                 sys.exit(0)
         except Exception:
             pass
@@ -91,4 +91,6 @@ def main():
 
 
 if __name__ == "__main__":
+    from lib.hook_telemetry import timed_hook
+    main = timed_hook("pretool-read-size-guard.py")(main)
     main()
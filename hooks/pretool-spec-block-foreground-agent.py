@@ -136,4 +136,6 @@ def main() -> None:
 
 
 if __name__ == "__main__":
+    from lib.hook_telemetry import timed_hook
+    main = timed_hook("pretool-spec-block-foreground-agent.py")(main)
     main()
@@ -88,6 +88,8 @@ def main() -> None:
 
 
 if __name__ == "__main__":
+    from lib.hook_telemetry import timed_hook
+    main = timed_hook("pretool-subagent-code-block.py")(main)
     try:
         main()
     except Exception:
@@ -36,7 +36,8 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 from lib import contract_runtime  # noqa: E402
 from lib.subagent import is_subagent_context  # noqa: E402
-from lib.allowlist import read_grant          # noqa: E402
+from lib import allowlist                     # noqa: E402
+from lib import state_snapshot                # noqa: E402
 
 
 def _parse_stdin() -> dict:
@@ -55,14 +56,8 @@ def _has_consent(session_id: str) -> bool:
 
 
 def _load_bookmark(session_id: str) -> dict | None:
-    project_dir = Path(os.environ.get('CLAUDE_PROJECT_DIR', os.getcwd()))
-    path = project_dir / '.claude' / f'workflow-{session_id}.json'
-    if not path.exists():
-        return None
-    try:
-        return json.loads(path.read_text(encoding='utf-8'))
-    except Exception:
-        return None
+    project_dir = os.environ.get('CLAUDE_PROJECT_DIR', os.getcwd())
+    return state_snapshot.snapshot(project_dir).workflow(session_id)
 
 
 def _content_to_step(content: str) -> str:
@@ -211,7 +206,7 @@ def _main() -> None:
         sys.exit(0)
 
     # /allow bypass: main-agent-only
-    if not is_subagent_context(stdin_data) and read_grant("Agent", session_id):
+    if not is_subagent_context(stdin_data) and allowlist.read_grant("Agent", session_id):
         sys.exit(0)
 
     contract = contract_runtime.load_contract(session_id, cycle_id)
@@ -228,4 +223,6 @@ def _main() -> None:
 
 
 if __name__ == '__main__':
+    from lib.hook_telemetry import timed_hook
+    _main = timed_hook("pretool-subagent-enforce.py")(_main)
     _main()
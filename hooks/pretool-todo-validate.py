@@ -29,6 +29,7 @@ from pathlib import Path
 
 # Import shared canonical validation
 sys.path.insert(0, str(Path(__file__).parent))
+from lib import state_snapshot
 from lib.todo_canonical import validate_against_canonical, run_todo_script
 
 
@@ -147,14 +148,8 @@ def build_correct_call(last):
 
 def load_state(session_id):
     """Load workflow bookmark, return state dict or None."""
-    project_dir = Path(os.environ.get('CLAUDE_PROJECT_DIR', os.getcwd()))
-    path = project_dir / '.claude' / f'workflow-{session_id}.json'
-    if not path.exists():
-        return None
-    try:
-        return json.loads(path.read_text())
-    except Exception:
-        return None
+    project_dir = os.environ.get('CLAUDE_PROJECT_DIR', os.getcwd())
+    return state_snapshot.snapshot(project_dir).workflow(session_id)
 
 
 def validate(last, new):
@@ -306,4 +301,6 @@ def main():
 
 
 if __name__ == '__main__':
+    from lib.hook_telemetry import timed_hook
+    main = timed_hook("pretool-todo-validate.py")(main)
     main()
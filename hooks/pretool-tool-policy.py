@@ -109,6 +109,8 @@ def main() -> None:
 
 
 if __name__ == "__main__":
+    from lib.hook_telemetry import timed_hook
+    main = timed_hook("pretool-tool-policy.py")(main)
     try:
         main()
     except Exception as e:  # pragma: no cover
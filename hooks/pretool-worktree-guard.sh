@@ -3,6 +3,8 @@
 # Fires on all tools. Uses 60s cache to avoid git overhead on every call.
 # Exit 0 = allow, Exit 2 = block (stderr shown to Claude)
 
+. "${BASH_SOURCE[0]%/*}/lib/hook-telemetry.sh"
+
 set -euo pipefail
 
 CACHE_FILE="/tmp/worktree-guard-cache"
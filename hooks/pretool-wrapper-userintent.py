@@ -187,4 +187,6 @@ def main() -> None:
 
 
 if __name__ == '__main__':
+    from lib.hook_telemetry import timed_hook
+    main = timed_hook("pretool-wrapper-userintent.py")(main)
     main()
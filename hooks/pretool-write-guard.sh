@@ -4,6 +4,8 @@
 # Reads tool input from stdin as JSON (Claude Code hook protocol)
 
 # Read full JSON from stdin
+. "${BASH_SOURCE[0]%/*}/lib/hook-telemetry.sh"
+
 INPUT=$(cat)
 
 # Extract tool name
@@ -889,4 +889,6 @@ def main():
 
 
 if __name__ == '__main__':
+    from lib.hook_telemetry import timed_hook
+    main = timed_hook("prompt-workflow.py")(main)
     main()
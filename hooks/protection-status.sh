@@ -49,7 +49,8 @@ find ~ -maxdepth 3 -type d -name ".git" 2>/dev/null | sort | while read git_dir;
     fi
 
     # Layer 3: FSWatch
-    if ps aux | grep -q "[g]it-fswatch.sh $repo_dir"; then
+    if ps aux | grep -q "[g]it-fswatch.sh $repo_dir" \
+        || python3 ~/.claude/hooks/git-watchd.py status --repo "$repo_dir" 2>/dev/null; then
         layer3="✅"
     fi
 
@@ -83,4 +84,5 @@ echo "Commands:"
 echo "  Install protection: bash ~/.claude/hooks/install-protection-all.sh"
 echo "  Start fswatch:      bash ~/.claude/hooks/start-fswatch-all.sh"
 echo "  Stop fswatch:       pkill -f git-fswatch.sh"
+echo "  Stop git-watchd:    python3 ~/.claude/hooks/git-watchd.py stop"
 echo "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
@@ -7,6 +7,8 @@
 # Trigger: SessionStart Hook
 # ============================================================================
 
+. "${BASH_SOURCE[0]%/*}/lib/hook-telemetry.sh"
+
 set -e
 
 # Color output
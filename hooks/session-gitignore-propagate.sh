@@ -4,6 +4,8 @@
 # Runs idempotently — only appends rules that are absent.
 # Exit codes: 0=success (always), 2=internal error (treated as 0 by design)
 
+. "${BASH_SOURCE[0]%/*}/lib/hook-telemetry.sh"
+
 set -euo pipefail
 
 HARNESS_RULES=(
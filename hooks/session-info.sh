@@ -5,6 +5,8 @@
 # protocol channel for hook<->harness JSON; informational messages belong on
 # stderr.
 
+. "${BASH_SOURCE[0]%/*}/lib/hook-telemetry.sh"
+
 echo "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━" >&2
 echo "  Claude Code Session Started" >&2
 echo "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━" >&2
@@ -9,6 +9,8 @@
 
 # Do NOT use `set -e` here: the hook must never fail Claude Code startup.
 
+. "${BASH_SOURCE[0]%/*}/lib/hook-telemetry.sh"
+
 LOG="/var/log/claude-tier.log"
 
 log_hook() {
@@ -10,6 +10,8 @@
 # Non-blocking: exits 0 unconditionally regardless of df failures.
 # `df` is invoked via PATH lookup (bare `df`) per project convention.
 
+. "${BASH_SOURCE[0]%/*}/lib/hook-telemetry.sh"
+
 set -u
 
 THRESHOLD=75
@@ -2,6 +2,10 @@
 # start-fswatch-all.sh - Start fswatch monitoring for all important repositories
 # Location: ~/.claude/hooks/start-fswatch-all.sh
 # Usage: bash ~/.claude/hooks/start-fswatch-all.sh
+#
+# On Linux with inotify every repo is registered with one git-watchd.py
+# service instead of one git-fswatch.sh loop per repo. FSWATCH_ENGINE=fswatch
+# forces the per-repo loops.
 
 echo "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
 echo "🚀 FSWatch Batch Starter"
@@ -30,6 +34,34 @@ started_count=0
 skipped_count=0
 failed_count=0
 
+WATCHD="$HOME/.claude/hooks/git-watchd.py"
+if [ "${FSWATCH_ENGINE:-}" != "fswatch" ] && [ -f "$WATCHD" ] && python3 "$WATCHD" supported; then
+    for repo in "${REPOS[@]}"; do
+        if ! git -C "$repo" remote get-url origin >/dev/null 2>&1; then
+            echo "⏭️  $(basename "$repo"): No remote, skipping"
+            ((skipped_count++))
+            continue
+        fi
+        python3 "$WATCHD" add "$repo" >/dev/null && ((started_count++))
+    done
+    python3 "$WATCHD" start
+    sleep 1
+    echo ""
+    if python3 "$WATCHD" status; then
+        echo "✅ git-watchd: $started_count repositories on one inotify watcher"
+    else
+        echo "❌ git-watchd failed to start (check \${TMPDIR:-/tmp}/claude-git-watchd-$(id -u).pid.log)"
+        exit 1
+    fi
+    echo ""
+    echo "Commands:"
+    echo "  Check status:   bash ~/.claude/hooks/protection-status.sh"
+    echo "  List repos:     python3 ~/.claude/hooks/git-watchd.py list"
+    echo "  Stop:           python3 ~/.claude/hooks/git-watchd.py stop"
+    echo "  Unwatch a repo: python3 ~/.claude/hooks/git-watchd.py remove REPO"
+    exit 0
+fi
+
 for repo in "${REPOS[@]}"; do
     repo_name=$(basename "$repo")
 
@@ -3,6 +3,8 @@
 # Registered LAST in Stop hooks array so earlier hook failures do not block cleanup.
 # Exits 0 always (cleanup is best-effort; never blocks agent stop).
 # NOTE: NO `set -e` — missing flag file is expected and must not error out.
+. "${BASH_SOURCE[0]%/*}/lib/hook-telemetry.sh"
+
 set -u
 
 INPUT=$(cat)
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Stop / SubagentStop Hook: Regenerate the INDEX.md / README.md files queued
+by posttool-doc-sync.py during the turn, once per directory.
+
+Delegates to doc_sync.main.flush_pending. See doc_sync/deferred.py for the
+journal. A no-op when nothing is queued (or CLAUDE_DOC_SYNC_DEFER=0, where
+posttool-doc-sync.py regenerates on every edit).
+Hook type: SubagentStop; on Stop, auto-commit.sh runs it ahead of the
+checkpoint (hooks in one Stop group run in parallel)
+Exit codes: 0 always (never blocks)
+"""
+
+import json
+import sys
+
+from doc_sync import deferred
+from doc_sync.main import flush_pending
+
+
+def main():
+    try:
+        data = json.load(sys.stdin) if not sys.stdin.isatty() else {}
+        session_id = (data.get('session_id') or '') if isinstance(data, dict) else ''
+        if deferred.pending(session_id):
+            flush_pending(session_id)
+    except Exception:
+        pass
+    sys.exit(0)
+
+
+if __name__ == '__main__':
+    from lib.hook_telemetry import timed_hook
+    main = timed_hook("stop-doc-sync-flush.py")(main)
+    main()
@@ -25,11 +25,10 @@ _HOOKS_DIR = Path(__file__).resolve().parent
 if str(_HOOKS_DIR) not in sys.path:
     sys.path.insert(0, str(_HOOKS_DIR))
 
-try:
-    from lib.closeout import has_pending_required_calls, run_cycle_closeout
+try:  # bound lazily (lib/__init__.py); loaded only when a cycle closes out
+    from lib import closeout
 except Exception:  # pragma: no cover - fail-soft if lib missing
-    has_pending_required_calls = None  # type: ignore[assignment]
-    run_cycle_closeout = None  # type: ignore[assignment]
+    closeout = None  # type: ignore[assignment]
 
 
 def read_stdin_context() -> dict:
@@ -103,16 +102,30 @@ def _coerce_cycle_id(state: dict) -> int | None:
         return None
 
 
+def _drain_trace_spool() -> None:
+    """Handle trace events posttool-overnight-trace.py spooled for obsd.
+
+    Stop fires right after the last Agent call, whose trace record may still
+    be queued; closeout has to see it (metrics, pending required_calls).
+    """
+    try:
+        import obsd
+        obsd.drain_queued()
+    except Exception as exc:  # pragma: no cover - fail-soft
+        sys.stderr.write(f"[stop-overnight-timelock] trace spool drain error: {exc}\n")
+
+
 def _invoke_closeout(session_id: str, state: dict) -> bool:
     """Run cycle closeout. Returns True if pending required_calls remain."""
-    if run_cycle_closeout is None or has_pending_required_calls is None:
+    if closeout is None:
         return False
     cycle_id = _coerce_cycle_id(state)
     if not session_id or cycle_id is None:
         return False
+    _drain_trace_spool()
     try:
-        run_cycle_closeout(session_id, cycle_id)
-        return bool(has_pending_required_calls(session_id, cycle_id))
+        closeout.run_cycle_closeout(session_id, cycle_id)
+        return bool(closeout.has_pending_required_calls(session_id, cycle_id))
     except Exception as exc:  # pragma: no cover - fail-soft
         sys.stderr.write(f"[stop-overnight-timelock] closeout error: {exc}\n")
         return False
@@ -257,4 +270,6 @@ def main():
 
 
 if __name__ == '__main__':
+    from lib.hook_telemetry import timed_hook
+    main = timed_hook("stop-overnight-timelock.py")(main)
     main()
@@ -259,4 +259,6 @@ def main():
 
 
 if __name__ == "__main__":
+    from lib.hook_telemetry import timed_hook
+    main = timed_hook("stop-spec-coverage-enforce.py")(main)
     main()
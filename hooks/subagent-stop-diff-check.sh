@@ -9,6 +9,8 @@
 # surgical fixes. Large diffs without documented scope expansion are suspicious
 # and likely represent unauthorized refactoring.
 
+. "${BASH_SOURCE[0]%/*}/lib/hook-telemetry.sh"
+
 set -euo pipefail
 
 # Skip if CLAUDE_PROJECT_DIR not set or not a git repo
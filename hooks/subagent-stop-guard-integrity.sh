@@ -5,6 +5,8 @@
 #          check whether recent diff (HEAD~5..HEAD + uncommitted) removes that guard.
 # Non-blocking: always exit 0. Degrades gracefully.
 
+. "${BASH_SOURCE[0]%/*}/lib/hook-telemetry.sh"
+
 set -euo pipefail
 
 # Prevent stacking: concurrent SubagentStop hooks skip instead of piling up CPU.
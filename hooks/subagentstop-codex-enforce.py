@@ -100,6 +100,8 @@ def main() -> None:
 
 
 if __name__ == "__main__":
+    from lib.hook_telemetry import timed_hook
+    main = timed_hook("subagentstop-codex-enforce.py")(main)
     try:
         main()
     except Exception:
@@ -102,6 +102,8 @@ def main() -> int:
 
 
 if __name__ == "__main__":
+    from lib.hook_telemetry import timed_hook
+    main = timed_hook("subagentstop-cp-enforce.py")(main)
     try:
         sys.exit(main())
     except SystemExit:
@@ -219,6 +219,8 @@ def main() -> None:
 
 
 if __name__ == "__main__":
+    from lib.hook_telemetry import timed_hook
+    main = timed_hook("subagentstop-e2e-enforce.py")(main)
     try:
         main()
     except Exception:
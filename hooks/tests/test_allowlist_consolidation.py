@@ -33,6 +33,8 @@ from lib.allowlist import (
     consume_sentinel_grant_on_terminal_result,
     reap_expired_sentinel_grants,
     SENTINEL_GRANT_DIR,
+    _enumerate_sentinel_grant_files,
+    _grant_expiry,
 )
 
 
@@ -845,5 +847,114 @@ class TestMatchSentinelGrantForWrite(unittest.TestCase):
                     os.unlink(p)
 
 
+class TestGrantStore(unittest.TestCase):
+    """Grant caching, the task_id index and the expiry heap."""
+
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.dir = self._tmpdir.name
+        patcher = patch("lib.allowlist.SENTINEL_GRANT_DIR", self.dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self._tmpdir.cleanup)
+
+    def _write(self, name, expires_at, ops=None, age=10):
+        path = os.path.join(self.dir, name)
+        with open(path, "w") as f:
+            json.dump({"task_id": name, "session_id": "s",
+                       "allowed_operations": ops or [{"op": "ls"}],
+                       "created_at": 0, "expires_at": expires_at}, f)
+        past = time.time() - age  # older than the racy window
+        os.utime(path, (past, past))
+        os.utime(self.dir, (past, past))
+        return path
+
+    def test_cached_grant_is_reused_until_the_file_changes(self):
+        path = self._write("t1.json", time.time() + 300)
+        self.assertIsNotNone(load_sentinel_grant_for_task("t1"))
+        with patch("lib.allowlist.json.load") as load:
+            self.assertIsNotNone(load_sentinel_grant_for_task("t1"))
+            load.assert_not_called()
+        self._write("t1.json", time.time() + 300, ops=[{"op": "git"}], age=5)
+        self.assertIsNotNone(match_sentinel_grant_for_bash_command("t1", "git status"))
+        os.unlink(path)
+        self.assertIsNone(load_sentinel_grant_for_task("t1"))
+
+    def test_recent_changes_are_never_served_from_cache(self):
+        self._write("t2.json", time.time() + 300)
+        self.assertIsNone(load_sentinel_grant_for_task("t2-x"))
+        with open(os.path.join(self.dir, "t2-x-nonce.json"), "w") as f:
+            json.dump({"task_id": "t2-x", "session_id": "s", "allowed_operations": [],
+                       "created_at": 0, "expires_at": time.time() + 300}, f)
+        # same directory mtime as before is possible within one clock tick
+        past = time.time() - 10
+        os.utime(self.dir, (past, past))
+        self.assertIsNotNone(load_sentinel_grant_for_task("t2-x"))
+
+    def test_task_id_prefixes_match_the_glob_rules(self):
+        for name in ("a-b-c.json", "a-b.json", "ab.json", "x--y.json"):
+            self._write(name, time.time() + 300)
+        names = lambda tid: sorted(p.name for p in _enumerate_sentinel_grant_files(tid))
+        self.assertEqual(names("a"), ["a-b-c.json", "a-b.json"])
+        self.assertEqual(names("a-b"), ["a-b-c.json", "a-b.json"])
+        self.assertEqual(names("a-b-c"), ["a-b-c.json"])
+        self.assertEqual(names("x-"), ["x--y.json"])
+        self.assertEqual(names("b"), [])
+        self.assertEqual(len(names(None)), 4)
+
+    def test_reap_only_parses_new_grants(self):
+        now = time.time()
+        self._write("old.json", now - 5)
+        self._write("live.json", now + 300)
+        self._write("forever.json", None)
+        with open(os.path.join(self.dir, "bad.json"), "w") as f:
+            f.write("{not json")
+        self.assertEqual(reap_expired_sentinel_grants(), 2)
+        self.assertEqual(sorted(os.listdir(self.dir)),
+                         [".expiry-index", "forever.json", "live.json"])
+        past = time.time() - 10
+        os.utime(self.dir, (past, past))
+        reap_expired_sentinel_grants()  # records a settled directory signature
+        self._write("new.json", now - 1)
+        with patch("lib.allowlist._grant_expiry", wraps=_grant_expiry) as parse:
+            self.assertEqual(reap_expired_sentinel_grants(), 1)
+        self.assertEqual([c.args[0] for c in parse.call_args_list],
+                         [os.path.join(self.dir, "new.json")])
+
+    def test_expiry_heap_is_replaced_atomically(self):
+        self._write("live.json", time.time() + 300)
+        legacy = os.path.join(self.dir, ".expiry-index")
+        with open(legacy, "w") as f:
+            f.write("{}")  # flat index from an older release
+        reap_expired_sentinel_grants()
+        heap = os.path.join(legacy, "heap.json")
+        self.assertEqual(os.listdir(legacy), ["heap.json"])
+        before = os.stat(heap).st_ino
+        with patch("lib.allowlist.os.replace", side_effect=OSError("crash")):
+            reap_expired_sentinel_grants()
+        self.assertEqual(os.listdir(legacy), ["heap.json"])  # temp cleaned up
+        self.assertEqual(os.stat(heap).st_ino, before)  # old heap left intact
+        reap_expired_sentinel_grants()
+        self.assertNotEqual(os.stat(heap).st_ino, before)
+        with open(heap) as f:
+            self.assertIn("live.json", json.load(f)["entries"])
+
+    def test_reap_rechecks_rewritten_grants(self):
+        path = self._write("t3.json", time.time() + 300)
+        self.assertEqual(reap_expired_sentinel_grants(), 0)
+        # the writer replaces grants with write-temp + rename
+        tmp = self._write("t3.json.tmp", time.time() - 1)
+        os.rename(tmp, path)
+        self.assertEqual(reap_expired_sentinel_grants(), 1)
+        self.assertFalse(os.path.exists(path))
+
+    def test_regex_compiled_once_and_timeout_optional(self):
+        grant = {"pattern": r"git\s+log", "is_regex": True}
+        self.assertIsNotNone(_match_loaded_grant(grant, ["git log -1"], "substr_only", None))
+        self.assertIsNotNone(_match_loaded_grant(grant, ["git  log"], "substr_only", 1))
+        self.assertIsNone(_match_loaded_grant({"pattern": "(", "is_regex": True},
+                                              ["("], "substr_only", 1))
+
+
 if __name__ == "__main__":
     unittest.main()
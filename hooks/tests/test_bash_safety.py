@@ -0,0 +1,223 @@
+"""Parity tests for the native bash-safety engine (lib/bash_safety.py).
+
+Every case runs the same payload through pretool-bash-safety.sh and
+pretool-bash-safety.py and requires identical (exit code, stdout, stderr),
+including the stateful /do, /allow and daemon-restart grant paths.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+import uuid
+from pathlib import Path
+from unittest import mock
+
+HOOKS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(HOOKS_DIR))
+
+from lib import bash_safety  # noqa: E402
+
+SHELL_HOOK = HOOKS_DIR / "pretool-bash-safety.sh"
+NATIVE_HOOK = HOOKS_DIR / "pretool-bash-safety.py"
+
+CONFIG = {
+    "schema_version": 1,
+    "protected_cmds": ["acme-cli"],
+    "protected_launch_paths": [],
+    "protected_services": ["acme-daemon"],
+    "protected_hotfiles": [],
+    "protected_statefiles": [],
+    "protected_endpoint_paths": [],
+    "protected_proc_idents": ["acme-daemon"],
+    "protected_global_bins": [],
+    "protected_build_workspaces": ["acme"],
+    "protected_build_paths": [],
+    "script_run_policy": "default_deny",
+    "protected_script_workspaces": ["acme"],
+    "protected_script_paths": [],
+    "non_protected_workspaces": [],
+    "safe_script_allowlist": [],
+}
+
+CORPUS = [
+    "git status", "ls -la", "kill -9 1234", 'echo "kill 1234"', "rm -rf /tmp/x",
+    "docker stop happy-web-dev", "docker stop happy-server", "docker compose down",
+    "systemctl restart nginx", "systemctl enable nginx",
+    "systemctl reload-or-restart happy-daemon",
+    "nohup bash -c 'systemctl restart happy-daemon'", "bash /tmp/x.sh",
+    "curl localhost:3000/stop",
+    "cat /tmp/claude-bulk-commit-sentinel-abc.json",
+    "cat /tmp/claude-bulk-commit-sentinel-abc.json; touch x",
+    "cat 'unterminated /tmp/claude-bulk-commit-sentinel-x",
+    "cat session_dirs.txt", "echo x > .env", "dd if=/dev/zero of=/dev/sda",
+    "npm install -g foo", "npm i foo # -g", "git stash", "git stash list",
+    "git checkout abc123 -- .", "git restore --source=HEAD~1 -- src/",
+    "git -C /x reset --hard", "git push origin :branch", "git push origin main",
+    "git symbolic-ref HEAD refs/heads/x", "git rebase main", "git revert HEAD~1",
+    "echo hi\nrm -rf /", "cat <<EOF\nrm -rf /\nEOF", "systemctl restart acme-daemon",
+]
+
+
+class BashSafetyTestCase(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.tmp = Path(self._tmpdir.name)
+        (self.tmp / "cfg.json").write_text(json.dumps(CONFIG))
+        self.env = dict(os.environ, HOME=str(self.tmp), CLAUDE_TMPDIR=str(self.tmp),
+                        CLAUDE_PROTECTED_RUNTIME_FILE=str(self.tmp / "cfg.json"),
+                        CLAUDE_GUARD_CACHE_FILE=str(self.tmp / "verdicts.json"))
+        for var in ("CLAUDE_TASK_ID", "CLAUDE_SESSION_ID", "CLAUDE_BASH_SAFETY_ENGINE"):
+            self.env.pop(var, None)
+        self.sid = f"bash-safety-test-{uuid.uuid4().hex}"
+        self._cleanup = []
+
+    def tearDown(self):
+        for path in self._cleanup:
+            for p in (path, f"{path}.lock"):
+                if os.path.exists(p):
+                    os.unlink(p)
+        self._tmpdir.cleanup()
+
+    def _payload(self, command, agent_id=None):
+        payload = {"tool_name": "Bash", "session_id": self.sid,
+                   "tool_input": {"command": command, "cwd": str(self.tmp)}}
+        if agent_id:
+            payload["agent_id"] = agent_id
+        return json.dumps(payload)
+
+    def _run(self, hook, payload):
+        argv = ["bash", str(hook)] if hook.suffix == ".sh" else [sys.executable, str(hook)]
+        proc = subprocess.run(argv, input=payload, text=True, capture_output=True,
+                              env=self.env, timeout=60)
+        return proc.returncode, proc.stdout, proc.stderr
+
+    def assert_parity(self, command, agent_id=None, before_each=None):
+        payload = self._payload(command, agent_id)
+        results = []
+        for hook in (SHELL_HOOK, NATIVE_HOOK):
+            if before_each:
+                before_each()
+            results.append(self._run(hook, payload))
+        self.assertEqual(results[1], results[0], command)
+        return results[1]
+
+    def _tmp_flag(self, path, content):
+        Path(path).write_text(content)
+        self._cleanup.append(str(path))
+
+
+class TestRuleParity(BashSafetyTestCase):
+    def test_corpus_main_agent(self):
+        codes = {cmd: self.assert_parity(cmd)[0] for cmd in CORPUS}
+        self.assertEqual(codes["git status"], 0)
+        self.assertEqual(codes["rm -rf /tmp/x"], 2)
+
+    def test_corpus_subagent(self):
+        for cmd in ("git rebase main", "git revert HEAD", "rm -rf /tmp/x", "git status"):
+            self.assert_parity(cmd, agent_id="sub-1")
+
+    def test_non_bash_and_malformed_payloads_allow(self):
+        for raw in ("not json", json.dumps({"tool_name": "Read", "tool_input": {}})):
+            self.assertEqual(self._run(NATIVE_HOOK, raw), self._run(SHELL_HOOK, raw))
+
+
+class TestGrantParity(BashSafetyTestCase):
+    def test_do_bypass(self):
+        self._tmp_flag(f"/tmp/claude-orchestrator-consent-{self.sid}.flag", "true\n")
+        self.assertEqual(self.assert_parity("rm -rf /tmp/x")[0], 0)
+
+    def test_allow_grant_approves_with_json(self):
+        self._tmp_flag(f"/tmp/claude-bash-allowlist-{self.sid}.json",
+                       json.dumps({"pattern": "rm -rf /tmp/x", "is_regex": False}))
+        code, out, err = self.assert_parity("ls && rm -rf /tmp/x")
+        self.assertEqual(code, 0)
+        self.assertEqual(json.loads(out)["hookSpecificOutput"]["permissionDecision"], "allow")
+        log = (self.tmp / ".claude" / "logs" / "bash-consent.log").read_text().splitlines()
+        entries = [line.split(" ", 1)[1] for line in log]  # drop the timestamp
+        self.assertEqual(len(entries), 2)
+        self.assertEqual(entries[0], entries[1])
+
+    def test_daemon_restart_grant_is_consumed(self):
+        flag = self.tmp / "claude-allow-daemon-restart-dev.flag"
+        grant = json.dumps({"target": "dev", "session_id": self.sid,
+                            "expires_at": "2999-01-01T00:00:00Z"})
+        self.env["CLAUDE_DAEMON_RESTART_GRANT_DIR"] = str(self.tmp)
+        code, _, err = self.assert_parity("systemctl restart happy-daemon-dev",
+                                          before_each=lambda: flag.write_text(grant))
+        self.assertEqual(code, 0)
+        self.assertIn("[daemon-restart-grant] consumed", err)
+        self.assertFalse(flag.exists())
+        self.assertEqual(self.assert_parity("systemctl restart happy-daemon-dev")[0], 2)
+
+
+class TestEngine(unittest.TestCase):
+    def test_grep_is_line_oriented(self):
+        rx = bash_safety._rx(r"reset\s+([^;|&]*\s+)?--hard\b")
+        self.assertFalse(bash_safety._grep(rx, "git reset\n--hard"))
+        self.assertTrue(bash_safety._grep(rx, "ls\ngit reset --hard"))
+
+    def test_bulk_decision(self):
+        sentinel = "/tmp/claude-bulk-commit-sentinel-x.json"
+        self.assertEqual(bash_safety.bulk_decision(f"cat {sentinel}"), "PURE_READ")
+        self.assertEqual(bash_safety.bulk_decision(f"find /tmp -name x -de$'lete' {sentinel}"), "DENY")
+        self.assertEqual(bash_safety.bulk_decision(f"cat '{sentinel}"), "TOKENIZER_ERROR")
+
+    def test_shell_engine_override(self):
+        env = dict(os.environ, CLAUDE_BASH_SAFETY_ENGINE="shell")
+        proc = subprocess.run([sys.executable, str(NATIVE_HOOK)], env=env, text=True,
+                              capture_output=True, timeout=60,
+                              input=json.dumps({"tool_name": "Bash",
+                                                "tool_input": {"command": "git stash"}}))
+        self.assertEqual(proc.returncode, 2)
+        self.assertIn("bare 'git stash'", proc.stderr)
+
+    def test_run_writes_to_given_streams(self):
+        out, err = io.StringIO(), io.StringIO()
+        payload = json.dumps({"tool_name": "Bash", "tool_input": {"command": "git stash -u"}})
+        with mock.patch.dict(os.environ, {"CLAUDE_GUARD_CACHE": "0"}):
+            self.assertEqual(bash_safety.run(payload, out, err), 2)
+        self.assertEqual(out.getvalue(), "")
+        self.assertIn("Command: git stash -u", err.getvalue())
+
+
+
+class TestFallback(BashSafetyTestCase):
+    def setUp(self):
+        super().setUp()
+        spec = importlib.util.spec_from_file_location("bash_safety_hook", NATIVE_HOOK)
+        self.hook = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(self.hook)
+
+    def _main(self, command, **patches):
+        stdin = io.StringIO(self._payload(command))
+        with mock.patch.dict(os.environ, self.env, clear=True), \
+                mock.patch.object(self.hook, "_run_shell", return_value=0) as shell, \
+                mock.patch.multiple(bash_safety, **patches), \
+                mock.patch.object(sys, "stdin", stdin), \
+                mock.patch.object(sys, "stderr", io.StringIO()) as err:
+            return self.hook.main(), shell.called, err.getvalue()
+
+    def test_error_before_any_state_change_runs_the_shell(self):
+        code, shell_ran, _ = self._main("git status", _rules=mock.Mock(side_effect=KeyError("x")))
+        self.assertEqual((code, shell_ran), (0, True))
+
+    def test_error_after_a_grant_was_logged_blocks_without_the_shell(self):
+        self._tmp_flag(f"/tmp/claude-bash-allowlist-{self.sid}.json",
+                       json.dumps({"pattern": "rm -rf /tmp/x", "is_regex": False}))
+        code, shell_ran, err = self._main("rm -rf /tmp/x",
+                                          _approve=mock.Mock(side_effect=KeyError("x")))
+        self.assertEqual((code, shell_ran), (2, False))
+        self.assertIn("failed after changing state", err)
+        log = self.tmp / ".claude" / "logs" / "bash-consent.log"
+        self.assertEqual(len(log.read_text().splitlines()), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
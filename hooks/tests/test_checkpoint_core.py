@@ -0,0 +1,100 @@
+"""Tests for the shadow index in lib/checkpoint-core.sh (write_checkpoint)."""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+
+HOOKS_DIR = Path(__file__).resolve().parent.parent
+CORE = HOOKS_DIR / "lib" / "checkpoint-core.sh"
+
+
+class ShadowIndexTest(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.tmp = Path(self._tmpdir.name)
+        self.repo = self.tmp / "repo"
+        self.repo.mkdir()
+        (self.tmp / "logs").mkdir()
+        self.env = dict(os.environ, HOME=str(self.tmp), CHECKPOINT_LOG_DIR=str(self.tmp / "logs"),
+                        GIT_CONFIG_GLOBAL=os.devnull, GIT_CONFIG_NOSYSTEM="1",
+                        GIT_AUTHOR_NAME="t", GIT_AUTHOR_EMAIL="t@t",
+                        GIT_COMMITTER_NAME="t", GIT_COMMITTER_EMAIL="t@t")
+        self.git("init", "-q", "-b", "main")
+        self.write("a.txt", "a\n")
+        self.write("dir/b.txt", "b\n")
+        self.git("add", "-A")
+        self.git("commit", "-qm", "init")
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def git(self, *args, **kw) -> str:
+        return subprocess.run(["git", *args], cwd=self.repo, env=dict(self.env, **kw),
+                              check=True, capture_output=True, text=True).stdout.strip()
+
+    def write(self, rel: str, text: str) -> None:
+        path = self.repo / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+
+    def checkpoint(self, shadow: str = "1") -> str:
+        subprocess.run(["bash", "-c", f'. "{CORE}" && write_checkpoint "" test'], cwd=self.repo,
+                       env=dict(self.env, CHECKPOINT_SHADOW_INDEX=shadow), check=True)
+        return self.git("rev-parse", "refs/checkpoints/main^{tree}")
+
+    def full_scan_tree(self) -> str:
+        """The snapshot the pre-shadow algorithm builds: read-tree HEAD + add -A."""
+        index = str(self.tmp / "ref-index")
+        self.git("read-tree", "HEAD", GIT_INDEX_FILE=index)
+        self.git("add", "-A", GIT_INDEX_FILE=index)
+        tree = self.git("write-tree", GIT_INDEX_FILE=index)
+        os.unlink(index)
+        return tree
+
+    def test_matches_full_scan_across_edits(self):
+        steps = [
+            lambda: self.write("a.txt", "a2\n"),
+            lambda: self.write("new.txt", "n\n"),
+            lambda: (self.repo / "dir" / "b.txt").unlink(),
+            # an untracked file that becomes ignored must leave the snapshot
+            lambda: self.write(".gitignore", "new.txt\n"),
+            # HEAD moves: the file now tracked stays even though it is ignored
+            lambda: (self.git("add", "-f", "new.txt"), self.git("commit", "-qm", "track")),
+            lambda: self.write("new.txt", "n2\n"),
+            # a tracked ignored file that was deleted for one checkpoint comes back
+            lambda: (self.repo / "new.txt").unlink(),
+            lambda: self.write("new.txt", "n3\n"),
+            # a directory pattern ignores entries below it
+            lambda: self.write("dir/c.txt", "c\n"),
+            lambda: self.write(".gitignore", "new.txt\ndir/\n"),
+        ]
+        shadow = self.repo / ".git" / "checkpoint-shadow" / "main.index"
+        for step in steps:
+            step()
+            self.assertEqual(self.checkpoint(), self.full_scan_tree(), steps.index(step))
+            self.assertTrue(shadow.exists())
+        self.assertIn("new.txt", self.git("ls-tree", "--name-only", "refs/checkpoints/main"))
+
+    def test_head_and_real_index_untouched(self):
+        head = self.git("rev-parse", "HEAD")
+        index = (self.repo / ".git" / "index").read_bytes()
+        self.write("a.txt", "changed\n")
+        self.checkpoint()
+        self.write("c.txt", "c\n")
+        self.checkpoint()
+        self.assertEqual(self.git("rev-parse", "HEAD"), head)
+        self.assertEqual((self.repo / ".git" / "index").read_bytes(), index)
+        self.assertEqual(self.git("status", "--porcelain"), "M a.txt\n?? c.txt")
+
+    def test_disabled_keeps_no_shadow(self):
+        self.write("a.txt", "a2\n")
+        self.assertEqual(self.checkpoint(shadow="0"), self.full_scan_tree())
+        self.assertFalse((self.repo / ".git" / "checkpoint-shadow" / "main.index").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
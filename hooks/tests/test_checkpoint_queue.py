@@ -0,0 +1,178 @@
+"""Tests for the coalescing checkpoint writer (lib/checkpoint_queue.py, checkpointd.py)
+and the enqueue-only posttool-git-checkpoint.sh."""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+HOOKS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(HOOKS_DIR))
+
+from lib import checkpoint_queue  # noqa: E402
+
+HOOK = str(HOOKS_DIR / "posttool-git-checkpoint.sh")
+CHECKPOINTD = str(HOOKS_DIR / "checkpointd.py")
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class _RepoCase(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.tmp = Path(self._tmpdir.name)
+        self.state = str(self.tmp / "state")
+        (self.tmp / "logs").mkdir()
+        self.env = dict(os.environ, HOME=str(self.tmp), CHECKPOINT_LOG_DIR=str(self.tmp / "logs"),
+                        CLAUDE_CHECKPOINTD_DIR=self.state,
+                        GIT_CONFIG_GLOBAL=os.devnull, GIT_CONFIG_NOSYSTEM="1",
+                        GIT_AUTHOR_NAME="t", GIT_AUTHOR_EMAIL="t@t",
+                        GIT_COMMITTER_NAME="t", GIT_COMMITTER_EMAIL="t@t")
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def make_repo(self, name: str, dirty: int) -> str:
+        repo = self.tmp / name
+        repo.mkdir()
+        subprocess.run(["git", "init", "-q", "-b", "main"], cwd=repo, env=self.env, check=True)
+        for i in range(dirty):
+            (repo / f"f{i}.txt").write_text(f"{i}\n")
+        return str(repo)
+
+    def checkpoints(self, repo: str) -> int:
+        proc = subprocess.run(["git", "rev-list", "--count", "refs/checkpoints/main"],
+                              cwd=repo, env=self.env, capture_output=True, text=True)
+        return int(proc.stdout) if proc.returncode == 0 else 0
+
+
+class WriterTest(_RepoCase):
+    def writer(self, **kw):
+        self.clock = _Clock()
+        self.calls = []
+        return checkpoint_queue.Writer(
+            self.state, debounce=2, max_delay=10, clock=self.clock,
+            checkpoint=lambda top, trigger: self.calls.append((top, trigger)) or True, **kw)
+
+    def test_edits_coalesce_per_worktree(self):
+        a, b = self.make_repo("a", 12), self.make_repo("b", 12)
+        writer = self.writer()
+        for _ in range(5):
+            checkpoint_queue.enqueue(self.state, a, 10)
+        checkpoint_queue.enqueue(self.state, os.path.join(b, "."), 10)
+        checkpoint_queue.enqueue(self.state, b, 10)
+        self.assertEqual(writer.drain(), 7)
+        writer.flush()
+        self.assertEqual(self.calls, [])  # still inside the debounce window
+        self.clock.now += 2
+        writer.flush()
+        self.assertEqual(sorted(top for top, _ in self.calls),
+                         sorted(os.path.realpath(p) for p in (a, b)))
+        self.assertIn("5 edits coalesced", dict(self.calls)[os.path.realpath(a)])
+        self.assertFalse(os.path.exists(checkpoint_queue.spool_path(self.state)))
+
+    def test_steady_edits_flush_at_max_delay(self):
+        a = self.make_repo("a", 12)
+        writer = self.writer()
+        for _ in range(12):  # one edit per second, never quiet for 2s
+            checkpoint_queue.enqueue(self.state, a, 10)
+            writer.drain()
+            writer.flush()
+            self.clock.now += 1
+        self.assertEqual(len(self.calls), 1)
+        self.assertIn("11 edits coalesced", self.calls[0][1])
+
+    def test_threshold_gate_and_non_repos(self):
+        small = self.make_repo("small", 3)
+        writer = self.writer()
+        checkpoint_queue.enqueue(self.state, small, 10)
+        checkpoint_queue.enqueue(self.state, str(self.tmp / "logs"), 1)
+        writer.drain()
+        writer.flush(force=True)
+        self.assertEqual(self.calls, [])
+        self.assertEqual(writer.skipped, 1)
+        # the lowest threshold queued in the window wins
+        checkpoint_queue.enqueue(self.state, small, 10)
+        checkpoint_queue.enqueue(self.state, small, 3)
+        writer.drain()
+        writer.flush(force=True)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_writes_real_checkpoint(self):
+        a = self.make_repo("a", 2)
+        writer = checkpoint_queue.Writer(self.state, debounce=0)
+        checkpoint_queue.enqueue(self.state, a, 1)
+        with mock.patch.dict(os.environ, self.env):
+            writer.drain()
+            writer.flush()
+        self.assertEqual(writer.written, 1)
+        self.assertEqual(self.checkpoints(a), 1)
+
+
+class HookTest(_RepoCase):
+    def run_hook(self, repo: str, **env) -> subprocess.CompletedProcess:
+        return subprocess.run(["bash", HOOK], cwd=repo, capture_output=True, text=True,
+                              env=dict(self.env, GIT_CHECKPOINT_THRESHOLD="1",
+                                       GIT_CHECKPOINT_SILENT="1", **env), timeout=30)
+
+    def test_hook_only_enqueues_while_writer_is_alive(self):
+        repo = self.make_repo("a", 3)
+        os.makedirs(self.state)
+        Path(checkpoint_queue.pid_path(self.state)).write_text(f"{os.getpid()}\n")
+        for _ in range(3):
+            self.assertEqual(self.run_hook(repo).returncode, 0)
+        spool = Path(checkpoint_queue.spool_path(self.state)).read_text()
+        self.assertEqual(spool, f"{repo}\t1\n" * 3)
+        self.assertEqual(self.checkpoints(repo), 0)
+
+    def test_worktree_path_is_queued(self):
+        repo = self.make_repo("a", 1)
+        wt = Path(repo) / ".claude" / "worktrees" / "w1"
+        wt.mkdir(parents=True)
+        os.makedirs(self.state)
+        Path(checkpoint_queue.pid_path(self.state)).write_text(f"{os.getpid()}\n")
+        self.run_hook(repo, TOOL_INPUT=f'{{"file_path": "{wt}/src/x.py"}}')
+        self.assertEqual(Path(checkpoint_queue.spool_path(self.state)).read_text(),
+                         f"{wt}/\t1\n")
+
+    def test_hook_starts_writer_which_checkpoints_once(self):
+        repo = self.make_repo("a", 3)
+        env = dict(CLAUDE_CHECKPOINTD_DEBOUNCE_SECS="0.5", CLAUDE_CHECKPOINTD_IDLE_SECS="1")
+        try:
+            for _ in range(4):
+                self.assertEqual(self.run_hook(repo, **env).returncode, 0)
+            deadline = time.time() + 20
+            while time.time() < deadline and not self.checkpoints(repo):
+                time.sleep(0.1)
+            self.assertEqual(self.checkpoints(repo), 1)
+            while time.time() < deadline and os.path.exists(checkpoint_queue.pid_path(self.state)):
+                time.sleep(0.1)
+            self.assertFalse(os.path.exists(checkpoint_queue.pid_path(self.state)))
+            self.assertEqual(self.checkpoints(repo), 1)
+        finally:
+            subprocess.run([sys.executable, CHECKPOINTD, "--state-dir", self.state, "stop"],
+                           env=self.env)
+
+    def test_sync_mode_checkpoints_inline(self):
+        repo = self.make_repo("a", 3)
+        (self.tmp / ".claude").mkdir()
+        (self.tmp / ".claude" / "hooks").symlink_to(HOOKS_DIR)
+        self.assertEqual(self.run_hook(repo, GIT_CHECKPOINT_ASYNC="0").returncode, 0)
+        self.assertEqual(self.checkpoints(repo), 1)
+        self.assertFalse(os.path.exists(self.state))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+"""Tests for doc_sync's description cache and header-only reads (doc_sync/extract.py)."""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+HOOKS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(HOOKS_DIR))
+
+from doc_sync import extract  # noqa: E402
+from doc_sync.regen_index import regen_index  # noqa: E402
+from doc_sync.regen_readme import regen_readme  # noqa: E402
+
+
+def _settle(*paths):
+    """Age mtimes past the racy window so their descriptions are cacheable."""
+    past = time.time() - 10
+    for p in paths:
+        os.utime(p, (past, past))
+
+
+class _Case(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.tmp = Path(self._tmpdir.name)
+        self.cache_file = self.tmp / "desc-cache.json"
+        patcher = mock.patch.dict(os.environ, {"CLAUDE_DOC_SYNC_DESC_CACHE": str(self.cache_file)})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.reset()
+
+    def tearDown(self):
+        self.reset()
+        self._tmpdir.cleanup()
+
+    def reset(self):
+        """Drop the in-memory cache, as a fresh hook process would start."""
+        extract._cache = None
+        extract._fresh.clear()
+        extract._dirty = False
+
+    def count_reads(self):
+        calls = []
+        real = extract._read_text
+
+        def counting(path, limit=None):
+            calls.append((path.name, limit))
+            return real(path, limit)
+        return calls, mock.patch.object(extract, "_read_text", counting)
+
+
+class DescriptionCacheTest(_Case):
+    def test_one_edit_rereads_one_file(self):
+        d = self.tmp / "scripts"
+        d.mkdir()
+        files = []
+        for i in range(50):
+            f = d / f"tool-{i}.py"
+            f.write_text(f'"""Tool number {i}."""\n')
+            files.append(f)
+        _settle(*files)
+        calls, patch = self.count_reads()
+        with patch:
+            regen_index(d)
+            regen_readme(d)
+        self.assertEqual(len(calls), 50)  # INDEX and README share one read per file
+        extract.save_cache()
+        self.reset()
+
+        files[7].write_text('"""Edited tool."""\n')
+        extract.invalidate(files[7])
+        calls.clear()
+        with patch:
+            regen_index(d)
+            regen_readme(d)
+        self.assertEqual([name for name, _ in calls], ["tool-7.py"])
+        self.assertIn("`tool-7.py` - Edited tool", (d / "INDEX.md").read_text())
+        self.assertIn("`tool-3.py` - Tool number 3", (d / "README.md").read_text())
+
+    def test_racy_files_are_not_cached(self):
+        f = self.tmp / "fresh.md"
+        f.write_text("# Fresh\n")
+        self.assertEqual(extract.extract_description(f), "Fresh")
+        self.assertNotIn(str(f), extract._entries())
+        _settle(f)
+        extract.extract_description(f)
+        extract.save_cache()
+        self.assertEqual(json.loads(self.cache_file.read_text())[str(f)][2], "Fresh")
+
+    def test_header_read_matches_full_read(self):
+        filler = "x = 1\n" * 3000  # ~18 KB, past HEAD_BYTES
+        cases = {
+            "early.py": ('"""Early docstring."""\n' + filler, "Early docstring."),
+            "late.py": (filler + '"""Late docstring."""\n', "Late docstring."),
+            "long-fm.md": ("---\n" + "k: v\n" * 3000 + "description: Deep\n---\n", "Deep"),
+            "late-title.md": ("text\n" * 3000 + "# Late title\n", "Late title"),
+            "cfg.json": ("{}", "json config"),
+        }
+        for name, (text, want) in cases.items():
+            (self.tmp / name).write_text(text)
+        calls, patch = self.count_reads()
+        with patch:
+            for name, (_, want) in cases.items():
+                self.assertEqual(extract.extract_description(self.tmp / name), want, name)
+        self.assertEqual(calls.count(("early.py", extract.HEAD_BYTES)), 1)
+        self.assertNotIn(("early.py", None), calls)
+        for name in ("late.py", "long-fm.md", "late-title.md"):
+            self.assertIn((name, None), calls)
+        self.assertNotIn("cfg.json", [name for name, _ in calls])
+
+    def test_hook_persists_cache_across_runs(self):
+        project = self.tmp / "project"
+        d = project / ".claude" / "scripts"
+        d.mkdir(parents=True)
+        a, b = d / "a.sh", d / "b.sh"
+        a.write_text("#!/bin/bash\n# Alpha tool\n")
+        b.write_text("#!/bin/bash\n# Beta tool\n")
+        _settle(a, b)
+        env = dict(os.environ, HOME=str(self.tmp / "home"), CLAUDE_PROJECT_DIR=str(project),
+                   CLAUDE_DOC_SYNC_DEFER="0")
+        proc = subprocess.run([sys.executable, str(HOOKS_DIR / "posttool-doc-sync.py")],
+                              input=json.dumps({"tool_input": {"file_path": str(a)}}),
+                              capture_output=True, text=True, env=env, cwd=str(HOOKS_DIR),
+                              timeout=30)
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+        self.assertIn("`b.sh` - Beta tool", (d / "INDEX.md").read_text())
+        self.assertEqual(set(json.loads(self.cache_file.read_text())), {str(a), str(b)})
+
+
+if __name__ == "__main__":
+    unittest.main()
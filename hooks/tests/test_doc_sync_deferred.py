@@ -0,0 +1,162 @@
+"""Tests for deferred doc-sync: the per-session journal (doc_sync/deferred.py),
+main.flush_pending, stop-doc-sync-flush.py and the skip-unchanged writes."""
+
+from __future__ import annotations
+
+import importlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+HOOKS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(HOOKS_DIR))
+
+from doc_sync import deferred, extract  # noqa: E402
+from doc_sync.regen_index import regen_index  # noqa: E402
+from doc_sync.regen_readme import regen_readme  # noqa: E402
+
+doc_main = importlib.import_module("doc_sync.main")  # the package re-exports main()
+
+
+class _Case(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.tmp = Path(self._tmpdir.name)
+        self.journal = self.tmp / "journal"
+        self.env = {"HOME": str(self.tmp / "home"),
+                    "CLAUDE_DOC_SYNC_JOURNAL_DIR": str(self.journal),
+                    "CLAUDE_DOC_SYNC_DESC_CACHE": str(self.tmp / "desc.json")}
+        patcher = mock.patch.dict(os.environ, self.env)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        extract._cache = None
+        extract._fresh.clear()
+        self.project = self.tmp / "project"
+        self.scripts = self.project / ".claude" / "scripts"
+        self.scripts.mkdir(parents=True)
+
+    def tearDown(self):
+        extract._cache = None
+        extract._fresh.clear()
+        self._tmpdir.cleanup()
+
+    def run_hook(self, name: str, payload: dict, **env) -> subprocess.CompletedProcess:
+        return subprocess.run([sys.executable, str(HOOKS_DIR / name)], input=json.dumps(payload),
+                              capture_output=True, text=True, cwd=str(HOOKS_DIR), timeout=30,
+                              env=dict(os.environ, CLAUDE_PROJECT_DIR=str(self.project), **env))
+
+    def edit(self, name: str, text: str = "#!/bin/bash\n# A tool\n") -> dict:
+        path = self.scripts / name
+        path.write_text(text)
+        return {"session_id": "s-1", "tool_input": {"file_path": str(path)}}
+
+
+class DeferredHookTest(_Case):
+    def test_edits_are_journalled_and_flushed_once_at_stop(self):
+        for i in range(5):
+            self.assertEqual(self.run_hook("posttool-doc-sync.py", self.edit(f"t{i}.sh")).returncode, 0)
+        self.assertFalse((self.scripts / "INDEX.md").exists())
+        self.assertTrue(deferred.pending("s-1"))
+        self.assertFalse(deferred.pending("s-2"))
+
+        proc = self.run_hook("stop-doc-sync-flush.py", {"session_id": "s-1"})
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+        index = (self.scripts / "INDEX.md").read_text()
+        self.assertEqual([f"t{i}.sh" in index for i in range(5)], [True] * 5)
+        self.assertTrue((self.scripts / "README.md").exists())
+        self.assertFalse(deferred.pending("s-1"))
+
+    def test_stop_checkpoint_includes_the_flushed_docs(self):
+        home_hooks = self.tmp / "home" / ".claude" / "hooks"
+        (home_hooks.parent / "logs").mkdir(parents=True)
+        home_hooks.symlink_to(HOOKS_DIR)
+        for args in (["init", "-q"], ["config", "user.email", "t@example.com"],
+                     ["config", "user.name", "t"], ["commit", "-q", "--allow-empty", "-m", "init"]):
+            subprocess.run(["git", *args], cwd=self.project, check=True, capture_output=True)
+        self.assertEqual(self.run_hook("posttool-doc-sync.py", self.edit("a.sh")).returncode, 0)
+
+        proc = subprocess.run(["bash", str(HOOKS_DIR / "auto-commit.sh")],
+                              input=json.dumps({"session_id": "s-1"}), capture_output=True,
+                              text=True, cwd=self.project, timeout=60,
+                              env=dict(os.environ, CLAUDE_PROJECT_DIR=str(self.project)))
+        self.assertEqual(proc.returncode, 0, proc.stdout + proc.stderr)
+        branch = subprocess.run(["git", "branch", "--show-current"], cwd=self.project,
+                                capture_output=True, text=True).stdout.strip()
+        tree = subprocess.run(["git", "ls-tree", "-r", "--name-only", f"refs/checkpoints/{branch}"],
+                              cwd=self.project, capture_output=True, text=True).stdout.split()
+        self.assertIn(".claude/scripts/INDEX.md", tree)
+        self.assertIn(".claude/scripts/README.md", tree)
+        self.assertFalse(deferred.pending("s-1"))
+
+    def test_sync_mode_regenerates_on_every_edit(self):
+        proc = self.run_hook("posttool-doc-sync.py", self.edit("a.sh"), CLAUDE_DOC_SYNC_DEFER="0")
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+        self.assertTrue((self.scripts / "INDEX.md").exists())
+        self.assertFalse(deferred.pending("s-1"))
+
+    def test_userprompt_hook_flushes_an_interrupted_turn(self):
+        self.run_hook("posttool-doc-sync.py", self.edit("a.sh"))
+        proc = self.run_hook("userprompt-doc-sync-check.py", {"session_id": "s-1", "prompt": "hi"})
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+        self.assertIn("`a.sh` - A tool", (self.scripts / "INDEX.md").read_text())
+        self.assertFalse(deferred.pending("s-1"))
+
+
+class FlushTest(_Case):
+    def test_union_of_dirty_dirs_is_regenerated_once_each(self):
+        other = self.project / ".claude" / "agents"
+        other.mkdir()
+        for _ in range(3):
+            deferred.record("s-1", self.scripts, self.project)
+            deferred.record("s-1", other, self.project)
+        deferred.record("s-1", self.project / "gone", self.project)
+        calls = []
+        with mock.patch.object(doc_main, "regen_index", calls.append), \
+                mock.patch.object(doc_main, "regen_readme", lambda d: None), \
+                mock.patch.object(doc_main, "patch_claude_md") as patch_md:
+            done = doc_main.flush_pending("s-1")
+        self.assertEqual(sorted(calls), sorted([self.scripts, other]))
+        self.assertEqual(sorted(done), sorted([self.scripts, other]))
+        patch_md.assert_called_once_with(self.project)
+        self.assertEqual(doc_main.flush_pending("s-1"), [])
+
+    def test_failed_flush_keeps_its_claim_for_the_next_one(self):
+        deferred.record("s-1", self.scripts, self.project)
+        with mock.patch.object(doc_main, "regen_targets", side_effect=RuntimeError("boom")):
+            with self.assertRaises(RuntimeError):
+                doc_main.flush_pending("s-1")
+        deferred.record("s-1", self.project, self.project)
+        self.assertTrue(deferred.pending("s-1"))
+        with deferred.claimed("s-1") as entries:
+            self.assertEqual(entries, [(self.scripts, self.project)])
+        with deferred.claimed("s-1") as entries:
+            self.assertEqual(entries, [(self.project, self.project)])
+        self.assertFalse(deferred.pending("s-1"))
+
+
+class UnchangedWriteTest(_Case):
+    def test_regen_leaves_unchanged_files_untouched(self):
+        (self.scripts / "a.sh").write_text("#!/bin/bash\n# A tool\n")
+        for _ in range(2):  # the first run's INDEX/README shift the detected convention
+            regen_index(self.scripts)
+            regen_readme(self.scripts)
+        past = time.time() - 100
+        for name in ("INDEX.md", "README.md"):
+            os.utime(self.scripts / name, (past, past))
+        regen_index(self.scripts)
+        regen_readme(self.scripts)
+        for name in ("INDEX.md", "README.md"):
+            self.assertAlmostEqual((self.scripts / name).stat().st_mtime, past, delta=1)
+        (self.scripts / "b.sh").write_text("#!/bin/bash\n# B tool\n")
+        regen_index(self.scripts)
+        self.assertIn("`b.sh` - B tool", (self.scripts / "INDEX.md").read_text())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,170 @@
+"""Tests for the runtime_guard verdict cache (lib/guard_cache.py).
+
+Every test runs against an isolated data file, monorepo and cache file; the
+cached answer must always equal a fresh runtime_guard.evaluate().
+"""
+
+from __future__ import annotations
+
+import importlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+HOOKS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(HOOKS_DIR))
+
+CONFIG = {
+    "schema_version": 1,
+    "protected_cmds": ["acme-cli"],
+    "protected_launch_paths": ["**/packages/acme-cli/dist/index.mjs"],
+    "protected_services": ["acme-daemon"],
+    "protected_hotfiles": ["**/packages/acme-cli/dist/index.mjs"],
+    "protected_statefiles": [],
+    "protected_endpoint_paths": [],
+    "protected_proc_idents": ["acme-daemon"],
+    "protected_global_bins": [],
+    "protected_build_workspaces": ["acme"],
+    "protected_build_paths": ["**/packages/acme-cli"],
+    "script_run_policy": "default_deny",
+    "protected_script_workspaces": ["acme"],
+    "protected_script_paths": ["**/packages/acme-cli"],
+    "non_protected_workspaces": ["acme-web"],
+    "safe_script_allowlist": [],
+}
+
+
+class GuardCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        tmp = Path(self._tmpdir.name)
+        self.repo = tmp / "repo"
+        (self.repo / "packages" / "acme-cli").mkdir(parents=True)
+        (self.repo / "packages" / "acme-cli" / "package.json").write_text(
+            json.dumps({"name": "acme", "scripts": {"build": "x"}}))
+        (self.repo / "package.json").write_text(json.dumps({"name": "root", "scripts": {}}))
+        self.datafile = tmp / "protected-runtime.json"
+        self._write_config(CONFIG)
+        self.cache_file = str(tmp / "verdicts.json")
+        self._env = {k: os.environ.get(k) for k in (
+            "CLAUDE_PROTECTED_RUNTIME_FILE", "CLAUDE_GUARD_CACHE_FILE", "CLAUDE_GUARD_CACHE")}
+        os.environ["CLAUDE_PROTECTED_RUNTIME_FILE"] = str(self.datafile)
+        os.environ["CLAUDE_GUARD_CACHE_FILE"] = self.cache_file
+        os.environ.pop("CLAUDE_GUARD_CACHE", None)
+        import lib.guard_cache
+        import lib.runtime_guard
+        self.rg = importlib.reload(lib.runtime_guard)
+        self.gc = importlib.reload(lib.guard_cache)
+
+    def tearDown(self):
+        for k, v in self._env.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+        self._tmpdir.cleanup()
+
+    def _write_config(self, cfg):
+        cfg = dict(cfg, protected_root_manifest_paths=[str(self.repo)])
+        self.datafile.write_text(json.dumps(cfg))
+
+    def _eval(self, command):
+        cached = self.gc.cached_evaluate(command, str(self.repo))
+        self.assertEqual(cached, self.rg.evaluate(command, str(self.repo)))
+        return cached
+
+    def _stats(self):
+        return self.gc.VerdictCache().stats()
+
+
+class TestHitsAndMisses(GuardCacheTestCase):
+    def test_repeat_is_a_hit_with_identical_verdict(self):
+        first = self._eval("git status")
+        second = self._eval("git status")
+        self.assertEqual(first, ("ALLOW", None, None))
+        self.assertEqual(second, first)
+        stats = self._stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["entries"]), (1, 1, 1))
+
+    def test_block_verdict_round_trips_with_reason(self):
+        first = self._eval("systemctl restart acme-daemon")
+        self.assertEqual(first[0], "BLOCK")
+        self.assertEqual(self._eval("systemctl restart acme-daemon"), first)
+        self.assertEqual(self._stats()["hits"], 1)
+
+    def test_cwd_is_part_of_the_key(self):
+        self.gc.cached_evaluate("yarn build", str(self.repo))
+        self.gc.cached_evaluate("yarn build", str(self.repo / "packages"))
+        self.assertEqual(self._stats()["entries"], 2)
+
+    def test_lru_is_bounded(self):
+        cache = self.gc.VerdictCache(max_entries=2)
+        for cmd in ("ls", "pwd", "date"):
+            self.gc.cached_evaluate(cmd, str(self.repo), cache=cache)
+        self.assertEqual(len(cache.entries), 2)
+        key_ls = self.gc.cache_key("ls", str(self.repo), self.gc.config_digest())
+        self.assertNotIn(key_ls, cache.entries)
+
+    def test_disabled_writes_nothing(self):
+        os.environ["CLAUDE_GUARD_CACHE"] = "0"
+        self._eval("git status")
+        self.assertFalse(os.path.exists(self.cache_file))
+
+
+class TestInvalidation(GuardCacheTestCase):
+    def test_config_change_invalidates(self):
+        self.assertEqual(self._eval("systemctl restart other-daemon")[0], "ALLOW")
+        self._write_config(dict(CONFIG, protected_services=["other-daemon"]))
+        self.assertEqual(self._eval("systemctl restart other-daemon")[0], "BLOCK")
+        self.assertEqual(self._stats()["hits"], 0)
+
+    def test_new_workspace_manifest_invalidates(self):
+        cmd = "yarn workspace acme-web build"
+        self.assertEqual(self._eval(cmd)[0], "BLOCK")  # unresolvable selector
+        web = self.repo / "packages" / "acme-web"
+        web.mkdir()
+        (web / "package.json").write_text(json.dumps({"name": "acme-web",
+                                                      "scripts": {"build": "x"}}))
+        self.assertEqual(self._eval(cmd)[0], "ALLOW")
+        self.assertEqual(self._stats()["stale"], 1)
+
+    def test_missing_config_is_never_cached(self):
+        self.datafile.unlink()
+        self.assertEqual(self._eval("kill 1")[0], "BLOCK")
+        self.assertFalse(os.path.exists(self.cache_file))
+
+
+class TestSelfProtection(GuardCacheTestCase):
+    def test_writes_to_the_cache_file_are_blocked(self):
+        self.assertEqual(self.rg.VERDICT_CACHE_PATH, self.gc.cache_path())
+        for cmd in (f"echo '{{}}' > {self.cache_file}",
+                    f"cp /tmp/forged.json {self.cache_file}"):
+            v = self.rg.evaluate(cmd, str(self.repo))
+            self.assertEqual(v[:1], ("BLOCK",), cmd)
+            self.assertEqual(v[1], "STEP0")
+
+
+class TestCli(GuardCacheTestCase):
+    def test_cli_matches_engine_cli_and_reports_stats(self):
+        payload = json.dumps({"tool_name": "Bash", "tool_input": {
+            "command": "systemctl restart acme-daemon", "cwd": str(self.repo)}})
+        engine = subprocess.run(
+            [sys.executable, str(HOOKS_DIR / "lib" / "runtime_guard.py")],
+            input=payload, text=True, capture_output=True, timeout=30)
+        for _ in range(2):
+            cached = subprocess.run(
+                [sys.executable, str(HOOKS_DIR / "lib" / "guard_cache.py")],
+                input=payload, text=True, capture_output=True, timeout=30)
+            self.assertEqual((cached.stdout, cached.stderr), (engine.stdout, engine.stderr))
+        stats = subprocess.run(
+            [sys.executable, str(HOOKS_DIR / "lib" / "guard_cache.py"), "--stats"],
+            text=True, capture_output=True, timeout=30)
+        self.assertEqual(json.loads(stats.stdout)["hits"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
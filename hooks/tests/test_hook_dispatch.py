@@ -0,0 +1,285 @@
+"""Tests for the in-process hook dispatcher (lib/hook_dispatch.py, dispatch.py)."""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+HOOKS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(HOOKS_DIR))
+
+from lib import hook_dispatch  # noqa: E402
+from lib.hook_dispatch import HookEntry, HookResult  # noqa: E402
+
+DISPATCH = str(HOOKS_DIR / "dispatch.py")
+
+
+def _py(name: str) -> dict:
+    return {"type": "command", "command": f'python3 "{HOOKS_DIR / name}"'}
+
+
+TABLE = {
+    "PreToolUse": [
+        {"hooks": [_py("pretool-orchestrator-gate.py")]},
+        {"matcher": "Bash", "hooks": [_py("pretool-bash-views-guard.py"),
+                                      _py("pretool-tool-policy.py")]},
+        {"matcher": "Write|Edit", "hooks": [_py("pretool-quality-gate.py")]},
+        {"matcher": "Bash", "hooks": [
+            {"type": "command", "command": "printf 'shell-ran\\n' >&2; exit 0"},
+            {"type": "command", "command": f'python3 "{DISPATCH}" PreToolUse'},
+        ]},
+    ],
+}
+
+
+def _result(status, stdout="", stderr=""):
+    entry = HookEntry("cmd", "", 60, None)
+    return HookResult(entry, status, stdout, stderr, 0.0)
+
+
+class TestSelectHooks(unittest.TestCase):
+    def test_bash_selects_star_and_bash_blocks_in_order(self):
+        names = [e.name for e in hook_dispatch.select_hooks(
+            TABLE, "PreToolUse", {"tool_name": "Bash"})]
+        self.assertEqual(names[:3], ["pretool-orchestrator-gate.py",
+                                     "pretool-bash-views-guard.py",
+                                     "pretool-tool-policy.py"])
+        self.assertNotIn("pretool-quality-gate.py", names)
+        self.assertFalse(any("dispatch.py" in n for n in names))
+
+    def test_alternation_matcher_is_full_match(self):
+        names = [e.name for e in hook_dispatch.select_hooks(
+            TABLE, "PreToolUse", {"tool_name": "Edit"})]
+        self.assertIn("pretool-quality-gate.py", names)
+        self.assertFalse(hook_dispatch.matcher_applies("Write|Edit", "EditX"))
+
+    def test_explicit_matcher_selects_one_block_kind(self):
+        names = [e.name for e in hook_dispatch.select_hooks(
+            TABLE, "PreToolUse", {"tool_name": "Bash"}, matcher="Write|Edit")]
+        self.assertEqual(names, ["pretool-quality-gate.py"])
+
+    def test_python_hooks_run_in_process_shell_does_not(self):
+        entries = hook_dispatch.select_hooks(TABLE, "PreToolUse", {"tool_name": "Bash"})
+        self.assertTrue(entries[0].script)
+        self.assertIsNone(entries[-1].script)
+
+
+class TestAggregate(unittest.TestCase):
+    def test_block_wins_and_only_blocking_stderr_is_reported(self):
+        status, out, err = hook_dispatch.aggregate([
+            _result(0, stderr="noise\n"), _result(2, stderr="BLOCKED: x\n")])
+        self.assertEqual((status, out, err), (2, "", "BLOCKED: x\n"))
+
+    def test_non_blocking_error_is_exit_1(self):
+        status, _, err = hook_dispatch.aggregate([_result(0), _result(1, stderr="oops\n")])
+        self.assertEqual(status, 1)
+        self.assertIn("oops", err)
+
+    def test_json_decisions_merge_most_restrictive(self):
+        allow = {"hookSpecificOutput": {"hookEventName": "PreToolUse",
+                                        "permissionDecision": "allow",
+                                        "permissionDecisionReason": "ok"}}
+        deny = {"hookSpecificOutput": {"hookEventName": "PreToolUse",
+                                       "permissionDecision": "deny",
+                                       "permissionDecisionReason": "no",
+                                       "updatedInput": {"command": "true"}}}
+        status, out, _ = hook_dispatch.aggregate([
+            _result(0, json.dumps(allow)), _result(0, json.dumps(deny))])
+        merged = json.loads(out)["hookSpecificOutput"]
+        self.assertEqual(status, 0)
+        self.assertEqual(merged["permissionDecision"], "deny")
+        self.assertEqual(merged["permissionDecisionReason"], "no")
+        self.assertEqual(merged["updatedInput"], {"command": "true"})
+
+    def test_deny_next_to_a_crash_still_blocks(self):
+        deny = {"hookSpecificOutput": {"hookEventName": "PreToolUse",
+                                       "permissionDecision": "deny",
+                                       "permissionDecisionReason": "no secrets"}}
+        status, out, err = hook_dispatch.aggregate([
+            _result(1, stderr="Traceback: boom\n"), _result(0, json.dumps(deny))])
+        self.assertEqual((status, out), (2, ""))
+        self.assertTrue(err.startswith("no secrets\n"))
+        self.assertIn("boom", err)
+        status, _, err = hook_dispatch.aggregate([
+            _result(1), _result(0, json.dumps({"decision": "block", "reason": "stop"}))])
+        self.assertEqual((status, err), (2, "stop\n"))
+
+    def test_other_json_next_to_a_crash_is_kept_with_exit_0(self):
+        ask = {"hookSpecificOutput": {"hookEventName": "PreToolUse",
+                                      "permissionDecision": "ask"}}
+        status, out, _ = hook_dispatch.aggregate([
+            _result(1, stderr="boom\n"), _result(0, json.dumps(ask))])
+        merged = json.loads(out)
+        self.assertEqual(status, 0)
+        self.assertEqual(merged["hookSpecificOutput"]["permissionDecision"], "ask")
+        self.assertEqual(merged["systemMessage"], "boom")
+
+    def test_plain_text_joins_json_context_for_context_events(self):
+        ctx = {"hookSpecificOutput": {"hookEventName": "UserPromptSubmit",
+                                      "additionalContext": "from json"}}
+        results = [_result(0, "plain note\n"), _result(0, json.dumps(ctx))]
+        _, out, _ = hook_dispatch.aggregate(results, "UserPromptSubmit")
+        self.assertEqual(json.loads(out)["hookSpecificOutput"]["additionalContext"],
+                         "from json\nplain note")
+        _, out, _ = hook_dispatch.aggregate(
+            [_result(0, "started\n"), _result(0, json.dumps({"suppressOutput": True}))],
+            "SessionStart")
+        self.assertEqual(json.loads(out)["hookSpecificOutput"],
+                         {"hookEventName": "SessionStart", "additionalContext": "started"})
+        _, out, _ = hook_dispatch.aggregate(results, "PreToolUse")
+        self.assertNotIn("plain note", out)
+
+
+class TestRunHooks(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.slow = Path(self._tmpdir.name) / "slow-hook.py"
+        self.slow.write_text("import sys, time\nprint('late')\ntime.sleep(3)\nsys.exit(2)\n")
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def _assert_timed_out(self, result, started):
+        self.assertEqual((result.status, result.stdout, result.stderr),
+                         (1, "", "slow-hook.py: timed out after 1s\n"))
+        self.assertTrue(result.timed_out)
+        self.assertLess(time.monotonic() - started, 2.5)
+
+    def test_main_thread_hook_is_interrupted_at_its_timeout(self):
+        entry = HookEntry("cmd", "", 1, str(self.slow))
+        started = time.monotonic()
+        (result,) = hook_dispatch.run_hooks([entry], "{}")
+        self._assert_timed_out(result, started)
+
+    def test_pooled_hook_is_abandoned_at_its_timeout(self):
+        entry = HookEntry("cmd", "", 1, str(self.slow))
+        started = time.monotonic()
+        with mock.patch.object(hook_dispatch, "READ_ONLY_HOOKS", {"slow-hook.py"}):
+            (result,) = hook_dispatch.run_hooks([entry], "{}", parallel=True)
+        self._assert_timed_out(result, started)
+
+    def test_only_parallel_runs_preload_lib(self):
+        entry = HookEntry("cmd", "", 60, str(HOOKS_DIR / "pretool-bash-views-guard.py"))
+        with mock.patch.object(hook_dispatch.hook_server, "preload_lib") as preload:
+            hook_dispatch.run_hooks([entry], "{}")
+            preload.assert_not_called()
+            hook_dispatch.run_hooks([entry], "{}", parallel=True)
+            preload.assert_called_once()
+
+
+# Runs a hook as __main__ and reports every file it opens for writing, every
+# filesystem mutation and every signal handler it installs.
+_AUDIT = r'''
+import json, os, runpy, signal, sys
+report = open(os.environ["RO_AUDIT_OUT"], "w")
+hook = sys.argv[1]
+sys.argv = [hook]
+events = []
+WRITE = os.O_WRONLY | os.O_RDWR | os.O_CREAT | os.O_APPEND | os.O_TRUNC
+MUTATE = {"os.rename", "os.remove", "os.mkdir", "os.rmdir", "os.symlink", "os.link",
+          "os.truncate", "os.chmod", "os.utime", "shutil.rmtree", "shutil.move"}
+def audit(ev, args):
+    if ev == "open":
+        path, mode, flags = args
+        if (isinstance(mode, str) and any(c in mode for c in "wax+")) or \
+                (isinstance(flags, int) and flags & WRITE):
+            events.append(["open-write", str(path)])
+    elif ev in MUTATE:
+        events.append([ev, str(args[0])])
+    elif ev == "signal.signal":
+        events.append([ev, int(args[0])])
+sys.addaudithook(audit)
+_signal = signal.signal
+def tracked(num, handler):
+    events.append(["signal.signal", int(num)])
+    return _signal(num, handler)
+signal.signal = tracked
+try:
+    runpy.run_path(hook, run_name="__main__")
+except SystemExit:
+    pass
+finally:
+    report.write(json.dumps(events))
+    report.close()
+'''
+
+
+class TestReadOnlyHooks(unittest.TestCase):
+    """READ_ONLY_HOOKS run on worker threads: prove they never write."""
+
+    def test_read_only_hooks_never_write_or_install_signals(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            home, proj = Path(tmp) / "home", Path(tmp) / "proj"
+            (proj / ".claude").mkdir(parents=True)
+            home.mkdir()
+            subprocess.run(["git", "init", "-q", str(proj)], check=True)
+            env = dict(os.environ, HOME=str(home), CLAUDE_PROJECT_DIR=str(proj),
+                       RO_AUDIT_OUT=str(Path(tmp) / "audit.json"))
+            inputs = {
+                "Bash": {"command": "git commit -am wip && rm -rf build"},
+                "Write": {"file_path": str(proj / "src" / "a.py"), "content": "x = 1\n"},
+                "Edit": {"file_path": str(proj / "a.py"), "old_string": "a", "new_string": "b"},
+                "TodoWrite": {"todos": [{"content": "a", "status": "pending",
+                                         "activeForm": "a"}]},
+                "Agent": {"subagent_type": "dev", "prompt": "do x", "description": "d"},
+            }
+            for hook in sorted(hook_dispatch.READ_ONLY_HOOKS):
+                for tool, tool_input in inputs.items():
+                    for agent in ({}, {"agent_id": "sub-1"}):
+                        payload = dict(agent, tool_name=tool, session_id="ro-1",
+                                       cwd=str(proj), tool_input=tool_input)
+                        subprocess.run(
+                            [sys.executable, "-c", _AUDIT, str(HOOKS_DIR / hook)],
+                            input=json.dumps(payload), text=True, capture_output=True,
+                            env=env, cwd=str(proj), timeout=60)
+                        events = json.loads((Path(tmp) / "audit.json").read_text())
+                        with self.subTest(hook=hook, tool=tool, **agent):
+                            self.assertEqual(events, [])
+
+
+class TestDispatchEndToEnd(unittest.TestCase):
+    def _run(self, payload, *extra):
+        table_path = Path(self._tmp) / "table.json"
+        table_path.write_text(json.dumps({"hooks": TABLE}))
+        return subprocess.run(
+            [sys.executable, DISPATCH, "PreToolUse", "--table", str(table_path), *extra],
+            input=json.dumps(payload), text=True, capture_output=True, timeout=60,
+        )
+
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self._tmp = self._tmpdir.name
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def test_block_matches_standalone_hook(self):
+        payload = {"tool_name": "EnterPlanMode", "session_id": "dispatch-t1"}
+        cold = subprocess.run(
+            [sys.executable, str(HOOKS_DIR / "pretool-orchestrator-gate.py")],
+            input=json.dumps(payload), text=True, capture_output=True, timeout=30)
+        warm = self._run(payload)
+        self.assertEqual(cold.returncode, 2)
+        self.assertEqual(warm.returncode, 2)
+        self.assertEqual(warm.stderr, cold.stderr)
+
+    def test_serial_and_parallel_agree(self):
+        payload = {"tool_name": "Bash", "agent_id": "sub-1",
+                   "tool_input": {"command": "ls -la"}}
+        serial = self._run(payload)
+        parallel = self._run(payload, "--parallel")
+        self.assertEqual(serial.returncode, 0, serial.stderr)
+        self.assertEqual((serial.returncode, serial.stdout),
+                         (parallel.returncode, parallel.stdout))
+        self.assertIn("shell-ran", serial.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,211 @@
+"""Tests for the warm hook daemon (lib/hook_server.py, hookd.py, hookd-client.py).
+
+The daemon is started on an isolated socket in a tmp dir; every assertion
+compares a daemon-served hook run against the same hook run cold.
+"""
+
+from __future__ import annotations
+
+import ast
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+HOOKS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(HOOKS_DIR))
+
+from lib import hook_server  # noqa: E402
+
+CLIENT = str(HOOKS_DIR / "hookd-client.py")
+HOOKD = str(HOOKS_DIR / "hookd.py")
+GATE = "pretool-orchestrator-gate.py"
+
+
+class TestWireFormat(unittest.TestCase):
+    def test_roundtrip(self):
+        env = {"CLAUDE_PROJECT_DIR": "/x", "EMPTY": "", "EQ": "a=b"}
+        msg = hook_server.encode_request("/h/hook.py", "/cwd", ["a", "b c"], env)
+        header = hook_server.decode_request(msg[4:])
+        self.assertEqual(header["hook"], "/h/hook.py")
+        self.assertEqual(header["cwd"], "/cwd")
+        self.assertEqual(header["argv"], ["a", "b c"])
+        self.assertEqual(header["env"], env)
+
+    def test_bad_magic_rejected(self):
+        with self.assertRaises(ValueError):
+            hook_server.decode_request(b"NOPE\0a\0b\x000")
+
+
+class TestResolveHookPath(unittest.TestCase):
+    def test_in_tree_hook_resolves(self):
+        self.assertEqual(
+            hook_server.resolve_hook_path(GATE), str(HOOKS_DIR / GATE)
+        )
+
+    def test_out_of_tree_rejected(self):
+        self.assertIsNone(hook_server.resolve_hook_path("../tests/__init__.py"))
+        self.assertIsNone(hook_server.resolve_hook_path("/etc/passwd"))
+        self.assertIsNone(hook_server.resolve_hook_path("pretool-bash-safety.sh"))
+
+
+def _module_level_env_reads(path: Path) -> set:
+    """Env var names a module reads while it is imported (not inside functions
+    or the ``if __name__ == "__main__"`` block)."""
+    found = set()
+
+    def visit(node):
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            for d in node.decorator_list + node.args.defaults + node.args.kw_defaults:
+                if d is not None:
+                    visit(d)
+            return
+        if isinstance(node, ast.Lambda):
+            return
+        if isinstance(node, ast.If) and "__main__" in ast.unparse(node.test):
+            return
+        if isinstance(node, ast.Call):
+            func = ast.unparse(node.func)
+            if func in ("os.environ.get", "os.getenv") and node.args \
+                    and isinstance(node.args[0], ast.Constant):
+                found.add(node.args[0].value)
+            if func in ("Path.home", "os.path.expanduser"):
+                found.add("HOME")
+        if isinstance(node, ast.Subscript) and ast.unparse(node.value) == "os.environ" \
+                and isinstance(node.slice, ast.Constant):
+            found.add(node.slice.value)
+        for child in ast.iter_child_nodes(node):
+            visit(child)
+
+    visit(ast.parse(path.read_text()))
+    return found
+
+
+class TestImportTimeEnv(unittest.TestCase):
+    def test_every_import_time_env_read_is_keyed(self):
+        for path in sorted((HOOKS_DIR / "lib").glob("*.py")):
+            with self.subTest(module=path.name):
+                missing = _module_level_env_reads(path) - set(hook_server.IMPORT_TIME_ENV)
+                self.assertEqual(missing, set())
+
+
+def _load_client():
+    spec = importlib.util.spec_from_file_location("hookd_client", CLIENT)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+class TestConcurrentStart(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.sock = os.path.join(self._tmpdir.name, "hookd.sock")
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def _serve(self, env=None):
+        return subprocess.Popen([sys.executable, HOOKD, "--socket", self.sock, "serve"],
+                                env=env or dict(os.environ), stdin=subprocess.DEVNULL,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def test_concurrent_serves_leave_one_daemon(self):
+        procs = [self._serve() for _ in range(6)]
+        try:
+            deadline = time.time() + 30
+            while time.time() < deadline and sum(p.poll() is None for p in procs) > 1:
+                time.sleep(0.1)
+            running = [p for p in procs if p.poll() is None]
+            self.assertEqual(len(running), 1)
+            self.assertEqual(int(Path(hook_server.pid_path(self.sock)).read_text()),
+                             running[0].pid)
+        finally:
+            for p in procs:
+                if p.poll() is None:
+                    p.terminate()
+                p.wait(timeout=10)
+
+    def test_idle_daemon_exits_and_removes_socket(self):
+        proc = self._serve(dict(os.environ, CLAUDE_HOOKD_IDLE_SECS="1"))
+        try:
+            self.assertEqual(proc.wait(timeout=30), 0)
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+        self.assertFalse(os.path.exists(self.sock))
+
+
+class TestDaemonRoundTrip(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.sock = os.path.join(cls.tmp.name, "hookd.sock")
+        cls.env = dict(os.environ, CLAUDE_HOOKD_SOCKET=cls.sock,
+                       CLAUDE_HOOKD_AUTOSTART="0", TMPDIR=cls.tmp.name)
+        cls.proc = subprocess.Popen(
+            [sys.executable, HOOKD, "--socket", cls.sock, "serve"],
+            env=cls.env, stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        deadline = time.time() + 10
+        while not os.path.exists(cls.sock) and time.time() < deadline:
+            time.sleep(0.05)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.proc.terminate()
+        cls.proc.wait(timeout=10)
+        cls.tmp.cleanup()
+
+    def _run(self, argv, payload, env):
+        return subprocess.run(argv, input=json.dumps(payload), text=True,
+                              capture_output=True, env=env, timeout=30)
+
+    def _compare(self, payload):
+        warm = self._run([sys.executable, "-S", CLIENT, GATE], payload, self.env)
+        cold = self._run([sys.executable, str(HOOKS_DIR / GATE)], payload, self.env)
+        self.assertEqual(warm.returncode, cold.returncode)
+        self.assertEqual(warm.stdout, cold.stdout)
+        self.assertEqual(warm.stderr, cold.stderr)
+        return warm
+
+    def test_block_semantics_preserved(self):
+        r = self._compare({"tool_name": "EnterPlanMode", "session_id": "hookd-t1"})
+        self.assertEqual(r.returncode, 2)
+        self.assertIn("Permanently blocked", r.stderr)
+
+    def test_allow_semantics_preserved(self):
+        r = self._compare({"tool_name": "Read", "agent_id": "sub-1"})
+        self.assertEqual(r.returncode, 0)
+
+    def test_client_refuses_socket_of_another_uid(self):
+        client = _load_client()
+        with mock.patch.object(client.os, "getuid", return_value=os.getuid() + 1):
+            self.assertIsNone(client._forward(self.sock, str(HOOKS_DIR / GATE), []))
+
+    def test_client_env_reaches_import_time_constants(self):
+        probe = HOOKS_DIR / f"_hookd_env_probe_{os.getpid()}.py"
+        probe.write_text("import sys\nsys.path.insert(0, __file__.rsplit('/', 1)[0])\n"
+                         "from lib import guard_cache\nprint(guard_cache.MAX_ENTRIES)\n")
+        try:
+            env = dict(self.env, CLAUDE_GUARD_CACHE_MAX="7")
+            r = self._run([sys.executable, "-S", CLIENT, probe.name], {}, env)
+            self.assertEqual((r.returncode, r.stdout), (0, "7\n"), r.stderr)
+        finally:
+            probe.unlink()
+
+    def test_client_falls_back_without_daemon(self):
+        env = dict(self.env, CLAUDE_HOOKD_SOCKET=os.path.join(self.tmp.name, "none.sock"))
+        r = self._run([sys.executable, "-S", CLIENT, GATE],
+                      {"tool_name": "EnterPlanMode", "session_id": "hookd-t2"}, env)
+        self.assertEqual(r.returncode, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,193 @@
+"""Tests for the opt-in hook telemetry sink (lib/hook_telemetry.py)."""
+
+from __future__ import annotations
+
+import ast
+import json
+import os
+import re
+import shlex
+import subprocess
+import sys
+import tempfile
+import types
+import unittest
+from pathlib import Path
+from unittest import mock
+
+HOOKS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(HOOKS_DIR))
+
+from lib import hook_dispatch, hook_telemetry  # noqa: E402
+
+PAYLOAD = json.dumps({"session_id": "s-1", "hook_event_name": "PreToolUse",
+                      "tool_name": "Bash", "tool_input": {"command": "git status"}})
+
+
+class TelemetryTestCase(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.sink = Path(self._tmpdir.name) / "telemetry.jsonl"
+        self._env = mock.patch.dict(os.environ, {"CLAUDE_HOOK_TELEMETRY": "1",
+                                                 "CLAUDE_HOOK_TELEMETRY_FILE": str(self.sink)})
+        self._env.start()
+
+    def tearDown(self):
+        self._env.stop()
+        self._tmpdir.cleanup()
+
+    def records(self):
+        if not self.sink.exists():
+            return []
+        return [json.loads(line) for line in self.sink.read_text().splitlines()]
+
+
+class TestHookSpan(TelemetryTestCase):
+    def test_record_fields_and_nested_spans(self):
+        with hook_telemetry.hook_span("guard.py", PAYLOAD) as record:
+            with hook_telemetry.span("outer"):
+                with hook_telemetry.span("inner"):
+                    pass
+                with hook_telemetry.span("inner"):
+                    pass
+            record.status = 2
+        (rec,) = self.records()
+        self.assertEqual((rec["session"], rec["event"], rec["matcher"], rec["hook"]),
+                         ("s-1", "PreToolUse", "Bash", "guard.py"))
+        self.assertEqual((rec["status"], rec["verdict"]), (2, "block"))
+        self.assertEqual(rec["payload_bytes"], len(PAYLOAD))
+        self.assertEqual(set(rec["spans"]), {"outer", "outer;inner"})
+        self.assertEqual(rec["spans"]["outer;inner"][1], 2)
+
+    def test_disabled_writes_nothing(self):
+        with mock.patch.dict(os.environ, {"CLAUDE_HOOK_TELEMETRY": "0"}):
+            with hook_telemetry.hook_span("guard.py", PAYLOAD):
+                with hook_telemetry.span("x"):
+                    pass
+        self.assertEqual(self.records(), [])
+
+    def test_nested_hook_span_is_a_section_of_the_outer_one(self):
+        with hook_telemetry.hook_span("dispatch", PAYLOAD):
+            with hook_telemetry.hook_span("inner.py", PAYLOAD):
+                pass
+        (rec,) = self.records()
+        self.assertEqual(rec["hook"], "dispatch")
+        self.assertIn("inner.py", rec["spans"])
+
+    def test_verdict_from_json_stdout(self):
+        deny = json.dumps({"hookSpecificOutput": {"permissionDecision": "deny"}})
+        self.assertEqual(hook_telemetry.verdict_for(0, deny), "deny")
+        self.assertEqual(hook_telemetry.verdict_for(0, '{"decision": "block"}'), "block")
+        self.assertEqual(hook_telemetry.verdict_for(0, "plain text"), "allow")
+        self.assertEqual(hook_telemetry.verdict_for(1), "error")
+
+    def test_rotation_keeps_bounded_generations(self):
+        with mock.patch.dict(os.environ, {"CLAUDE_HOOK_TELEMETRY_MAX_BYTES": "200",
+                                          "CLAUDE_HOOK_TELEMETRY_KEEP": "2"}):
+            for _ in range(10):
+                with hook_telemetry.hook_span("guard.py", PAYLOAD):
+                    pass
+        names = {p.name for p in self.sink.parent.iterdir() if not p.name.endswith(".lock")}
+        self.assertTrue({"telemetry.jsonl.1", "telemetry.jsonl.2"} <= names)
+        self.assertFalse(names - {"telemetry.jsonl", "telemetry.jsonl.1", "telemetry.jsonl.2"})
+
+
+class TestInstrument(TelemetryTestCase):
+    def test_instrument_wraps_module_functions_once(self):
+        mod = types.ModuleType("fake_engine")
+        exec("def _step(x):\n    return x + 1\n\ndef evaluate(x):\n    return _step(x)\n",
+             mod.__dict__)
+        hook_telemetry.instrument(mod, "fake", ("evaluate", "_step"))
+        hook_telemetry.instrument(mod, "fake", ("evaluate", "_step"))
+        self.assertEqual(mod.evaluate(1), 2)  # outside a hook span: plain call
+        with hook_telemetry.hook_span("guard.py", PAYLOAD):
+            mod.evaluate(1)
+        (rec,) = self.records()
+        self.assertEqual(set(rec["spans"]), {"fake.evaluate", "fake.evaluate;fake.step"})
+
+    def test_timed_hook_replays_stdin(self):
+        hook = HOOKS_DIR / "pretool-bash-safety.py"
+        env = dict(os.environ, HOME=self._tmpdir.name, CLAUDE_TMPDIR=self._tmpdir.name,
+                   CLAUDE_GUARD_CACHE_FILE=str(Path(self._tmpdir.name) / "verdicts.json"))
+        for command, code in (("git status", 0), ("git stash", 2)):
+            payload = json.dumps({"session_id": "s-1", "hook_event_name": "PreToolUse",
+                                  "tool_name": "Bash", "tool_input": {"command": command}})
+            proc = subprocess.run([sys.executable, str(hook)], input=payload, text=True,
+                                  capture_output=True, env=env, timeout=60)
+            self.assertEqual(proc.returncode, code, proc.stderr)
+        recs = self.records()
+        self.assertEqual([r["verdict"] for r in recs], ["allow", "block"])
+        self.assertTrue(any(k.startswith("bash_safety.rules") for k in recs[1]["spans"]))
+
+
+class TestDispatcherRecords(TelemetryTestCase):
+    def test_each_dispatched_hook_is_recorded(self):
+        with tempfile.TemporaryDirectory(dir=HOOKS_DIR) as tmp:
+            script = Path(tmp) / "fake-guard.py"
+            script.write_text("import sys\nsys.stdin.read()\nsys.exit(2)\n")
+            entries = [hook_dispatch.HookEntry(f"python3 {script}", "Bash", 10, str(script)),
+                       hook_dispatch.HookEntry("bash -c 'cat >/dev/null; echo ok'", "Bash", 10, None)]
+            hook_dispatch.run_hooks(entries, PAYLOAD)
+        recs = self.records()
+        self.assertEqual([(r["hook"], r["verdict"]) for r in recs],
+                         [("fake-guard.py", "block"), ("bash -c 'cat >/dev/null; echo ok'", "allow")])
+
+
+    def test_dispatched_bash_hook_is_not_recorded_twice(self):
+        entry = hook_dispatch.HookEntry(f'bash "{HOOKS_DIR / "pretool-block-enterworktree.sh"}"',
+                                        "", 10, None)
+        hook_dispatch.run_hooks([entry], PAYLOAD)
+        self.assertEqual(len(self.records()), 1)
+
+
+def _wired_hooks() -> dict:
+    """{script path: settings command} for every command hook in settings.json."""
+    settings = json.loads((HOOKS_DIR.parent / "settings.json").read_text())
+    wired = {}
+    for blocks in settings["hooks"].values():
+        for block in blocks:
+            for hook in block["hooks"]:
+                for word in shlex.split(hook["command"]):
+                    if word.endswith((".py", ".sh")):
+                        rel = word.split("/.claude/", 1)[1]
+                        wired[HOOKS_DIR.parent / rel] = hook["command"]
+    return wired
+
+
+def _main_guard_wraps(path: Path) -> bool:
+    """True when the `__main__` block applies timed_hook(<basename>)."""
+    for node in ast.parse(path.read_text()).body:
+        if isinstance(node, ast.If) and "__main__" in ast.unparse(node.test):
+            return f"timed_hook(\"{path.name}\")" in ast.unparse(node) \
+                or f"timed_hook('{path.name}')" in ast.unparse(node)
+    return False
+
+
+class TestSettingsCoverage(TelemetryTestCase):
+    """Every hook settings.json wires records its own timing."""
+
+    def test_every_wired_hook_is_timed(self):
+        wired = _wired_hooks()
+        self.assertGreater(len(wired), 50)
+        source = re.compile(r'^\. "\$\{BASH_SOURCE\[0\]%/\*\}/(\.\./hooks/)?lib/hook-telemetry\.sh"$',
+                            re.M)
+        for path in sorted(wired):
+            with self.subTest(hook=path.name):
+                if path.suffix == ".py":
+                    self.assertTrue(_main_guard_wraps(path))
+                else:
+                    self.assertRegex(path.read_text(), source)
+
+    def test_bash_and_python_hooks_write_one_record_each(self):
+        for name in ("pretool-block-enterworktree.sh", "pretool-read-size-guard.py"):
+            argv = ["bash" if name.endswith(".sh") else sys.executable, str(HOOKS_DIR / name)]
+            proc = subprocess.run(argv, input=PAYLOAD, text=True, capture_output=True,
+                                  timeout=30)
+            self.assertEqual(proc.returncode, 0, proc.stderr)
+        self.assertEqual([(r["hook"], r["session"]) for r in self.records()],
+                         [("pretool-block-enterworktree.sh", "s-1"),
+                          ("pretool-read-size-guard.py", "s-1")])
+
+
+if __name__ == "__main__":
+    unittest.main()
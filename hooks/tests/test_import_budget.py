@@ -0,0 +1,141 @@
+"""Import-time budget for the fast path of hooks that usually exit early.
+
+Each case feeds a hook a payload it short-circuits on (wrong tool, no
+overnight session, no contract) under ``python3 -X importtime`` and checks:
+
+  - the heavy hooks/lib modules it binds lazily (lib/__init__.py) were never
+    executed, and jsonschema was never imported;
+  - the import time attributable to the hook stays under IMPORT_BUDGET_MS
+    (best of RUNS, so a cold page cache does not flap the test).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+HOOKS_DIR = Path(__file__).resolve().parent.parent
+
+IMPORT_BUDGET_MS = float(os.environ.get("CLAUDE_IMPORT_BUDGET_MS", "50"))
+RUNS = 3
+HEAVY = {"lib.contract_runtime", "lib.schema_registry", "lib.specialist_yield",
+         "lib.closeout", "lib.allowlist", "lib.overnight", "jsonschema"}
+
+BASH_LS = {"hook_event_name": "PreToolUse", "tool_name": "Bash", "tool_input": {"command": "ls"}}
+POST_BASH = {"hook_event_name": "PostToolUse", "tool_name": "Bash",
+             "tool_input": {"command": "ls"}, "tool_response": {}}
+
+# hook -> (fast-path payload, heavy modules the hook legitimately needs there)
+FAST_PATHS = {
+    "pretool-subagent-enforce.py": (BASH_LS, set()),
+    "pretool-read-size-guard.py": (BASH_LS, set()),
+    "pretool-aggregate-check.py": (BASH_LS, set()),
+    "pretool-block-branch-pr-worktree.py": (BASH_LS, set()),
+    "pretool-overnight-hook-guard.py": (BASH_LS, set()),
+    "pretool-git-privilege-guard.py": (BASH_LS, {"lib.allowlist"}),
+    "posttool-overnight-trace.py": (POST_BASH, set()),
+    "posttool-subagent-track.py": (POST_BASH, set()),
+    "posttool-overnight-file-check.py": (
+        {"hook_event_name": "PostToolUse", "tool_name": "Write",
+         "tool_input": {"file_path": "/tmp/x"}, "tool_response": {}}, set()),
+    "stop-overnight-timelock.py": ({"hook_event_name": "Stop"}, set()),
+}
+
+# Runs the hook as __main__ and reports which modules were really executed
+# (a lazily bound lib module that was never touched is still a _LazyModule).
+_WRAPPER = r'''
+import json, os, runpy, sys
+hook = sys.argv[1]
+sys.argv = [hook]
+sys.stderr.write("--hook-start--\n")
+sys.stderr.flush()
+try:
+    runpy.run_path(hook, run_name="__main__")
+except SystemExit:
+    pass
+finally:
+    loaded = sorted(name for name, mod in list(sys.modules.items())
+                    if mod is not None and type(mod).__name__ != "_LazyModule")
+    with open(os.environ["IMPORT_PROBE_OUT"], "w") as fh:
+        json.dump(loaded, fh)
+'''
+
+
+def hook_import_ms(importtime_stderr: str) -> float:
+    """Sum of top-level cumulative import times logged after the hook starts."""
+    total_us = 0
+    tail = importtime_stderr.split("--hook-start--\n", 1)[-1]
+    for line in tail.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split("|", 2)
+        if name.startswith(" ") and not name.startswith("  "):
+            try:
+                total_us += int(cumulative)
+            except ValueError:  # the header line
+                pass
+    return total_us / 1000
+
+
+class TestFastPathImports(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.tmp = Path(self._tmpdir.name)
+        (self.tmp / "proj").mkdir()
+        self.env = dict(os.environ, HOME=str(self.tmp), CLAUDE_TMPDIR=str(self.tmp),
+                        CLAUDE_PROJECT_DIR=str(self.tmp / "proj"),
+                        IMPORT_PROBE_OUT=str(self.tmp / "loaded.json"))
+        for var in ("CLAUDE_TASK_ID", "CLAUDE_SESSION_ID", "CLAUDE_HOOK_TELEMETRY"):
+            self.env.pop(var, None)
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def _probe(self, hook: str, payload: dict) -> tuple[float, set]:
+        payload = dict(payload, session_id="import-budget", cwd=str(self.tmp / "proj"))
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", _WRAPPER, str(HOOKS_DIR / hook)],
+            input=json.dumps(payload), text=True, capture_output=True,
+            env=self.env, cwd=str(self.tmp / "proj"), timeout=60,
+        )
+        loaded = set(json.loads((self.tmp / "loaded.json").read_text()))
+        return hook_import_ms(proc.stderr), loaded
+
+    def test_fast_paths_skip_heavy_modules_and_stay_in_budget(self):
+        for hook, (payload, needed) in FAST_PATHS.items():
+            with self.subTest(hook=hook):
+                samples = [self._probe(hook, payload) for _ in range(RUNS)]
+                loaded = samples[0][1]
+                heavy = {m for m in loaded if m.split(".")[0] == "jsonschema" or m in HEAVY}
+                self.assertEqual(heavy - needed, set())
+                best = min(ms for ms, _ in samples)
+                self.assertLess(best, IMPORT_BUDGET_MS,
+                                f"{hook} fast path imports took {best:.1f}ms")
+
+
+class TestLazyPackage(unittest.TestCase):
+    def test_module_form_binds_without_executing(self):
+        code = ("import sys; sys.path.insert(0, sys.argv[1])\n"
+                "from lib import contract_runtime\n"
+                "print(type(contract_runtime).__name__)\n"
+                "contract_runtime.load_contract\n"
+                "print(type(contract_runtime).__name__, 'lib.schema_registry' in sys.modules)\n")
+        proc = subprocess.run([sys.executable, "-c", code, str(HOOKS_DIR)],
+                              text=True, capture_output=True, timeout=60)
+        self.assertEqual(proc.stdout.split(), ["_LazyModule", "module", "True"], proc.stderr)
+
+    def test_unknown_name_is_still_an_import_error(self):
+        code = ("import sys; sys.path.insert(0, sys.argv[1])\n"
+                "from lib import no_such_module\n")
+        proc = subprocess.run([sys.executable, "-c", code, str(HOOKS_DIR)],
+                              text=True, capture_output=True, timeout=60)
+        self.assertIn("ImportError", proc.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,216 @@
+"""Tests for the single-process inotify watcher (lib/inotify_watch.py, git-watchd.py)."""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+HOOKS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(HOOKS_DIR))
+
+from lib import inotify_watch  # noqa: E402
+
+WATCHD = str(HOOKS_DIR / "git-watchd.py")
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class IgnoreRulesTest(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmpdir.name)
+        (self.root / ".git" / "info").mkdir(parents=True)
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def rules(self, gitignore: str, **nested) -> inotify_watch.IgnoreRules:
+        (self.root / ".gitignore").write_text(gitignore)
+        rules = inotify_watch.IgnoreRules(str(self.root))
+        rules.load("")
+        for rel_dir, text in nested.items():
+            (self.root / rel_dir).mkdir(parents=True, exist_ok=True)
+            (self.root / rel_dir / ".gitignore").write_text(text)
+            rules.load(rel_dir)
+        return rules
+
+    def test_basename_anchored_and_dir_only(self):
+        rules = self.rules("*.o\n/build\ncache/\n")
+        self.assertTrue(rules.ignored("a.o"))
+        self.assertTrue(rules.ignored("src/deep/a.o"))
+        self.assertTrue(rules.ignored("build", is_dir=True))
+        self.assertFalse(rules.ignored("src/build", is_dir=True))
+        self.assertTrue(rules.ignored("src/cache", is_dir=True))
+        self.assertFalse(rules.ignored("src/cache"))  # a file named cache
+        self.assertTrue(rules.ignored("src/cache/x.txt"))
+
+    def test_negation_and_double_star(self):
+        rules = self.rules("*.out\n!keep.out\nlogs/**/tmp\ndocs/**\n!docs/index.md\n")
+        self.assertTrue(rules.ignored("sub/x.out"))
+        self.assertFalse(rules.ignored("sub/keep.out"))
+        self.assertTrue(rules.ignored("logs/tmp", is_dir=True))
+        self.assertTrue(rules.ignored("logs/a/b/tmp", is_dir=True))
+        self.assertTrue(rules.ignored("docs/a.md"))
+        self.assertFalse(rules.ignored("docs/index.md"))
+
+    def test_nested_gitignore_and_ignored_parent(self):
+        rules = self.rules("vendor/\n", **{"pkg": "*.gen.py\n!vendor/\n"})
+        self.assertTrue(rules.ignored("pkg/x.gen.py"))
+        self.assertFalse(rules.ignored("x.gen.py"))
+        # a directory ignored higher up cannot be re-included below it
+        self.assertTrue(rules.ignored("vendor/lib/a.py"))
+        self.assertFalse(rules.ignored("pkg/vendor/a.py"))
+
+    def test_builtin_excludes_and_info_exclude(self):
+        (self.root / ".git" / "info" / "exclude").write_text("secret.txt\n")
+        rules = self.rules("")
+        for rel in (".git/index", "node_modules/a/b.js", "a/__pycache__/m.cpython.pyc",
+                    "notes.swp", "secret.txt"):
+            self.assertTrue(rules.ignored(rel), rel)
+        self.assertFalse(rules.ignored("src/app.py"))
+
+
+class DebounceTest(unittest.TestCase):
+    def test_quiet_period_and_max_wait(self):
+        d = inotify_watch.Debounce(base=2, max_wait=10)
+        self.assertFalse(d.due(0))
+        d.touch(0)
+        self.assertFalse(d.due(1.9))
+        self.assertTrue(d.due(2))
+        d.reset()
+        for t in range(9):  # never quiet for 2s
+            d.touch(t)
+            self.assertFalse(d.due(t + 1))
+        self.assertTrue(d.due(10))
+
+    def test_bursts_stretch_the_window(self):
+        d = inotify_watch.Debounce(base=2, max_wait=60)
+        d.touch(0, 400)
+        d.touch(2, 400)  # 400 events/s
+        self.assertEqual(d.quiet(), 8)  # capped at base * MAX_STRETCH
+        self.assertFalse(d.due(5))
+        self.assertTrue(d.due(10))
+
+
+@unittest.skipUnless(inotify_watch.supported(), "inotify not available")
+class WatcherTest(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.tmp = Path(self._tmpdir.name)
+        self.repo = self.tmp / "repo"
+        (self.repo / ".git").mkdir(parents=True)
+        (self.repo / "src").mkdir()
+        (self.repo / "ignored").mkdir()
+        (self.repo / ".gitignore").write_text("ignored/\n*.bak\n")
+        self.registry = str(self.tmp / "repos")
+        inotify_watch.write_registry(self.registry, [str(self.repo)])
+        self.clock = _Clock()
+        self.calls = []
+        self.watcher = inotify_watch.Watcher(
+            self.registry, base=2, max_wait=10, pull_interval=300, clock=self.clock,
+            sync=lambda root, pull: self.calls.append((root, pull)) or 0)
+
+    def tearDown(self):
+        self.watcher.pool.shutdown(wait=True)
+        self.watcher.inotify.close()
+        self._tmpdir.cleanup()
+
+    def settle(self):
+        """Deliver pending events and finish any dispatched syncs."""
+        self.watcher.poll(0.2)
+        self.watcher.pool.submit(lambda: None).result()
+        self.watcher.dispatch()
+
+    def test_initial_sync_then_one_sync_per_burst(self):
+        self.watcher.reload_registry()
+        self.assertEqual(set(self.watcher.repos[str(self.repo)].wds.values()), {"", "src"})
+        self.settle()
+        self.assertEqual(self.calls, [(str(self.repo), True)])
+        for i in range(5):
+            (self.repo / "src" / f"m{i}.py").write_text("x\n")
+        self.settle()
+        self.assertEqual(len(self.calls), 1)  # still inside the quiet period
+        self.clock.now += 2
+        self.settle()
+        self.assertEqual(self.calls[1:], [(str(self.repo), False)])
+
+    def test_event_storm_waits_longer(self):
+        self.watcher.reload_registry()
+        self.settle()
+        for i in range(50):  # 100 events inside one second: window stretches to 4 x base
+            (self.repo / "src" / f"m{i}.py").write_text("x\n")
+        self.settle()
+        self.clock.now += 4
+        self.settle()
+        self.assertEqual(len(self.calls), 1)
+        self.clock.now += 4
+        self.settle()
+        self.assertEqual(len(self.calls), 2)
+
+    def test_ignored_paths_do_not_trigger(self):
+        self.watcher.reload_registry()
+        self.settle()
+        (self.repo / "ignored" / "a.txt").write_text("x\n")
+        (self.repo / "src" / "a.bak").write_text("x\n")
+        (self.repo / "x.log").write_text("x\n")
+        self.clock.now += 100
+        self.settle()
+        self.assertEqual(len(self.calls), 1)
+
+    def test_new_directories_are_watched(self):
+        self.watcher.reload_registry()
+        self.settle()
+        (self.repo / "src" / "new").mkdir()
+        self.settle()
+        self.assertIn("src/new", self.watcher.repos[str(self.repo)].wds.values())
+        self.clock.now += 2
+        self.settle()
+        self.calls.clear()
+        (self.repo / "src" / "new" / "f.py").write_text("x\n")
+        self.clock.now += 2
+        self.settle()
+        self.clock.now += 2
+        self.settle()
+        self.assertEqual(len(self.calls), 1)
+
+    def test_registry_changes_are_picked_up(self):
+        self.watcher.reload_registry()
+        inotify_watch.write_registry(self.registry, [])
+        self.watcher.reload_registry()
+        self.assertEqual(self.watcher.repos, {})
+        self.assertEqual(self.watcher.by_wd, {})
+
+
+class CliTest(unittest.TestCase):
+    def test_add_list_remove(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            repo = Path(tmp) / "r"
+            repo.mkdir()
+            subprocess.run(["git", "init", "-q"], cwd=repo, check=True)
+            env = dict(os.environ, GIT_WATCHD_REGISTRY=str(Path(tmp) / "reg"),
+                       GIT_WATCHD_PID=str(Path(tmp) / "w.pid"))
+
+            def run(*args):
+                return subprocess.run([sys.executable, WATCHD, *args], env=env,
+                                      capture_output=True, text=True)
+
+            self.assertEqual(run("add", str(repo)).returncode, 0)
+            self.assertEqual(run("add", tmp).returncode, 1)
+            self.assertEqual(run("list").stdout.split(), [str(repo.resolve())])
+            self.assertEqual(run("status", "--repo", str(repo)).returncode, 1)  # not running
+            run("remove", str(repo))
+            self.assertEqual(run("list").stdout, "")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,179 @@
+"""Tests for the observability spool (lib/obs_queue.py, obsd.py) and the
+spooling posttool-overnight-trace.py."""
+
+from __future__ import annotations
+
+import fcntl
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+HOOKS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(HOOKS_DIR))
+
+from lib import obs_queue  # noqa: E402
+
+HOOK = str(HOOKS_DIR / "posttool-overnight-trace.py")
+OBSD = str(HOOKS_DIR / "obsd.py")
+
+
+class _Case(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.tmp = Path(self._tmpdir.name)
+        self.state = str(self.tmp / "state")
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+
+class ConsumerTest(_Case):
+    def test_drain_batches_per_kind_and_isolates_failures(self):
+        seen = {}
+
+        def boom(events):
+            raise RuntimeError("bad batch")
+
+        consumer = obs_queue.Consumer(self.state, {
+            "a": lambda events: seen.setdefault("a", []).extend(events),
+            "b": boom,
+        })
+        with mock.patch.dict(os.environ, {"CLAUDE_PROJECT_DIR": "/p1"}):
+            for i in range(3):
+                obs_queue.enqueue(self.state, "a", {"n": i})
+        obs_queue.enqueue(self.state, "b", {"n": 9})
+        obs_queue.enqueue(self.state, "nope", {})
+        with open(obs_queue.spool_path(self.state), "a") as f:
+            f.write('{"torn": \n')
+        with mock.patch.object(obs_queue, "GRACE_SECS", 0):
+            self.assertEqual(consumer.drain(), 5)
+        self.assertEqual([e["n"] for e in seen["a"]], [0, 1, 2])
+        self.assertEqual(seen["a"][0]["env"]["CLAUDE_PROJECT_DIR"], "/p1")
+        self.assertEqual((consumer.handled, consumer.dropped), (3, 2))
+        self.assertEqual(consumer.drain(), 0)
+
+    def test_drain_waits_for_a_batch_in_flight(self):
+        seen = []
+        consumer = obs_queue.Consumer(self.state, {"a": seen.extend})
+        obs_queue.enqueue(self.state, "a", {"n": 1})
+        fd = os.open(obs_queue.drain_lock_path(self.state), os.O_RDWR | os.O_CREAT)
+        fcntl.flock(fd, fcntl.LOCK_EX)  # the background consumer mid-batch
+        worker = threading.Thread(target=consumer.drain)
+        worker.start()
+        time.sleep(0.2)
+        self.assertTrue(worker.is_alive())
+        self.assertEqual(seen, [])
+        os.close(fd)
+        worker.join(5)
+        self.assertEqual([e["n"] for e in seen], [1])
+        self.assertEqual(obs_queue.Consumer(str(self.tmp / "none"), {}).drain(), 0)
+        self.assertFalse((self.tmp / "none").exists())
+
+    def test_applied_env_restores_environment(self):
+        with mock.patch.dict(os.environ, {"CLAUDE_PROJECT_DIR": "/outer"}):
+            os.environ.pop("CLAUDE_AGENT_ID", None)
+            with obs_queue.applied_env({"CLAUDE_AGENT_ID": "a1"}):
+                self.assertEqual(os.environ["CLAUDE_AGENT_ID"], "a1")
+                self.assertNotIn("CLAUDE_PROJECT_DIR", os.environ)
+            self.assertEqual(os.environ["CLAUDE_PROJECT_DIR"], "/outer")
+            self.assertNotIn("CLAUDE_AGENT_ID", os.environ)
+
+
+class TraceHookTest(_Case):
+    SID = "s-obs"
+
+    def setUp(self):
+        super().setUp()
+        self.project = self.tmp / "project"
+        (self.project / ".claude").mkdir(parents=True)
+        (self.project / ".claude" / f"overnight-state-{self.SID}.json").write_text(
+            json.dumps({"session_id": self.SID, "cycle_count": 1, "current_step": "8"}))
+        self.cycle = self.project / "docs" / "dev" / "overnight" / self.SID / "cycle-1"
+        self.cycle.mkdir(parents=True)
+        (self.cycle / "cycle-contract.json").write_text(
+            json.dumps({"pipelines": {"p-1": {}}}))
+        self.trace = self.cycle / "trace.jsonl"
+        self.env = dict(os.environ, HOME=str(self.tmp), CLAUDE_PROJECT_DIR=str(self.project),
+                        CLAUDE_OBSD_DIR=self.state, CLAUDE_OBSD_IDLE_SECS="1",
+                        SPECIALIST_YIELD_LOG_PATH=str(self.tmp / "yield.jsonl"))
+        self.env.pop("CLAUDE_SESSION_ID", None)
+
+    def run_hook(self, **env) -> subprocess.CompletedProcess:
+        payload = {"hook_event_name": "PostToolUse", "tool_name": "Agent",
+                   "session_id": self.SID,
+                   "tool_input": {"subagent_type": "dev", "prompt": "go"},
+                   "tool_response": {"usage": {"total_tokens": 42}}}
+        return subprocess.run([sys.executable, HOOK], input=json.dumps(payload),
+                              capture_output=True, text=True, env=dict(self.env, **env),
+                              timeout=30)
+
+    def records(self) -> list[dict]:
+        if not self.trace.exists():
+            return []
+        return [json.loads(line) for line in self.trace.read_text().splitlines()]
+
+    def test_hook_spools_and_consumer_writes_batched_trace(self):
+        try:
+            for _ in range(3):
+                self.assertEqual(self.run_hook().returncode, 0)
+            deadline = time.time() + 20
+            while time.time() < deadline and len(self.records()) < 3:
+                time.sleep(0.1)
+            records = self.records()
+            self.assertEqual(len(records), 3)
+            self.assertEqual({r["pipeline_id"] for r in records}, {"p-1"})
+            self.assertEqual(records[0]["estimated_tokens"], 42)
+            self.assertEqual(records[0]["step"], "8")
+            self.assertEqual(records[0]["evidence_completeness"]["required_count"], 7)
+            while time.time() < deadline and os.path.exists(obs_queue.pid_path(self.state)):
+                time.sleep(0.1)
+            self.assertFalse(os.path.exists(obs_queue.pid_path(self.state)))
+        finally:
+            subprocess.run([sys.executable, OBSD, "--state-dir", self.state, "stop"],
+                           env=self.env)
+
+    def test_sync_mode_writes_inline(self):
+        self.assertEqual(self.run_hook(CLAUDE_OBS_ASYNC="0").returncode, 0)
+        (record,) = self.records()
+        self.assertEqual(record["pipeline_id"], "p-1")
+        self.assertFalse(os.path.exists(self.state))
+
+    def test_drain_command_handles_queued_events(self):
+        os.makedirs(self.state)
+        Path(obs_queue.pid_path(self.state)).write_text(f"{os.getpid()}\n")  # no autostart
+        self.assertEqual(self.run_hook().returncode, 0)
+        self.assertEqual(self.records(), [])
+        proc = subprocess.run([sys.executable, OBSD, "--state-dir", self.state, "drain"],
+                              env=self.env, capture_output=True, text=True, timeout=30)
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+        self.assertEqual(len(self.records()), 1)
+
+    def test_stop_hook_drains_the_spool_before_closeout(self):
+        os.makedirs(self.state)
+        Path(obs_queue.pid_path(self.state)).write_text(f"{os.getpid()}\n")  # no autostart
+        self.assertEqual(self.run_hook().returncode, 0)
+        self.assertEqual(self.records(), [])
+        spec = importlib.util.spec_from_file_location(
+            "stop_timelock", HOOKS_DIR / "stop-overnight-timelock.py")
+        stop = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(stop)
+        seen = []
+        with mock.patch.dict(os.environ, self.env), \
+                mock.patch.object(stop.closeout, "run_cycle_closeout",
+                                  lambda sid, cycle: seen.append(len(self.records()))), \
+                mock.patch.object(stop.closeout, "has_pending_required_calls",
+                                  return_value=False):
+            self.assertFalse(stop._invoke_closeout(self.SID, {"cycle_count": 1}))
+        self.assertEqual(seen, [1])
+
+
+if __name__ == "__main__":
+    unittest.main()
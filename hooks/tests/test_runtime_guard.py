@@ -4297,5 +4297,37 @@ class TestCycle16CodexFollowup:
             assert name not in src, f"engine must stay project-name-free: {name!r}"
 
 
+class TestPathMatcherIndex:
+    """The compiled trie + alternation matcher must agree with the per-glob
+    segment regexes it replaces, for every glob shape the data file uses."""
+
+    GLOBS = FIXTURE["protected_launch_paths"] + FIXTURE["protected_statefiles"] + [
+        "**/packages/happy-cli", "/root/.config/app", "/usr/lib/node_modules/happy*",
+        "/opt/**/bin/x", "~/.config/app/data.json", "rel/dir", "/", "/a/b/",
+    ]
+    CANDS = [
+        "/usr/bin/happy", "/usr/bin/happy-dev", "/usr/bin/happyx/y", "/usr/bin",
+        "/repo/packages/happy-cli", "packages/happy-cli", "xpackages/happy-cli",
+        "/repo/packages/happy-cli/dist/index.mjs", "/repo/packages/happy-cli/bin/happy-a.mjs",
+        "/root/.happy-dev/daemon.state.json", "/root/.happy/x/daemon.state.json",
+        "/root/.config/app", "/root/.config/app/", "/root/.config/apps",
+        "/usr/lib/node_modules/happy-coder", "/opt/a/b/bin/x", "/opt/bin/x",
+        "~/.config/app/data.json", "/home/u/rel/dir", "/", "", "/a/b/", "/a/b",
+    ]
+
+    def test_matches_per_glob_regexes(self):
+        import lib.runtime_guard as rg
+        for n in range(len(self.GLOBS) + 1):
+            globs = self.GLOBS[:n]
+            matcher = rg._path_matcher(globs)
+            for cand in self.CANDS:
+                expected = any(rg._glob_to_segment_regex(g).search(cand) for g in globs)
+                assert matcher.search(cand) == expected, (globs, cand)
+
+    def test_matcher_is_shared_per_glob_list(self):
+        import lib.runtime_guard as rg
+        assert rg._path_matcher(list(self.GLOBS)) is rg._path_matcher(tuple(self.GLOBS))
+
+
 if __name__ == "__main__":
     raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,93 @@
+"""Tests for the shared Bash lexer (lib/shell_lex.py)."""
+
+from __future__ import annotations
+
+import sys
+import unittest
+from pathlib import Path
+
+HOOKS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(HOOKS_DIR))
+
+from lib import shell_lex  # noqa: E402
+
+
+class TestSegments(unittest.TestCase):
+    def test_control_operators_split(self):
+        self.assertEqual(
+            shell_lex.parse("a && b || c; d | e |& f & g\nh").segments,
+            ("a", "b", "c", "d", "e", "f", "g", "h"))
+
+    def test_quotes_substitutions_and_fd_amp_do_not_split(self):
+        self.assertEqual(shell_lex.parse("echo 'a;b' \"c|d\" $(x; y) `p && q` 2>&1").segments,
+                         ("echo 'a;b' \"c|d\" $(x; y) `p && q` 2>&1",))
+
+    def test_parts_are_lossless(self):
+        cmd = "a && 'b;c' | d; $(e || f)\ng"
+        parts = shell_lex.parse(cmd).parts
+        self.assertEqual("".join(sep + text for sep, text in parts), cmd)
+
+
+class TestHeredocs(unittest.TestCase):
+    def test_bodies_and_closers_removed(self):
+        cmd = "cat > /tmp/a << EOF\necho > /tmp/b\nEOF\nls"
+        self.assertEqual(shell_lex.parse(cmd).without_heredoc_bodies, "cat > /tmp/a << EOF\nls")
+
+    def test_two_openers_on_one_line_read_bodies_in_order(self):
+        cmd = "cmd <<A <<'B'\na-body\nA\nb-body\nB\nafter"
+        lex = shell_lex.parse(cmd)
+        self.assertEqual([(h.delim, h.quoted, h.body_start, h.body_end) for h in lex.heredocs],
+                         [("A", False, 1, 2), ("B", True, 3, 4)])
+        self.assertEqual(lex.without_heredoc_bodies, "cmd <<A <<'B'\nafter")
+
+    def test_here_string_has_no_body(self):
+        cmd = "cat <<<EOF\nrm -rf /tmp/x\nEOF"
+        self.assertEqual(shell_lex.parse(cmd).heredocs, ())
+
+    def test_unclosed_heredoc_runs_to_end(self):
+        h, = shell_lex.parse("cat <<-EOF\n\tbody\nmore").heredocs
+        self.assertTrue(h.dash)
+        self.assertFalse(h.closed)
+        self.assertEqual((h.body_start, h.body_end), (1, 3))
+
+
+class TestActiveSubstitution(unittest.TestCase):
+    def test_matrix(self):
+        cases = {
+            "echo $(id)": True, "echo `id`": True, "diff <(a) b": True, "tee >(x)": True,
+            "echo \"$(id)\"": True, "echo \"`id`\"": True,
+            "echo '$(id)'": False, "echo \"<(a)\"": False, "echo $'\\'$(id)'": False,
+            "echo \\$(id)": False, "echo \"it's\" $(id)": True, "ls -la": False,
+        }
+        for cmd, expected in cases.items():
+            self.assertEqual(shell_lex.parse(cmd).has_active_substitution, expected, cmd)
+
+
+class TestWords(unittest.TestCase):
+    def test_split_words_returns_fresh_lists(self):
+        a = shell_lex.split_words("cp 'a b' c")
+        a.append("mutated")
+        self.assertEqual(shell_lex.split_words("cp 'a b' c"), ["cp", "a b", "c"])
+        self.assertIsNone(shell_lex.split_words("echo 'open"))
+
+    def test_punct_words_splits_unspaced_operators(self):
+        self.assertEqual(shell_lex.punct_words("ls x;touch y"), ["ls", "x", ";", "touch", "y"])
+        self.assertIsNone(shell_lex.punct_words("cat 'unterminated"))
+
+    def test_parse_is_memoized(self):
+        self.assertIs(shell_lex.parse("git status"), shell_lex.parse("git status"))
+
+    def test_memo_keys_are_digests_and_text_is_bounded(self):
+        memo = shell_lex._Memo()
+        big = "echo " + "x" * (shell_lex._MEMO_MAX_CHARS // 2)
+        memo.put(big, 1)
+        self.assertEqual([len(k) for k in memo.entries], [16])
+        memo.put(big + "y", 2)
+        self.assertEqual((len(memo.entries), memo.get(big + "y"), memo.get(big)), (1, 2, None))
+        self.assertLessEqual(memo.chars, shell_lex._MEMO_MAX_CHARS)
+        memo.put("x" * (shell_lex._MEMO_MAX_CHARS + 1), 3)
+        self.assertEqual(len(memo.entries), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+"""Tests for the stat-validated state snapshot (lib/state_snapshot.py)."""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+HOOKS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(HOOKS_DIR))
+
+from lib import agent_resolver, overnight, state_snapshot  # noqa: E402
+
+LIVE = {"session_id": "s-1", "current_phase": "dev", "end_time": "2099-01-01T00:00:00Z",
+        "worktree_path": "/tmp/wt"}
+
+
+class SnapshotTestCase(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.tmp = Path(self._tmpdir.name)
+        self.proj = self.tmp / "proj"
+        (self.proj / ".claude").mkdir(parents=True)
+        state_snapshot._SNAPSHOTS.clear()
+
+    def tearDown(self):
+        state_snapshot._SNAPSHOTS.clear()
+        self._tmpdir.cleanup()
+
+    def write(self, rel: str, data, age: float = 10.0) -> Path:
+        path = self.proj / ".claude" / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(data if isinstance(data, str) else json.dumps(data))
+        # back-date past the racy window so the entry may be reused
+        past = path.stat().st_mtime - age
+        os.utime(path, (past, past))
+        os.utime(path.parent, (past, past))
+        return path
+
+    def snap(self):
+        return state_snapshot.snapshot(str(self.proj))
+
+
+class TestViews(SnapshotTestCase):
+    def test_overnight_states_in_name_order(self):
+        self.write("overnight-state-b.json", dict(LIVE, session_id="b"))
+        self.write("overnight-state-a.json", dict(LIVE, session_id="a"))
+        self.write("overnight-state-c.json", "")
+        self.write("workflow-a.json", {"command": "dev"})
+        states = self.snap().overnight_states()
+        self.assertEqual([Path(sf.path).name for sf in states],
+                         ["overnight-state-a.json", "overnight-state-b.json",
+                          "overnight-state-c.json"])
+        self.assertEqual([sf.data and sf.data["session_id"] for sf in states], ["a", "b", None])
+        self.assertEqual(self.snap().overnight_state("b")["session_id"], "b")
+        self.assertEqual(self.snap().workflow("a"), {"command": "dev"})
+        self.assertIsNone(self.snap().workflow("missing"))
+
+    def test_cp_states_and_agent_index(self):
+        self.write("specs/s1/cp-state-1.json", {"agent_id": "x", "agent_type": "dev",
+                                                "is_running": True})
+        self.write("specs/s2/cp-state-2.json", "{torn")
+        self.write("dev-registry/agent-index.json", {"y": "qa"})
+        self.assertEqual([sf.data for sf in self.snap().cp_states()],
+                         [{"agent_id": "x", "agent_type": "dev", "is_running": True}, None])
+        self.assertEqual(agent_resolver._scan_cp_state_files("x", str(self.proj)), "dev")
+        self.assertEqual(agent_resolver._lookup_dev_registry_index("y", str(self.proj)), "qa")
+
+
+class TestValidation(SnapshotTestCase):
+    def test_unchanged_files_are_not_reparsed(self):
+        self.write("overnight-state-a.json", LIVE)
+        self.snap().overnight_states()
+        with mock.patch.object(state_snapshot, "_parse", side_effect=AssertionError), \
+                mock.patch.object(os, "listdir", side_effect=AssertionError):
+            (sf,) = self.snap().overnight_states()
+        self.assertEqual(sf.data, LIVE)
+
+    def test_rewrite_and_new_file_are_seen(self):
+        path = self.write("overnight-state-a.json", LIVE)
+        self.snap().overnight_states()
+        self.write("overnight-state-a.json", dict(LIVE, current_phase="complete"), age=20)
+        self.assertEqual(self.snap().overnight_state("a")["current_phase"], "complete")
+        self.write("overnight-state-b.json", LIVE, age=5)
+        self.assertEqual(len(self.snap().overnight_states()), 2)
+        path.unlink()
+        self.assertIsNone(self.snap().overnight_state("a"))
+
+    def test_recent_write_is_racy_and_always_reread(self):
+        path = self.write("overnight-state-a.json", LIVE, age=0)
+        self.snap().overnight_states()
+        # same size, same mtime: only the racy-clean rule catches this rewrite
+        st = path.stat()
+        path.write_text(json.dumps(dict(LIVE, session_id="z")))
+        os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+        self.assertEqual(self.snap().overnight_state("a")["session_id"], "z")
+
+    def test_disabled_reparses_every_call(self):
+        self.write("overnight-state-a.json", LIVE)
+        self.snap().overnight_states()
+        with mock.patch.dict(os.environ, {"CLAUDE_STATE_SNAPSHOT": "0"}), \
+                mock.patch.object(state_snapshot, "_parse", wraps=state_snapshot._parse) as parse:
+            self.snap().overnight_states()
+        self.assertEqual(parse.call_count, 1)
+
+
+# Runs a hook as __main__ in a fresh interpreter and reports how many state
+# files it parsed.
+_COUNT_PARSES = r'''
+import json, os, runpy, sys
+sys.path.insert(0, os.path.dirname(sys.argv[1]))
+from lib import state_snapshot
+parsed = []
+_parse = state_snapshot._parse
+state_snapshot._parse = lambda path: (parsed.append(path), _parse(path))[1]
+hook = sys.argv[1]
+sys.argv = [hook]
+try:
+    runpy.run_path(hook, run_name="__main__")
+except SystemExit:
+    pass
+finally:
+    sys.__stderr__.write("PARSED %d\n" % len(parsed))
+'''
+
+
+class TestCallers(SnapshotTestCase):
+    def test_fresh_guard_process_parses_each_state_file_once(self):
+        for i in range(5):
+            self.write(f"overnight-state-s{i}.json",
+                       dict(LIVE, session_id=f"s{i}", worktree_path=str(self.tmp)))
+        payload = {"tool_name": "Bash", "session_id": "s0", "cwd": str(self.proj),
+                   "tool_input": {"command": "ls"}}
+        env = dict(os.environ, CLAUDE_PROJECT_DIR=str(self.proj), HOME=str(self.tmp))
+        proc = subprocess.run(
+            [sys.executable, "-c", _COUNT_PARSES, str(HOOKS_DIR / "pretool-overnight-hook-guard.py")],
+            input=json.dumps(payload), text=True, capture_output=True, env=env,
+            cwd=str(self.proj), timeout=60)
+        self.assertIn("PARSED 5\n", proc.stderr)
+
+    @mock.patch.object(overnight, "candidate_project_dirs", lambda d: [d])
+    def test_is_overnight_active_fails_closed(self):
+        self.assertFalse(overnight.is_overnight_active(str(self.proj)))
+        self.write("overnight-state-a.json", dict(LIVE, end_time=""))
+        self.assertFalse(overnight.is_overnight_active(str(self.proj)))
+        self.write("overnight-state-b.json", LIVE)
+        self.assertTrue(overnight.is_overnight_active(str(self.proj)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,189 @@
+"""Tests for the incremental trace.jsonl index (lib/trace_index.py) and the
+closeout metrics computed from it."""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+HOOKS_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(HOOKS_DIR))
+
+from lib import closeout, contract_runtime, trace_index  # noqa: E402
+
+
+def _age(path: Path, seconds: float = 10) -> None:
+    """Push mtime out of the racy window so the cache may trust it."""
+    past = time.time() - seconds
+    os.utime(path, (past, past))
+
+
+def _append(path: Path, *records: dict) -> None:
+    with open(path, "a", encoding="utf-8") as fh:
+        for rec in records:
+            fh.write(json.dumps(rec) + "\n")
+
+
+class TraceIndexTest(unittest.TestCase):
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.trace = Path(self._tmpdir.name) / "cycle-1" / "trace.jsonl"
+        self.trace.parent.mkdir()
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def test_folds_only_new_records_and_keeps_offsets(self):
+        _append(self.trace, {"step": "1", "role": "qa", "estimated_tokens": 10, "retry_count": 1})
+        first = trace_index.refresh(self.trace)
+        self.assertEqual(first["records"], [0])
+        _append(self.trace, {"step": "1", "role": "qa", "estimated_tokens": "5"},
+                {"role": "dev", "retry_count": 2})
+        with mock.patch.object(trace_index, "_fold", wraps=trace_index._fold) as fold:
+            trace = trace_index.refresh(self.trace)
+        self.assertEqual(fold.call_count, 2)
+        self.assertEqual(trace["tokens"], 15)
+        self.assertEqual(trace["retries"], {"qa": 1, "dev": 2})
+        self.assertEqual(trace["step_roles"], {json.dumps(["1", "qa"]): 2})
+        self.assertEqual(trace["offset"], self.trace.stat().st_size)
+        self.assertEqual([r.get("role") for r in trace_index.read_records(self.trace, 1)],
+                         ["qa", "dev"])
+        self.assertTrue(trace_index.sidecar_path(self.trace).exists())
+
+    def test_rewritten_or_truncated_trace_is_rebuilt(self):
+        _append(self.trace, {"role": "qa", "estimated_tokens": 10},
+                {"role": "qa", "estimated_tokens": 10})
+        trace_index.refresh(self.trace)
+        # same length, different content: the tail check catches it
+        text = self.trace.read_text().replace("10", "20")
+        self.trace.write_text(text)
+        self.assertEqual(trace_index.refresh(self.trace)["tokens"], 40)
+        # replaced by a shorter file via rename
+        tmp = self.trace.with_name("new.jsonl")
+        tmp.write_text(json.dumps({"estimated_tokens": 1}) + "\n")
+        os.replace(tmp, self.trace)
+        trace = trace_index.refresh(self.trace)
+        self.assertEqual((trace["tokens"], len(trace["records"])), (1, 1))
+
+    def test_partial_last_line_waits_for_completion(self):
+        _append(self.trace, {"role": "a"})
+        with open(self.trace, "a") as fh:
+            fh.write('{"role": "b", "estim')
+        self.assertEqual(len(trace_index.refresh(self.trace)["records"]), 1)
+        with open(self.trace, "a") as fh:
+            fh.write('ated_tokens": 3}\n')
+        trace = trace_index.refresh(self.trace)
+        self.assertEqual((len(trace["records"]), trace["tokens"]), (2, 3))
+
+    def test_corrupt_sidecar_is_rebuilt(self):
+        _append(self.trace, {"estimated_tokens": 4})
+        trace_index.refresh(self.trace)
+        trace_index.sidecar_path(self.trace).write_text("{not json")
+        self.assertEqual(trace_index.refresh(self.trace)["tokens"], 4)
+
+    def test_busy_index_is_skipped_when_non_blocking(self):
+        _append(self.trace, {"estimated_tokens": 4})
+        with trace_index.TraceIndex.open(self.trace) as held:
+            self.assertIsNotNone(held)
+            self.assertIsNone(trace_index.refresh(self.trace, blocking=False))
+        self.assertEqual(trace_index.refresh(self.trace, blocking=False)["tokens"], 4)
+
+    def test_missing_trace_creates_nothing(self):
+        absent = Path(self._tmpdir.name) / "cycle-2" / "trace.jsonl"
+        with trace_index.TraceIndex.open(absent) as index:
+            self.assertEqual(index.refresh()["records"], [])
+            index.dirty = True
+        self.assertEqual(trace_index.read_records(absent), [])
+        self.assertFalse(absent.parent.exists())
+        trace_index.refresh(self.trace)
+        self.assertEqual(os.listdir(self.trace.parent), [])
+
+    def test_verdicts_are_cached_until_the_report_changes(self):
+        _append(self.trace, {"role": "qa"})  # the sidecar is only kept next to a trace
+        report = self.trace.with_name("qa.json")
+        report.write_text(json.dumps({"verdict": "pass"}))
+        _age(report)
+        calls = []
+
+        def validate(record, schema_name):
+            calls.append(record)
+            return {"ok": True, "errors": []}
+
+        with mock.patch.object(contract_runtime, "validate", validate):
+            for _ in range(2):
+                with trace_index.TraceIndex.open(self.trace) as index:
+                    self.assertTrue(index.verdict(report, "qa-report")["ok"])
+            self.assertEqual(len(calls), 1)
+            report.write_text(json.dumps({"verdict": "fail"}))
+            _age(report, 5)
+            with trace_index.TraceIndex.open(self.trace) as index:
+                index.verdict(report, "qa-report")
+            self.assertEqual(calls[-1], {"verdict": "fail"})
+            report.write_text("[]")
+            with trace_index.TraceIndex.open(self.trace) as index:
+                self.assertIsNone(index.verdict(report, "qa-report"))
+
+    def test_recently_modified_report_is_not_trusted(self):
+        report = self.trace.with_name("qa.json")
+        report.write_text(json.dumps({"verdict": "pass"}))
+        calls = []
+        with mock.patch.object(contract_runtime, "validate",
+                               lambda r, s: calls.append(r) or {"ok": True, "errors": []}):
+            for _ in range(2):
+                with trace_index.TraceIndex.open(self.trace) as index:
+                    index.verdict(report, "qa-report")
+        self.assertEqual(len(calls), 2)
+
+
+class CloseoutFromIndexTest(unittest.TestCase):
+    SID = "dev-20260101-000000"
+
+    def setUp(self):
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.project = Path(self._tmpdir.name)
+        env = mock.patch.dict(os.environ, {"CLAUDE_PROJECT_DIR": str(self.project)})
+        env.start()
+        self.addCleanup(env.stop)
+        self.cycle = self.project / "docs" / "dev" / "overnight" / self.SID / "cycle-1"
+        self.cycle.mkdir(parents=True)
+        qa = self.cycle / "qa.json"
+        qa.write_text(json.dumps({"report_type": "qa", "verdict": "PASS", "ui_pipeline": True,
+                                  "evidence_summary": {"ui_evidence": {"trace": "t.zip"}}}))
+        _age(qa)
+        (self.cycle / "cycle-contract.json").write_text(json.dumps({"required_calls": [
+            {"step": "2", "role": "dev", "expected_output_path": "missing.json"},
+            {"step": "3", "role": "qa", "expected_output_path": str(qa)},
+        ]}))
+        self.trace = self.cycle / "trace.jsonl"
+
+    def tearDown(self):
+        self._tmpdir.cleanup()
+
+    def test_metrics_accumulate_across_closeouts(self):
+        _append(self.trace, {"step": "2", "role": "dev", "estimated_tokens": 100},
+                {"step": "3", "role": "dev", "estimated_tokens": 50, "retry_count": 1})
+        report = closeout.run_cycle_closeout(self.SID, 1)
+        self.assertEqual(report["trace_record_count"], 2)
+        self.assertEqual(report["metrics"]["role_compliance_rate"], 0.5)
+        _append(self.trace, {"step": "3", "role": "qa", "estimated_tokens": 50},
+                {"step": "9", "role": "qa"}, {"role": "qa", "retry_count": 2})
+        report = closeout.run_cycle_closeout(self.SID, 1)
+        metrics = report["metrics"]
+        self.assertEqual(report["trace_record_count"], 5)
+        self.assertEqual(report["pipeline_report_count"], 1)
+        self.assertEqual(metrics["role_compliance_rate"], 0.6667)
+        self.assertEqual(metrics["token_per_fixed_issue"], 200.0)
+        self.assertEqual(metrics["retry_count_by_role"], {"dev": 1, "qa": 2})
+        self.assertEqual(metrics["ui_evidence_coverage"], 0.0)
+        self.assertEqual([r.get("step") for r in closeout.read_records(self.trace)],
+                         ["2", "3", "3", "9", None])
+
+
+if __name__ == "__main__":
+    unittest.main()
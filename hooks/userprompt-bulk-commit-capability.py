@@ -106,4 +106,6 @@ def main() -> int:
 
 
 if __name__ == "__main__":
+    from lib.hook_telemetry import timed_hook
+    main = timed_hook("userprompt-bulk-commit-capability.py")(main)
     sys.exit(main())
@@ -18,6 +18,8 @@
 #         structured per-task sentinel; log to ~/.claude/logs/bash-consent.log.
 #
 # Exit 0 always. Stop hook (stop-cleanup-allowlist.sh) wipes any unconsumed flag.
+. "${BASH_SOURCE[0]%/*}/lib/hook-telemetry.sh"
+
 set -u
 
 INPUT=$(cat)
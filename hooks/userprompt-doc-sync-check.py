@@ -4,7 +4,12 @@ UserPromptSubmit Hook: Periodic file deletion detection for doc-sync.
 
 Compares current file lists in watched directories against cached state.
 If deletions detected, regenerates INDEX.md for affected directories
-by invoking posttool-doc-sync.py via subprocess.
+by invoking posttool-doc-sync.py via subprocess (with CLAUDE_DOC_SYNC_DEFER=0,
+so the resync is immediate rather than journalled).
+
+Also flushes this session's deferred doc-sync journal (doc_sync/deferred.py)
+when the previous turn ended without a Stop hook (e.g. it was interrupted),
+on every prompt regardless of the check interval.
 
 Hook type: UserPromptSubmit
 Exit codes: 0 always (never blocks)
@@ -70,7 +75,24 @@ def get_dir_snapshot(dir_path: Path) -> set[str]:
     }
 
 
+def flush_deferred(session_id: str) -> None:
+    """Regenerate directories still queued from an earlier turn of this session."""
+    from doc_sync import deferred
+    if deferred.pending(session_id):
+        from doc_sync.main import flush_pending
+        flush_pending(session_id)
+
+
 def main() -> None:
+    try:
+        try:
+            payload = json.load(sys.stdin) if not sys.stdin.isatty() else {}
+        except ValueError:
+            payload = {}
+        if isinstance(payload, dict):
+            flush_deferred(payload.get('session_id') or '')
+    except Exception:
+        pass
     try:
         now: float = datetime.now(timezone.utc).timestamp()
 
@@ -130,7 +152,8 @@ def main() -> None:
                     input=fake_input,
                     capture_output=True,
                     text=True,
-                    env={**os.environ, 'CLAUDE_PROJECT_DIR': str(dir_path.parent)},
+                    env={**os.environ, 'CLAUDE_PROJECT_DIR': str(dir_path.parent),
+                         'CLAUDE_DOC_SYNC_DEFER': '0'},
                     timeout=5,
                 )
                 print(
@@ -152,4 +175,6 @@ def main() -> None:
 
 
 if __name__ == '__main__':
+    from lib.hook_telemetry import timed_hook
+    main = timed_hook("userprompt-doc-sync-check.py")(main)
     main()
@@ -25,6 +25,8 @@
 # are swept by /usr/local/sbin/tmp-cleanup.sh via the `claude-pressure-warn-*`
 # wildcard at the >7d hook-state tier.
 
+. "${BASH_SOURCE[0]%/*}/lib/hook-telemetry.sh"
+
 set -u
 
 THRESHOLD=75
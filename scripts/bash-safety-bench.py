@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Per-call latency of pretool-bash-safety.sh vs the native pretool-bash-safety.py.
+
+Replays a corpus of Bash commands through both hooks as Claude Code invokes
+them (a fresh process per call, payload on stdin) and prints p50/p95/mean per
+engine plus the speedup. Every call is also checked for identical exit code,
+stdout and stderr; any divergence is listed and the exit status is 1.
+
+Runs against an isolated HOME / CLAUDE_TMPDIR / verdict-cache so no real grant
+or log is touched. The protected-runtime data file is the live one unless
+--config is given.
+
+Usage:
+  bash-safety-bench.py [--corpus FILE] [--rounds N] [--config FILE]
+
+--corpus takes one command per line (a literal `\\n` in a line becomes a
+newline); the default corpus below mixes routine reads, builds and git with
+commands that trip each rule family.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HOOKS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "hooks")
+ENGINES = {
+    "shell": ["bash", os.path.join(HOOKS_DIR, "pretool-bash-safety.sh")],
+    "native": [sys.executable, os.path.join(HOOKS_DIR, "pretool-bash-safety.py")],
+}
+
+sys.path.insert(0, HOOKS_DIR)
+from lib.hook_telemetry import percentile  # noqa: E402
+
+DEFAULT_CORPUS = [
+    "git status", "git diff --stat", "git log --oneline -20", "ls -la", "pwd",
+    "cat README.md", "grep -rn TODO hooks/ | head -20", "python3 -m pytest -q",
+    "npm test", "yarn build", "cd packages/web && npm run lint",
+    "find . -name '*.py' -newer setup.py", "git add -A && git commit -m 'wip'",
+    "echo \"kill 1234\"", "codex exec --prompt \"do not rm -rf anything\"",
+    "rm -rf build/", "kill -9 1234", "docker compose down", "git stash",
+    "git reset --hard HEAD~1", "git push --force origin main",
+    "systemctl restart nginx", "cat /tmp/claude-bulk-commit-sentinel-x.json",
+    "cat <<EOF > notes.md\nrm -rf /\nEOF",
+]
+
+
+def _load_corpus(path):
+    if not path:
+        return DEFAULT_CORPUS
+    with open(path, encoding="utf-8") as fh:
+        return [line.rstrip("\n").replace("\\n", "\n") for line in fh if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", help="file with one command per line")
+    parser.add_argument("--rounds", type=int, default=3, help="passes over the corpus (default 3)")
+    parser.add_argument("--config", help="protected-runtime data file for the guard")
+    args = parser.parse_args()
+
+    corpus = _load_corpus(args.corpus)
+    with tempfile.TemporaryDirectory(prefix="bash-safety-bench-") as tmp:
+        env = dict(os.environ, HOME=tmp, CLAUDE_TMPDIR=tmp,
+                   CLAUDE_GUARD_CACHE_FILE=os.path.join(tmp, "verdicts.json"))
+        env.pop("CLAUDE_BASH_SAFETY_ENGINE", None)
+        if args.config:
+            env["CLAUDE_PROTECTED_RUNTIME_FILE"] = os.path.abspath(args.config)
+
+        timings = {name: [] for name in ENGINES}
+        mismatches = []
+        for _ in range(args.rounds):
+            for i, command in enumerate(corpus):
+                payload = json.dumps({"tool_name": "Bash", "session_id": f"bench-{i}",
+                                      "tool_input": {"command": command, "cwd": tmp}})
+                results = {}
+                for name, argv in ENGINES.items():
+                    start = time.perf_counter()
+                    proc = subprocess.run(argv, input=payload, text=True,
+                                          capture_output=True, env=env)
+                    timings[name].append((time.perf_counter() - start) * 1000)
+                    results[name] = (proc.returncode, proc.stdout, proc.stderr)
+                if results["shell"] != results["native"] and command not in mismatches:
+                    mismatches.append(command)
+
+    print(f"{len(corpus)} commands x {args.rounds} rounds")
+    for name, samples in timings.items():
+        print(f"  {name:<7} p50 {percentile(samples, 50):7.1f}ms  "
+              f"p95 {percentile(samples, 95):7.1f}ms  mean {statistics.mean(samples):7.1f}ms")
+    speedup = statistics.median(timings["shell"]) / statistics.median(timings["native"])
+    print(f"  speedup (p50): {speedup:.1f}x")
+    for command in mismatches:
+        print(f"  MISMATCH: {command!r}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,8 +5,9 @@ Two phases:
   Phase 1 (BA-side, prediction):  --files <file_list> --output <path>
   Phase 2 (QA-side, verification): --git-diff [--base <ref>] --output <path>
 
-The tool uses Python ast + subprocess grep (no jedi/rope) to produce a JSON
-blast-radius-map.json with these top-level keys:
+The tool uses Python ast plus a persistent reverse reference index
+(reverse_index.py; CLAUDE_BLAST_RADIUS_INDEX=0 falls back to subprocess grep)
+-- no jedi/rope -- to produce a JSON blast-radius-map.json with these top-level keys:
     schema_version, task_id, phase, generated_at,
     scope_filter_applied, analyzed_files, files_to_modify, files_to_create,
     edges[], coverage_gaps[], required_validation[]
@@ -28,6 +29,9 @@ import sys
 from pathlib import Path
 from typing import Iterable
 
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from reverse_index import ReverseIndex  # noqa: E402
+
 # ---------------------------------------------------------------------------
 # Scope filtering -- spec §5.3 mandates excluding venv/, worktrees/, .archive,
 # plugins/. Tool runs from project root; paths are made relative for output.
@@ -49,6 +53,10 @@ def in_scope(path: str) -> bool:
     return not any(frag in norm for frag in EXCLUDE_FRAGMENTS)
 
 
+def index_enabled() -> bool:
+    return os.environ.get("CLAUDE_BLAST_RADIUS_INDEX", "1") != "0"
+
+
 def now_iso() -> str:
     return datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
 
@@ -74,7 +82,8 @@ def python_imports(file_path: Path) -> list[str]:
     return out
 
 
-def find_callers_via_grep(root: Path, basename: str) -> list[str]:
+def find_callers_via_grep(root: Path, basename: str,
+                          index: ReverseIndex | None = None) -> list[str]:
     """Use grep to find files that textually reference `basename`. In-scope filter applied.
 
     Two passes:
@@ -88,8 +97,21 @@ def find_callers_via_grep(root: Path, basename: str) -> list[str]:
          would never trigger because `from util import util` callers use the
          stem only, but a bare `-F util` scan would emit many false-positive
          edges from documentation / log files.
+
+    With `index`, both passes are lookups: pass 1 is the `basename` name
+    token and pass 2 the `py:<stem>` import key. Index tokens are whole
+    words, so `myutil.py` no longer counts as a reference to `util.py`. A
+    basename without a dot is not an index token and is still grepped.
     """
     hits: set[str] = set()
+    if index is not None:
+        if "." in basename:
+            hits |= index.referencing(basename)
+        else:
+            hits |= set(find_callers_via_grep(root, basename))
+        if basename.endswith(".py") and basename[:-3]:
+            hits |= index.referencing("py:" + basename[:-3])
+        return sorted(rel for rel in hits if in_scope(rel))
     # Pass 1: fixed-string basename search (broad, historical).
     try:
         result = subprocess.run(
@@ -157,10 +179,12 @@ def find_callers_via_grep(root: Path, basename: str) -> list[str]:
     return sorted(hits)
 
 
-def find_dependent_tests(root: Path, target_rel: str) -> list[str]:
+def find_dependent_tests(root: Path, target_rel: str,
+                         index: ReverseIndex | None = None) -> list[str]:
     """Search tests/** for files that reference the target by basename, module
     path, or relative path. Returns relative paths of matching test files.
-    Limited to .py / .sh / .md test descriptors under tests/.
+    Limited to .py / .sh / .md test descriptors under tests/. With `index`,
+    dotted needles are index lookups; a dotless one is still grepped.
     """
     tests_root = root / "tests"
     if not tests_root.exists():
@@ -173,6 +197,14 @@ def find_dependent_tests(root: Path, target_rel: str) -> list[str]:
         if mod:
             needles.add(mod)
     hits: set[str] = set()
+    if index is not None:
+        for needle in [n for n in needles if "." in n]:
+            needles.discard(needle)
+            for rel in index.referencing(needle):
+                if (rel.startswith("tests/") and rel.endswith((".py", ".sh", ".md"))
+                        and "/__pycache__/" not in rel and "/.archive/" not in rel
+                        and in_scope(rel) and rel != target_rel):
+                    hits.add(rel)
     for needle in needles:
         try:
             result = subprocess.run(
@@ -230,6 +262,9 @@ def build_report(
     # skipped and counted into top-level omitted_edges_count.
     edges_per_analyzed_source: dict[str, int] = {}
     omitted_edges_count = 0
+    # One index open (load + incremental git-diff refresh) per report; every
+    # analysed file's caller / dependent-test lookups then share it.
+    index = ReverseIndex.open(root, in_scope) if index_enabled() and target_files else None
     current_analyzed: list[str] = [""]  # mutable holder so closure can read
 
     def _try_add_edge(edge: dict) -> None:
@@ -277,7 +312,7 @@ def build_report(
         # `required_validation.callers[]` below.
         bn = os.path.basename(tf_norm)
         if bn:
-            for caller in find_callers_via_grep(root, bn):
+            for caller in find_callers_via_grep(root, bn, index):
                 if caller == tf_norm:
                     continue
                 _try_add_edge({
@@ -292,7 +327,7 @@ def build_report(
         # Per spec 5.3, hooks/ gaps are critical when present.
         sev = severity_for(tf_norm)
         is_hook = sev == "critical" and "hooks/" in tf_norm
-        dependent_tests = find_dependent_tests(root, tf_norm)
+        dependent_tests = find_dependent_tests(root, tf_norm, index)
         if dependent_tests:
             # Tests exist that reference this file — record edges, no gap.
             for t in dependent_tests:
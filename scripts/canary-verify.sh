@@ -9,6 +9,8 @@
 #                  such as session-info.sh / session-git-init.sh — declared
 #                  Won't Have for this cycle; documented in spec §5.5)
 
+. "${BASH_SOURCE[0]%/*}/../hooks/lib/hook-telemetry.sh"
+
 set -uo pipefail
 
 # Suppress ALL stdout for prompt-cache safety per spec §5.5 line 214
@@ -8,12 +8,15 @@ Description: Validates all overnight required outputs declared by the active
 Usage: check-overnight-reports.py --session-id <sid> [--cycle <N>]
 Exit codes: 0 = all required outputs present and valid; 1 = any missing or invalid
 Output: per-entry status lines + summary (N expected, N present, N valid, N missing, N invalid)
+
+Validation verdicts are cached in the cycle's trace.index.json (see
+hooks/lib/trace_index.py), so re-running only re-validates reports that
+changed since the last check or closeout.
 """
 
 from __future__ import annotations
 
 import argparse
-import json
 import os
 import sys
 from pathlib import Path
@@ -21,7 +24,7 @@ from pathlib import Path
 # Make hooks/lib importable.
 _hooks_dir = os.environ.get('CLAUDE_HOOKS_DIR', os.path.join(os.path.dirname(__file__), '..', 'hooks'))
 sys.path.insert(0, str(Path(_hooks_dir).resolve()))
-from lib import contract_runtime  # noqa: E402
+from lib import contract_runtime, trace_index  # noqa: E402
 
 
 def _list_cycle_dirs(base: Path) -> list[int]:
@@ -61,30 +64,28 @@ def _expected_paths(entry: dict) -> list[str]:
     return []
 
 
-def _read_json(path: Path) -> dict | None:
-    try:
-        return json.loads(path.read_text(encoding='utf-8'))
-    except (OSError, json.JSONDecodeError):
-        return None
-
-
 def _resolve_path(relpath: str, project_dir: Path) -> Path:
     return Path(relpath) if relpath.startswith('/') else project_dir / relpath
 
 
-def _check_one_path(path: Path, schema_name: str) -> tuple[str, list[str]]:
+def _trace_path(project_dir: Path, session_id: str, cycle_id: int) -> Path:
+    return project_dir / 'docs' / 'dev' / 'overnight' / session_id / f'cycle-{cycle_id}' / 'trace.jsonl'
+
+
+def _check_one_path(index: trace_index.TraceIndex, path: Path,
+                    schema_name: str) -> tuple[str, list[str]]:
     if not path.exists():
         return 'missing', [f'file not found: {path}']
-    record = _read_json(path)
-    if record is None:
+    result = index.verdict(path, schema_name)
+    if result is None:
         return 'present_invalid', [f'invalid JSON: {path}']
-    result = contract_runtime.validate(record, schema_name)
     if not result['ok']:
         return 'present_invalid', [f'{path}: {e}' for e in result['errors']]
     return 'present_valid', []
 
 
-def _check_entry(entry: dict, project_dir: Path) -> tuple[str, str, list[str]]:
+def _check_entry(index: trace_index.TraceIndex, entry: dict,
+                 project_dir: Path) -> tuple[str, str, list[str]]:
     """Return (status, label, errors). status in {present_valid, present_invalid, missing}."""
     label = f"step={entry.get('step')} role={entry.get('role')} pipeline={entry.get('pipeline_id')}"
     paths = _expected_paths(entry)
@@ -93,7 +94,7 @@ def _check_entry(entry: dict, project_dir: Path) -> tuple[str, str, list[str]]:
     schema_name = entry.get('schema_name', '')
     for relpath in paths:
         candidate = _resolve_path(relpath, project_dir)
-        status, errs = _check_one_path(candidate, schema_name)
+        status, errs = _check_one_path(index, candidate, schema_name)
         if status != 'present_valid':
             return status, label, errs
     return 'present_valid', label, []
@@ -138,7 +139,8 @@ def main() -> int:
         return 1
 
     project_dir = Path(os.environ.get('CLAUDE_PROJECT_DIR', os.getcwd()))
-    rows = [_check_entry(e, project_dir) for e in contract.get('required_calls', [])]
+    with trace_index.TraceIndex.open(_trace_path(project_dir, args.session_id, cycle_id)) as index:
+        rows = [_check_entry(index, e, project_dir) for e in contract.get('required_calls', [])]
     _print_rows(rows)
     expected, present, valid, missing, invalid = _summarize(rows)
     print(f'SUMMARY: expected={expected} present={present} valid={valid} '
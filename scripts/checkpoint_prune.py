@@ -0,0 +1,323 @@
+"""
+checkpoint_prune.py — streaming rewrite engine behind checkpoint-prune.sh.
+
+checkpoint-prune.sh used to rebuild each refs/checkpoints/* chain one commit
+at a time: per kept commit one `git rev-parse`, seven `git log -1` calls and
+one `git commit-tree`, i.e. ~1800 process spawns for one 200-commit ref. This
+engine rewrites every ref in one pass with two long-lived git processes:
+
+  git cat-file --batch     reads the raw commit objects of every kept commit
+  git fast-import          writes the new chains, streamed from those objects
+
+For each ref being pruned the stream is
+
+  reset refs/checkpoint-prune/<pid>            (next commit has no parent)
+  commit ... mark :N                           (oldest kept commit, now a root)
+  author/committer copied byte for byte from the raw commit
+  data <exact message bytes>
+  M 040000 <original tree> ""                  (same tree, no rehashing)
+  ... repeated oldest -> newest, each commit parented on the previous one
+
+so tree, message, author and committer (name, email, date, timezone) are
+identical to the originals and only the parent chain changes. Rewriting an
+already-pruned chain reproduces the same SHAs.
+
+fast-import only moves the scratch ref; the real refs are then moved by
+`git update-ref <ref> <new> <old>` after checking that the new tip has the
+original tip's tree, so a writer that advanced a ref in the meantime makes
+that one ref fail cleanly, as before.
+
+Dry run (--dry-run) changes nothing in the repo. It reports, per ref, the
+commits that would be dropped, the on-disk size of the objects that only
+those commits reach (`git rev-list --disk-usage`, reclaimed by the reflog
+expire + gc step), and how long the rewrite takes, measured by streaming it
+into a throwaway repo that borrows this repo's objects as an alternate.
+
+Stdlib-only; called by checkpoint-prune.sh after argument and repo checks.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+
+PREFIX = "refs/checkpoints/"
+
+
+class PruneError(Exception):
+    """A git step of the rewrite failed; no ref has been moved."""
+
+
+@dataclass
+class RefPlan:
+    ref: str
+    tip: str
+    total: int
+    kept: list = field(default_factory=list)  # oldest kept -> tip
+    new_tip: str = ""
+
+
+def _git(*args: str, input: bytes | None = None, env: dict | None = None) -> bytes:
+    proc = subprocess.run(["git", *args], input=input, capture_output=True, env=env)
+    if proc.returncode != 0:
+        raise PruneError(f"git {args[0]} failed: {proc.stderr.decode(errors='replace').strip()}")
+    return proc.stdout
+
+
+def checkpoint_refs() -> list[tuple[str, str]]:
+    out = _git("for-each-ref", "--format=%(refname) %(objectname)", PREFIX)
+    return [tuple(line.split(" ", 1)) for line in out.decode().splitlines() if line]
+
+
+def plan_refs(retention: int) -> list[RefPlan]:
+    """Every checkpoint ref with its commit count; kept commits for those over `retention`."""
+    plans = []
+    for ref, tip in checkpoint_refs():
+        total = int(_git("rev-list", "--count", tip))
+        plan = RefPlan(ref, tip, total)
+        if total > retention:
+            newest = _git("rev-list", "--topo-order", f"--max-count={retention}", tip).split()
+            plan.kept = [c.decode() for c in reversed(newest)]
+        plans.append(plan)
+    return plans
+
+
+def _split_commit(raw: bytes) -> tuple[dict, bytes]:
+    """Header fields (first occurrence) and message of a raw commit object."""
+    head, _, message = raw.partition(b"\n\n")
+    fields: dict = {}
+    for line in head.split(b"\n"):
+        if line.startswith(b" "):
+            continue  # continuation of a multi-line header (gpgsig, mergetag)
+        key, _, value = line.partition(b" ")
+        fields.setdefault(key, value)
+    return fields, message
+
+
+def _feed(proc: subprocess.Popen, oids: list[str]) -> None:
+    try:
+        for oid in oids:
+            proc.stdin.write(oid.encode() + b"\n")
+        proc.stdin.close()
+    except BrokenPipeError:
+        pass
+
+
+def write_stream(plans: list[RefPlan], scratch_ref: str, out) -> None:
+    """Write the fast-import stream for `plans` to `out`; marks are 1..n in order."""
+    oids = [c for p in plans for c in p.kept]
+    cat = subprocess.Popen(["git", "cat-file", "--batch"], stdin=subprocess.PIPE,
+                           stdout=subprocess.PIPE)
+    feeder = threading.Thread(target=_feed, args=(cat, oids), daemon=True)
+    feeder.start()
+    mark = 0
+    try:
+        for plan in plans:
+            out.write(b"reset %s\n\n" % scratch_ref.encode())
+            for oid in plan.kept:
+                header = cat.stdout.readline().split()
+                if len(header) != 3 or header[1] != b"commit":
+                    raise PruneError(f"cat-file: {oid} is not a commit")
+                raw = cat.stdout.read(int(header[2]) + 1)[:-1]
+                fields, message = _split_commit(raw)
+                mark += 1
+                out.write(b"commit %s\nmark :%d\n" % (scratch_ref.encode(), mark))
+                out.write(b"author %s\ncommitter %s\n" % (fields[b"author"], fields[b"committer"]))
+                if b"encoding" in fields:
+                    out.write(b"encoding %s\n" % fields[b"encoding"])
+                out.write(b"data %d\n%s\n" % (len(message), message))
+                out.write(b'M 040000 %s ""\n\n' % fields[b"tree"])
+        out.write(b"done\n")
+    finally:
+        cat.stdout.close()
+        cat.wait()
+        feeder.join()
+
+
+def fast_import(plans: list[RefPlan], env: dict | None = None) -> None:
+    """Stream every kept chain through one fast-import; fills in plan.new_tip."""
+    scratch_ref = f"refs/checkpoint-prune/{os.getpid()}"
+    with tempfile.TemporaryDirectory(prefix="checkpoint-prune.") as tmp:
+        marks = os.path.join(tmp, "marks")
+        proc = subprocess.Popen(
+            ["git", "fast-import", "--quiet", "--force", "--done", f"--export-marks={marks}"],
+            stdin=subprocess.PIPE, stderr=subprocess.PIPE, env=env)
+        try:
+            write_stream(plans, scratch_ref, proc.stdin)
+            proc.stdin.close()
+        except BrokenPipeError:
+            pass
+        except BaseException:
+            proc.kill()
+            proc.wait()
+            raise
+        err = proc.stderr.read()
+        if proc.wait() != 0:
+            raise PruneError(f"fast-import failed: {err.decode(errors='replace').strip()}")
+        _git("update-ref", "-d", scratch_ref, env=env)
+        by_mark = {}
+        with open(marks, encoding="ascii") as f:
+            for line in f:
+                mark, oid = line.split()
+                by_mark[int(mark[1:])] = oid
+    mark = 0
+    for plan in plans:
+        mark += len(plan.kept)
+        plan.new_tip = by_mark[mark]
+
+
+def _trees(revs: list[str]) -> list[str]:
+    spec = "".join(f"{r}^{{tree}}\n" for r in revs)
+    out = _git("cat-file", "--batch-check=%(objectname)", input=spec.encode())
+    return out.decode().split()
+
+
+def apply(plans: list[RefPlan]) -> list[RefPlan]:
+    """Move each ref to its rewritten tip (tree check + CAS); returns the refs that failed."""
+    failed = []
+    trees = _trees([r for p in plans for r in (p.tip, p.new_tip)])
+    for i, plan in enumerate(plans):
+        if trees[2 * i] != trees[2 * i + 1]:
+            print(f"Error: tree mismatch after rebuild (orig={trees[2 * i]} new={trees[2 * i + 1]})",
+                  file=sys.stderr)
+            failed.append(plan)
+            continue
+        try:
+            _git("update-ref", plan.ref, plan.new_tip, plan.tip)
+        except PruneError:
+            print(f"Error: update-ref failed for {plan.ref} (CAS mismatch?)", file=sys.stderr)
+            failed.append(plan)
+    return failed
+
+
+def reclaimable_bytes(plans: list[RefPlan]) -> int | None:
+    """Disk usage of objects only the dropped commits reach (None if git cannot tell)."""
+    pruned = {p.ref for p in plans}
+    keep = [oid for ref, oid in _all_refs() if ref not in pruned]
+    keep += _trees([c for p in plans for c in p.kept])
+    spec = "".join(f"{p.tip}\n" for p in plans) + "".join(f"^{oid}\n" for oid in keep)
+    try:
+        out = _git("rev-list", "--objects", "--disk-usage", "--stdin", input=spec.encode())
+    except PruneError:
+        return None  # --disk-usage needs git >= 2.38
+    return int(out)
+
+
+def _all_refs() -> list[tuple[str, str]]:
+    out = _git("for-each-ref", "--format=%(refname) %(objectname)")
+    refs = [tuple(line.split(" ", 1)) for line in out.decode().splitlines() if line]
+    try:
+        refs.append(("HEAD", _git("rev-parse", "--verify", "-q", "HEAD").decode().strip()))
+    except PruneError:
+        pass  # unborn HEAD
+    return refs
+
+
+def timed_scratch_import(plans: list[RefPlan]) -> float:
+    """Seconds for the rewrite, streamed into a scratch repo that borrows our objects."""
+    objects = os.path.abspath(_git("rev-parse", "--git-path", "objects").decode().strip())
+    scratch = tempfile.mkdtemp(prefix="checkpoint-prune-dry.")
+    try:
+        _git("init", "-q", "--bare", scratch)
+        with open(os.path.join(scratch, "objects", "info", "alternates"), "w") as f:
+            f.write(objects + "\n")
+        env = dict(os.environ, GIT_DIR=scratch)
+        start = time.monotonic()
+        fast_import(plans, env=env)
+        return time.monotonic() - start
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+def _human(n: int) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if n < 1024:
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GiB"
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Trim refs/checkpoints/* to the newest N commits.")
+    ap.add_argument("--retention", type=int, required=True)
+    ap.add_argument("--reflog-expire", default="30.days")
+    ap.add_argument("--gc-prune", default="30.days.ago")
+    ap.add_argument("--dry-run", action="store_true")
+    args = ap.parse_args(argv)
+
+    try:
+        plans = plan_refs(args.retention)
+    except PruneError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if not plans:
+        print("checkpoint-prune: no refs/checkpoints/* found — nothing to do")
+        return 0
+    todo = [p for p in plans if p.kept]
+    skipped = len(plans) - len(todo)
+
+    if args.dry_run:
+        size, secs = None, 0.0
+        if todo:
+            try:
+                size = reclaimable_bytes(todo)
+                secs = timed_scratch_import(todo)
+            except PruneError as e:
+                print(f"Error: {e}", file=sys.stderr)
+                return 1
+        for plan in plans:
+            if plan.kept:
+                print(f"  {plan.ref}: {plan.total} -> {len(plan.kept)} commits "
+                      f"(would drop {plan.total - len(plan.kept)})")
+            else:
+                print(f"  {plan.ref}: {plan.total} commits (<= {args.retention}) — no pruning needed")
+        if todo:
+            kept = sum(len(p.kept) for p in todo)
+            print(f"checkpoint-prune: dry run — {kept} commits to rewrite in ~{secs:.1f}s "
+                  f"(measured in a scratch repo; gc not included)")
+            if size is None:
+                print("checkpoint-prune: reclaimable size unknown (needs git >= 2.38)")
+            else:
+                print(f"checkpoint-prune: ~{_human(size)} reclaimable after reflog expire + gc")
+        print(f"checkpoint-prune: dry run — would prune={len(todo)} skipped={skipped}; nothing changed")
+        return 0
+
+    failed = []
+    if todo:
+        try:
+            fast_import(todo)
+            failed = apply(todo)
+        except PruneError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            failed = todo
+    for plan in plans:
+        if not plan.kept:
+            print(f"  {plan.ref}: {plan.total} commits (<= {args.retention}) — no pruning needed")
+        elif plan in failed:
+            print(f"  {plan.ref}: rebuild failed — leaving ref unchanged", file=sys.stderr)
+        else:
+            print(f"  {plan.ref}: {plan.total} -> {len(plan.kept)} commits "
+                  f"(rewrote chain, new tip {plan.new_tip[:12]})")
+    pruned = len(todo) - len(failed)
+    print(f"checkpoint-prune: pruned={pruned} skipped={skipped} failed={len(failed)}")
+
+    if pruned:
+        print(f"checkpoint-prune: reflog expire (--expire={args.reflog_expire}) "
+              f"+ gc (--prune={args.gc_prune})")
+        subprocess.run(["git", "reflog", "expire", f"--expire={args.reflog_expire}", "--all"],
+                       capture_output=True)
+        subprocess.run(["git", "gc", f"--prune={args.gc_prune}"], capture_output=True)
+    else:
+        print("checkpoint-prune: no pruning performed — skipping gc")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
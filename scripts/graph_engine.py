@@ -0,0 +1,699 @@
+"""
+graph_engine.py — compact memory-mapped graph + in-process query engine.
+
+graph.json is a NetworkX node-link dump that runs to hundreds of MB on a
+monorepo. graphify_lib.load_graph json-parses all of it and then scrubs every
+node and link, and each /dev run did that several times across
+graphify-query.py, graphify-enrich.py and graphify-maintain.py. This module
+derives a compact binary form once per graph version and mmaps it, so an
+open is a stat + mmap and memory stays flat however large the graph is.
+
+Compact file (<cacheDir>/graph-index.bin, native byte order, 8-byte aligned
+sections):
+  string table   offsets (int64) + one UTF-8 blob: node ids first (string i
+                 is node i's id), then labels, source_file basenames and
+                 relations, each interned once
+  nodes          label / source_file / basename string indexes per node, a
+                 sensitive-flag bitmap (node_references_sensitive, computed
+                 at build time), the non-sensitive nodes in file order, and
+                 permutations sorted by id / label / basename for lookups, plus
+                 by normalized label and by reversed basename for the path
+                 matching of resolve_paths_to_node_ids
+  links          source / target / relation per link in file order — only the
+                 links load_graph keeps — plus CSR edge lists in both
+                 directions (orientation as in graph.json: source=depender,
+                 target=dependency):
+                   out_off[i]..out_off[i+1] -> out_link   links with source == i
+                   in_off[i]..in_off[i+1]   -> in_link    links with target == i
+
+Only id / label / source_file (nodes) and source / target / relation
+(links) are kept: the fields the query/enrich wrappers read. graphify-
+maintain's semantic gate diffs full link dicts and so still uses load_graph.
+
+Freshness: the header records graph.json's (size, mtime_ns), its content hash
+and when the file was built. A stat match is trusted unless graph.json was
+modified within a second of the build (racy); otherwise the content hash is
+compared, and a touched-but-identical graph.json (every `graphify update`)
+only restamps the header. The format, byte order and EXCLUDE_FRAGMENTS are
+part of the header key, so changing any of them rebuilds. Sidecar I/O is
+advisory: an unwritable cache dir just keeps the built bytes in memory.
+
+open_graph() returns the compact graph behind a read-only, load_graph-shaped
+view (CompactGraph); GraphIndex.query / .affected answer the budgeted-BFS and
+reverse-affected enrichment for every anchor / seed of a run in one batch,
+replacing per-anchor `graphify query` / `graphify affected` subprocesses.
+Iterating the view decodes every node or link, so the wrappers go through
+node_lookup / node_labels / incident_links / iter_links /
+resolve_paths_to_node_ids, which answer a CompactGraph from the sorted
+permutations and the CSR lists and a load_graph dict as before.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import deque
+from collections.abc import Container, Iterable, Iterator, Mapping, Sequence
+from pathlib import Path
+
+import graphify_lib
+from graphify_lib import (
+    EXCLUDE_FRAGMENTS, STATUS_OK, _normalize_path, is_compact_graph_enabled, load_graph,
+    node_references_sensitive, should_exclude_path,
+)
+
+INDEX_NAME = "graph-index.bin"
+_MAGIC = b"GRAPHIX3"
+# magic, config key, content sha256, graph size, graph mtime_ns, built at (ns),
+# nodes, safe nodes, links, strings, string blob bytes, meta bytes
+_HEADER = struct.Struct("<8s64s64sQqqQQQQQQ")
+_CONFIG_KEY = hashlib.sha256("\0".join(
+    (_MAGIC.decode(), sys.byteorder) + EXCLUDE_FRAGMENTS).encode("utf-8")).hexdigest().encode("ascii")
+_RACY_NS = 1_000_000_000
+
+QUERY_DEPTH = 3
+AFFECTED_DEPTH = 2
+MAX_START_NODES = 10
+MAX_AFFECTED_NODES = 100
+
+
+def _layout(nodes: int, safe: int, links: int, strings: int, blob: int, meta: int):
+    """(name, typecode, count) for every section after the header, in file order."""
+    return (
+        ("str_off", "q", strings + 1), ("blob", "B", blob), ("meta", "B", meta),
+        ("node_label", "i", nodes), ("node_sf", "i", nodes), ("node_base", "i", nodes),
+        ("sensitive", "B", (nodes + 7) // 8), ("safe_nodes", "i", safe),
+        ("id_order", "i", nodes), ("label_order", "i", nodes), ("base_order", "i", nodes),
+        ("nlabel_order", "i", nodes), ("rbase_order", "i", nodes),
+        ("link_src", "i", links), ("link_tgt", "i", links), ("link_rel", "i", links),
+        ("out_off", "i", nodes + 1), ("out_link", "i", links),
+        ("in_off", "i", nodes + 1), ("in_link", "i", links),
+    )
+
+
+def _csr(n: int, ends: array) -> tuple[array, array]:
+    """Counting-sort link indexes by their endpoint in `ends` -> (offsets, link ids)."""
+    off = array("i", bytes(4 * (n + 1)))
+    for e in ends:
+        off[e + 1] += 1
+    for i in range(n):
+        off[i + 1] += off[i]
+    cursor = array("i", off[:n])
+    order = array("i", bytes(4 * len(ends)))
+    for k, e in enumerate(ends):
+        order[cursor[e]] = k
+        cursor[e] += 1
+    return off, order
+
+
+def _build(raw: dict, content_hash: str, size: int, mtime_ns: int) -> bytes:
+    """Serialize a raw (unscrubbed) node-link dict into the compact format."""
+    strings: list[str] = []
+    interned: dict[str, int] = {}
+
+    def intern(s: str) -> int:
+        idx = interned.get(s)
+        if idx is None:
+            idx = interned[s] = len(strings)
+            strings.append(s)
+        return idx
+
+    raw_nodes = raw.get("nodes") if isinstance(raw.get("nodes"), list) else []
+    raw_links = raw.get("links") if isinstance(raw.get("links"), list) else []
+    nodes: list[dict] = []
+    sensitive_ids: set[str] = set()
+    for n in raw_nodes:
+        nid = n.get("id") if isinstance(n, dict) else None
+        if not isinstance(nid, str):
+            continue
+        if node_references_sensitive(n):
+            sensitive_ids.add(nid)
+        if nid not in interned:
+            intern(nid)
+            nodes.append(n)
+    count = len(nodes)
+
+    def text(v) -> str:
+        return v if isinstance(v, str) else ("" if v is None else str(v))
+
+    node_label = array("i", (intern(text(n.get("label"))) for n in nodes))
+    node_sf = array("i", (intern(text(n.get("source_file"))) for n in nodes))
+    node_base = array("i", (intern(strings[s].replace("\\", "/").rsplit("/", 1)[-1])
+                            for s in node_sf))
+    sensitive = bytearray((count + 7) // 8)
+    safe_nodes = array("i")
+    for i in range(count):
+        if strings[i] in sensitive_ids:
+            sensitive[i >> 3] |= 1 << (i & 7)
+        else:
+            safe_nodes.append(i)
+
+    # Same drop rules as load_graph: links touching a sensitive node, with a
+    # sensitive source_file, or with an endpoint that is not a kept node.
+    link_src, link_tgt, link_rel = array("i"), array("i"), array("i")
+    for l in raw_links:
+        if not isinstance(l, dict):
+            continue
+        src, tgt = l.get("source"), l.get("target")
+        if not isinstance(src, str) or not isinstance(tgt, str):
+            continue
+        if src in sensitive_ids or tgt in sensitive_ids:
+            continue
+        sf = l.get("source_file")
+        if isinstance(sf, str) and should_exclude_path(sf):
+            continue
+        s, t = interned.get(src, count), interned.get(tgt, count)
+        if s >= count or t >= count:
+            continue
+        link_src.append(s)
+        link_tgt.append(t)
+        link_rel.append(intern(text(l.get("relation"))))
+    out_off, out_link = _csr(count, link_src)
+    in_off, in_link = _csr(count, link_tgt)
+
+    encoded = [s.encode("utf-8", "surrogatepass") for s in strings]
+    str_off = array("q", [0])
+    total = 0
+    for b in encoded:
+        total += len(b)
+        str_off.append(total)
+    meta = json.dumps({"directed": raw.get("directed"), "graph": raw.get("graph")}).encode("utf-8")
+    sections = {
+        "str_off": str_off, "blob": b"".join(encoded), "meta": meta,
+        "node_label": node_label, "node_sf": node_sf, "node_base": node_base,
+        "sensitive": bytes(sensitive), "safe_nodes": safe_nodes,
+        "id_order": array("i", sorted(range(count), key=strings.__getitem__)),
+        "label_order": array("i", sorted(range(count), key=lambda i: strings[node_label[i]])),
+        "base_order": array("i", sorted(range(count), key=lambda i: strings[node_base[i]])),
+        "nlabel_order": array("i", sorted(range(count),
+                                          key=lambda i: _normalize_path(strings[node_label[i]]))),
+        "rbase_order": array("i", sorted(range(count), key=lambda i: strings[node_base[i]][::-1])),
+        "link_src": link_src, "link_tgt": link_tgt, "link_rel": link_rel,
+        "out_off": out_off, "out_link": out_link, "in_off": in_off, "in_link": in_link,
+    }
+    parts = [_HEADER.pack(_MAGIC, _CONFIG_KEY, content_hash.encode("ascii"), size, mtime_ns,
+                          time.time_ns(), count, len(safe_nodes), len(link_src), len(strings),
+                          total, len(meta))]
+    for name, _code, _count in _layout(count, len(safe_nodes), len(link_src), len(strings),
+                                       total, len(meta)):
+        data = bytes(sections[name])
+        parts.append(data + b"\0" * (-len(data) % 8))
+    return b"".join(parts)
+
+
+class _Strings(Sequence):
+    """Lazily decoded view of the interned string table."""
+
+    def __init__(self, off, blob) -> None:
+        self._off = off
+        self._blob = blob
+
+    def __len__(self) -> int:
+        return len(self._off) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[k] for k in range(*i.indices(len(self)))]
+        return str(self._blob[self._off[i]:self._off[i + 1]], "utf-8", "surrogatepass")
+
+
+class GraphIndex:
+    """Compact graph over a bytes-like buffer (usually an mmap of the sidecar)."""
+
+    def __init__(self, buf) -> None:
+        view = memoryview(buf)
+        if len(view) < _HEADER.size:
+            raise ValueError("truncated graph index")
+        (magic, config_key, content_hash, self.graph_size, self.graph_mtime_ns, self.built_ns,
+         nodes, safe, links, nstrings, blob, meta) = _HEADER.unpack_from(view)
+        if magic != _MAGIC or config_key != _CONFIG_KEY:
+            raise ValueError("foreign graph index")
+        self._buf = buf  # keeps the mmap alive for the views below
+        self.content_hash = content_hash.decode("ascii")
+        pos = _HEADER.size
+        for name, code, count in _layout(nodes, safe, links, nstrings, blob, meta):
+            size = count * (8 if code == "q" else 4 if code == "i" else 1)
+            if pos + size > len(view):
+                raise ValueError("truncated graph index")
+            section = view[pos:pos + size]
+            setattr(self, name, section if code == "B" else section.cast(code))
+            pos += size + (-size % 8)
+        self.strings = _Strings(self.str_off, self.blob)
+        self.node_count = nodes
+
+    def is_fresh(self, st: os.stat_result) -> bool:
+        """True when graph.json's stat still matches and was not racy at build time."""
+        return (st.st_size == self.graph_size and st.st_mtime_ns == self.graph_mtime_ns
+                and self.built_ns - st.st_mtime_ns >= _RACY_NS)
+
+    def restamped(self, st: os.stat_result) -> bytes:
+        """This index with graph.json's new stat — for a touched but unchanged graph."""
+        head = list(_HEADER.unpack_from(self._buf))
+        head[3:6] = [st.st_size, st.st_mtime_ns, time.time_ns()]
+        return _HEADER.pack(*head) + bytes(memoryview(self._buf)[_HEADER.size:])
+
+    # -- node helpers ------------------------------------------------------
+    def is_sensitive(self, i: int) -> bool:
+        return bool(self.sensitive[i >> 3] >> (i & 7) & 1)
+
+    def node(self, i: int, **extra) -> dict:
+        return {"id": self.strings[i], "label": self.strings[self.node_label[i]],
+                "source_file": self.strings[self.node_sf[i]], **extra}
+
+    def node_dict(self, i: int) -> dict:
+        """Node i shaped like a load_graph node (empty label/source_file omitted)."""
+        out = {"id": self.strings[i]}
+        label, sf = self.strings[self.node_label[i]], self.strings[self.node_sf[i]]
+        if label:
+            out["label"] = label
+        if sf:
+            out["source_file"] = sf
+        return out
+
+    def link_dict(self, k: int) -> dict:
+        out = {"source": self.strings[self.link_src[k]], "target": self.strings[self.link_tgt[k]]}
+        rel = self.strings[self.link_rel[k]]
+        if rel:
+            out["relation"] = rel
+        return out
+
+    def _edge(self, k: int) -> dict:
+        return {"source": self.strings[self.link_src[k]], "target": self.strings[self.link_tgt[k]],
+                "relation": self.strings[self.link_rel[k]]}
+
+    def _equal(self, order, column, target: str) -> list[int]:
+        """Node indexes whose string in `column` (None: the id) equals target."""
+        strings = self.strings
+        key = strings.__getitem__ if column is None else (lambda i: strings[column[i]])
+        return sorted(_span(order, key, target))
+
+    def named(self, labels: Iterable[str] = (), basenames: Iterable[str] = ()) -> list[int]:
+        """Non-sensitive nodes whose label is one of `labels` or whose source_file
+        basename is one of `basenames`, in file order."""
+        hits = set()
+        for label in set(labels):
+            hits.update(self._equal(self.label_order, self.node_label, label))
+        for base in set(basenames):
+            hits.update(self._equal(self.base_order, self.node_base, base))
+        return sorted(i for i in hits if not self.is_sensitive(i))
+
+    def path_candidates(self, norm: str, base: str) -> list[int]:
+        """Non-sensitive nodes, in file order, that may match graphify_lib's
+        resolve_paths_to_node_ids test for a normalized path and its basename.
+
+        A superset, for the caller to re-test: source_file basename equal to
+        base (covers the exact, suffix and basename matches) or to a suffix of
+        base (a bare source_file that norm ends with); for a bare file name, a
+        basename ending with it (a source_file that ends with norm); and a
+        normalized label equal to base or norm.
+        """
+        strings, node_base, node_label = self.strings, self.node_base, self.node_label
+        hits = set(self.named(basenames={base[j:] for j in range(len(base))} | {base}))
+        if "/" not in norm:
+            rbase = base[::-1]
+            hits.update(_span(self.rbase_order,
+                              lambda i: strings[node_base[i]][::-1][:len(rbase)], rbase))
+        for target in {base, norm}:
+            hits.update(_span(self.nlabel_order,
+                              lambda i: _normalize_path(strings[node_label[i]]), target))
+        return sorted(i for i in hits if not self.is_sensitive(i))
+
+    def incident(self, node_indexes: Iterable[int]) -> list[int]:
+        """Links with source or target among node_indexes, in file order."""
+        hits = set()
+        for i in node_indexes:
+            hits.update(self.out_link[self.out_off[i]:self.out_off[i + 1]].tolist())
+            hits.update(self.in_link[self.in_off[i]:self.in_off[i + 1]].tolist())
+        return sorted(hits)
+
+    def node_index(self, node_id: str) -> int | None:
+        """Index of a non-sensitive node by id, else None."""
+        hits = self._equal(self.id_order, None, node_id)
+        return hits[0] if hits and not self.is_sensitive(hits[0]) else None
+
+    def find_anchor(self, anchor: str) -> list[int]:
+        """Start nodes for an anchor: exact id / label / source_file (or path-suffix)
+        matches, else a case-insensitive label substring match. Capped at MAX_START_NODES."""
+        norm = anchor.replace("\\", "/")
+        base = norm.rsplit("/", 1)[-1]
+        hits = self._equal(self.id_order, None, anchor)
+        candidates = set(self._equal(self.label_order, self.node_label, anchor))
+        candidates.update(self._equal(self.label_order, self.node_label, norm))
+        for i in self._equal(self.base_order, self.node_base, base):
+            sf = self.strings[self.node_sf[i]].replace("\\", "/")
+            if sf == norm or sf.endswith("/" + norm):
+                candidates.add(i)
+        hits += sorted(candidates)
+        if not hits and norm:
+            needle = norm.lower()
+            hits = [i for i in self.safe_nodes
+                    if needle in self.strings[self.node_label[i]].lower()]
+        hits = [i for i in dict.fromkeys(hits) if not self.is_sensitive(i)]
+        return hits[:MAX_START_NODES]
+
+    # -- queries -----------------------------------------------------------
+    def query(self, anchors: list[str], budget: int = 2000,
+              depth: int = QUERY_DEPTH) -> list[dict]:
+        """Budgeted BFS (both directions) around each anchor — the `graphify query` analogue.
+
+        Nodes/edges are emitted in BFS order until their estimated token cost
+        would exceed `budget`; `truncated` records whether that cut anything.
+        """
+        results = []
+        for anchor in anchors:
+            starts = self.find_anchor(anchor)
+            nodes_out: list[dict] = []
+            edges_out: list[dict] = []
+            seen = set(starts)
+            seen_edges: set[tuple[int, int, int]] = set()
+            used = 0
+            truncated = False
+            for i in starts:
+                item = self.node(i, depth=0)
+                used += _tokens(item)
+                nodes_out.append(item)
+            queue = deque((i, 0) for i in starts)
+            while queue and not truncated:
+                i, d = queue.popleft()
+                if d >= depth:
+                    continue
+                incident = [(k, self.link_tgt[k]) for k in
+                            self.out_link[self.out_off[i]:self.out_off[i + 1]].tolist()]
+                incident += [(k, self.link_src[k]) for k in
+                             self.in_link[self.in_off[i]:self.in_off[i + 1]].tolist()]
+                for k, other in incident:
+                    edge = (self.link_src[k], self.link_tgt[k], self.link_rel[k])
+                    if edge in seen_edges:
+                        continue
+                    items = [self._edge(k)]
+                    if other not in seen:
+                        items.append(self.node(other, depth=d + 1))
+                    cost = sum(_tokens(item) for item in items)
+                    if used + cost > budget:
+                        truncated = True
+                        break
+                    used += cost
+                    seen_edges.add(edge)
+                    edges_out.append(items[0])
+                    if len(items) > 1:
+                        seen.add(other)
+                        nodes_out.append(items[1])
+                        queue.append((other, d + 1))
+            results.append({
+                "anchor": anchor,
+                "start_node_ids": [self.strings[i] for i in starts],
+                "nodes": nodes_out,
+                "edges": edges_out,
+                "token_estimate": used,
+                "truncated": truncated,
+            })
+        return results
+
+    def affected(self, node_ids: list[str], depth: int = AFFECTED_DEPTH,
+                 relations: frozenset[str] | None = None,
+                 max_nodes: int = MAX_AFFECTED_NODES) -> list[dict]:
+        """Reverse BFS over links targeting each seed — the `graphify affected` analogue.
+
+        `relations` restricts which links count as a dependency (None: all).
+        Each affected node carries its depth, the relation and the node it
+        depends on (`via`).
+        """
+        rel_ok = None
+        if relations is not None:
+            rel_ok = {r for r in set(self.link_rel) if self.strings[r] in relations}
+        results = []
+        for node_id in node_ids:
+            seed = self.node_index(node_id)
+            affected: list[dict] = []
+            truncated = False
+            if seed is not None:
+                seen = {seed}
+                queue = deque([(seed, 0)])
+                while queue and not truncated:
+                    i, d = queue.popleft()
+                    if d >= depth:
+                        continue
+                    for k in self.in_link[self.in_off[i]:self.in_off[i + 1]].tolist():
+                        src, rel = self.link_src[k], self.link_rel[k]
+                        if src in seen or (rel_ok is not None and rel not in rel_ok):
+                            continue
+                        if len(affected) >= max_nodes:
+                            truncated = True
+                            break
+                        seen.add(src)
+                        affected.append(self.node(src, depth=d + 1, relation=self.strings[rel],
+                                                  via=self.strings[i]))
+                        queue.append((src, d + 1))
+            results.append({"node_id": node_id, "found": seed is not None,
+                            "affected": affected, "truncated": truncated})
+        return results
+
+    @classmethod
+    def from_graph(cls, raw: dict) -> "GraphIndex":
+        """In-memory index for a raw node-link dict (no sidecar)."""
+        return cls(_build(raw, "0" * 64, 0, 0))
+
+
+def _span(order, key, target: str) -> list[int]:
+    """Entries of `order` (sorted by key) whose key equals target."""
+    lo = bisect_left(order, target, key=key)
+    return order[lo:bisect_right(order, target, lo=lo, key=key)].tolist()
+
+
+def _tokens(item: dict) -> int:
+    """Rough token cost of one emitted item (1 token ≈ 4 chars, as the wrappers count)."""
+    return max(1, len(json.dumps(item, ensure_ascii=False)) // 4)
+
+
+# ---------------------------------------------------------------------------
+# load_graph-shaped views
+# ---------------------------------------------------------------------------
+
+class _NodeView(Sequence):
+    def __init__(self, index: GraphIndex) -> None:
+        self._index = index
+
+    def __len__(self) -> int:
+        return len(self._index.safe_nodes)
+
+    def __getitem__(self, k):
+        if isinstance(k, slice):
+            return [self[j] for j in range(*k.indices(len(self)))]
+        return self._index.node_dict(self._index.safe_nodes[k])
+
+    def __iter__(self):
+        for i in self._index.safe_nodes:
+            yield self._index.node_dict(i)
+
+
+class _LinkView(Sequence):
+    def __init__(self, index: GraphIndex) -> None:
+        self._index = index
+
+    def __len__(self) -> int:
+        return len(self._index.link_src)
+
+    def __getitem__(self, k):
+        if isinstance(k, slice):
+            return [self[j] for j in range(*k.indices(len(self)))]
+        if not -len(self) <= k < len(self):
+            raise IndexError(k)
+        return self._index.link_dict(k % len(self))
+
+    def __iter__(self):
+        for k in range(len(self)):
+            yield self._index.link_dict(k)
+
+
+class _NodeLookup(Mapping):
+    """id -> node dict for non-sensitive nodes, by binary search on the sidecar."""
+
+    def __init__(self, index: GraphIndex) -> None:
+        self._index = index
+
+    def __getitem__(self, node_id):
+        i = self._index.node_index(node_id) if isinstance(node_id, str) else None
+        if i is None:
+            raise KeyError(node_id)
+        return self._index.node_dict(i)
+
+    def __iter__(self):
+        for i in self._index.safe_nodes:
+            yield self._index.strings[i]
+
+    def __len__(self) -> int:
+        return len(self._index.safe_nodes)
+
+
+class CompactGraph(Mapping):
+    """Read-only, load_graph-shaped view of a GraphIndex.
+
+    `nodes` / `links` are lazy sequences yielding fresh small dicts, already
+    scrubbed exactly as load_graph scrubs; nothing is materialized up front.
+    """
+
+    def __init__(self, index: GraphIndex) -> None:
+        self.index = index
+        self._meta = json.loads(bytes(index.meta) or b"{}")
+
+    def __getitem__(self, key):
+        if key == "nodes":
+            return _NodeView(self.index)
+        if key == "links":
+            return _LinkView(self.index)
+        if key in ("directed", "graph"):
+            return self._meta.get(key)
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(("nodes", "links", "directed", "graph"))
+
+    def __len__(self) -> int:
+        return 4
+
+
+class _LabelSet(Container):
+    """Label membership for non-sensitive nodes, by binary search on the sidecar."""
+
+    def __init__(self, index: GraphIndex) -> None:
+        self._index = index
+
+    def __contains__(self, label) -> bool:
+        # an empty label is stored for a node without one, which has no label
+        return isinstance(label, str) and bool(label) and bool(self._index.named(labels=(label,)))
+
+
+def node_lookup(graph: Mapping) -> Mapping:
+    """id -> node mapping for a load_graph dict or a CompactGraph (no copy for the latter)."""
+    if isinstance(graph, CompactGraph):
+        return _NodeLookup(graph.index)
+    return {n.get("id"): n for n in graph.get("nodes", []) if n.get("id")}
+
+
+def node_labels(graph: Mapping) -> Container:
+    """The set of node labels of a load_graph dict or a CompactGraph (no copy for the latter)."""
+    if isinstance(graph, CompactGraph):
+        return _LabelSet(graph.index)
+    return {n.get("label") for n in graph.get("nodes", [])}
+
+
+def incident_links(graph: Mapping, node_ids: Iterable[str]) -> list[dict]:
+    """Links whose source or target is one of node_ids, in file order."""
+    if isinstance(graph, CompactGraph):
+        index = graph.index
+        found = (index.node_index(nid) for nid in set(node_ids) if isinstance(nid, str))
+        return [index.link_dict(k) for k in index.incident(i for i in found if i is not None)]
+    ids = set(node_ids)
+    return [l for l in graph.get("links", []) if l.get("source") in ids or l.get("target") in ids]
+
+
+def iter_links(graph: Mapping, relations: Container | None = None) -> Iterator[dict]:
+    """Links in file order, only those whose relation is in `relations` unless None
+    (a CompactGraph tests the interned relation before decoding the link)."""
+    if not isinstance(graph, CompactGraph):
+        return (l for l in graph.get("links", [])
+                if relations is None or l.get("relation") in relations)
+    index = graph.index
+    if relations is None:
+        return iter(graph["links"])
+    rel_ok = {r for r in set(index.link_rel) if index.strings[r] in relations}
+    return (index.link_dict(k) for k, r in enumerate(index.link_rel) if r in rel_ok)
+
+
+def resolve_paths_to_node_ids(modified_paths: list[str], graph: Mapping,
+                              max_ids_per_path: int = 8) -> tuple[dict, list[str]]:
+    """graphify_lib.resolve_paths_to_node_ids; a CompactGraph only tests the nodes
+    its sorted permutations can match (GraphIndex.path_candidates)."""
+    if not isinstance(graph, CompactGraph):
+        return graphify_lib.resolve_paths_to_node_ids(modified_paths, graph, max_ids_per_path)
+    index = graph.index
+    return graphify_lib.resolve_paths_to_node_ids(
+        modified_paths, graph, max_ids_per_path,
+        candidates=lambda norm, base: map(index.node_dict, index.path_candidates(norm, base)))
+
+
+# ---------------------------------------------------------------------------
+# Sidecar
+# ---------------------------------------------------------------------------
+
+def _map(path: Path) -> GraphIndex | None:
+    try:
+        with open(path, "rb") as fh:
+            mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):  # ValueError: empty file
+        return None
+    try:
+        return GraphIndex(mm)
+    except ValueError:
+        return None
+
+
+def _publish(sidecar: Path, data: bytes) -> GraphIndex:
+    """Atomically replace the sidecar with data; return an index mapped from it
+    (mapped before the rename, so it is ours even if another writer races us)."""
+    tmp = sidecar.with_name(f"{INDEX_NAME}.{os.getpid()}.tmp")
+    try:
+        tmp.write_bytes(data)
+        index = _map(tmp)
+        os.replace(tmp, sidecar)
+    except OSError:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        index = None
+    return index or GraphIndex(data)
+
+
+def open_index(graph_file: Path) -> GraphIndex | None:
+    """The compact index for graph_file, rebuilding its sidecar when stale.
+
+    None when graph.json is missing or not a JSON object.
+    """
+    graph_file = Path(graph_file)
+    sidecar = graph_file.parent / INDEX_NAME
+    try:
+        st = os.stat(graph_file)
+    except OSError:
+        return None
+    index = _map(sidecar)
+    if index is not None and index.is_fresh(st):
+        return index
+    try:
+        with open(graph_file, "rb") as fh:
+            st = os.fstat(fh.fileno())
+            data = fh.read()
+    except OSError:
+        return None
+    content_hash = hashlib.sha256(data).hexdigest()
+    if index is not None and index.content_hash == content_hash:
+        return _publish(sidecar, index.restamped(st))
+    try:
+        raw = json.loads(data)
+    except ValueError:
+        return None
+    if not isinstance(raw, dict):
+        return None
+    del data
+    return _publish(sidecar, _build(raw, content_hash, st.st_size, st.st_mtime_ns))
+
+
+def open_graph(graph_file: Path) -> tuple[Mapping, str]:
+    """Drop-in for graphify_lib.load_graph backed by the compact sidecar.
+
+    Returns (CompactGraph, STATUS_OK), or load_graph's own answer when
+    CLAUDE_GRAPHIFY_COMPACT_GRAPH=0 or graph.json is missing or unparseable.
+    """
+    if not is_compact_graph_enabled():
+        return load_graph(graph_file)
+    index = open_index(graph_file)
+    if index is None:
+        return load_graph(graph_file)
+    return CompactGraph(index), STATUS_OK
@@ -10,9 +10,12 @@ after BA-QA validation, before DEV. Operations:
   4. Build the focused subgraph DETERMINISTICALLY from graph.json nodes+links
      around those ids (the PRIMARY signal) — translated to real human-readable
      fields (label, source_file, relation) per AC14
-  5. Invoke real `graphify affected "<node.id>" --graph <cacheDir/graph.json> --depth N`
-     seeded with a RESOLVED node id (never raw path/label); consume its stdout as
-     enrichment layered on top; text-parse failure/timeout → status=degraded but the
+  5. Reverse-affected enrichment seeded with RESOLVED node ids (never raw
+     path/label), layered on top. By default answered in-process for all seeds
+     in one batch by graph_engine.py (structured JSON); with
+     CLAUDE_GRAPHIFY_NATIVE_QUERY=0 via the real
+     `graphify affected "<node.id>" --graph <cacheDir/graph.json> --depth N` per
+     seed with its stdout consumed. Failure/timeout → status=degraded but the
      deterministic subgraph is kept (AC3)
   6. Patch context-{ts}.json in-place with graph_context (arch-6); sensitive paths
      scrubbed on read + on CLI stdout (AC15)
@@ -69,22 +72,14 @@ from graphify_lib import (
     STATUS_OK, STATUS_DEGRADED, STATUS_FAILED, STATUS_UNAVAILABLE, STATUS_SKIPPED,
     EXCLUDE_FRAGMENTS, TIMEOUT_UPDATE, TIMEOUT_AFFECTED,
     check_cache_available, contains_sensitive_fragment, empty_graph_context,
-    get_cache_dir, get_repo_key, graph_json_path, is_cache_root_inside_repo,
-    is_graphify_enabled, load_graph, resolve_paths_to_node_ids, run_graphify_cmd,
-    scrub_sensitive, should_exclude_path, write_json_locked, read_json_safe,
-    reset_semantic_mode_in_manifest,
+    get_cache_dir, get_repo_key, graph_content_hash, graph_json_path,
+    is_cache_root_inside_repo, is_graphify_enabled, is_native_query_enabled,
+    run_graphify_cmd, scrub_sensitive, should_exclude_path,
+    write_json_locked, read_json_safe, reset_semantic_mode_in_manifest,
+)
+from graph_engine import (
+    CompactGraph, incident_links, node_lookup, open_graph, open_index, resolve_paths_to_node_ids,
 )
-
-
-def _graph_content_hash(path: Path) -> str | None:
-    """Content-hash snapshot of graph.json, or None if absent (AC11 iter #3 guard)."""
-    import hashlib
-    try:
-        return hashlib.sha256(Path(path).read_bytes()).hexdigest()
-    except FileNotFoundError:
-        return None
-    except Exception:
-        return None
 
 
 def _now_iso() -> str:
@@ -183,8 +178,7 @@ def _build_deterministic_subgraph(graph: dict, resolved_node_ids: Sequence[str])
     their item shapes (node={id,label,source_file}; edge={source,target,relation})
     are preserved verbatim.
     """
-    all_nodes = {n.get("id"): n for n in graph.get("nodes", []) if n.get("id")}
-    links = graph.get("links", [])
+    all_nodes = node_lookup(graph)
 
     def _node_allowed(nid: str) -> bool:
         n = all_nodes.get(nid)
@@ -209,7 +203,9 @@ def _build_deterministic_subgraph(graph: dict, resolved_node_ids: Sequence[str])
     missing_seed_count = len(seen_seed) - valid_seed_count
     seed_set = set(valid_seeds)
 
-    # --- Scan links once into the four directional buckets ---
+    # --- Scan the seeds' links once into the four directional buckets ---
+    # Every bucket needs a seed endpoint, so only links incident to one are read.
+    links = incident_links(graph, seed_set)
     contains_anchor_edges: list[dict] = []   # contains incident to a seed (anchor-only)
     reverse_edges: list[dict] = []           # target==seed coupling (impact)
     forward_edges: list[dict] = []           # source==seed coupling (context only)
@@ -389,6 +385,26 @@ def _run_real_affected(node_id: str, graph_file: Path, cache_dir: Path) -> dict:
     return record
 
 
+def _run_native_affected(node_ids: list[str], graph_file: Path, graph) -> list[dict]:
+    """Answer every seed in-process from the graph index (one open, one batch).
+
+    Depth 2 as on the CLI, following REVERSE_DEPENDENT_RELATIONS only (the same
+    coupling set as the focused subgraph's impact view). Records keep the CLI
+    record's node_id / affected_cli_status keys (schema back-compat) and carry
+    the structured result. Any engine error degrades every record.
+    """
+    try:
+        index = graph.index if isinstance(graph, CompactGraph) else open_index(graph_file)
+        if index is None:
+            raise ValueError("graph.json is not a node-link object")
+        results = index.affected(node_ids, depth=2, relations=REVERSE_DEPENDENT_RELATIONS)
+    except Exception as exc:
+        return [{"node_id": nid, "engine": "native", "affected_cli_status": STATUS_DEGRADED,
+                 "reason": str(exc)[:200]} for nid in node_ids]
+    return [{"node_id": r["node_id"], "engine": "native", "affected_cli_status": STATUS_OK,
+             "result": r} for r in results]
+
+
 def _build_graph_summary(subgraph: dict, status: str, run_manifest: dict) -> dict:
     """Build compact graph-summary.json.
 
@@ -511,7 +527,7 @@ def main() -> int:
     start = time.time()
     # Pre-update snapshot so we can prove whether the update mutated graph.json
     # (OBJ-1/AC11 three-branch reconciliation of maintain's stale semantic_mode).
-    pre_snapshot = _graph_content_hash(graph_file)
+    pre_snapshot = graph_content_hash(graph_file)
     if not is_cache_root_inside_repo(_PROJECT_DIR):
         exit_code, stdout, stderr = run_graphify_cmd(
             ["update", str(_PROJECT_DIR)], timeout_seconds=TIMEOUT_UPDATE, cache_dir=cache_dir,
@@ -531,7 +547,7 @@ def main() -> int:
     # semantic_mode -> ast_only via the SHARED helper so `status` cannot lie. Done
     # AFTER the graph overwrite (graph-then-manifest). Advisory: errors swallowed.
     try:
-        post_snapshot = _graph_content_hash(graph_file)
+        post_snapshot = graph_content_hash(graph_file)
         if exit_code == 0 or (pre_snapshot != post_snapshot):
             reconciled = reset_semantic_mode_in_manifest(cache_dir)
             run_manifest["update_run"]["semantic_mode_reconciled"] = bool(reconciled)
@@ -539,8 +555,10 @@ def main() -> int:
         run_manifest["update_run"]["semantic_reconcile_error"] = str(exc)
         print(f"graphify-enrich: semantic_mode reconcile failed (advisory): {exc}", file=sys.stderr)
 
-    # Step 2: read real node-link graph (sensitive nodes/links scrubbed on read).
-    graph, gstatus = load_graph(graph_file)
+    # Step 2: read real node-link graph (sensitive nodes/links scrubbed on read),
+    # through the mmapped compact sidecar that Step 4 also queries.
+    native = is_native_query_enabled()
+    graph, gstatus = open_graph(graph_file)
     modified_paths = _collect_modified_paths(blast_radius_map)
     resolved_map, unresolved_paths = resolve_paths_to_node_ids(modified_paths, graph)
     resolved_node_ids = list(dict.fromkeys(
@@ -584,20 +602,25 @@ def main() -> int:
         run_manifest["error_detail"] = f"subgraph extraction error: {exc}"
         status = STATUS_DEGRADED
 
-    # Step 4: real `graphify affected` enrichment — MUST be attempted when ≥1 id
-    # resolved (AC3 c). Seed with a RESOLVED node id ONLY.
+    # Step 4: affected enrichment (in-process batch, or real `graphify affected`
+    # per seed) — MUST be attempted when ≥1 id resolved (AC3 c). Seed with a
+    # RESOLVED node id ONLY.
     affected_records: list[dict] = []
     affected_cli_status = "not_attempted"
-    for nid in resolved_node_ids[:5]:
-        rec = _run_real_affected(nid, graph_file, cache_dir)
-        affected_records.append(rec)
-        affected_cli_status = rec.get("affected_cli_status", STATUS_DEGRADED)
+    if native and resolved_node_ids:
+        affected_records = _run_native_affected(resolved_node_ids[:5], graph_file, graph)
+    elif resolved_node_ids:
+        affected_records = [_run_real_affected(nid, graph_file, cache_dir)
+                            for nid in resolved_node_ids[:5]]
+    if affected_records:
+        affected_cli_status = affected_records[-1].get("affected_cli_status", STATUS_DEGRADED)
     if affected_records and affected_cli_status == STATUS_DEGRADED:
         # text-parse/timeout degrades enrichment but keeps the deterministic subgraph.
         status = STATUS_DEGRADED if status == STATUS_OK else status
     run_manifest["affected_run"] = {
         "attempted": bool(resolved_node_ids),
         "affected_cli_status": affected_cli_status,
+        "engine": "native" if native else "cli",
         "seeds": resolved_node_ids[:5],
     }
     run_manifest["status"] = status
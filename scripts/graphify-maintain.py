@@ -56,6 +56,7 @@ from graphify_lib import (
     load_graph, run_graphify_cmd, write_json_locked,
     reset_semantic_mode_in_manifest,
 )
+from graph_engine import open_graph
 
 # Edge-signature confidence whitelist for the semantic proof-gate (verdict P, codex round-2).
 VALID_CONFIDENCES = {"EXTRACTED", "INFERRED", "AMBIGUOUS"}
@@ -289,7 +290,7 @@ def cmd_init() -> int:
             print(f"  stderr: {stderr[:500]}", file=sys.stderr, flush=True)
         return 1
 
-    graph, st = load_graph(graph_json_path(_PROJECT_DIR))
+    graph, st = open_graph(graph_json_path(_PROJECT_DIR))
     ast_nodes = len(graph.get("nodes", []))
     print(f"graphify-maintain init: AST graph ok in {elapsed:.1f}s ({ast_nodes} nodes)", flush=True)
 
@@ -334,7 +335,7 @@ def cmd_update() -> int:
     reconcile_reason = _reconcile_after_ast_overwrite(cache_dir, exit_code, pre_snapshot)
 
     if exit_code == 0:
-        graph, _ = load_graph(graph_json_path(_PROJECT_DIR))
+        graph, _ = open_graph(graph_json_path(_PROJECT_DIR))
         print(f"graphify-maintain update: ok in {elapsed:.1f}s "
               f"({len(graph.get('nodes', []))} nodes); {reconcile_reason}", flush=True)
         _write_run_manifest(cache_dir, repo_key, bin_path, None, "incremental update", verb="update")
@@ -549,7 +550,7 @@ def cmd_status() -> int:
         print(f"  unavailable_reason: {reason}")
 
     if gpath.exists():
-        graph, st = load_graph(gpath)
+        graph, st = open_graph(gpath)
         print(f"  status: {STATUS_OK if available else st}")
         print(f"  nodes: {len(graph.get('nodes', []))}")
         print(f"  links: {len(graph.get('links', []))}")
@@ -672,7 +673,7 @@ def cmd_ensure_async() -> int:
         gpath = graph_json_path(_PROJECT_DIR)
 
         # 1) Graph already present + usable -> nothing to do (covers "build finished").
-        graph, st = load_graph(gpath)
+        graph, st = open_graph(gpath)
         if st == STATUS_OK and len(graph.get("nodes", [])) > 0:
             print("graphify-maintain ensure-async: cached graph present — no auto-init needed", flush=True)
             return 0
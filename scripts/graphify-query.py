@@ -7,11 +7,14 @@ Drives the REAL `graphify` v0.8.25 CLI. Builds structural_context for BA from:
   Layer 2 — node-link graph.json read (the DETERMINISTIC primary signal): edges
             are under `links` with source/target/relation; sensitive nodes/links
             are scrubbed ON READ (AC15)
-  Layer 3 — real `graphify query "<anchor>" --graph <cacheDir/graph.json> --budget N`
-            enrichment layered on top; its real stdout is consumed (and scrubbed)
-            into structural_context. A query failure/timeout degrades to the
-            graph.json-only signal (advisory, exit 0) but the call MUST be
-            attempted when an anchor is present (AC2).
+  Layer 3 — budgeted-BFS query enrichment per anchor, layered on top. By default
+            answered in-process for all anchors in one batch by graph_engine.py
+            (structured nodes/edges, index cached next to graph.json);
+            CLAUDE_GRAPHIFY_NATIVE_QUERY=0 instead runs the real
+            `graphify query "<anchor>" --graph <cacheDir/graph.json> --budget N`
+            per anchor and consumes its (scrubbed) stdout. A query failure/timeout
+            degrades to the graph.json-only signal (advisory, exit 0) but the
+            query MUST be attempted when an anchor is present (AC2).
 
 Output (≤2000 tokens, advisory, fail-open):
   .claude/dev-registry/{task_id}/graphify/pre_query.json
@@ -21,6 +24,7 @@ Usage:
 
 Feature flags:
   CLAUDE_GRAPHIFY_ENABLED=0  — exits immediately with status=skipped
+  CLAUDE_GRAPHIFY_NATIVE_QUERY=0 — Layer 3 via the `graphify query` CLI (default: in-process)
   GRAPHIFY_BIN               — override CLI path
   CLAUDE_GRAPHIFY_CACHE_ROOT — override /var/tmp/claude-graphify (must be outside repo)
 
@@ -35,6 +39,7 @@ import os
 import re
 import sys
 import time
+from itertools import chain
 from pathlib import Path
 
 _PROJECT_DIR = Path(os.environ.get("CLAUDE_PROJECT_DIR", os.getcwd())).resolve()
@@ -49,8 +54,11 @@ from graphify_lib import (
     EXCLUDE_FRAGMENTS, TIMEOUT_QUERY,
     check_cache_available, contains_sensitive_fragment, empty_graph_context,
     get_cache_dir, get_repo_key, graph_json_path, is_graphify_enabled,
-    load_graph, run_graphify_cmd, scrub_sensitive, should_exclude_path,
-    write_json_locked,
+    is_native_query_enabled, run_graphify_cmd, scrub_sensitive,
+    should_exclude_path, write_json_locked,
+)
+from graph_engine import (
+    CompactGraph, incident_links, iter_links, node_labels, node_lookup, open_graph, open_index,
 )
 
 # Implicit reference trigger words that signal ambiguity — per spec §5
@@ -114,9 +122,13 @@ def _resolve_anchors_in_graph(mentions: list[str], graph: dict) -> dict[str, str
     """
     resolved: dict[str, str] = {}
     nodes = graph.get("nodes", [])
+    index = graph.index if isinstance(graph, CompactGraph) else None
     for mention in mentions:
         base = mention.replace("\\", "/").rsplit("/", 1)[-1]
-        for n in nodes:
+        # A CompactGraph narrows the scan to label / basename matches by index.
+        candidates = (nodes if index is None
+                      else map(index.node_dict, index.named((base, mention), (base,))))
+        for n in candidates:
             label = n.get("label", "") or ""
             sf = (n.get("source_file", "") or "").replace("\\", "/")
             if label == base or label == mention or sf.endswith("/" + base) or sf == base or sf == mention:
@@ -146,27 +158,46 @@ def _build_import_excerpt(graph: dict, anchor_labels: set[str]) -> list[str]:
     each, anchor-touching links first. So a coupling-rich repo fills the [:20] cap with
     signal and never shows `contains` skeleton, while a coupling-poor graph still yields a
     populated excerpt from whatever edges exist. Sensitive links already removed on read.
+
+    Anchor links come from incident_links and the rest are read lazily, stopping
+    once the cap is filled, so a CompactGraph is never scanned end to end.
     """
-    nodes = graph.get("nodes", [])
-    id_to_label = {n.get("id"): (n.get("label") or n.get("id")) for n in nodes}
-    anchor_ids = {n.get("id") for n in nodes if (n.get("label") or "") in anchor_labels}
-    coupling: list[str] = []
-    other: list[str] = []
-    for l in graph.get("links", []):
-        src = l.get("source")
-        tgt = l.get("target")
-        rel = l.get("relation", "rel")
-        line = f"{id_to_label.get(src, src)} --{rel}--> {id_to_label.get(tgt, tgt)}"
-        if should_exclude_path(line):
-            continue
-        bucket = coupling if rel in COUPLING_RELATIONS else other
-        # Anchor-touching links first within their bucket.
-        if anchor_ids and (src in anchor_ids or tgt in anchor_ids):
-            bucket.insert(0, line)
-        else:
-            bucket.append(line)
-    # Coupling signal before skeleton/noise fallback; dedupe, then cap.
-    return list(dict.fromkeys(coupling + other))[:20]
+    nodes = node_lookup(graph)
+    if isinstance(graph, CompactGraph):
+        anchor_ids = {graph.index.strings[i] for i in graph.index.named(anchor_labels)}
+    else:
+        anchor_ids = {nid for nid, n in nodes.items() if (n.get("label") or "") in anchor_labels}
+
+    def _label(nid):
+        n = nodes.get(nid) if isinstance(nid, str) else None
+        return (n.get("label") or nid) if n else nid
+
+    def _lines(links, coupling):
+        for l in links:
+            rel = l.get("relation", "rel")
+            if (rel in COUPLING_RELATIONS) != coupling:
+                continue
+            line = f"{_label(l.get('source'))} --{rel}--> {_label(l.get('target'))}"
+            if not should_exclude_path(line):
+                yield line
+
+    def _unanchored(links):
+        return (l for l in links if l.get("source") not in anchor_ids
+                and l.get("target") not in anchor_ids)
+
+    anchored = incident_links(graph, anchor_ids) if anchor_ids else []
+    anchored.reverse()  # most recent anchor link first, as insert(0) ordered them
+    # Coupling signal before skeleton/noise fallback; anchor-touching links first
+    # within each bucket; dedupe, then cap.
+    excerpt: dict[str, None] = {}
+    for line in chain(_lines(anchored, True),
+                      _lines(_unanchored(iter_links(graph, COUPLING_RELATIONS)), True),
+                      _lines(anchored, False),
+                      _lines(_unanchored(iter_links(graph)), False)):
+        excerpt.setdefault(line)
+        if len(excerpt) == 20:
+            break
+    return list(excerpt)
 
 
 # ---------------------------------------------------------------------------
@@ -198,6 +229,25 @@ def _run_real_query(anchor: str, graph_file: Path, cache_dir: Path) -> dict:
     return record
 
 
+def _run_native_queries(anchors: list[str], graph_file: Path, graph) -> list[dict]:
+    """Answer every anchor in-process from the graph index (one open, one batch).
+
+    Same budget as the CLI call. Records keep the CLI record's anchor /
+    query_cli_status keys (schema back-compat) and carry the structured BFS
+    result instead of scraped text. Any engine error degrades every record.
+    """
+    try:
+        index = graph.index if isinstance(graph, CompactGraph) else open_index(graph_file)
+        if index is None:
+            raise ValueError("graph.json is not a node-link object")
+        results = index.query(anchors, budget=2000)
+    except Exception as exc:
+        return [{"anchor": a, "engine": "native", "query_cli_status": STATUS_DEGRADED,
+                 "reason": str(exc)[:200]} for a in anchors]
+    return [{"anchor": r["anchor"], "engine": "native", "query_cli_status": STATUS_OK,
+             "result": r} for r in results]
+
+
 # ---------------------------------------------------------------------------
 # Ambiguity detection
 # ---------------------------------------------------------------------------
@@ -296,28 +346,33 @@ def main() -> int:
     if raw_mentions:
         layers_used.append("deterministic_rules")
 
-    # Layer 2: read the REAL node-link graph.json (sensitive nodes/links scrubbed on read).
-    graph, gstatus = load_graph(graph_file)
+    # Layer 2: read the REAL node-link graph.json (sensitive nodes/links scrubbed on read),
+    # through the mmapped compact sidecar that Layer 3 also queries.
+    native = is_native_query_enabled()
+    graph, gstatus = open_graph(graph_file)
     if gstatus == STATUS_OK:
         layers_used.append("graph_json_node_link")
     resolved_map = _resolve_anchors_in_graph(raw_mentions, graph)
     anchor_labels = set(resolved_map.values())
     import_graph = _build_import_excerpt(graph, anchor_labels)
 
-    # Layer 3: real `graphify query` enrichment — MUST be attempted when an
-    # input-derived anchor present/resolvable in graph.json exists (AC2).
+    # Layer 3: query enrichment (in-process batch, or real `graphify query` per
+    # anchor) — MUST be attempted when an input-derived anchor
+    # present/resolvable in graph.json exists (AC2).
     query_records: list[dict] = []
     query_cli_status = "not_attempted"
     # Prefer anchors resolvable in graph.json; fall back to raw mentions present as node labels.
-    anchors_for_query = list(dict.fromkeys(resolved_map.values())) or [
-        m for m in raw_mentions if m in {n.get("label") for n in graph.get("nodes", [])}
-    ]
-    for anchor in anchors_for_query[:5]:
-        rec = _run_real_query(anchor, graph_file, cache_dir)
-        query_records.append(rec)
-        query_cli_status = rec.get("query_cli_status", STATUS_DEGRADED)
+    anchors_for_query = list(dict.fromkeys(resolved_map.values()))
+    if not anchors_for_query:
+        labels = node_labels(graph)
+        anchors_for_query = [m for m in raw_mentions if m in labels]
+    if native and anchors_for_query:
+        query_records = _run_native_queries(anchors_for_query[:5], graph_file, graph)
+    elif anchors_for_query:
+        query_records = [_run_real_query(a, graph_file, cache_dir) for a in anchors_for_query[:5]]
     if query_records:
-        layers_used.append("real_graphify_query")
+        query_cli_status = query_records[-1].get("query_cli_status", STATUS_DEGRADED)
+        layers_used.append("native_graph_query" if native else "real_graphify_query")
 
     # Build candidate_anchors (resolved_path comes from graph.json node match).
     candidate_anchors = []
@@ -336,7 +391,7 @@ def main() -> int:
         "candidate_anchors": candidate_anchors,
         "import_graph_excerpt": import_graph,
         "high_centrality_nodes": [],
-        "graphify_query_results": query_records,  # consumed real stdout (scrubbed)
+        "graphify_query_results": query_records,  # structured BFS results, or consumed CLI stdout (scrubbed)
         "query_cli_status": query_cli_status,
         "token_count": 0,
         "truncated": False,
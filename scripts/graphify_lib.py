@@ -18,6 +18,10 @@ Real CLI surface (empirically verified against graphify 0.8.25):
                                                   DIR/graphify-out/graph.json.
   graphify query "<q>" --graph G --budget N       BFS traversal, human-readable TEXT.
   graphify affected "<node.id>" --graph G --depth N  reverse traversal, TEXT.
+The query/affected enrichment is answered in-process by graph_engine.py unless
+CLAUDE_GRAPHIFY_NATIVE_QUERY=0 (see is_native_query_enabled), and graph.json is
+read through graph_engine's mmapped compact form unless
+CLAUDE_GRAPHIFY_COMPACT_GRAPH=0 (see is_compact_graph_enabled).
 
 Graph schema (verified): NetworkX node-link. Top keys
   {directed, multigraph, graph, nodes, links, hyperedges}.
@@ -117,6 +121,24 @@ def is_graphify_enabled() -> bool:
     return val != "0"
 
 
+def is_native_query_enabled() -> bool:
+    """Return False only when CLAUDE_GRAPHIFY_NATIVE_QUERY=0.
+
+    Default: query/affected enrichment is answered in-process by graph_engine.py.
+    0 restores the per-anchor `graphify query` / `graphify affected` subprocesses.
+    """
+    return os.environ.get("CLAUDE_GRAPHIFY_NATIVE_QUERY", "1").strip() != "0"
+
+
+def is_compact_graph_enabled() -> bool:
+    """Return False only when CLAUDE_GRAPHIFY_COMPACT_GRAPH=0.
+
+    Default: the wrappers read graph.json through graph_engine.open_graph (an
+    mmapped sidecar). 0 restores a full load_graph parse on every read.
+    """
+    return os.environ.get("CLAUDE_GRAPHIFY_COMPACT_GRAPH", "1").strip() != "0"
+
+
 def get_graphify_bin() -> str | None:
     """Return graphify CLI path from GRAPHIFY_BIN env or PATH search, or None."""
     override = os.environ.get("GRAPHIFY_BIN", "").strip()
@@ -226,6 +248,19 @@ def reset_semantic_mode_in_manifest(cache_dir: Path) -> bool:
     return True
 
 
+def graph_content_hash(path: Path) -> str | None:
+    """Content-hash snapshot of graph.json, or None if absent (AC11 iter #3 guard)."""
+    import hashlib
+    try:
+        digest = hashlib.sha256()
+        with open(path, "rb") as fh:
+            for chunk in iter(lambda: fh.read(1 << 20), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+    except Exception:
+        return None
+
+
 def read_json_safe(path: Path) -> tuple[Any, str]:
     """Read JSON from path. Returns (data, status) — STATUS_OK / UNAVAILABLE / DEGRADED."""
     try:
@@ -419,12 +454,17 @@ def load_graph(graph_path: Path) -> tuple[dict, str]:
 
 
 def resolve_paths_to_node_ids(modified_paths: list[str], graph: dict,
-                              max_ids_per_path: int = 8) -> tuple[dict, list[str]]:
+                              max_ids_per_path: int = 8,
+                              candidates=None) -> tuple[dict, list[str]]:
     """Map modified file paths to a bounded set of real node.id values.
 
     Matches on normalized source_file / relative-path suffix / label, INCLUDING
     symbol nodes whose source_file is the modified file (M3a). Returns
     (resolved_map {path: [node_id,...]}, unresolved_paths[]).
+
+    `candidates(norm, base)`, when given, returns the nodes (in graph order) that
+    may match one normalized path, so only those are tested instead of every
+    node — graph_engine passes its index lookup.
     """
     nodes = graph.get("nodes", [])
     resolved: dict[str, list[str]] = {}
@@ -434,8 +474,8 @@ def resolve_paths_to_node_ids(modified_paths: list[str], graph: dict,
             continue
         norm = _normalize_path(raw)
         base = norm.rsplit("/", 1)[-1]
-        ids: list[str] = []
-        for n in nodes:
+        matched: dict[str, None] = {}  # dedupe, preserve order
+        for n in (nodes if candidates is None else candidates(norm, base)):
             nid = n.get("id")
             if not nid:
                 continue
@@ -444,10 +484,12 @@ def resolve_paths_to_node_ids(modified_paths: list[str], graph: dict,
             # source_file match (exact, suffix, or basename) catches file + symbol nodes.
             if sf and (sf == norm or norm.endswith(sf) or sf.endswith(norm)
                        or sf == base or sf.endswith("/" + base)):
-                ids.append(nid)
+                matched.setdefault(nid)
             elif label and (label == base or label == norm):
-                ids.append(nid)
-        ids = list(dict.fromkeys(ids))[:max_ids_per_path]  # dedupe, preserve order
+                matched.setdefault(nid)
+            if len(matched) >= max_ids_per_path:
+                break  # the cap is reached; later nodes cannot change the answer
+        ids = list(matched)[:max_ids_per_path]
         if ids:
             resolved[raw] = ids
         else:
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Description: Summarizes the local hook telemetry sink written by
+             hooks/lib/hook_telemetry.py (CLAUDE_HOOK_TELEMETRY=1): latency per
+             hook, cost per session, and a flame-style breakdown of the timed
+             sections inside hooks (bash_safety phases, runtime_guard.evaluate
+             primitives).
+
+Usage: hook-profile.py [--file PATH] [--session SID] [--hook NAME] [--event EVENT]
+                       [--spans | --folded | --json]
+  (default)  per-hook and per-session tables
+  --spans    indented span tree per hook: inclusive / self ms and share of hook time
+  --folded   folded stacks ("hook;a;b <self-us>") for flamegraph.pl / speedscope
+  --json     the aggregates as JSON
+Exit codes: 0 = report printed; 1 = no matching records
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+# Make hooks/lib importable.
+_hooks_dir = os.environ.get('CLAUDE_HOOKS_DIR', os.path.join(os.path.dirname(__file__), '..', 'hooks'))
+sys.path.insert(0, str(Path(_hooks_dir).resolve()))
+from lib import hook_telemetry  # noqa: E402
+
+
+def sink_files(path: str) -> list[str]:
+    """The sink and its rotated generations, oldest first."""
+    rotated = []
+    i = 1
+    while os.path.exists(f'{path}.{i}'):
+        rotated.append(f'{path}.{i}')
+        i += 1
+    files = list(reversed(rotated))
+    if os.path.exists(path):
+        files.append(path)
+    return files
+
+
+def load_records(path: str) -> list[dict]:
+    records = []
+    for name in sink_files(path):
+        with open(name, encoding='utf-8', errors='replace') as fh:
+            for line in fh:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # torn line from a crashed writer
+                if isinstance(rec, dict) and 'hook' in rec and 'ms' in rec:
+                    records.append(rec)
+    return records
+
+
+def by_hook(records: list[dict]) -> dict:
+    groups: dict[str, list[dict]] = {}
+    for rec in records:
+        groups.setdefault(f"{rec.get('event')}:{rec['hook']}", []).append(rec)
+    out = {}
+    for key, recs in sorted(groups.items()):
+        ms = [r['ms'] for r in recs]
+        verdicts: dict[str, int] = {}
+        for r in recs:
+            verdicts[r.get('verdict', '?')] = verdicts.get(r.get('verdict', '?'), 0) + 1
+        out[key] = {
+            'n': len(recs),
+            'p50': round(hook_telemetry.percentile(ms, 50), 2),
+            'p95': round(hook_telemetry.percentile(ms, 95), 2),
+            'max': round(max(ms), 2),
+            'total': round(sum(ms), 2),
+            'verdicts': verdicts,
+        }
+    return out
+
+
+def by_session(records: list[dict]) -> dict:
+    out: dict[str, dict] = {}
+    for rec in records:
+        s = out.setdefault(str(rec.get('session')), {'calls': 0, 'total': 0.0, 'blocks': 0,
+                                                      'slowest': None, 'slowest_ms': 0.0})
+        s['calls'] += 1
+        s['total'] += rec['ms']
+        s['blocks'] += rec.get('verdict') in ('block', 'deny')
+        if rec['ms'] > s['slowest_ms']:
+            s['slowest'], s['slowest_ms'] = rec['hook'], rec['ms']
+    for s in out.values():
+        s['total'] = round(s['total'], 2)
+        s['slowest_ms'] = round(s['slowest_ms'], 2)
+    return out
+
+
+def span_tree(records: list[dict]) -> dict:
+    """{hook: {path: [inclusive_ms, calls]}} with each hook's own total at ''."""
+    trees: dict[str, dict[str, list]] = {}
+    for rec in records:
+        tree = trees.setdefault(rec['hook'], {'': [0.0, 0]})
+        tree[''][0] += rec['ms']
+        tree[''][1] += 1
+        for path, (ms, calls) in (rec.get('spans') or {}).items():
+            slot = tree.setdefault(path, [0.0, 0])
+            slot[0] += ms
+            slot[1] += calls
+    return trees
+
+
+def self_times(tree: dict) -> dict:
+    """Inclusive minus the inclusive time of direct children, per path."""
+    child_sum: dict[str, float] = {}
+    for path, (ms, _) in tree.items():
+        if path:
+            parent = path.rpartition(';')[0]
+            child_sum[parent] = child_sum.get(parent, 0.0) + ms
+    return {path: max(0.0, ms - child_sum.get(path, 0.0)) for path, (ms, _) in tree.items()}
+
+
+def folded(trees: dict) -> list[str]:
+    lines = []
+    for hook, tree in sorted(trees.items()):
+        for path, ms in sorted(self_times(tree).items()):
+            us = int(round(ms * 1000))
+            if us:
+                lines.append(f"{';'.join(filter(None, (hook, path)))} {us}")
+    return lines
+
+
+def format_tables(hooks: dict, sessions: dict) -> str:
+    lines = [f"{'hook':<56} {'n':>5} {'p50':>9} {'p95':>9} {'max':>9} {'total':>10}  verdicts"]
+    for key, s in sorted(hooks.items(), key=lambda kv: -kv[1]['total']):
+        verdicts = ' '.join(f'{v}={n}' for v, n in sorted(s['verdicts'].items()))
+        lines.append(f"{key:<56} {s['n']:>5} {s['p50']:>7.1f}ms {s['p95']:>7.1f}ms "
+                     f"{s['max']:>7.1f}ms {s['total']:>8.0f}ms  {verdicts}")
+    lines += ['', f"{'session':<40} {'calls':>6} {'total':>10} {'blocks':>7}  slowest"]
+    for sid, s in sorted(sessions.items(), key=lambda kv: -kv[1]['total']):
+        lines.append(f"{sid:<40} {s['calls']:>6} {s['total']:>8.0f}ms {s['blocks']:>7}  "
+                     f"{s['slowest']} ({s['slowest_ms']:.1f}ms)")
+    return '\n'.join(lines)
+
+
+def format_spans(trees: dict) -> str:
+    lines = []
+    for hook, tree in sorted(trees.items()):
+        if len(tree) == 1:
+            continue  # hook has no instrumented sections
+        total = tree[''][0] or 1.0
+        own = self_times(tree)
+        lines.append(f"{hook}  ({tree[''][1]} calls, {tree[''][0]:.1f}ms, "
+                     f"{own['']:.1f}ms outside spans)")
+        for path in sorted((p for p in tree if p), key=lambda p: p.split(';')):
+            ms, calls = tree[path]
+            depth = path.count(';')
+            name = path.rpartition(';')[2]
+            lines.append(f"  {'  ' * depth}{name:<{48 - 2 * depth}} {calls:>6}x "
+                         f"{ms:>9.2f}ms incl {own[path]:>9.2f}ms self {100 * ms / total:>5.1f}%")
+    return '\n'.join(lines) if lines else 'no span data (only instrumented hooks record spans)'
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Summarize hook telemetry')
+    parser.add_argument('--file', default=hook_telemetry.sink_path())
+    parser.add_argument('--session')
+    parser.add_argument('--hook')
+    parser.add_argument('--event')
+    view = parser.add_mutually_exclusive_group()
+    view.add_argument('--spans', action='store_true')
+    view.add_argument('--folded', action='store_true')
+    view.add_argument('--json', action='store_true')
+    args = parser.parse_args(argv)
+
+    records = [r for r in load_records(args.file)
+               if (not args.session or r.get('session') == args.session)
+               and (not args.hook or r['hook'] == args.hook)
+               and (not args.event or r.get('event') == args.event)]
+    if not records:
+        print(f'no telemetry records in {args.file} '
+              '(set CLAUDE_HOOK_TELEMETRY=1 to record)', file=sys.stderr)
+        return 1
+    if args.folded:
+        print('\n'.join(folded(span_tree(records))))
+    elif args.spans:
+        print(format_spans(span_tree(records)))
+    elif args.json:
+        print(json.dumps({'hooks': by_hook(records), 'sessions': by_session(records),
+                          'spans': span_tree(records)}, indent=2))
+    else:
+        print(format_tables(by_hook(records), by_session(records)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Description: Canned performance reports over every overnight run, from the
+             sqlite store in scripts/overnight_store.py. Each run first
+             ingests whatever the trace / yield / lifecycle / audit streams
+             gained since the last one, so repeated queries only parse new data.
+
+Usage: overnight-query.py [REPORT] [--last N] [--role ROLE] [--json]
+                          [--db PATH] [--project-dir DIR] [--lifecycle-file PATH]
+                          [--audit-file PATH] [--yield-log PATH] [--no-ingest]
+  roles       (default) per role: agent calls, latency p50 / p95 / max, tokens, retries, errors
+  nights      per session: cycles, agent calls, wall time in agents, tokens, compliance
+  yield       per specialist: yield classifications and actions
+  compliance  per session / cycle harness-report metrics
+  scores      per agent: latest lifecycle score and event count
+  grants      hook-guard self-repair grants per session / role / reason
+  ingest      only bring the store up to date; prints rows loaded
+  sql QUERY   run a read-only SQL query against the store
+  --last N    restrict trace-based reports to the N most recent sessions
+Exit codes: 0 = report printed; 1 = no matching rows; 2 = bad query
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'hooks'))
+import overnight_store  # noqa: E402
+from lib.hook_telemetry import percentile  # noqa: E402
+
+
+def _session_filter(conn: sqlite3.Connection, last: int | None) -> tuple[str, list]:
+    """SQL fragment limiting rows to the `last` most recent sessions."""
+    if not last:
+        return '', []
+    sids = [r[0] for r in conn.execute(
+        'SELECT session_id FROM trace WHERE session_id IS NOT NULL '
+        'GROUP BY session_id ORDER BY MAX(ts) DESC LIMIT ?', (last,))]
+    return f' AND session_id IN ({", ".join("?" * len(sids))})', sids
+
+
+def report_roles(conn, last=None, role=None) -> list[dict]:
+    where, params = _session_filter(conn, last)
+    if role:
+        where, params = where + ' AND role = ?', params + [role]
+    rows: dict[str, dict] = {}
+    for r in conn.execute(
+            'SELECT role, COUNT(*), SUM(estimated_tokens), SUM(retry_count), '
+            "SUM(exit_status = 'error') "
+            f'FROM trace WHERE role IS NOT NULL{where} GROUP BY role', params):
+        rows[r[0]] = {'role': r[0], 'calls': r[1], 'tokens': r[2] or 0, 'retries': r[3] or 0,
+                      'errors': r[4] or 0}
+    durations: dict[str, list[int]] = {}
+    for r in conn.execute(
+            'SELECT role, duration_ms FROM trace '
+            f'WHERE role IS NOT NULL AND duration_ms IS NOT NULL{where} '
+            'ORDER BY role, duration_ms', params):
+        durations.setdefault(r[0], []).append(r[1])
+    for name, row in rows.items():
+        d = durations.get(name, [])
+        row.update(timed=len(d), total_ms=sum(d), p50_ms=percentile(d, 50) if d else None,
+                   p95_ms=percentile(d, 95) if d else None, max_ms=d[-1] if d else None)
+    return sorted(rows.values(), key=lambda r: (-(r['p95_ms'] or 0), r['role']))
+
+
+def report_nights(conn, last=None, role=None) -> list[dict]:
+    where, params = _session_filter(conn, last)
+    if role:
+        where, params = where + ' AND role = ?', params + [role]
+    compliance = {r[0]: r[1] for r in conn.execute(
+        'SELECT session_id, AVG(role_compliance_rate) FROM harness GROUP BY session_id')}
+    out = []
+    for r in conn.execute(
+            'SELECT session_id, COUNT(DISTINCT cycle_id), COUNT(*), MIN(ts), MAX(ts), '
+            'SUM(duration_ms), SUM(estimated_tokens) '
+            f'FROM trace WHERE session_id IS NOT NULL{where} '
+            'GROUP BY session_id ORDER BY MAX(ts) DESC', params):
+        out.append({'session_id': r[0], 'cycles': r[1], 'calls': r[2], 'first_ts': r[3],
+                    'last_ts': r[4], 'agent_ms': r[5] or 0, 'tokens': r[6] or 0,
+                    'role_compliance_rate': compliance.get(r[0])})
+    return out
+
+
+def report_yield(conn, last=None, role=None) -> list[dict]:
+    where, params = _session_filter(conn, last)
+    if role:
+        where, params = where + ' AND specialist_type = ?', params + [role]
+    rows: dict[str, dict] = {}
+    for r in conn.execute(
+            'SELECT specialist_type, classification, action, COUNT(*) FROM yield '
+            f'WHERE specialist_type IS NOT NULL{where} '
+            'GROUP BY specialist_type, classification, action', params):
+        row = rows.setdefault(r[0], {'specialist_type': r[0], 'reports': 0,
+                                     'classification': {}, 'action': {}})
+        row['reports'] += r[3]
+        row['classification'][r[1]] = row['classification'].get(r[1], 0) + r[3]
+        row['action'][r[2]] = row['action'].get(r[2], 0) + r[3]
+    return [rows[k] for k in sorted(rows)]
+
+
+def report_compliance(conn, last=None, role=None) -> list[dict]:
+    where, params = _session_filter(conn, last)
+    cols = ('session_id', 'cycle_id', 'computed_at', 'status', 'trace_record_count',
+            'pipeline_report_count', 'role_compliance_rate', 'false_pass_risk_count',
+            'ui_evidence_coverage', 'token_per_fixed_issue')
+    return [dict(zip(cols, r)) for r in conn.execute(
+        f'SELECT {", ".join(cols)} FROM harness WHERE 1{where} '
+        'ORDER BY session_id, cycle_id', params)]
+
+
+def report_scores(conn, last=None, role=None) -> list[dict]:
+    where, params = (' AND agent = ?', [role]) if role else ('', [])
+    return [{'agent': r[0], 'score': r[1], 'events': r[2], 'last_ts': r[3]}
+            for r in conn.execute(
+                'SELECT agent, new_score, n, ts FROM ('
+                '  SELECT agent, new_score, ts, COUNT(*) OVER (PARTITION BY agent) AS n,'
+                '         ROW_NUMBER() OVER (PARTITION BY agent ORDER BY ts DESC, offset DESC) AS k'
+                f'  FROM lifecycle WHERE agent IS NOT NULL{where}'
+                ') WHERE k = 1 ORDER BY agent', params)]
+
+
+def report_grants(conn, last=None, role=None) -> list[dict]:
+    where, params = _session_filter(conn, last)
+    if role:
+        where, params = where + ' AND role = ?', params + [role]
+    return [{'session_id': r[0], 'role': r[1], 'decision_reason': r[2], 'grants': r[3],
+             'targets': r[4]}
+            for r in conn.execute(
+                'SELECT session_id, role, decision_reason, COUNT(*), COUNT(DISTINCT target) '
+                f'FROM audit WHERE 1{where} GROUP BY session_id, role, decision_reason '
+                'ORDER BY session_id, role', params)]
+
+
+REPORTS = {
+    'roles': report_roles,
+    'nights': report_nights,
+    'yield': report_yield,
+    'compliance': report_compliance,
+    'scores': report_scores,
+    'grants': report_grants,
+}
+
+
+def _cell(value) -> str:
+    if value is None:
+        return '-'
+    if isinstance(value, float):
+        return f'{value:.4g}'
+    if isinstance(value, dict):
+        return ' '.join(f'{k}={v}' for k, v in sorted(value.items(), key=lambda kv: str(kv[0])))
+    return str(value)
+
+
+def format_table(rows: list[dict]) -> str:
+    cols = list(rows[0])
+    cells = [[_cell(r.get(c)) for c in cols] for r in rows]
+    widths = [max(len(c), *(len(row[i]) for row in cells)) for i, c in enumerate(cols)]
+    lines = ['  '.join(c.ljust(w) for c, w in zip(cols, widths)).rstrip()]
+    lines += ['  '.join(v.ljust(w) for v, w in zip(row, widths)).rstrip() for row in cells]
+    return '\n'.join(lines)
+
+
+def run_sql(db_path: str, query: str) -> list[dict]:
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    try:
+        cur = conn.execute(query)
+        cols = [d[0] for d in cur.description or ()]
+        return [dict(zip(cols, r)) for r in cur.fetchall()]
+    finally:
+        conn.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Query overnight observability data')
+    parser.add_argument('report', nargs='?', default='roles',
+                        choices=[*REPORTS, 'ingest', 'sql'])
+    parser.add_argument('query', nargs='?', help='SQL for the sql report')
+    parser.add_argument('--last', type=int, default=None, help='most recent N sessions only')
+    parser.add_argument('--role', default=None, help='only this role / specialist / agent')
+    parser.add_argument('--json', action='store_true')
+    parser.add_argument('--no-ingest', action='store_true', help='query the store as it is')
+    parser.add_argument('--project-dir', default=None)
+    parser.add_argument('--db', default=None)
+    parser.add_argument('--yield-log', default=None)
+    parser.add_argument('--lifecycle-file', default=None)
+    parser.add_argument('--audit-file', default=None)
+    args = parser.parse_args(argv)
+
+    paths = overnight_store.default_paths(args.project_dir)
+    for key, value in (('db', args.db), ('yield_log', args.yield_log),
+                       ('lifecycle', args.lifecycle_file), ('audit', args.audit_file)):
+        if value:
+            paths[key] = value
+    conn = overnight_store.connect(paths['db'])
+    try:
+        loaded = {} if args.no_ingest else overnight_store.ingest(conn, paths)
+        if args.report == 'ingest':
+            print(json.dumps(loaded, sort_keys=True) if args.json
+                  else ' '.join(f'{k}={v}' for k, v in sorted(loaded.items())) or 'up to date')
+            return 0
+        if args.report == 'sql':
+            if not args.query:
+                parser.error('sql needs a QUERY')
+            try:
+                rows = run_sql(paths['db'], args.query)
+            except sqlite3.Error as exc:
+                print(f'overnight-query: {exc}', file=sys.stderr)
+                return 2
+        else:
+            rows = REPORTS[args.report](conn, last=args.last, role=args.role)
+    finally:
+        conn.close()
+    if args.json:
+        print(json.dumps(rows, indent=2, sort_keys=True))
+    elif rows:
+        print(format_table(rows))
+    return 0 if rows else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,320 @@
+"""
+overnight_store.py — sqlite store for overnight observability streams.
+
+Overnight runs leave their data in many files:
+
+  docs/dev/overnight/<sid>/cycle-N/trace.jsonl            one row per Agent call
+  docs/dev/overnight/<sid>/cycle-N/harness-report.json    closeout metrics
+  .claude/state/specialist-yield-log.jsonl                specialist yield verdicts
+  ~/.claude/logs/lifecycle.jsonl                          agent score log
+  ~/.claude/logs/overnight-self-repair.jsonl              hook-guard grant audit rows
+
+ingest() loads all of them into one sqlite database (stdlib sqlite3) with
+indexed tables, so cross-night questions are a query rather than a glob and
+a parse of every file. Loading is incremental. The `sources` table remembers,
+per file, its inode, how many bytes were loaded and a digest of the bytes
+just before that offset:
+
+  - an unchanged file (same size, mtime and inode, and not modified within
+    the last second, where mtimes cannot be trusted) is not opened at all;
+  - an appended JSONL file is read from the stored offset on;
+  - a JSONL file that was replaced, truncated or rewritten has its rows
+    dropped and is loaded again from the start;
+  - a JSON report is re-read whenever it changed;
+  - rows from files that no longer exist are dropped.
+
+Only complete lines are loaded; a last line without its newline yet (an
+append in progress) is picked up by the next ingest. Malformed lines are
+skipped. Each file is loaded in its own transaction, so an interrupted
+ingest leaves the store consistent and the next run resumes.
+
+The store is a cache: deleting it just means the next ingest reloads
+everything. scripts/overnight-query.py ingests before every report.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+VERSION = 1
+_SIG_BYTES = 64
+_RACY_NS = 1_000_000_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS sources (
+    path TEXT PRIMARY KEY, kind TEXT NOT NULL, inode INTEGER, size INTEGER,
+    mtime_ns INTEGER, offset INTEGER, sig TEXT
+);
+CREATE TABLE IF NOT EXISTS trace (
+    source TEXT NOT NULL, offset INTEGER NOT NULL,
+    session_id TEXT, cycle_id INTEGER, ts TEXT, role TEXT, step TEXT,
+    pipeline_id TEXT, mode TEXT, duration_ms INTEGER, tool_call_count INTEGER,
+    estimated_tokens INTEGER, retry_count INTEGER, exit_status TEXT,
+    PRIMARY KEY (source, offset)
+);
+CREATE INDEX IF NOT EXISTS trace_role ON trace (role, duration_ms);
+CREATE INDEX IF NOT EXISTS trace_session ON trace (session_id, cycle_id);
+CREATE TABLE IF NOT EXISTS yield (
+    source TEXT NOT NULL, offset INTEGER NOT NULL,
+    session_id TEXT, cycle_id INTEGER, ts TEXT, specialist_type TEXT,
+    classification TEXT, action TEXT,
+    PRIMARY KEY (source, offset)
+);
+CREATE INDEX IF NOT EXISTS yield_specialist ON yield (specialist_type, session_id);
+CREATE TABLE IF NOT EXISTS lifecycle (
+    source TEXT NOT NULL, offset INTEGER NOT NULL,
+    ts TEXT, agent TEXT, event TEXT, prev_score INTEGER, new_score INTEGER,
+    delta INTEGER,
+    PRIMARY KEY (source, offset)
+);
+CREATE INDEX IF NOT EXISTS lifecycle_agent ON lifecycle (agent, ts);
+CREATE TABLE IF NOT EXISTS audit (
+    source TEXT NOT NULL, offset INTEGER NOT NULL,
+    session_id TEXT, cycle_id INTEGER, ts TEXT, role TEXT, pipeline_id TEXT,
+    target TEXT, tool_name TEXT, decision TEXT, decision_reason TEXT,
+    PRIMARY KEY (source, offset)
+);
+CREATE INDEX IF NOT EXISTS audit_session ON audit (session_id, role);
+CREATE TABLE IF NOT EXISTS harness (
+    source TEXT PRIMARY KEY, session_id TEXT, cycle_id INTEGER, computed_at TEXT,
+    status TEXT, trace_record_count INTEGER, pipeline_report_count INTEGER,
+    role_compliance_rate REAL, false_pass_risk_count INTEGER,
+    ui_evidence_coverage REAL, token_per_fixed_issue REAL
+);
+CREATE INDEX IF NOT EXISTS harness_session ON harness (session_id, cycle_id);
+"""
+
+
+def _int(value: Any) -> int | None:
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (int, float)):
+        return int(value)
+    try:
+        return int(str(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def _real(value: Any) -> float | None:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    return None
+
+
+def _text(value: Any) -> str | None:
+    return None if value is None else str(value)
+
+
+# JSONL streams: kind -> (table, columns, row builder)
+
+def _trace_row(rec: dict) -> tuple:
+    return (_text(rec.get("session_id")), _int(rec.get("cycle_id")),
+            _text(rec.get("end_ts") or rec.get("ts_iso")),
+            _text(rec.get("role") or rec.get("agent_type")), _text(rec.get("step")),
+            _text(rec.get("pipeline_id")), _text(rec.get("mode")),
+            _int(rec.get("duration_ms")), _int(rec.get("tool_call_count")),
+            _int(rec.get("estimated_tokens")), _int(rec.get("retry_count")),
+            _text(rec.get("exit_status")))
+
+
+def _yield_row(rec: dict) -> tuple:
+    return (_text(rec.get("session_id")), _int(rec.get("cycle_id")), _text(rec.get("timestamp")),
+            _text(rec.get("specialist_type")), _text(rec.get("classification")),
+            _text(rec.get("action")))
+
+
+def _lifecycle_row(rec: dict) -> tuple:
+    return (_text(rec.get("ts")), _text(rec.get("agent")), _text(rec.get("event")),
+            _int(rec.get("prev_score")), _int(rec.get("new_score")), _int(rec.get("delta")))
+
+
+def _audit_row(rec: dict) -> tuple:
+    return (_text(rec.get("session_id")), _int(rec.get("cycle_id")), _text(rec.get("ts")),
+            _text(rec.get("role")), _text(rec.get("pipeline_id")), _text(rec.get("target")),
+            _text(rec.get("tool_name")), _text(rec.get("decision")),
+            _text(rec.get("decision_reason")))
+
+
+STREAMS: dict[str, tuple[str, tuple[str, ...], Callable[[dict], tuple]]] = {
+    "trace": ("trace", ("session_id", "cycle_id", "ts", "role", "step", "pipeline_id", "mode",
+                        "duration_ms", "tool_call_count", "estimated_tokens", "retry_count",
+                        "exit_status"), _trace_row),
+    "yield": ("yield", ("session_id", "cycle_id", "ts", "specialist_type", "classification",
+                        "action"), _yield_row),
+    "lifecycle": ("lifecycle", ("ts", "agent", "event", "prev_score", "new_score", "delta"),
+                  _lifecycle_row),
+    "audit": ("audit", ("session_id", "cycle_id", "ts", "role", "pipeline_id", "target",
+                        "tool_name", "decision", "decision_reason"), _audit_row),
+}
+
+
+def default_paths(project_dir: str | None = None) -> dict[str, str]:
+    """Default locations of every stream (the same env overrides the writers use)."""
+    project = Path(project_dir or os.environ.get("CLAUDE_PROJECT_DIR") or os.getcwd())
+    return {
+        "project_dir": str(project),
+        "db": os.environ.get("OVERNIGHT_STORE_DB")
+        or str(project / ".claude" / "state" / "overnight.sqlite"),
+        "yield_log": os.environ.get("SPECIALIST_YIELD_LOG_PATH")
+        or str(project / ".claude" / "state" / "specialist-yield-log.jsonl"),
+        "lifecycle": os.path.expanduser("~/.claude/logs/lifecycle.jsonl"),
+        "audit": os.path.expanduser("~/.claude/logs/overnight-self-repair.jsonl"),
+    }
+
+
+def connect(db_path: str) -> sqlite3.Connection:
+    """Open (creating if needed) the store. A store from another VERSION is rebuilt."""
+    Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    row = None
+    try:
+        row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+    except sqlite3.OperationalError:
+        pass
+    if row is not None and row[0] != str(VERSION):
+        tables = [r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type='table'")]
+        with conn:
+            for name in tables:
+                conn.execute(f'DROP TABLE IF EXISTS "{name}"')
+    with conn:
+        conn.executescript(SCHEMA)
+        conn.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (str(VERSION),))
+    return conn
+
+
+def _sig(fh, offset: int) -> str:
+    start = max(0, offset - _SIG_BYTES)
+    fh.seek(start)
+    return hashlib.blake2b(fh.read(offset - start), digest_size=8).hexdigest()
+
+
+def _drop_source(conn: sqlite3.Connection, path: str, kind: str) -> None:
+    table = "harness" if kind == "harness" else STREAMS[kind][0]
+    conn.execute(f'DELETE FROM "{table}" WHERE source = ?', (path,))
+    conn.execute("DELETE FROM sources WHERE path = ?", (path,))
+
+
+def _iter_lines(data: bytes, base: int) -> Iterator[tuple[int, dict]]:
+    pos = base
+    for line in data.split(b"\n")[:-1]:
+        offset = pos
+        pos += len(line) + 1
+        try:
+            rec = json.loads(line)
+        except (ValueError, UnicodeDecodeError):
+            continue
+        if isinstance(rec, dict):
+            yield offset, rec
+
+
+def _load_jsonl(conn: sqlite3.Connection, path: str, kind: str, cursor: tuple | None) -> int:
+    """Load complete lines appended since the cursor; returns rows inserted."""
+    table, columns, build = STREAMS[kind]
+    try:
+        fh = open(path, "rb")
+    except OSError:
+        return 0
+    with fh, conn:
+        st = os.fstat(fh.fileno())
+        offset = 0
+        if cursor is not None:
+            inode, _size, _mtime, old_offset, old_sig = cursor
+            if inode == st.st_ino and st.st_size >= old_offset and _sig(fh, old_offset) == old_sig:
+                offset = old_offset
+            else:
+                _drop_source(conn, path, kind)
+        fh.seek(offset)
+        data = fh.read(st.st_size - offset)
+        end = offset + data.rfind(b"\n") + 1
+        rows = [(path, off) + build(rec) for off, rec in _iter_lines(data, offset)]
+        placeholders = ", ".join("?" * (len(columns) + 2))
+        conn.executemany(
+            f'INSERT OR REPLACE INTO "{table}" (source, offset, {", ".join(columns)}) '
+            f"VALUES ({placeholders})", rows)
+        conn.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?, ?, ?, ?)",
+                     (path, kind, st.st_ino, st.st_size, st.st_mtime_ns, end, _sig(fh, end)))
+    return len(rows)
+
+
+def _load_harness(conn: sqlite3.Connection, path: str) -> int:
+    try:
+        st = os.stat(path)
+        report = json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        report = None
+    with conn:
+        conn.execute("DELETE FROM harness WHERE source = ?", (path,))
+        if isinstance(report, dict):
+            m = report.get("metrics") if isinstance(report.get("metrics"), dict) else {}
+            conn.execute(
+                "INSERT INTO harness VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (path, _text(report.get("session_id")), _int(report.get("cycle_id")),
+                 _text(report.get("computed_at")), _text(report.get("status")),
+                 _int(report.get("trace_record_count")), _int(report.get("pipeline_report_count")),
+                 _real(m.get("role_compliance_rate")), _int(m.get("false_pass_risk_count")),
+                 _real(m.get("ui_evidence_coverage")), _real(m.get("token_per_fixed_issue"))))
+        if report is None:
+            conn.execute("DELETE FROM sources WHERE path = ?", (path,))
+            return 0
+        conn.execute("INSERT OR REPLACE INTO sources VALUES (?, 'harness', ?, ?, ?, NULL, NULL)",
+                     (path, st.st_ino, st.st_size, st.st_mtime_ns))
+    return 1
+
+
+def discover(paths: dict[str, str]) -> list[tuple[str, str]]:
+    """(path, kind) for every stream file that exists now."""
+    found: list[tuple[str, str]] = []
+    base = Path(paths["project_dir"]) / "docs" / "dev" / "overnight"
+    if base.is_dir():
+        for cycle in sorted(base.glob("*/cycle-*")):
+            for name, kind in (("trace.jsonl", "trace"), ("harness-report.json", "harness")):
+                if (cycle / name).is_file():
+                    found.append((str(cycle / name), kind))
+    for key, kind in (("yield_log", "yield"), ("lifecycle", "lifecycle"), ("audit", "audit")):
+        if paths.get(key) and os.path.isfile(paths[key]):
+            found.append((paths[key], kind))
+    return found
+
+
+def ingest(conn: sqlite3.Connection, paths: dict[str, str]) -> dict[str, int]:
+    """Bring the store up to date with every stream; returns rows loaded per kind."""
+    loaded: dict[str, int] = {}
+    known = {row[0]: (row[1], row[2:]) for row in conn.execute(
+        "SELECT path, kind, inode, size, mtime_ns, offset, sig FROM sources")}
+    present = discover(paths)
+    for path, kind in present:
+        old = known.get(path)
+        cursor = None
+        if old is not None:
+            if old[0] == kind:
+                cursor = old[1]
+            else:
+                with conn:
+                    _drop_source(conn, path, old[0])
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        if (cursor is not None and tuple(cursor[:3]) == (st.st_ino, st.st_size, st.st_mtime_ns)
+                and time.time_ns() - st.st_mtime_ns >= _RACY_NS):
+            continue
+        if kind == "harness":
+            n = _load_harness(conn, path)
+        else:
+            n = _load_jsonl(conn, path, kind, cursor)
+        loaded[kind] = loaded.get(kind, 0) + n
+    live = {path for path, _ in present}
+    with conn:
+        for path, (kind, _cursor) in known.items():
+            if path not in live:
+                _drop_source(conn, path, kind)
+    return loaded
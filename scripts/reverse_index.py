@@ -0,0 +1,244 @@
+"""reverse_index.py — persistent reverse reference index for blast-radius-tool.py.
+
+Maps a reference key to the repository files that mention it, so the
+blast-radius tool answers "who references util.py / imports util / names
+hooks.lib.util" with dict lookups instead of two `grep -r` passes over the
+whole repository per analysed file.
+
+Keys recorded per file:
+  name tokens   every dotted word in the text (`util.py`, `settings.json`,
+                `hooks.lib.util`) plus its dotted prefixes of two or more
+                segments (`hooks.lib`). For .py files only string literals and
+                comments are scanned (tokenize), so attribute chains in code do
+                not bloat the index; unparseable files are scanned as text.
+  py:<name>     each component of a Python import (ast): `import a.b` and
+                `from a.b import x` give py:a and py:b, and a relative
+                `from . import util` gives py:util.
+
+Files covered: `git ls-files -co --exclude-standard` (tracked + untracked,
+not ignored), or an os.walk outside git, filtered by blast-radius-tool's
+EXCLUDE_FRAGMENTS. Binary files (a NUL in the first 8 KB) are skipped.
+
+Stored at <graphify cache dir>/reverse-index.json (out of the repo; see
+graphify_lib.get_cache_dir), or not at all when that cache would sit inside
+the repo. Updates are incremental: the index remembers the commit it was
+built at and the paths that were dirty then; the next open rescans only
+`git diff --name-only <commit>` + untracked + those paths, and only the ones
+whose (mtime_ns, size) moved. Files modified within the last second are
+stored with mtime -1 so they are rescanned next time. A missing commit, a
+non-git root or a version change falls back to a full stat walk (which
+still re-reads only changed files).
+"""
+from __future__ import annotations
+
+import ast
+import io
+import json
+import os
+import re
+import subprocess
+import time
+import tokenize
+from pathlib import Path
+
+from graphify_lib import get_cache_dir, is_cache_root_inside_repo
+
+VERSION = 1
+INDEX_NAME = "reverse-index.json"
+HEAD_BYTES = 8192
+_RACY_NS = 1_000_000_000
+_NAME_RE = re.compile(r"[A-Za-z0-9_\-]+(?:\.[A-Za-z0-9_\-]+)+")
+_WALK_SKIP_DIRS = {".git", "venv", "__pycache__", ".archive", "worktrees",
+                   "plugins", "node_modules"}
+
+
+def _name_keys(text: str) -> set[str]:
+    keys: set[str] = set()
+    for token in _NAME_RE.findall(text):
+        keys.add(token)
+        parts = token.split(".")
+        for i in range(2, len(parts)):
+            keys.add(".".join(parts[:i]))
+    return keys
+
+
+def _python_keys(text: str) -> set[str] | None:
+    """Keys for a .py file, or None when it does not tokenize / parse."""
+    keys: set[str] = set()
+    try:
+        for tok in tokenize.generate_tokens(io.StringIO(text).readline):
+            if tok.type in (tokenize.STRING, tokenize.COMMENT):
+                keys |= _name_keys(tok.string)
+        tree = ast.parse(text)
+    except (tokenize.TokenError, SyntaxError, ValueError):
+        return None
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                keys.add(alias.name)
+                keys.update(f"py:{part}" for part in alias.name.split("."))
+        elif isinstance(node, ast.ImportFrom):
+            if node.module:
+                keys.add(node.module)
+                keys.update(f"py:{part}" for part in node.module.split("."))
+            elif node.level:
+                keys.update(f"py:{alias.name}" for alias in node.names)
+    return keys
+
+
+def file_keys(path: Path) -> list[str] | None:
+    """Reference keys for one file; None for unreadable or binary files."""
+    try:
+        data = path.read_bytes()
+    except OSError:
+        return None
+    if b"\0" in data[:HEAD_BYTES]:
+        return None
+    text = data.decode("utf-8", errors="replace")
+    keys = _python_keys(text) if path.suffix == ".py" else None
+    if keys is None:
+        keys = _name_keys(text)
+    return sorted(keys)
+
+
+def _git(root: Path, *args: str) -> list[str] | None:
+    try:
+        result = subprocess.run(["git", *args], cwd=str(root), capture_output=True,
+                                timeout=30, check=False)
+    except (subprocess.TimeoutExpired, FileNotFoundError):
+        return None
+    if result.returncode != 0:
+        return None
+    return [p for p in result.stdout.decode("utf-8", errors="replace").split("\0") if p]
+
+
+def default_index_path(root: Path) -> Path | None:
+    """<graphify cache dir>/reverse-index.json, or None if that is inside the repo."""
+    if is_cache_root_inside_repo(root):
+        return None
+    return get_cache_dir(root) / INDEX_NAME
+
+
+class ReverseIndex:
+    """Reference key -> referencing files, for the in-scope files under root."""
+
+    def __init__(self, root: Path, in_scope, path: Path | None) -> None:
+        self.root = root
+        self.in_scope = in_scope
+        self.path = path
+        self.commit: str | None = None
+        self.dirty: list[str] = []
+        self.files: dict[str, list] = {}  # rel -> [mtime_ns, size, keys]
+        self.rescanned = 0
+        self._reverse: dict[str, set[str]] | None = None
+
+    @classmethod
+    def open(cls, root: Path, in_scope, path: Path | None = None) -> "ReverseIndex":
+        """Load the stored index for root and bring it up to date."""
+        index = cls(root, in_scope, path if path is not None else default_index_path(root))
+        index._load()
+        index.update()
+        return index
+
+    # -- persistence -------------------------------------------------------
+    def _load(self) -> None:
+        if self.path is None:
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if (not isinstance(data, dict) or data.get("version") != VERSION
+                or data.get("root") != str(self.root)):
+            return
+        self.commit = data.get("commit")
+        self.dirty = list(data.get("dirty") or [])
+        self.files = data.get("files") or {}
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        data = {"version": VERSION, "root": str(self.root), "commit": self.commit,
+                "dirty": self.dirty, "files": self.files}
+        tmp = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp.write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+            os.replace(tmp, self.path)
+        except OSError:
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+
+    # -- refresh -----------------------------------------------------------
+    def _refresh(self, rel: str) -> None:
+        """Re-read rel if its (mtime_ns, size) moved; drop it if gone or out of scope."""
+        if not self.in_scope(rel):
+            self.files.pop(rel, None)
+            return
+        try:
+            st = os.stat(self.root / rel)
+        except OSError:
+            self.files.pop(rel, None)
+            return
+        entry = self.files.get(rel)
+        if entry and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            return
+        keys = file_keys(self.root / rel)
+        self.rescanned += 1
+        if keys is None:
+            self.files.pop(rel, None)
+            return
+        mtime = st.st_mtime_ns if time.time_ns() - st.st_mtime_ns >= _RACY_NS else -1
+        self.files[rel] = [mtime, st.st_size, keys]
+
+    def _walk(self) -> list[str]:
+        out: list[str] = []
+        for dirpath, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if d not in _WALK_SKIP_DIRS]
+            for name in filenames:
+                out.append(os.path.relpath(os.path.join(dirpath, name), self.root))
+        return out
+
+    def update(self) -> None:
+        head = _git(self.root, "rev-parse", "HEAD")
+        head = head[0].strip() if head else None
+        untracked = _git(self.root, "ls-files", "--others", "--exclude-standard", "-z")
+        changed = None
+        if head and self.commit and untracked is not None:
+            changed = _git(self.root, "diff", "--name-only", "-z", self.commit)
+        if changed is None:  # first build, history rewritten, or not a git repo
+            listed = _git(self.root, "ls-files", "-co", "--exclude-standard", "-z")
+            candidates = listed if listed is not None else self._walk()
+            for rel in set(self.files) - set(candidates):
+                del self.files[rel]
+        else:
+            candidates = list(dict.fromkeys([*changed, *untracked, *self.dirty]))
+        for rel in candidates:
+            self._refresh(rel)
+        if head:
+            dirty = set(untracked or ())
+            if self.commit == head and changed is not None:
+                dirty.update(changed)
+            else:
+                dirty.update(_git(self.root, "diff", "--name-only", "-z", "HEAD") or ())
+            self.dirty = sorted(dirty)
+        self.commit = head
+        self._reverse = None
+        if self.rescanned or changed is None:
+            self.save()
+
+    # -- queries -----------------------------------------------------------
+    def _reverse_map(self) -> dict[str, set[str]]:
+        if self._reverse is None:
+            reverse: dict[str, set[str]] = {}
+            for rel, (_mtime, _size, keys) in self.files.items():
+                for key in keys:
+                    reverse.setdefault(key, set()).add(rel)
+            self._reverse = reverse
+        return self._reverse
+
+    def referencing(self, key: str) -> set[str]:
+        """Files whose text (or, for py:<name>, whose imports) mention key."""
+        return set(self._reverse_map().get(key, ()))
@@ -12,6 +12,7 @@
 set -euo pipefail
 
 SCRIPT_NAME="$(basename "$0")"
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 LIFECYCLE_FILE_DEFAULT="${HOME}/.claude/logs/lifecycle.jsonl"
 
 usage() {
@@ -67,12 +68,14 @@ if ! flock -s -w "${LOCK_TIMEOUT}" 8; then
   exit 1
 fi
 
-( source ~/.claude/venv/bin/activate && python3 - "${LIFECYCLE_FILE}" "${AGENT}" <<'PYEOF'
+( source ~/.claude/venv/bin/activate && python3 - "${LIFECYCLE_FILE}" "${AGENT}" "${SCRIPT_DIR}" <<'PYEOF'
 import hashlib
-import json
 import sys
 
-lifecycle_file, agent = sys.argv[1:3]
+lifecycle_file, agent, scripts_dir = sys.argv[1:4]
+
+sys.path.insert(0, scripts_dir)
+from score_ledger import LedgerCorrupt, open_ledger
 
 RANK_BOUNDARIES = [
     (0, 20, "Apprentice"),
@@ -121,48 +124,36 @@ def emit_neutral_fallback():
     sys.stdout.write(tail + "\n")
     sys.stdout.write(injection_proof_block(fb_rank, fb_range, fb_recent))
 
-# Read lifecycle.jsonl under shared flock (flock already acquired by bash caller).
-# Scan all lines; take latest new_score for rank/range computation.
-# For recent-events, take last 3 entries where event != "score_baseline_import".
+# Read lifecycle.jsonl under shared flock (flock already acquired by bash caller)
+# through the ledger index (scripts/score_ledger.py), which only parses what was
+# appended since its last snapshot. It keeps the latest new_score for rank/range
+# and the last 3 entries where event != "score_baseline_import".
 # Malformed non-final JSONL line: exit 1 with stderr message (not silent fallback).
 try:
-    with open(lifecycle_file, "r", encoding="utf-8") as f:
-        lines = f.readlines()
+    ledger = open_ledger(lifecycle_file)
 except OSError as e:
     sys.stderr.write(f"score-inject.sh: cannot read {lifecycle_file}: {e}\n")
     sys.exit(1)
+except LedgerCorrupt as e:
+    # Non-final malformed line: audit corruption — exit 1 with stderr
+    sys.stderr.write(
+        f"score-inject.sh: malformed JSONL at line {e.line} of {lifecycle_file} (not final line) — possible audit corruption\n"
+    )
+    sys.exit(1)
 
-score = 50
-agent_found = False
-behavioral_events = []  # events with event != "score_baseline_import"
-
-for i, raw_line in enumerate(lines):
-    stripped = raw_line.rstrip("\n")
-    if not stripped:
-        continue
-    is_final = (i == len(lines) - 1)
-    try:
-        entry = json.loads(stripped)
-    except json.JSONDecodeError:
-        if is_final:
-            # Silently skip partial final line (crash-recovery path)
-            continue
-        # Non-final malformed line: audit corruption — exit 1 with stderr
-        sys.stderr.write(
-            f"score-inject.sh: malformed JSONL at line {i+1} of {lifecycle_file} (not final line) — possible audit corruption\n"
-        )
-        sys.exit(1)
-    if entry.get("agent") == agent:
-        score = int(entry.get("new_score", 50))
-        agent_found = True
-        ev = entry.get("event", "")
-        if ev != "score_baseline_import":
-            behavioral_events.append(entry)
-
-if not agent_found:
+record = ledger.agent(agent)
+if record is None:
     # No entry for this agent: neutral mid-tier fallback (same as missing-file behavior)
     emit_neutral_fallback()
     sys.exit(0)
+if record["bad"] is not None:
+    sys.stderr.write(
+        f"score-inject.sh: entry at line {record['bad']} of {lifecycle_file} has non-numeric new_score for agent '{agent}'\n"
+    )
+    sys.exit(1)
+
+score = record["score"]
+behavioral_events = record["recent"]  # events with event != "score_baseline_import"
 
 rank, rng = rank_and_range(score)
 
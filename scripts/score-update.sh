@@ -218,14 +218,17 @@ fi
 # 4 on --undo not-found/ambiguous (M2).
 # venv activation is co-located on the same line as python3 per /dev Standard 3 — spec-20260518-225715 Cycle 2 P3.6.
 ( source ~/.claude/venv/bin/activate && python3 - \
-    "${LIFECYCLE_FILE}" "${AGENT}" "${EVENT}" "${NOTE}" "${EXPECTED_PREV_SCORE}" "${DELTA}" "${UNDO_TS}" "${REASON}" <<'PYEOF'
+    "${LIFECYCLE_FILE}" "${AGENT}" "${EVENT}" "${NOTE}" "${EXPECTED_PREV_SCORE}" "${DELTA}" "${UNDO_TS}" "${REASON}" "${SCRIPT_DIR}" <<'PYEOF'
 import json
 import os
 import sys
 import datetime
 
 (lifecycle_file, agent, event, note, expected_prev_score_str,
- delta_str, undo_ts, reason) = sys.argv[1:9]
+ delta_str, undo_ts, reason, scripts_dir) = sys.argv[1:10]
+
+sys.path.insert(0, scripts_dir)
+from score_ledger import LedgerCorrupt, open_ledger
 
 # Canonical event delta table (spec 5.1).
 # Path A rebalance (task 20260524-205206 M1, cycle-total <= +5 across {dev,ba,qa}):
@@ -291,50 +294,34 @@ if mode == "event":
         )
         sys.exit(1)
 
-# Read lifecycle.jsonl entries (under existing exclusive flock).
+# Latest score and --undo target come from the ledger index (scripts/score_ledger.py),
+# which only parses what was appended since its last snapshot (under existing exclusive flock).
+# Non-final malformed line -> exit 2. Final malformed line -> silently skip (crash-recovery).
 try:
-    with open(lifecycle_file, "r", encoding="utf-8") as f:
-        raw_lines = f.readlines()
+    ledger = open_ledger(lifecycle_file, undo=(mode == "undo"))
 except OSError as e:
     sys.stderr.write(f"score-update.sh: cannot read {lifecycle_file}: {e}\n")
     sys.exit(2)
+except LedgerCorrupt as e:
+    sys.stderr.write(
+        f"score-update.sh: malformed JSONL at line {e.line} of {lifecycle_file} (not final line)\n"
+    )
+    sys.exit(2)
 
-# Parse every line; collect (idx, entry) for parseable ones.
-# Non-final malformed line -> exit 2. Final malformed line -> silently skip (crash-recovery).
-parsed_entries = []  # list of (line_index, entry_dict)
-for i, raw_line in enumerate(raw_lines):
-    stripped = raw_line.rstrip("\n")
-    if not stripped:
-        continue
-    is_final = (i == len(raw_lines) - 1)
-    try:
-        entry = json.loads(stripped)
-    except json.JSONDecodeError:
-        if is_final:
-            continue
+# Latest prior score for this agent (baseline 50 if none).
+prev_score = 50
+record = ledger.agent(agent)
+if record is not None:
+    if record["bad"] is not None:
         sys.stderr.write(
-            f"score-update.sh: malformed JSONL at line {i+1} of {lifecycle_file} (not final line)\n"
+            f"score-update.sh: prior entry for agent '{agent}' has non-numeric new_score\n"
         )
         sys.exit(2)
-    parsed_entries.append((i, entry))
-
-# Find latest prior entry for this agent (for prev_score baseline 50 if none).
-prev_score = 50
-latest_entry_found = False
-for _, entry in parsed_entries:
-    if entry.get("agent") == agent:
-        try:
-            prev_score = int(entry.get("new_score", 50))
-        except (TypeError, ValueError):
-            sys.stderr.write(
-                f"score-update.sh: prior entry for agent '{agent}' has non-numeric new_score\n"
-            )
-            sys.exit(2)
-        latest_entry_found = True
+    prev_score = record["score"]
 
 # CAS check: --expected-prev-score honored in event AND delta modes.
 # codex iter-1 F6: when no prior entry exists, baseline is 50; CAS must still
-# work — so we compare against current prev_score regardless of latest_entry_found.
+# work — so we compare against current prev_score whether or not a prior entry exists.
 if expected_prev_score_str and mode in ("event", "delta"):
     try:
         expected = int(expected_prev_score_str)
@@ -362,27 +349,26 @@ elif mode == "delta":
     final_event = "manual_reversal"
     final_reason = reason
 else:  # mode == "undo"
-    # Find matching (agent, ts) entries among parseable rows.
-    matches = [(i, e) for (i, e) in parsed_entries
-               if e.get("agent") == agent and e.get("ts") == undo_ts]
-    if len(matches) == 0:
+    # Matching (agent, ts) entries among parseable rows, from the undo index.
+    target = ledger.undo_target(agent, undo_ts)
+    match_count = target["count"] if target else 0
+    if match_count == 0:
         sys.stderr.write(
             f"score-update.sh: --undo target not found for ts={undo_ts} agent={agent}\n"
         )
         sys.exit(4)
-    if len(matches) > 1:
+    if match_count > 1:
         sys.stderr.write(
-            f"score-update.sh: --undo target ambiguous — {len(matches)} entries match (ts={undo_ts}, agent={agent})\n"
+            f"score-update.sh: --undo target ambiguous — {match_count} entries match (ts={undo_ts}, agent={agent})\n"
         )
         sys.exit(4)
-    target_idx, target_entry = matches[0]
-    target_delta_raw = target_entry.get("delta")
+    target_delta_raw = target["delta"]
     try:
         target_delta = int(target_delta_raw)
     except (TypeError, ValueError):
         sys.stderr.write(
             f"score-update.sh: --undo target row has non-numeric delta '{target_delta_raw}' "
-            f"(ts={undo_ts}, agent={agent}, line={target_idx+1})\n"
+            f"(ts={undo_ts}, agent={agent}, line={target['line']})\n"
         )
         sys.exit(2)
     delta = -target_delta
@@ -419,6 +405,13 @@ except OSError as e:
     sys.stderr.write(f"score-update.sh: failed to append to {lifecycle_file}: {e}\n")
     sys.exit(2)
 
+# Fold the new line into the index snapshot. The append already succeeded, so a
+# failure here only means the next call replays a longer tail.
+try:
+    ledger.refresh(save=True)
+except (OSError, LedgerCorrupt):
+    pass
+
 print(f"{agent}:{final_event}:{prev_score}->{new_score} (delta={delta}, unclamped={unclamped_score})")
 PYEOF
 )
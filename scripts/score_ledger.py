@@ -0,0 +1,286 @@
+"""
+score_ledger.py — append-aware index over the lifecycle score log.
+
+score-update.sh and score-inject.sh used to readlines() and json.loads every
+line of logs/lifecycle.jsonl on every call, under the lifecycle lock. The log
+is append-only (existing lines are never rewritten; tests/score-lifecycle-contract
+checks them byte for byte), so an index that remembers how far it has read only
+has to parse what was appended since.
+
+Two sidecars sit next to the log. Each one is a JSON snapshot of an index at a
+byte offset into the log:
+
+  <log>.idx        agent -> latest new_score + last 3 behavioral events
+                   (read by every score-update.sh / score-inject.sh call)
+  <log>.undo.idx   (agent, ts) -> match count, delta, line number
+                   (read by score-update.sh --undo only)
+
+Opening an index loads its snapshot and checks that it still describes the
+log: same inode, log not shorter than the offset, and the bytes just before
+the offset unchanged. It then replays the tail past the offset. Any mismatch,
+or an unreadable sidecar, re-indexes from line 1. score-update.sh rewrites the
+snapshot after every append. Readers rewrite it when they had to re-index or
+when the replayed tail has grown past COMPACT_BYTES (snapshot + tail
+compaction). The log itself is never compacted: it is the audit trail.
+
+Line semantics match the old full scan. Blank lines are skipped. A malformed
+line is tolerated only while it is the last line of the file (a torn append);
+anywhere else it raises LedgerCorrupt. A malformed last line, or a last line
+without its newline yet, is read but not folded into the snapshot, so the next
+call looks at it again.
+
+Callers hold lifecycle.jsonl.lock: score-update.sh exclusive, score-inject.sh
+shared. Sidecars are replaced atomically, so concurrent shared readers that
+both compact cannot tear them.
+
+CLI (recovery):
+  score_ledger.py rebuild [--lifecycle-file PATH]   drop both sidecars, re-index from the log
+  score_ledger.py compact [--lifecycle-file PATH]   fold the tail into both snapshots
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import fcntl
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from typing import Any
+
+VERSION = 1
+COMPACT_BYTES = 64 * 1024
+RECENT_EVENTS = 3
+BASELINE_EVENT = "score_baseline_import"
+DEFAULT_SCORE = 50
+LIFECYCLE_FILE_DEFAULT = os.path.expanduser("~/.claude/logs/lifecycle.jsonl")
+
+_SIG_BYTES = 64
+
+
+class LedgerCorrupt(Exception):
+    """A malformed line that is not the last line of the log."""
+
+    def __init__(self, line: int):
+        super().__init__(f"malformed JSONL at line {line}")
+        self.line = line
+
+
+def _sig(fh, offset: int) -> str:
+    """Digest of the bytes just before `offset` (detects an in-place rewrite)."""
+    start = max(0, offset - _SIG_BYTES)
+    fh.seek(start)
+    return hashlib.blake2b(fh.read(offset - start), digest_size=8).hexdigest()
+
+
+class _Index:
+    """Records keyed by key(entry), folded in log order; see the module docstring."""
+
+    suffix = ""
+
+    def __init__(self, log_path: str):
+        self.path = log_path + self.suffix
+        self.records: dict = {}
+        self.offset = 0        # log bytes folded into self.records
+        self.lines = 0         # log lines folded into self.records
+        self.sig = ""
+        self.tail = 0          # bytes replayed past the loaded snapshot
+        self.loaded = False    # a valid snapshot was found
+        self.pending: list = []  # (line, entry) read past offset, not folded
+
+    def key(self, entry: dict) -> str | None:
+        raise NotImplementedError
+
+    def fold(self, rec: Any, line: int, entry: dict) -> Any:
+        raise NotImplementedError
+
+    def get(self, key: str) -> Any:
+        rec = self.records.get(key)
+        for line, entry in self.pending:
+            if self.key(entry) == key:
+                rec = self.fold(copy.deepcopy(rec), line, entry)
+        return rec
+
+    def _load(self, fh, st: os.stat_result) -> bool:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                doc = json.load(f)
+            offset, lines, records = doc["offset"], doc["lines"], doc["records"]
+            if doc["version"] != VERSION or doc["ino"] != st.st_ino \
+                    or not isinstance(offset, int) or not 0 <= offset <= st.st_size \
+                    or not isinstance(lines, int) or not isinstance(records, dict) \
+                    or doc["sig"] != _sig(fh, offset):
+                return False
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+        self.records, self.offset, self.lines = records, offset, lines
+        return True
+
+    def refresh(self, fh, st: os.stat_result) -> None:
+        """Bring the index up to the end of the log open as `fh`."""
+        if not self.loaded:
+            self.loaded = self._load(fh, st)
+        fh.seek(self.offset)
+        buf = fh.read()
+        *terminated, rest = buf.split(b"\n")
+        self.pending = []
+        consumed = 0
+        for i, raw in enumerate(terminated):
+            line = self.lines + 1
+            if raw.strip(b"\r"):
+                try:
+                    entry = json.loads(raw)
+                except ValueError:
+                    if i == len(terminated) - 1 and not rest:
+                        break  # torn final line: look at it again next call
+                    raise LedgerCorrupt(line) from None
+                k = self.key(entry) if isinstance(entry, dict) else None
+                if k is not None:
+                    self.records[k] = self.fold(self.records.get(k), line, entry)
+            self.lines = line
+            consumed += len(raw) + 1
+        if rest:
+            try:
+                entry = json.loads(rest)
+            except ValueError:
+                entry = None
+            if isinstance(entry, dict) and self.key(entry) is not None:
+                self.pending.append((self.lines + 1, entry))
+        self.offset += consumed
+        self.tail += consumed
+        self.sig = _sig(fh, self.offset)
+
+    def save(self, ino: int) -> None:
+        """Atomically replace the sidecar with the current snapshot (best effort)."""
+        doc = {"version": VERSION, "ino": ino, "offset": self.offset, "lines": self.lines,
+               "sig": self.sig, "records": self.records}
+        fd, tmp = -1, ""
+        try:
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.path) or ".",
+                                       prefix=os.path.basename(self.path) + ".")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                fd = -1
+                json.dump(doc, f, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp, self.path)
+            tmp = ""
+        except OSError:
+            pass
+        finally:
+            if fd >= 0:
+                os.close(fd)
+            if tmp:
+                try:
+                    os.unlink(tmp)
+                except OSError:
+                    pass
+        self.loaded, self.tail = True, 0
+
+
+class _ScoreIndex(_Index):
+    """agent -> {"score": latest int new_score, "bad": first non-numeric line, "recent": [...]}"""
+
+    suffix = ".idx"
+
+    def key(self, entry):
+        agent = entry.get("agent")
+        return agent if isinstance(agent, str) else None
+
+    def fold(self, rec, line, entry):
+        rec = rec or {"score": DEFAULT_SCORE, "bad": None, "recent": []}
+        try:
+            rec["score"] = int(entry.get("new_score", DEFAULT_SCORE))
+        except (TypeError, ValueError, OverflowError):
+            if rec["bad"] is None:
+                rec["bad"] = line
+        if entry.get("event", "") != BASELINE_EVENT:
+            rec["recent"] = (rec["recent"] + [entry])[-RECENT_EVENTS:]
+        return rec
+
+
+class _UndoIndex(_Index):
+    """"<agent>\\0<ts>" -> {"count": matches, "delta": first match's delta, "line": its line}"""
+
+    suffix = ".undo.idx"
+
+    def key(self, entry):
+        agent, ts = entry.get("agent"), entry.get("ts")
+        if isinstance(agent, str) and isinstance(ts, str):
+            return f"{agent}\0{ts}"
+        return None
+
+    def fold(self, rec, line, entry):
+        if rec is None:
+            return {"count": 1, "delta": entry.get("delta"), "line": line}
+        rec["count"] += 1
+        return rec
+
+
+class Ledger:
+    """Indexed view of one lifecycle log. Build with open_ledger()."""
+
+    def __init__(self, log_path: str, undo: bool = False):
+        self.log_path = log_path
+        self.indexes = [_ScoreIndex(log_path)] + ([_UndoIndex(log_path)] if undo else [])
+
+    def agent(self, agent: str) -> dict | None:
+        """{"score", "bad", "recent"} for `agent`, or None if it has no entry."""
+        return self.indexes[0].get(agent)
+
+    def undo_target(self, agent: str, ts: str) -> dict | None:
+        """{"count", "delta", "line"} for entries matching (agent, ts), or None."""
+        return self.indexes[1].get(f"{agent}\0{ts}")
+
+    def refresh(self, save: bool = False) -> None:
+        """Replay whatever was appended since the last refresh.
+
+        Snapshots are rewritten when `save` is set (score-update.sh after its
+        append), when no valid snapshot existed, or when the replayed tail
+        has reached COMPACT_BYTES.
+        """
+        with open(self.log_path, "rb") as fh:
+            st = os.fstat(fh.fileno())
+            for idx in self.indexes:
+                idx.refresh(fh, st)
+                if save or not idx.loaded or idx.tail >= COMPACT_BYTES:
+                    idx.save(st.st_ino)
+
+
+def open_ledger(log_path: str, undo: bool = False) -> Ledger:
+    """Index `log_path`; raises OSError if it cannot be read, LedgerCorrupt on a bad line."""
+    ledger = Ledger(log_path, undo=undo)
+    ledger.refresh()
+    return ledger
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description="Rebuild or compact the lifecycle score index.")
+    ap.add_argument("command", choices=("rebuild", "compact"))
+    ap.add_argument("--lifecycle-file", default=LIFECYCLE_FILE_DEFAULT)
+    args = ap.parse_args(argv)
+    log = args.lifecycle_file
+    try:
+        with open(log + ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            if args.command == "rebuild":
+                for idx in (_ScoreIndex(log), _UndoIndex(log)):
+                    try:
+                        os.unlink(idx.path)
+                    except FileNotFoundError:
+                        pass
+            ledger = Ledger(log, undo=True)
+            ledger.refresh(save=True)
+    except OSError as e:
+        sys.stderr.write(f"score_ledger.py: cannot index {log}: {e}\n")
+        return 2
+    except LedgerCorrupt as e:
+        sys.stderr.write(f"score_ledger.py: {e} of {log} (not final line)\n")
+        return 2
+    scores = ledger.indexes[0]
+    print(f"{args.command}: {scores.lines} lines, {len(scores.records)} agents, offset {scores.offset}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""Hook latency benchmark: replay recorded payloads through the wired hooks.
+
+Every payload in corpus.jsonl is sent through each hook that settings.json
+wires for its event and tool (selection via hooks/lib/hook_dispatch), one
+`bash -c <command>` process per hook exactly as Claude Code spawns them. Wall
+time is reported as p50/p95/p99 per hook and per event; an event sample is
+the total cost of one tool call (the sum over its hooks).
+
+Each run is sandboxed: `$HOME/.claude` in the wired commands points at this
+checkout, while HOME, CLAUDE_TMPDIR, the guard verdict cache and the payload
+cwd point at a throwaway git workspace. Hooks therefore never touch real
+grants, logs or repos.
+
+Corpus lines are {"label", "event", "payload"}. The placeholders @WORKSPACE@,
+@SESSION@ and @TRANSCRIPT@ are filled in per run. record_payload.py captures
+new payloads from a live session.
+
+Usage:
+  hook_bench.py                      print the report
+  hook_bench.py --check              also fail (exit 1) on regression vs baseline.json
+  hook_bench.py --update-baseline    store this run as the new baseline
+  hook_bench.py --json FILE          write the raw stats as JSON
+
+A hook regresses when its p50 or p95 exceeds the baseline by more than
+--tolerance (fraction, default 0.5) plus --slack-ms (default 20ms). The
+absolute slack keeps fast hooks from flapping on scheduler noise.
+
+Timings are host-relative. Each run first measures floor_ms, the p50 cost of
+`bash -c 'python3 -c pass'` (the spawn floor every Python hook pays), and the
+baseline stores it next to its timings and the host it was recorded on.
+--check scales the baseline by current floor_ms / baseline floor_ms, so a
+slower or faster machine moves the limits with it.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BENCH_DIR.parent.parent
+HOOKS_DIR = REPO_ROOT / "hooks"
+CORPUS = BENCH_DIR / "corpus.jsonl"
+BASELINE = BENCH_DIR / "baseline.json"
+SETTINGS = REPO_ROOT / "settings.json"
+
+sys.path.insert(0, str(HOOKS_DIR))
+
+from lib import hook_dispatch  # noqa: E402
+from lib.hook_telemetry import percentile  # noqa: E402
+
+DEFAULT_TOLERANCE = 0.5
+DEFAULT_SLACK_MS = 20.0
+PERCENTILES = (50, 95, 99)
+CALIBRATION_ROUNDS = 20
+
+
+def summarize(samples: list[float]) -> dict:
+    stats = {f"p{p}": round(percentile(samples, p), 2) for p in PERCENTILES}
+    stats["n"] = len(samples)
+    return stats
+
+
+def load_corpus(path: Path = CORPUS) -> list[dict]:
+    with open(path, encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh if line.strip()]
+
+
+def wired_command(command: str) -> str:
+    """The settings command with the checkout standing in for ~/.claude."""
+    root = str(REPO_ROOT)
+    return command.replace("$HOME/.claude", root).replace("~/.claude", root)
+
+
+def hook_name(command: str) -> str:
+    """Basename of the script a settings command runs (the command if none)."""
+    try:
+        words = shlex.split(command)
+    except ValueError:
+        return command
+    scripts = [w for w in words if w.endswith((".py", ".sh"))]
+    return os.path.basename(scripts[0]) if scripts else command
+
+
+def make_workspace(root: Path) -> dict:
+    """Throwaway HOME + git workspace; returns the env the hooks run with."""
+    home, work = root / "home", root / "workspace"
+    (home / ".claude").mkdir(parents=True)
+    (work / "src").mkdir(parents=True)
+    (work / "src" / "app.py").write_text("def main():\n    return 1\n")
+    (work / "README.md").write_text("# demo\n")
+    git = ["git", "-C", str(work), "-c", "user.name=bench", "-c", "user.email=bench@localhost"]
+    subprocess.run(git[:3] + ["init", "-q"], check=True)
+    subprocess.run(git + ["add", "-A"], check=True)
+    subprocess.run(git + ["commit", "-qm", "init"], check=True)
+    (root / "transcript.jsonl").write_text("")
+    env = dict(os.environ, HOME=str(home), CLAUDE_TMPDIR=str(root),
+               CLAUDE_PROJECT_DIR=str(work),
+               CLAUDE_GUARD_CACHE_FILE=str(root / "verdicts.json"))
+    for var in ("CLAUDE_TASK_ID", "CLAUDE_SESSION_ID"):
+        env.pop(var, None)
+    return env
+
+
+def render_payload(entry: dict, root: Path, session: str) -> tuple[str, dict]:
+    raw = json.dumps(entry["payload"])
+    raw = (raw.replace("@WORKSPACE@", str(root / "workspace"))
+              .replace("@SESSION@", session)
+              .replace("@TRANSCRIPT@", str(root / "transcript.jsonl")))
+    return raw, json.loads(raw)
+
+
+def run_hook(command: str, raw: str, env: dict, cwd: str, timeout: int) -> tuple[float, int]:
+    start = time.perf_counter()
+    try:
+        proc = subprocess.run(["bash", "-c", command], input=raw, text=True,
+                              capture_output=True, env=env, cwd=cwd, timeout=timeout)
+        status = proc.returncode
+    except subprocess.TimeoutExpired:
+        status = 124
+    return (time.perf_counter() - start) * 1000, status
+
+
+def calibrate(rounds: int = CALIBRATION_ROUNDS) -> float:
+    """p50 ms of spawning a bare `python3` the way a wired hook is spawned."""
+    samples = [run_hook("python3 -c pass", "", os.environ, ".", 30)[0] for _ in range(rounds)]
+    return round(percentile(samples, 50), 2)
+
+
+def host_info() -> dict:
+    return {"platform": platform.platform(), "machine": platform.machine(),
+            "python": platform.python_version(), "cpus": os.cpu_count()}
+
+
+def bench(corpus: list[dict], rounds: int = 3, warmup: int = 1,
+          only_event: str | None = None, only_hook: str | None = None) -> dict:
+    """Run the corpus; returns {"floor_ms", "hooks", "events", "statuses"}."""
+    table = hook_dispatch.load_table(str(SETTINGS))
+    floor_ms = calibrate()
+    hook_samples: dict[str, list[float]] = {}
+    event_samples: dict[str, list[float]] = {}
+    statuses: dict[str, dict[str, int]] = {}
+    with tempfile.TemporaryDirectory(prefix="hook-bench-") as tmp:
+        root = Path(tmp)
+        env = make_workspace(root)
+        cwd = str(root / "workspace")
+        for rnd in range(warmup + rounds):
+            for i, entry in enumerate(corpus):
+                event = entry["event"]
+                if only_event and event != only_event:
+                    continue
+                raw, payload = render_payload(entry, root, f"hook-bench-{i}")
+                total = 0.0
+                for hook in hook_dispatch.select_hooks(table, event, payload):
+                    name = hook_name(hook.command)
+                    key = f"{event}:{name}"
+                    if only_hook and name != only_hook:
+                        continue
+                    ms, status = run_hook(wired_command(hook.command), raw, env, cwd, hook.timeout)
+                    total += ms
+                    if rnd < warmup:
+                        continue
+                    hook_samples.setdefault(key, []).append(ms)
+                    counts = statuses.setdefault(key, {})
+                    counts[str(status)] = counts.get(str(status), 0) + 1
+                if rnd >= warmup:
+                    event_samples.setdefault(event, []).append(total)
+    return {
+        "floor_ms": floor_ms,
+        "hooks": {k: summarize(v) for k, v in sorted(hook_samples.items())},
+        "events": {k: summarize(v) for k, v in sorted(event_samples.items())},
+        "statuses": statuses,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE,
+            slack_ms: float = DEFAULT_SLACK_MS) -> list[str]:
+    """Regression messages for hooks/events slower than the baseline allows.
+
+    Baseline timings (and the slack) are scaled by the ratio of the two runs'
+    floor_ms when both recorded one.
+    """
+    scale = 1.0
+    if current.get("floor_ms") and baseline.get("floor_ms"):
+        scale = current["floor_ms"] / baseline["floor_ms"]
+    problems = []
+    for section in ("hooks", "events"):
+        base = baseline.get(section, {})
+        for key, stats in current.get(section, {}).items():
+            ref = base.get(key)
+            if not ref:
+                continue
+            for p in ("p50", "p95"):
+                limit = (ref[p] * (1 + tolerance) + slack_ms) * scale
+                if stats[p] > limit:
+                    problems.append(f"{key} {p} {stats[p]:.1f}ms > {limit:.1f}ms "
+                                    f"(baseline {ref[p]:.1f}ms x{scale:.2f})")
+    return problems
+
+
+def format_report(result: dict) -> str:
+    lines = [f"spawn floor {result['floor_ms']:.1f}ms", "",
+             f"{'hook':<56} {'n':>4} {'p50':>8} {'p95':>8} {'p99':>8}"]
+    for section in ("hooks", "events"):
+        if section == "events":
+            lines.append("")
+            lines.append("per event (sum of hooks per tool call)")
+        for key, s in result[section].items():
+            lines.append(f"{key:<56} {s['n']:>4} {s['p50']:>7.1f}ms {s['p95']:>7.1f}ms {s['p99']:>7.1f}ms")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", type=Path, default=CORPUS)
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--event", help="only replay payloads of this event")
+    parser.add_argument("--hook", help="only time this hook (basename)")
+    parser.add_argument("--check", action="store_true", help="exit 1 on regression")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--slack-ms", type=float, default=DEFAULT_SLACK_MS)
+    parser.add_argument("--json", type=Path, help="write raw stats here")
+    args = parser.parse_args(argv)
+
+    result = bench(load_corpus(args.corpus), args.rounds, args.warmup, args.event, args.hook)
+    print(format_report(result))
+    if args.json:
+        args.json.write_text(json.dumps(result, indent=2) + "\n")
+    if args.update_baseline:
+        doc = {"rounds": args.rounds, "host": host_info(), "floor_ms": result["floor_ms"],
+               "hooks": result["hooks"], "events": result["events"]}
+        args.baseline.write_text(json.dumps(doc, indent=2, sort_keys=True) + "\n")
+        print(f"\nbaseline written: {args.baseline}")
+    if args.check:
+        try:
+            baseline = json.loads(args.baseline.read_text())
+        except (OSError, ValueError):
+            print(f"\nno usable baseline at {args.baseline}", file=sys.stderr)
+            return 1
+        problems = compare(result, baseline, args.tolerance, args.slack_ms)
+        for problem in problems:
+            print(f"REGRESSION: {problem}", file=sys.stderr)
+        return 1 if problems else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
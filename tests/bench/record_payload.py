@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""Capture live hook payloads into a hook_bench corpus.
+
+Wire it next to the real hooks of an event (opt-in, never in the shipped
+settings.json):
+
+  {"type": "command", "command": "python3 ~/.claude/tests/bench/record_payload.py PreToolUse"}
+
+Each payload is appended to $CLAUDE_HOOK_BENCH_RECORD (default
+~/.claude/logs/hook-bench-recorded.jsonl) as a corpus line. The session id,
+transcript path and cwd are replaced with hook_bench's placeholders so the line
+can be pasted into corpus.jsonl after review (redact anything private first).
+Always exits 0 and prints nothing, so it never changes a session's outcome.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+
+PLACEHOLDERS = (("session_id", "@SESSION@"), ("transcript_path", "@TRANSCRIPT@"),
+                ("cwd", "@WORKSPACE@"))
+
+
+def to_entry(event: str, payload: dict) -> dict:
+    payload = dict(payload)
+    cwd = payload.get("cwd")
+    for field, placeholder in PLACEHOLDERS:
+        if field in payload:
+            payload[field] = placeholder
+    tool_input = payload.get("tool_input")
+    if cwd and isinstance(tool_input, dict):
+        payload["tool_input"] = json.loads(
+            json.dumps(tool_input).replace(json.dumps(cwd)[1:-1], "@WORKSPACE@"))
+    label = payload.get("tool_name") or event
+    return {"label": f"recorded {label}", "event": event, "payload": payload}
+
+
+def main(argv: list[str]) -> int:
+    try:
+        payload = json.loads(sys.stdin.read())
+        event = argv[1] if len(argv) > 1 else payload.get("hook_event_name", "unknown")
+        path = os.environ.get("CLAUDE_HOOK_BENCH_RECORD") or os.path.expanduser(
+            "~/.claude/logs/hook-bench-recorded.jsonl")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(to_entry(event, payload)) + "\n")
+    except Exception:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv))
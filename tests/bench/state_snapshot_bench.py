@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Fresh-process benchmark for hooks/lib/state_snapshot.py.
+
+Every hook runs in its own process, so the snapshot only pays off if a single
+fresh process gets cheaper. This runs pretool-overnight-hook-guard.py (the
+heaviest state reader: up to five overnight-state lookups per call) against a
+throwaway project with --states overnight-state files, once per sample, with
+CLAUDE_STATE_SNAPSHOT=0 (re-list and re-parse every lookup, the behaviour
+before the snapshot) and with the default, and reports p50/p95 wall time.
+
+Usage:
+  state_snapshot_bench.py [--states 45] [--rounds 40] [--json FILE]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR))
+
+import hook_bench  # noqa: E402
+
+GUARD = hook_bench.HOOKS_DIR / "pretool-overnight-hook-guard.py"
+MODES = {"disabled": "0", "snapshot": "1"}
+
+
+def make_project(root: Path, states: int) -> Path:
+    """A project whose .claude/ holds `states` live overnight sessions."""
+    claude = root / "proj" / ".claude"
+    claude.mkdir(parents=True)
+    past = time.time() - 60
+    for i in range(states):
+        path = claude / f"overnight-state-s{i}.json"
+        path.write_text(json.dumps({
+            "session_id": f"s{i}", "current_phase": "dev",
+            "end_time": "2099-01-01T00:00:00Z", "worktree_path": str(root / f"wt{i}"),
+            "phases": [{"name": f"p{j}", "notes": "x" * 200} for j in range(20)],
+        }))
+        os.utime(path, (past, past))
+    return claude.parent
+
+
+def bench(states: int = 45, rounds: int = 40) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        proj = make_project(Path(tmp), states)
+        raw = json.dumps({"tool_name": "Bash", "session_id": "s0", "cwd": str(proj),
+                          "tool_input": {"command": "git status"}})
+        samples = {mode: [] for mode in MODES}
+        for i in range(rounds + 1):
+            for mode, flag in MODES.items():
+                env = dict(os.environ, HOME=tmp, CLAUDE_PROJECT_DIR=str(proj),
+                           CLAUDE_STATE_SNAPSHOT=flag)
+                t0 = time.perf_counter()
+                subprocess.run([sys.executable, str(GUARD)], input=raw, text=True,
+                               capture_output=True, env=env, cwd=str(proj), timeout=60)
+                if i:  # the first round only warms the page cache
+                    samples[mode].append((time.perf_counter() - t0) * 1000)
+    return {mode: hook_bench.summarize(s) for mode, s in samples.items()}
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--states", type=int, default=45)
+    ap.add_argument("--rounds", type=int, default=40)
+    ap.add_argument("--json", metavar="FILE")
+    args = ap.parse_args(argv)
+    result = bench(args.states, args.rounds)
+    for mode, stats in result.items():
+        print(f"{mode:<9} p50 {stats['p50']:7.1f}ms  p95 {stats['p95']:7.1f}ms")
+    if args.json:
+        Path(args.json).write_text(json.dumps(result, indent=2) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""Tests for the hook latency benchmark (tests/bench/hook_bench.py).
+
+The fast tests check the statistics, the regression gate and that the corpus
+covers every wired event and tool. The full replay against baseline.json takes
+about a minute and, like the fresh-process state snapshot comparison, only runs
+with CLAUDE_HOOK_BENCH=1.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR))
+
+import hook_bench  # noqa: E402
+import record_payload  # noqa: E402
+
+
+class TestStats(unittest.TestCase):
+    def test_percentile_nearest_rank(self):
+        samples = [float(x) for x in range(1, 101)]
+        self.assertEqual(hook_bench.percentile(samples, 50), 51.0)
+        self.assertEqual(hook_bench.percentile(samples, 99), 99.0)
+        self.assertEqual(hook_bench.percentile([7.0], 95), 7.0)
+
+    def test_compare_flags_only_real_regressions(self):
+        baseline = {"hooks": {"PreToolUse:a.sh": {"p50": 100.0, "p95": 120.0}},
+                    "events": {"PreToolUse": {"p50": 300.0, "p95": 400.0}}}
+        current = {"hooks": {"PreToolUse:a.sh": {"p50": 160.0, "p95": 190.0},
+                             "PreToolUse:new.sh": {"p50": 900.0, "p95": 900.0}},
+                   "events": {"PreToolUse": {"p50": 460.0, "p95": 700.0}}}
+        problems = hook_bench.compare(current, baseline, tolerance=0.5, slack_ms=20)
+        self.assertEqual(len(problems), 1)
+        self.assertTrue(problems[0].startswith("PreToolUse p95"))
+
+    def test_compare_scales_baseline_by_spawn_floor(self):
+        baseline = {"floor_ms": 20.0, "hooks": {"PreToolUse:a.sh": {"p50": 100.0, "p95": 100.0}}}
+        current = {"floor_ms": 40.0, "hooks": {"PreToolUse:a.sh": {"p50": 300.0, "p95": 300.0}}}
+        self.assertEqual(hook_bench.compare(current, baseline, tolerance=0.5, slack_ms=20), [])
+        current["floor_ms"] = 20.0
+        self.assertEqual(len(hook_bench.compare(current, baseline, tolerance=0.5, slack_ms=20)), 2)
+
+    def test_hook_name_and_wired_command(self):
+        cmd = 'python3 "$HOME/.claude/hooks/pretool-bash-safety.py"'
+        self.assertEqual(hook_bench.hook_name(cmd), "pretool-bash-safety.py")
+        self.assertEqual(hook_bench.hook_name("bash ~/.claude/hooks/x.sh --fast"), "x.sh")
+        self.assertIn(str(hook_bench.REPO_ROOT / "hooks"), hook_bench.wired_command(cmd))
+
+
+class TestCorpus(unittest.TestCase):
+    def test_every_payload_reaches_a_wired_hook(self):
+        table = hook_bench.hook_dispatch.load_table(str(hook_bench.SETTINGS))
+        for entry in hook_bench.load_corpus():
+            hooks = hook_bench.hook_dispatch.select_hooks(table, entry["event"], entry["payload"])
+            self.assertTrue(hooks, entry["label"])
+
+    def test_corpus_covers_events_and_tools(self):
+        corpus = hook_bench.load_corpus()
+        self.assertEqual(len({e["label"] for e in corpus}), len(corpus))
+        seen = {(e["event"], e["payload"].get("tool_name")) for e in corpus}
+        for event in ("PreToolUse", "PostToolUse"):
+            for tool in ("Bash", "Write", "Edit", "Agent", "TodoWrite"):
+                self.assertIn((event, tool), seen)
+        self.assertIn(("UserPromptSubmit", None), seen)
+
+    def test_baseline_covers_corpus_events(self):
+        baseline = json.loads(hook_bench.BASELINE.read_text())
+        self.assertEqual(set(baseline["events"]),
+                         {e["event"] for e in hook_bench.load_corpus()})
+        self.assertGreater(baseline["floor_ms"], 0)
+        self.assertIn("platform", baseline["host"])
+
+
+class TestRecorder(unittest.TestCase):
+    def test_recorded_entry_uses_placeholders(self):
+        payload = {"session_id": "s-1", "transcript_path": "/x/t.jsonl", "cwd": "/w",
+                   "tool_name": "Write",
+                   "tool_input": {"file_path": "/w/src/a.py", "content": "x"}}
+        entry = record_payload.to_entry("PreToolUse", payload)
+        self.assertEqual(entry["event"], "PreToolUse")
+        self.assertEqual(entry["payload"]["session_id"], "@SESSION@")
+        self.assertEqual(entry["payload"]["tool_input"]["file_path"], "@WORKSPACE@/src/a.py")
+        self.assertEqual(payload["session_id"], "s-1")
+
+    def test_recorder_never_fails(self):
+        proc = subprocess.run([sys.executable, str(BENCH_DIR / "record_payload.py")],
+                              input="not json", text=True, capture_output=True, timeout=30)
+        self.assertEqual((proc.returncode, proc.stdout), (0, ""))
+
+
+@unittest.skipUnless(os.environ.get("CLAUDE_HOOK_BENCH") == "1",
+                     "full hook replay; set CLAUDE_HOOK_BENCH=1")
+class TestRegressionGate(unittest.TestCase):
+    def test_no_hook_regressed_vs_baseline(self):
+        proc = subprocess.run([sys.executable, str(BENCH_DIR / "hook_bench.py"), "--check"],
+                              text=True, capture_output=True, timeout=900)
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+
+    def test_state_snapshot_helps_a_fresh_process(self):
+        import state_snapshot_bench
+        result = state_snapshot_bench.bench(states=45, rounds=30)
+        self.assertLessEqual(result["snapshot"]["p50"], result["disabled"]["p50"] + 2.0, result)
+
+
+if __name__ == "__main__":
+    unittest.main()
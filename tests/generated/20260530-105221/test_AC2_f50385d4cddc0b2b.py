@@ -21,6 +21,8 @@ def test_AC2(real_binary, fixture_env):
     THEN:  (a) parses edges from links (source/target/relation) read directly from graph.json (deterministic primary signal); (b) MUST invoke real `graphify query "<q>" --graph <cacheDir/graph.json> --budget N` at least once where <q> contains >=1 anchor EXTRACTED from the same input under test and present/resolvable in graph.json (NOT a hardcoded/irrelevant query), and MUST consume its real stdout into structural_context attributable to that exact invocation; (c) structural_context <=2000 tokens, ambiguity+advisory preserved, NO argv references --file/--format/--cache-dir. PROOF-OF-CALL: recorded argv contains [graphify,query,...] whose executable resolves to the real binary and --graph==real graph.j…
     """
     build_cache(fixture_env, real_binary)
+    # The proof-of-call contract covers the CLI path; the default is the in-process engine.
+    fixture_env["env"]["CLAUDE_GRAPHIFY_NATIVE_QUERY"] = "0"
     # Requirement mentions mod_a.py — an anchor present in the built graph.
     req = fixture_env["src"] / "req.md"
     req.write_text("Please change mod_a.py so alpha() returns 2.\n", encoding="utf-8")
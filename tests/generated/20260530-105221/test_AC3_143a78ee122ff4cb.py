@@ -21,6 +21,8 @@ def test_AC3(real_binary, fixture_env):
     THEN:  (a) resolves each modified path to bounded set of real node.id (via source_file/relative-path/label incl symbols); (b) builds focused subgraph DETERMINISTICALLY from graph.json nodes+links around those ids (primary); (c) MUST invoke real `graphify affected "<node.id>" --graph <cacheDir/graph.json> --depth N` at least once seeded with a node id that EQUALS one of the deterministic resolved_node_ids for the modified path(s) in that fixture (NOT merely any node.id in graph.json, NEVER raw paths/labels) and MUST consume its real stdout into graph_context; (d) enrichment reflects real affected output. PROOF-OF-CALL: recorded argv [graphify,affected,<resolved-node-id>] executable resolves to real…
     """
     build_cache(fixture_env, real_binary)
+    # The proof-of-call contract covers the CLI path; the default is the in-process engine.
+    fixture_env["env"]["CLAUDE_GRAPHIFY_NATIVE_QUERY"] = "0"
     write_blast_radius_map(fixture_env, ["mod_b.py"])
     ctx = fixture_env["src"] / "context.json"
     ctx.write_text('{"task_id":"t1"}', encoding="utf-8")
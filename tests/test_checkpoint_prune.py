@@ -0,0 +1,109 @@
+"""Tests for scripts/checkpoint_prune.py and the checkpoint-prune.sh wrapper."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+_SCRIPTS_DIR = Path(__file__).parent.parent / "scripts"
+if str(_SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(_SCRIPTS_DIR))
+
+import checkpoint_prune  # noqa: E402
+
+PRUNE_SH = str(_SCRIPTS_DIR / "checkpoint-prune.sh")
+
+
+def _git(repo, *args, **kw):
+    return subprocess.run(["git", *args], cwd=repo, check=True, capture_output=True,
+                          **kw).stdout.decode().strip()
+
+
+def _chain(repo, ref, n):
+    """`n` checkpoint commits on `ref`, each with its own tree, message and dates."""
+    stream = [f"reset {ref}\n"]
+    for i in range(n):
+        blob = f"{ref} {i}\n"
+        msg = f"checkpoint: {ref} #{i}\n\nTrigger: t\n"
+        stream.append(f"commit {ref}\nauthor A B <a@b> {1700000000 + i} +0200\n"
+                      f"committer C <c@d> {1700000500 + i} -0500\n"
+                      f"data {len(msg)}\n{msg}\nM 100644 inline f{i % 5}.txt\n"
+                      f"data {len(blob)}\n{blob}\n")
+    subprocess.run(["git", "fast-import", "--quiet"], cwd=repo, check=True,
+                   input="".join(stream).encode(), capture_output=True)
+
+
+def _without_parents(repo, commit):
+    raw = _git(repo, "cat-file", "commit", commit)
+    return "\n".join(line for line in raw.split("\n") if not line.startswith("parent "))
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    monkeypatch.setenv("GIT_CONFIG_GLOBAL", os.devnull)
+    monkeypatch.setenv("GIT_CONFIG_NOSYSTEM", "1")
+    _git(tmp_path, "init", "-q", "-b", "main")
+    _chain(tmp_path, "refs/checkpoints/main", 30)
+    _chain(tmp_path, "refs/checkpoints/feat-x", 8)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_keeps_newest_commits_byte_for_byte(repo, capsys):
+    old = _git(repo, "rev-list", "--max-count=10", "refs/checkpoints/main").split()
+    skipped_tip = _git(repo, "rev-parse", "refs/checkpoints/feat-x")
+    assert checkpoint_prune.main(["--retention", "10"]) == 0
+    new = _git(repo, "rev-list", "refs/checkpoints/main").split()
+    assert len(new) == 10
+    assert [_without_parents(repo, c) for c in new] == [_without_parents(repo, c) for c in old]
+    assert _git(repo, "rev-list", "--max-parents=0", "refs/checkpoints/main") == new[-1]
+    assert _git(repo, "rev-parse", "refs/checkpoints/feat-x") == skipped_tip
+    assert _git(repo, "for-each-ref", "refs/checkpoint-prune/") == ""
+    out = capsys.readouterr().out
+    assert "refs/checkpoints/main: 30 -> 10 commits" in out
+    assert "pruned=1 skipped=1 failed=0" in out
+
+
+def test_second_run_is_a_noop(repo, capsys):
+    assert checkpoint_prune.main(["--retention", "10"]) == 0
+    tip = _git(repo, "rev-parse", "refs/checkpoints/main")
+    assert checkpoint_prune.main(["--retention", "10"]) == 0
+    assert _git(repo, "rev-parse", "refs/checkpoints/main") == tip
+    assert "no pruning performed" in capsys.readouterr().out
+
+
+def test_concurrent_advance_fails_that_ref_only(repo, capsys):
+    plans = [p for p in checkpoint_prune.plan_refs(5) if p.kept]
+    assert {p.ref for p in plans} == {"refs/checkpoints/main", "refs/checkpoints/feat-x"}
+    checkpoint_prune.fast_import(plans)
+    # a writer appends a checkpoint meanwhile
+    advanced = _git(repo, "commit-tree", "-p", "refs/checkpoints/main", "-m", "late",
+                    "refs/checkpoints/main^{tree}",
+                    env=dict(os.environ, GIT_AUTHOR_NAME="a", GIT_AUTHOR_EMAIL="a@b",
+                             GIT_COMMITTER_NAME="a", GIT_COMMITTER_EMAIL="a@b"))
+    _git(repo, "update-ref", "refs/checkpoints/main", advanced)
+    failed = checkpoint_prune.apply(plans)
+    assert [p.ref for p in failed] == ["refs/checkpoints/main"]
+    assert _git(repo, "rev-parse", "refs/checkpoints/main") == advanced
+    assert _git(repo, "rev-list", "--count", "refs/checkpoints/feat-x") == "5"
+
+
+def test_dry_run_changes_nothing(repo):
+    refs = _git(repo, "for-each-ref")
+    objects = _git(repo, "count-objects", "-v")
+    proc = subprocess.run(["bash", PRUNE_SH, "--dry-run"], cwd=repo, capture_output=True,
+                          text=True, env=dict(os.environ, CHECKPOINT_RETENTION="10"))
+    assert proc.returncode == 0, proc.stderr
+    assert "refs/checkpoints/main: 30 -> 10 commits (would drop 20)" in proc.stdout
+    assert "10 commits to rewrite in ~" in proc.stdout
+    assert "reclaimable after reflog expire + gc" in proc.stdout
+    assert _git(repo, "for-each-ref") == refs
+    assert _git(repo, "count-objects", "-v") == objects
+
+
+def test_wrapper_rejects_bad_retention(repo):
+    proc = subprocess.run(["bash", PRUNE_SH], cwd=repo, capture_output=True, text=True,
+                          env=dict(os.environ, CHECKPOINT_RETENTION="0"))
+    assert proc.returncode == 2
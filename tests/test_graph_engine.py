@@ -0,0 +1,227 @@
+"""Unit tests for scripts/graph_engine.py and its use by graphify-query.py / graphify-enrich.py"""
+
+import importlib.util
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+_SCRIPTS_DIR = Path(__file__).parent.parent / "scripts"
+if str(_SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(_SCRIPTS_DIR))
+
+import graph_engine  # noqa: E402
+from graphify_lib import STATUS_DEGRADED, STATUS_OK, get_cache_dir, load_graph  # noqa: E402
+
+
+def _node(nid, label, sf):
+    return {"id": nid, "label": label, "source_file": sf}
+
+
+def _link(src, tgt, rel):
+    return {"source": src, "target": tgt, "relation": rel}
+
+
+GRAPH = {
+    "directed": True, "multigraph": False, "graph": {},
+    "nodes": [
+        _node("mod_a", "mod_a.py", "pkg/mod_a.py"),
+        _node("mod_a_alpha", "alpha()", "pkg/mod_a.py"),
+        _node("mod_b", "mod_b.py", "pkg/mod_b.py"),
+        _node("mod_b_beta", "beta()", "pkg/mod_b.py"),
+        _node("mod_c", "mod_c.py", "pkg/mod_c.py"),
+        _node("cfg", "settings", "config/.env"),
+    ],
+    "links": [
+        _link("mod_a", "mod_a_alpha", "contains"),
+        _link("mod_b", "mod_b_beta", "contains"),
+        _link("mod_b", "mod_a", "imports"),
+        _link("mod_b_beta", "mod_a_alpha", "calls"),
+        _link("mod_c", "mod_b", "imports"),
+        _link("cfg", "mod_a", "imports"),
+    ],
+}
+
+
+@pytest.fixture
+def graph_file(tmp_path):
+    path = tmp_path / "cache" / "graph.json"
+    path.parent.mkdir()
+    _write_graph(path, GRAPH)
+    return path
+
+
+def _load_script(name, filename):
+    spec = importlib.util.spec_from_file_location(name, _SCRIPTS_DIR / filename)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def _write_graph(path, graph, age=10):
+    path.write_text(json.dumps(graph), encoding="utf-8")
+    past = time.time() - age  # past the racy window so the sidecar's stat is trusted
+    os.utime(path, (past, past))
+
+
+def _index(graph_file):
+    return graph_engine.GraphIndex.from_graph(GRAPH)
+
+
+def test_compact_graph_matches_load_graph(graph_file, monkeypatch):
+    graph, status = graph_engine.open_graph(graph_file)
+    assert status == STATUS_OK and isinstance(graph, graph_engine.CompactGraph)
+    expected, _ = load_graph(graph_file)
+    assert list(graph["nodes"]) == expected["nodes"]  # cfg (config/.env) scrubbed
+    assert list(graph["links"]) == expected["links"]
+    assert graph["links"][-1] == expected["links"][-1]
+    assert graph.get("directed") is True and graph.get("graph") == {}
+    lookup = graph_engine.node_lookup(graph)
+    assert lookup["mod_b"] == {"id": "mod_b", "label": "mod_b.py", "source_file": "pkg/mod_b.py"}
+    assert "cfg" not in lookup and len(lookup) == 5
+    assert graph.index.is_sensitive(5) and graph.index.node_index("cfg") is None
+
+    monkeypatch.setenv("CLAUDE_GRAPHIFY_COMPACT_GRAPH", "0")
+    plain, _ = graph_engine.open_graph(graph_file)
+    assert plain == expected
+
+
+def test_sidecar_is_reused_restamped_and_rebuilt(graph_file, monkeypatch):
+    built = graph_engine.open_index(graph_file)
+    sidecar = graph_file.parent / graph_engine.INDEX_NAME
+    assert sidecar.exists()
+
+    def no_build(*_args):
+        raise AssertionError("unchanged graph.json must not be re-indexed")
+    monkeypatch.setattr(graph_engine, "_build", no_build)
+    cached = graph_engine.open_index(graph_file)
+    assert cached.content_hash == built.content_hash
+    assert list(cached.strings) == list(built.strings)
+    assert cached.out_link.tolist() == built.out_link.tolist()
+
+    _write_graph(graph_file, GRAPH, age=5)  # touched, same bytes: header restamp only
+    restamped = graph_engine.open_index(graph_file)
+    assert restamped.graph_mtime_ns == os.stat(graph_file).st_mtime_ns
+    assert graph_engine.open_index(graph_file).is_fresh(os.stat(graph_file))
+
+    sidecar.write_bytes(sidecar.read_bytes()[:-8])
+    with pytest.raises(ValueError):
+        graph_engine.GraphIndex(sidecar.read_bytes())
+    monkeypatch.undo()
+    assert len(graph_engine.open_index(graph_file).link_src) == 5  # truncated -> rebuilt
+
+    _write_graph(graph_file, dict(GRAPH, links=GRAPH["links"][:1]))
+    rebuilt = graph_engine.open_index(graph_file)
+    assert len(rebuilt.link_src) == 1 and rebuilt.out_link.tolist() == [0]
+
+    graph_file.write_text("not json", encoding="utf-8")
+    assert graph_engine.open_index(graph_file) is None
+    assert graph_engine.open_graph(graph_file) == ({"nodes": [], "links": []}, STATUS_DEGRADED)
+
+
+def test_query_walks_both_directions_within_budget(graph_file):
+    index = _index(graph_file)
+    [res] = index.query(["mod_a.py"], budget=2000)
+    assert res["start_node_ids"] == ["mod_a", "mod_a_alpha"]
+    assert {n["id"] for n in res["nodes"]} == {"mod_a", "mod_a_alpha", "mod_b", "mod_b_beta", "mod_c"}
+    assert {"source": "mod_c", "target": "mod_b", "relation": "imports"} in res["edges"]
+    assert not res["truncated"]
+
+    [small] = index.query(["mod_a.py"], budget=60)
+    assert small["truncated"] and small["token_estimate"] <= 60
+    assert len(small["nodes"]) < len(res["nodes"])
+
+    [fuzzy, missing] = index.query(["BETA", "nothing-here"])
+    assert fuzzy["start_node_ids"] == ["mod_b_beta"]
+    assert missing["start_node_ids"] == [] and missing["nodes"] == []
+
+
+def test_affected_follows_reverse_coupling_edges(graph_file):
+    index = _index(graph_file)
+    coupling = frozenset({"imports", "calls"})
+    [a, alpha, gone] = index.affected(["mod_a", "mod_a_alpha", "cfg"], depth=2, relations=coupling)
+    assert [(n["id"], n["depth"], n["via"]) for n in a["affected"]] == [
+        ("mod_b", 1, "mod_a"), ("mod_c", 2, "mod_b")]
+    assert [n["id"] for n in alpha["affected"]] == ["mod_b_beta"]  # `contains` not followed
+    assert gone == {"node_id": "cfg", "found": False, "affected": [], "truncated": False}
+    [one] = index.affected(["mod_a"], depth=1)
+    assert [n["id"] for n in one["affected"]] == ["mod_b"]
+    [capped] = index.affected(["mod_a"], depth=2, max_nodes=1)
+    assert capped["truncated"] and len(capped["affected"]) == 1
+
+
+def test_wrapper_lookups_are_answered_from_the_index(graph_file, monkeypatch):
+    graph, _ = graph_engine.open_graph(graph_file)
+    plain, _ = load_graph(graph_file)
+    query = _load_script("graphify_query", "graphify-query.py")
+    enrich = _load_script("graphify_enrich", "graphify-enrich.py")
+    paths = ["pkg/mod_a.py", "mod_b.py", "b.py", "repo\\pkg//mod_c.py", "settings", "missing.py"]
+    mentions = ["mod_a.py", "pkg/mod_b.py", "settings"]
+    expected = (graph_engine.resolve_paths_to_node_ids(paths, plain),
+                query._resolve_anchors_in_graph(mentions, plain),
+                query._build_import_excerpt(plain, {"mod_a.py"}),
+                enrich._build_deterministic_subgraph(plain, ["mod_a", "mod_b_beta"]))
+
+    def no_scan(_view):
+        raise AssertionError("node lookups must go through the sorted permutations")
+    monkeypatch.setattr(graph_engine._NodeView, "__iter__", no_scan)
+    monkeypatch.setattr(graph_engine._NodeLookup, "__iter__", no_scan)
+    resolved, unresolved = graph_engine.resolve_paths_to_node_ids(paths, graph)
+    assert (resolved, unresolved) == expected[0]
+    assert resolved["b.py"] == ["mod_b", "mod_b_beta"]  # bare name: basename suffix match
+    assert unresolved == ["settings", "missing.py"]  # cfg is scrubbed
+    assert query._resolve_anchors_in_graph(mentions, graph) == expected[1]
+    assert query._build_import_excerpt(graph, {"mod_a.py"}) == expected[2]
+    assert enrich._build_deterministic_subgraph(graph, ["mod_a", "mod_b_beta"]) == expected[3]
+    labels = graph_engine.node_labels(graph)
+    assert "beta()" in labels and "settings" not in labels and "" not in labels
+    assert [l["target"] for l in graph_engine.incident_links(graph, {"mod_b"})] == [
+        "mod_b_beta", "mod_a", "mod_b"]
+    assert [l["source"] for l in graph_engine.iter_links(graph, {"calls"})] == ["mod_b_beta"]
+
+
+def _run(script, args, env, cwd):
+    return subprocess.run([sys.executable, str(_SCRIPTS_DIR / script), *args], env=env,
+                          cwd=str(cwd), capture_output=True, text=True, timeout=60)
+
+
+def test_wrappers_answer_in_process(tmp_path, monkeypatch):
+    project = tmp_path / "work" / "proj"
+    project.mkdir(parents=True)
+    fake_bin = tmp_path / "graphify"
+    fake_bin.write_text("#!/bin/sh\nexit 0\n")
+    fake_bin.chmod(0o755)
+    env = dict(os.environ, CLAUDE_PROJECT_DIR=str(project), GRAPHIFY_BIN=str(fake_bin),
+               CLAUDE_GRAPHIFY_CACHE_ROOT=str(tmp_path / "cache-root"), CLAUDE_GRAPHIFY_ENABLED="1")
+    monkeypatch.setenv("CLAUDE_GRAPHIFY_CACHE_ROOT", env["CLAUDE_GRAPHIFY_CACHE_ROOT"])
+    cache_dir = get_cache_dir(project)
+    cache_dir.mkdir(parents=True)
+    (cache_dir / "graph.json").write_text(json.dumps(GRAPH), encoding="utf-8")
+
+    req = project / "req.md"
+    req.write_text("Please change mod_a.py so alpha() returns 2.\n", encoding="utf-8")
+    r = _run("graphify-query.py", ["--task-id", "t1", "--requirement-file", str(req)], env, project)
+    assert r.returncode == 0, r.stderr
+    registry = project / ".claude" / "dev-registry" / "t1" / "graphify"
+    pq = json.loads((registry / "pre_query.json").read_text())
+    [rec] = pq["structural_context"]["graphify_query_results"]
+    assert rec["engine"] == "native" and rec["query_cli_status"] == "ok"
+    assert rec["result"]["start_node_ids"] == ["mod_a", "mod_a_alpha"]
+    assert "native_graph_query" in pq["extraction_layers_used"]
+    assert (cache_dir / graph_engine.INDEX_NAME).exists()
+
+    (registry.parent / "blast-radius-map.json").write_text(
+        json.dumps({"modified_files": ["pkg/mod_a.py"]}), encoding="utf-8")
+    ctx = project / "context.json"
+    ctx.write_text('{"task_id": "t1"}', encoding="utf-8")
+    r = _run("graphify-enrich.py", ["--task-id", "t1", "--context-file", str(ctx)], env, project)
+    assert r.returncode == 0, r.stderr
+    gc = json.loads(ctx.read_text())["graph_context"]
+    assert gc["affected_cli_status"] == "ok"
+    by_seed = {rec["node_id"]: rec for rec in gc["graphify_affected_results"]}
+    assert set(by_seed) == set(gc["resolved_node_ids"])
+    assert [n["id"] for n in by_seed["mod_a"]["result"]["affected"]] == ["mod_b", "mod_c"]
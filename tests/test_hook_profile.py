@@ -0,0 +1,59 @@
+"""Unit tests for scripts/hook-profile.py"""
+
+import importlib.util
+import json
+from pathlib import Path
+
+# ---------------------------------------------------------------------------
+# Load module (filename has hyphens — cannot use normal import)
+# ---------------------------------------------------------------------------
+
+_SCRIPT = Path(__file__).parent.parent / "scripts" / "hook-profile.py"
+
+_spec = importlib.util.spec_from_file_location("hook_profile", _SCRIPT)
+_mod = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(_mod)
+
+
+def _rec(hook, ms, session="s-1", verdict="allow", spans=None):
+    return {"session": session, "event": "PreToolUse", "matcher": "Bash", "hook": hook,
+            "ms": ms, "status": 0, "verdict": verdict, "payload_bytes": 10, "spans": spans or {}}
+
+
+def _write(path, records):
+    path.write_text("".join(json.dumps(r) + "\n" for r in records))
+
+
+def test_rotated_generations_are_read_oldest_first(tmp_path):
+    sink = tmp_path / "t.jsonl"
+    _write(Path(f"{sink}.2"), [_rec("a.py", 1)])
+    _write(Path(f"{sink}.1"), [_rec("a.py", 2)])
+    sink.write_text(json.dumps(_rec("a.py", 3)) + "\n{torn")
+    assert [r["ms"] for r in _mod.load_records(str(sink))] == [1, 2, 3]
+
+
+def test_per_hook_and_per_session_aggregates():
+    records = [_rec("a.py", 10), _rec("a.py", 30, verdict="block"), _rec("b.sh", 5, session="s-2")]
+    hooks = _mod.by_hook(records)
+    assert hooks["PreToolUse:a.py"]["n"] == 2
+    assert hooks["PreToolUse:a.py"]["verdicts"] == {"allow": 1, "block": 1}
+    sessions = _mod.by_session(records)
+    assert sessions["s-1"]["total"] == 40
+    assert sessions["s-1"]["blocks"] == 1
+    assert sessions["s-1"]["slowest"] == "a.py"
+
+
+def test_folded_stacks_use_self_time():
+    spans = {"rg.evaluate": [6.0, 1], "rg.evaluate;rg.p1_launch": [4.0, 2]}
+    lines = _mod.folded(_mod.span_tree([_rec("guard.py", 10.0, spans=spans)]))
+    assert lines == ["guard.py 4000", "guard.py;rg.evaluate 2000",
+                     "guard.py;rg.evaluate;rg.p1_launch 4000"]
+
+
+def test_main_filters_and_reports_missing(tmp_path, capsys):
+    sink = tmp_path / "t.jsonl"
+    _write(sink, [_rec("a.py", 10), _rec("b.py", 5)])
+    assert _mod.main(["--file", str(sink), "--hook", "b.py"]) == 0
+    out = capsys.readouterr().out
+    assert "PreToolUse:b.py" in out and "PreToolUse:a.py" not in out
+    assert _mod.main(["--file", str(tmp_path / "missing.jsonl")]) == 1
@@ -0,0 +1,123 @@
+"""Unit tests for scripts/overnight_store.py and scripts/overnight-query.py"""
+
+import importlib.util
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+_SCRIPTS_DIR = Path(__file__).parent.parent / "scripts"
+if str(_SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(_SCRIPTS_DIR))
+
+import overnight_store  # noqa: E402
+
+_spec = importlib.util.spec_from_file_location("overnight_query", _SCRIPTS_DIR / "overnight-query.py")
+_mod = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(_mod)
+
+
+def _trace(sid, role, ms, ts, cycle=1, tokens=10):
+    return {"session_id": sid, "cycle_id": cycle, "role": role, "agent_type": role,
+            "duration_ms": ms, "end_ts": ts, "estimated_tokens": tokens, "retry_count": 0,
+            "exit_status": "success", "step": "8"}
+
+
+def _append(path, *records, raw=""):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        f.write("".join(json.dumps(r) + "\n" for r in records) + raw)
+
+
+def _settle(*paths):
+    """Age mtimes past the racy window so unchanged files are skipped."""
+    past = time.time() - 10
+    for p in paths:
+        os.utime(p, (past, past))
+
+
+def _paths(tmp_path):
+    return {"project_dir": str(tmp_path), "db": str(tmp_path / "store.sqlite"),
+            "yield_log": str(tmp_path / "yield.jsonl"),
+            "lifecycle": str(tmp_path / "lifecycle.jsonl"),
+            "audit": str(tmp_path / "audit.jsonl")}
+
+
+def _cycle(tmp_path, sid, cycle=1):
+    return tmp_path / "docs" / "dev" / "overnight" / sid / f"cycle-{cycle}"
+
+
+def test_ingest_is_incremental_and_tracks_rewrites(tmp_path):
+    paths = _paths(tmp_path)
+    trace = _cycle(tmp_path, "s1") / "trace.jsonl"
+    _append(trace, _trace("s1", "dev", 100, "2026-01-01T01:00:00Z"), raw='{"torn": ')
+    conn = overnight_store.connect(paths["db"])
+    assert overnight_store.ingest(conn, paths) == {"trace": 1}
+    _append(trace, {}, raw="\n")  # completes the torn line (malformed: skipped)
+    _append(trace, _trace("s1", "qa", 50, "2026-01-01T02:00:00Z"))
+    _settle(trace)
+    assert overnight_store.ingest(conn, paths) == {"trace": 1}
+    assert overnight_store.ingest(conn, paths) == {}
+    assert conn.execute("SELECT COUNT(*) FROM trace").fetchone()[0] == 2
+
+    trace.write_text(json.dumps(_trace("s1", "ba", 1, "2026-01-01T03:00:00Z")) + "\n")
+    assert overnight_store.ingest(conn, paths) == {"trace": 1}
+    assert [r[0] for r in conn.execute("SELECT role FROM trace")] == ["ba"]
+
+    trace.unlink()
+    overnight_store.ingest(conn, paths)
+    assert conn.execute("SELECT COUNT(*) FROM trace").fetchone()[0] == 0
+    assert conn.execute("SELECT COUNT(*) FROM sources").fetchone()[0] == 0
+
+
+def test_harness_reports_are_reloaded_when_changed(tmp_path):
+    paths = _paths(tmp_path)
+    report = _cycle(tmp_path, "s1") / "harness-report.json"
+    report.parent.mkdir(parents=True)
+    report.write_text(json.dumps({"session_id": "s1", "cycle_id": 1, "status": "computed",
+                                  "metrics": {"role_compliance_rate": 0.5}}))
+    conn = overnight_store.connect(paths["db"])
+    overnight_store.ingest(conn, paths)
+    report.write_text(json.dumps({"session_id": "s1", "cycle_id": 1, "status": "computed",
+                                  "metrics": {"role_compliance_rate": 0.75}}))
+    overnight_store.ingest(conn, paths)
+    assert _mod.report_compliance(conn)[0]["role_compliance_rate"] == 0.75
+
+
+def test_role_latency_and_last_n_sessions(tmp_path):
+    paths = _paths(tmp_path)
+    old = [_trace("s-old", "dev", 9000, "2026-01-01T00:00:00Z")]
+    new = [_trace("s-new", "dev", ms, "2026-02-01T00:00:00Z", tokens=1) for ms in range(1, 21)]
+    _append(_cycle(tmp_path, "s-old") / "trace.jsonl", *old)
+    _append(_cycle(tmp_path, "s-new") / "trace.jsonl", *new)
+    conn = overnight_store.connect(paths["db"])
+    overnight_store.ingest(conn, paths)
+    (dev,) = _mod.report_roles(conn)
+    assert (dev["calls"], dev["max_ms"]) == (21, 9000)
+    (dev,) = _mod.report_roles(conn, last=1)
+    assert (dev["calls"], dev["p50_ms"], dev["p95_ms"], dev["tokens"]) == (20, 11, 19, 20)
+    assert [n["session_id"] for n in _mod.report_nights(conn)] == ["s-new", "s-old"]
+
+
+def test_main_reports_yield_scores_and_sql(tmp_path, capsys):
+    paths = _paths(tmp_path)
+    _append(Path(paths["yield_log"]),
+            {"specialist_type": "qa", "session_id": "s1", "classification": "useful",
+             "action": "active"},
+            {"specialist_type": "qa", "session_id": "s1", "classification": "empty",
+             "action": "active"})
+    _append(Path(paths["lifecycle"]),
+            {"ts": "2026-01-01T00:00:00Z", "agent": "dev", "event": "e", "new_score": 50},
+            {"ts": "2026-01-02T00:00:00Z", "agent": "dev", "event": "e", "new_score": 55})
+    argv = ["--project-dir", str(tmp_path), "--db", paths["db"], "--yield-log", paths["yield_log"],
+            "--lifecycle-file", paths["lifecycle"], "--audit-file", paths["audit"]]
+    assert _mod.main(["yield", "--json", *argv]) == 0
+    (row,) = json.loads(capsys.readouterr().out)
+    assert row["classification"] == {"useful": 1, "empty": 1}
+    assert _mod.main(["scores", *argv]) == 0
+    assert "55" in capsys.readouterr().out
+    assert _mod.main(["sql", "SELECT COUNT(*) AS n FROM yield", "--json", *argv]) == 0
+    assert json.loads(capsys.readouterr().out) == [{"n": 2}]
+    assert _mod.main(["sql", "DELETE FROM yield", *argv]) == 2
+    assert _mod.main(["grants", *argv]) == 1
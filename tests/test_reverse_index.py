@@ -0,0 +1,106 @@
+"""Unit tests for scripts/reverse_index.py and its use by scripts/blast-radius-tool.py"""
+
+import importlib.util
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+_SCRIPTS_DIR = Path(__file__).parent.parent / "scripts"
+if str(_SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(_SCRIPTS_DIR))
+
+import reverse_index  # noqa: E402
+
+_spec = importlib.util.spec_from_file_location("blast_radius_tool", _SCRIPTS_DIR / "blast-radius-tool.py")
+_mod = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(_mod)
+
+
+def _git(repo, *args):
+    subprocess.run(["git", *args], cwd=repo, check=True, capture_output=True)
+
+
+def _write(repo, rel, text):
+    path = repo / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    past = time.time() - 10  # past the racy window so the entry is trusted
+    os.utime(path, (past, past))
+    return path
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    monkeypatch.setenv("CLAUDE_GRAPHIFY_CACHE_ROOT", str(tmp_path / "cache"))
+    root = tmp_path / "work" / "repo"
+    root.mkdir(parents=True)
+    _git(root, "init", "-q")
+    _git(root, "config", "user.email", "t@example.com")
+    _git(root, "config", "user.name", "t")
+    _write(root, "lib/util.py", "def helper():\n    return 1\n")
+    _write(root, "app.py", "from lib.util import helper\n")
+    _write(root, "rel/__init__.py", "from . import util\n")
+    _write(root, "docs/notes.md", "See util.py and myutil.py.\n")
+    _write(root, "other.py", "import pkgutil\nx = 'util'\n")
+    _write(root, "tests/test_util.py", "import lib.util\n")
+    _write(root, "tests/test_mod.py", "# patches lib.util.helper\n")
+    _write(root, ".gitignore", "build/\n")
+    _write(root, "build/out.txt", "util.py\n")
+    _git(root, "add", "-A")
+    _git(root, "commit", "-q", "-m", "init")
+    return root
+
+
+def _open(root):
+    return reverse_index.ReverseIndex.open(root, _mod.in_scope)
+
+
+def test_lookups_match_import_and_name_references(repo):
+    index = _open(repo)
+    assert index.path is not None and index.path.exists()
+    assert _mod.find_callers_via_grep(repo, "util.py", index) == [
+        "app.py", "docs/notes.md", "rel/__init__.py", "tests/test_util.py"]
+    assert _mod.find_dependent_tests(repo, "lib/util.py", index) == [
+        "tests/test_mod.py", "tests/test_util.py"]
+
+
+def test_reopen_rescans_only_changed_files(repo):
+    _open(repo)
+    index = _open(repo)
+    assert index.rescanned == 0
+    _write(repo, "docs/notes.md", "Nothing here.\n")
+    _write(repo, "new.py", "import util\n")
+    index = _open(repo)
+    assert index.rescanned == 2
+    assert index.referencing("util.py") == set()
+    assert index.referencing("py:util") == {"app.py", "new.py", "rel/__init__.py", "tests/test_util.py"}
+
+    _git(repo, "add", "-A")
+    _git(repo, "commit", "-q", "-m", "more")
+    (repo / "app.py").unlink()
+    index = _open(repo)
+    assert "app.py" not in index.files
+    assert index.rescanned == 0
+
+
+def test_racy_files_are_rescanned(repo):
+    _open(repo)
+    (repo / "docs/notes.md").write_text("util.py again\n")
+    index = _open(repo)
+    assert index.files["docs/notes.md"][0] == -1
+    index = _open(repo)
+    assert index.rescanned == 1
+
+
+def test_report_falls_back_to_grep_when_disabled(repo, monkeypatch):
+    with_index = _mod.build_report(repo, ["lib/util.py"], "1", "t")
+    monkeypatch.setenv("CLAUDE_BLAST_RADIUS_INDEX", "0")
+    with_grep = _mod.build_report(repo, ["lib/util.py"], "1", "t")
+    callers = {e["to"] for e in with_index["edges"] if e["edge_type"] == "textual_reference"}
+    assert callers == {"app.py", "docs/notes.md", "rel/__init__.py", "tests/test_util.py"}
+    grep_callers = {e["to"] for e in with_grep["edges"] if e["edge_type"] == "textual_reference"}
+    assert callers - {"rel/__init__.py"} <= grep_callers
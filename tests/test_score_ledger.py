@@ -0,0 +1,133 @@
+"""Unit tests for scripts/score_ledger.py (indexed lifecycle score log)."""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+_SCRIPTS_DIR = Path(__file__).parent.parent / "scripts"
+if str(_SCRIPTS_DIR) not in sys.path:
+    sys.path.insert(0, str(_SCRIPTS_DIR))
+
+import score_ledger  # noqa: E402
+
+
+def _row(agent, ts, new_score, delta=0, event="qa_reject_dev"):
+    return {"ts": ts, "agent": agent, "event": event, "prev_score": 50,
+            "new_score": new_score, "delta": delta, "unclamped_score": new_score,
+            "actor": "orchestrator", "reason": ""}
+
+
+def _append(log, *rows, raw=""):
+    with open(log, "a", encoding="utf-8") as f:
+        f.write("".join(json.dumps(r) + "\n" for r in rows) + raw)
+
+
+def _full_scan(log, agent):
+    """The pre-index semantics: latest new_score and last 3 behavioral events."""
+    score, recent = None, []
+    for line in Path(log).read_text().splitlines():
+        if line.strip():
+            entry = json.loads(line)
+            if entry["agent"] == agent:
+                score = int(entry["new_score"])
+                if entry["event"] != "score_baseline_import":
+                    recent.append(entry)
+    return score, recent[-3:]
+
+
+@pytest.fixture
+def log(tmp_path):
+    path = tmp_path / "lifecycle.jsonl"
+    path.touch()
+    return str(path)
+
+
+def test_index_matches_full_scan(log):
+    _append(log, _row("dev", "t0", 50, event="score_baseline_import"),
+            *[_row("dev", f"t{i}", 50 - i, -1) for i in range(1, 6)], _row("qa", "t1", 40))
+    ledger = score_ledger.open_ledger(log, undo=True)
+    rec = ledger.agent("dev")
+    assert (rec["score"], rec["recent"]) == _full_scan(log, "dev")
+    assert rec["bad"] is None
+    assert ledger.agent("ba") is None
+    assert ledger.undo_target("dev", "t3") == {"count": 1, "delta": -1, "line": 4}
+    assert ledger.undo_target("qa", "t9") is None
+    _append(log, _row("dev", "t3", 30))
+    ledger.refresh()
+    assert ledger.undo_target("dev", "t3")["count"] == 2
+
+
+def test_reopen_replays_only_the_tail(log):
+    _append(log, *[_row("dev", f"t{i}", i) for i in range(50)])
+    score_ledger.open_ledger(log)  # no snapshot yet: indexes and saves one
+    assert Path(log + ".idx").exists()
+    _append(log, _row("dev", "late", 7))
+    ledger = score_ledger.open_ledger(log)
+    scores = ledger.indexes[0]
+    assert scores.loaded
+    assert scores.tail == len(json.dumps(_row("dev", "late", 7))) + 1
+    assert ledger.agent("dev")["score"] == 7
+
+
+def test_save_after_append_leaves_no_tail(log):
+    _append(log, _row("dev", "t1", 49))
+    ledger = score_ledger.open_ledger(log)
+    _append(log, _row("dev", "t2", 48))
+    ledger.refresh(save=True)
+    doc = json.loads(Path(log + ".idx").read_text())
+    assert doc["offset"] == os.path.getsize(log)
+    assert doc["records"]["dev"]["score"] == 48
+
+
+def test_torn_final_line_is_skipped_until_it_is_not_final(log):
+    _append(log, _row("dev", "t1", 45), raw='{"agent": "dev", "new_sc\n')
+    assert score_ledger.open_ledger(log).agent("dev")["score"] == 45
+    _append(log, _row("dev", "t2", 44))
+    with pytest.raises(score_ledger.LedgerCorrupt) as exc:
+        score_ledger.open_ledger(log)
+    assert exc.value.line == 2
+
+
+def test_unterminated_final_line_is_read_but_not_snapshotted(log):
+    _append(log, _row("dev", "t1", 45), raw=json.dumps(_row("dev", "t2", 44)))
+    ledger = score_ledger.open_ledger(log, undo=True)
+    assert ledger.agent("dev")["score"] == 44
+    assert ledger.undo_target("dev", "t2")["line"] == 2
+    ledger.refresh(save=True)
+    assert json.loads(Path(log + ".idx").read_text())["records"]["dev"]["score"] == 45
+
+
+def test_non_numeric_score_is_sticky(log):
+    _append(log, _row("dev", "t1", "high"), _row("dev", "t2", 40))
+    assert score_ledger.open_ledger(log).agent("dev")["bad"] == 1
+
+
+def test_rewritten_log_is_reindexed(log):
+    _append(log, _row("dev", "t1", 45), _row("dev", "t2", 44))
+    score_ledger.open_ledger(log)
+    # same inode, same length, different bytes just before the snapshot offset
+    text = Path(log).read_text()
+    with open(log, "r+", encoding="utf-8") as f:
+        f.write(text[:-40] + text[-40:].replace("orchestrator", "orchestrat0r"))
+    assert score_ledger.open_ledger(log).agent("dev")["recent"][-1]["actor"] == "orchestrat0r"
+
+
+def test_unreadable_snapshot_is_rebuilt(log):
+    _append(log, _row("dev", "t1", 45))
+    Path(log + ".idx").write_text("{torn")
+    ledger = score_ledger.open_ledger(log)
+    assert ledger.agent("dev")["score"] == 45
+    assert json.loads(Path(log + ".idx").read_text())["records"]["dev"]["score"] == 45
+
+
+def test_rebuild_command(log, capsys):
+    _append(log, _row("dev", "t1", 45), _row("qa", "t1", 41))
+    Path(log + ".idx").write_text(json.dumps({"bogus": True}))
+    assert score_ledger.main(["rebuild", "--lifecycle-file", log]) == 0
+    assert "2 lines, 2 agents" in capsys.readouterr().out
+    assert json.loads(Path(log + ".undo.idx").read_text())["records"]["qa\0t1"]["count"] == 1
+    _append(log, raw="not json\n" + json.dumps(_row("qa", "t2", 1)) + "\n")
+    assert score_ledger.main(["compact", "--lifecycle-file", log]) == 2
@@ -13,6 +13,7 @@ import os
 import sys
 import tempfile
 import unittest
+import unittest.mock
 from pathlib import Path
 
 HOOKS_DIR = "/root/.claude/hooks"
@@ -120,5 +121,43 @@ class SpecialistYieldTest(unittest.TestCase):
         self.assertEqual(result["source_records"], [])
 
 
+    def test_ring_sidecar_serves_history_without_full_scan(self) -> None:
+        """record_yield keeps a per-specialist ring; reads never rescan the log."""
+        _seed_log(self._log_path, [])
+        for i in range(40):
+            specialist = "architect" if i % 2 else "user"
+            specialist_yield.record_yield(
+                f"/tmp/r-{i}.json", specialist, "sess-test", i, "low_yield", "active"
+            )
+        full = specialist_yield._filter_history(
+            specialist_yield._read_log_lines(), "architect", 5
+        )
+        self.assertTrue(specialist_yield._ring_path(self._log_path).exists())
+        with unittest.mock.patch.object(
+            specialist_yield, "_read_log_lines", side_effect=AssertionError("full scan")
+        ):
+            result = specialist_yield.get_degradation_state("architect")
+        self.assertEqual(result["source_records"], full)
+        self.assertEqual(result["state"], "degraded")
+
+    def test_ring_follows_external_appends_and_rewrites(self) -> None:
+        """Appends past the ring are folded; a rewritten log invalidates it."""
+        _seed_log(self._log_path, [])
+        specialist_yield.record_yield("/tmp/r.json", "architect", "s", 1, "low_yield", "active")
+        with self._log_path.open("a", encoding="utf-8") as fh:
+            fh.write(json.dumps(_make_record("architect", "low_yield", 2)) + "\n")
+            fh.write(json.dumps(_make_record("architect", "low_yield", 3)))  # no newline yet
+        self.assertEqual(specialist_yield.get_degradation_state("architect")["state"], "degraded")
+        _seed_log(self._log_path, [_make_record("architect", "productive", 9)])
+        result = specialist_yield.get_degradation_state("architect")
+        self.assertEqual([r["cycle_id"] for r in result["source_records"]], [9])
+
+    def test_window_larger_than_ring_falls_back_to_full_scan(self) -> None:
+        records = [_make_record("architect", "clean_sweep", i) for i in range(1, 41)]
+        _seed_log(self._log_path, records)
+        history = specialist_yield._read_history("architect", 40)
+        self.assertEqual(len(history), 40)
+
+
 if __name__ == "__main__":
     unittest.main()